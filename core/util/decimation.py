@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+This file contains a peak preserving (min/max) decimation of continuously running data traces for
+display purposes.
+
+Qudi is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Qudi. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
+top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
+"""
+
+import numpy as np
+from core.util.ringbuffer import RingBuffer
+
+
+def decimation_factor(size, max_points):
+    """ Smallest power of two decimation factor that reduces a trace to at most max_points points
+    (two points per bucket, see MinMaxDecimator).
+
+    @param int size: number of samples in the trace
+    @param int max_points: maximum number of points to display
+
+    @return int: decimation factor, 1 if the trace does not need to be decimated
+    """
+    size = int(size)
+    max_points = max(int(max_points), 2)
+    if size <= max_points:
+        return 1
+    return int(2 ** np.ceil(np.log2(2 * size / max_points)))
+
+
+class MinMaxDecimator:
+    """
+    Peak preserving decimation of a continuously running trace (e.g. a RingBuffer) for display.
+
+    The trace is divided into buckets of factor samples and every bucket is represented by its
+    minimum and its maximum, so single outliers and spikes remain visible, unlike with subsampling.
+    The buckets are aligned to the total number of appended samples, hence the minima and maxima of
+    a completed bucket never change. They are kept in ring buffers and only the new samples have to
+    be reduced, i.e. the cost of appending is O(new samples) and the cost of getting the decimated
+    trace is O(size / factor), independent of the number of samples in the trace.
+
+    The decimated trace covers the newest size samples. The bucket that is only partly inside of
+    the trace at the old end is left out, the bucket at the new end that is not completed yet is
+    represented by the min/max of the samples appended to it so far.
+    """
+
+    def __init__(self, size, factor, channels, fill_value=0):
+        """
+        @param int size: number of samples in the (not decimated) trace per channel
+        @param int factor: number of samples per bucket
+        @param int channels: number of channels
+        @param fill_value: optional, initial value of all samples (default: 0)
+        """
+        if factor < 1:
+            raise ValueError('MinMaxDecimator factor must be integer value >= 1.')
+        if size < factor:
+            raise ValueError('MinMaxDecimator size must not be smaller than the factor.')
+        self._size = int(size)
+        self._factor = int(factor)
+        self._channels = int(channels)
+        number_of_buckets = self._size // self._factor + 1
+        self._minima = RingBuffer(size=number_of_buckets, channels=self._channels,
+                                  fill_value=fill_value)
+        self._maxima = RingBuffer(size=number_of_buckets, channels=self._channels,
+                                  fill_value=fill_value)
+        # samples of the bucket that is not completed yet
+        self._pending = np.empty((self._channels, self._factor), dtype=np.float64)
+        self._pending_samples = 0
+        # total number of appended samples (the initial trace spans the samples -size to -1)
+        self._samples = 0
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def factor(self):
+        return self._factor
+
+    @property
+    def channels(self):
+        return self._channels
+
+    def append(self, data):
+        """ Append new samples to the trace.
+
+        @param numpy.ndarray data: samples to append with shape (channels, samples)
+        """
+        data = np.asarray(data)
+        new_samples = data.shape[-1]
+        if new_samples == 0:
+            return
+        factor = self._factor
+        position = 0
+
+        # Complete the pending bucket first
+        if self._pending_samples > 0:
+            position = min(factor - self._pending_samples, new_samples)
+            self._pending[:, self._pending_samples:self._pending_samples + position] = \
+                data[:, :position]
+            self._pending_samples += position
+            if self._pending_samples == factor:
+                self._minima.append(self._pending.min(axis=1))
+                self._maxima.append(self._pending.max(axis=1))
+                self._pending_samples = 0
+
+        # Reduce all complete buckets at once
+        buckets = (new_samples - position) // factor
+        if buckets > 0:
+            # Only the buckets that still fit into the ring buffers are needed
+            skip = max(buckets - self._minima.size, 0)
+            blocks = data[:, position + skip * factor:position + buckets * factor].reshape(
+                (self._channels, buckets - skip, factor))
+            self._minima.append(blocks.min(axis=2))
+            self._maxima.append(blocks.max(axis=2))
+            position += buckets * factor
+
+        # Keep the remaining samples for the next bucket
+        if position < new_samples:
+            self._pending_samples = new_samples - position
+            self._pending[:, :self._pending_samples] = data[:, position:]
+        self._samples += new_samples
+
+    def decimated(self):
+        """ The decimated trace with two points (minimum and maximum) per bucket.
+
+        @return numpy.ndarray, numpy.ndarray: (fractional) sample indices of the points relative to
+                                              the oldest sample of the trace, and the values of the
+                                              points with shape (channels, points). Both are copies.
+        """
+        factor = self._factor
+        completed = self._samples // factor
+        # first bucket that lies completely inside of the trace
+        first = -((self._size - self._samples) // factor)
+        buckets = completed - first
+        start = self._minima.size - buckets
+
+        centers = np.arange(first, completed) * factor + (factor - 1) / 2
+        minima = self._minima.data[:, start:]
+        maxima = self._maxima.data[:, start:]
+        if self._pending_samples > 0:
+            pending = self._pending[:, :self._pending_samples]
+            centers = np.append(centers, completed * factor + (self._pending_samples - 1) / 2)
+            minima = np.column_stack((minima, pending.min(axis=1)))
+            maxima = np.column_stack((maxima, pending.max(axis=1)))
+
+        values = np.empty((self._channels, 2 * centers.size), dtype=np.float64)
+        values[:, 0::2] = minima
+        values[:, 1::2] = maxima
+        indices = np.repeat(centers - (self._samples - self._size), 2)
+        return indices, values
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+This file contains a Kalman filter based estimation and prediction of slow sample drift from a
+history of measured positions (e.g. the ROI position history of the POI manager).
+
+Qudi is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Qudi. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
+top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
+"""
+
+import numpy as np
+
+
+class DriftEstimator:
+    """
+    Constant velocity Kalman filter for every axis of a position that drifts slowly.
+
+    The state of every axis is position and drift velocity. The velocity performs a random walk
+    (white noise acceleration with spectral density process_noise), so a slowly changing drift
+    (e.g. thermal drift after a temperature change) is followed, while the noise of the single
+    position measurements (measurement_noise) is averaged out.
+
+    The innovation (measured minus predicted position) of the last measurement is kept as
+    residual. It tells how good the prediction was and can be used to adapt how often the position
+    has to be measured.
+    """
+
+    def __init__(self, dimensions=3, measurement_noise=10e-9, process_noise=1e-22,
+                 initial_velocity=100e-9):
+        """
+        @param int dimensions: optional, number of position axes (default: 3)
+        @param float measurement_noise: optional, standard deviation of a position measurement
+        @param float process_noise: optional, spectral density of the drift velocity change
+                                    (unit: position^2 / time^3)
+        @param float initial_velocity: optional, standard deviation of the drift velocity before
+                                       the first measurements (unit: position / time)
+        """
+        self._dimensions = int(dimensions)
+        self._measurement_variance = float(measurement_noise) ** 2
+        self._process_noise = float(process_noise)
+        self._initial_velocity_variance = float(initial_velocity) ** 2
+        self.reset()
+
+    @property
+    def measurements(self):
+        """ Number of measurements the estimate is based on. """
+        return self._measurements
+
+    @property
+    def residual(self):
+        """ Measured minus predicted position of the last measurement (None before the second
+        measurement). """
+        return None if self._residual is None else self._residual.copy()
+
+    @property
+    def velocity(self):
+        """ Estimated drift velocity of every axis. """
+        return self._state[:, 1].copy()
+
+    def reset(self):
+        """ Forget all measurements. """
+        # state and covariance for every axis: [position, velocity]
+        self._state = np.zeros((self._dimensions, 2))
+        self._covariance = np.zeros((self._dimensions, 2, 2))
+        self._time = None
+        self._measurements = 0
+        self._residual = None
+
+    def update(self, time, position):
+        """ Add a position measurement.
+
+        @param float time: time of the measurement (must not be before the last measurement)
+        @param float[] position: measured position with one entry per axis
+
+        @return numpy.ndarray: residual (measured minus predicted position), None for the first
+                               measurement
+        """
+        position = np.asarray(position, dtype=float)
+        if position.shape != (self._dimensions,):
+            raise ValueError('Position for drift estimation must have {0:d} entries.'
+                             ''.format(self._dimensions))
+        if self._time is None:
+            self._state[:, 0] = position
+            self._state[:, 1] = 0
+            self._covariance[:] = np.diag((self._measurement_variance,
+                                           self._initial_velocity_variance))
+            self._time = float(time)
+            self._measurements = 1
+            return None
+
+        state, covariance = self._propagate(max(float(time) - self._time, 0))
+        innovation = position - state[:, 0]
+        # Kalman gain for the measurement of the position only
+        innovation_variance = covariance[:, 0, 0] + self._measurement_variance
+        gain = covariance[:, :, 0] / innovation_variance[:, np.newaxis]
+        self._state = state + gain * innovation[:, np.newaxis]
+        self._covariance = covariance - gain[:, :, np.newaxis] * covariance[:, np.newaxis, 0, :]
+        self._time = max(float(time), self._time)
+        self._measurements += 1
+        self._residual = innovation
+        return innovation.copy()
+
+    def update_from_history(self, history):
+        """ Estimate the drift anew from a history of measurements.
+
+        @param history: iterable of measurements (time, position axis 0, position axis 1, ...)
+        """
+        self.reset()
+        for entry in history:
+            self.update(entry[0], entry[1:])
+
+    def predict(self, time):
+        """ Predict the position at a given time.
+
+        @param float time: time of the prediction
+
+        @return tuple(numpy.ndarray, numpy.ndarray): predicted position and its standard deviation
+                                                     for every axis. None, None without
+                                                     measurements.
+        """
+        if self._time is None:
+            return None, None
+        state, covariance = self._propagate(max(float(time) - self._time, 0))
+        return state[:, 0], np.sqrt(covariance[:, 0, 0])
+
+    def _propagate(self, dt):
+        transition = np.array(((1, dt), (0, 1)))
+        noise = self._process_noise * np.array(((dt ** 3 / 3, dt ** 2 / 2), (dt ** 2 / 2, dt)))
+        state = self._state @ transition.T
+        covariance = transition @ self._covariance @ transition.T + noise
+        return state, covariance
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+This file contains incrementally updated intensity histograms to determine percentile based colour
+scales of images that are acquired line by line.
+
+Qudi is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Qudi. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
+top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
+"""
+
+import numpy as np
+
+
+class IncrementalHistogram:
+    """
+    Histogram of values that can be added and removed, to answer percentile queries in O(bins)
+    instead of sorting all values (np.percentile) for every query.
+
+    The bins have a width of a power of two and the histogram range starts at a multiple of the
+    bin width. If added values do not fit into the range, the bin width is doubled (as often as
+    needed) and the old bins are merged exactly into the new ones. Hence a value that has been
+    added can always be removed again. The range is only fitted anew once the histogram is empty.
+
+    Percentiles are interpolated linearly inside of a bin instead of between the two neighbouring
+    values as np.percentile does. The deviation from np.percentile is therefore bounded by one bin
+    width (about the range of the values divided by the number of bins) plus the gap between these
+    two values, which can be many bin widths for sparse values. Non-finite values are ignored and
+    if ignore_zeros is True zeros (typically the unfinished part of an image) as well.
+    """
+
+    def __init__(self, bins=65536, ignore_zeros=True):
+        """
+        @param int bins: optional, number of histogram bins (default: 65536)
+        @param bool ignore_zeros: optional, do not count values equal to zero (default: True)
+        """
+        if bins < 2:
+            raise ValueError('IncrementalHistogram needs at least 2 bins.')
+        self._bins = int(bins)
+        self._ignore_zeros = bool(ignore_zeros)
+        self._counts = np.zeros(self._bins, dtype=np.int64)
+        self._start = 0.0
+        self._width = 0.0
+        self._count = 0
+        # smallest and largest value added since the histogram has been empty
+        self._minimum = np.inf
+        self._maximum = -np.inf
+
+    @property
+    def count(self):
+        """ Number of counted values. """
+        return self._count
+
+    @property
+    def bins(self):
+        return self._bins
+
+    @property
+    def bin_width(self):
+        return self._width
+
+    def clear(self):
+        """ Remove all values. """
+        self._counts[:] = 0
+        self._count = 0
+
+    def add(self, values):
+        """ Add values to the histogram.
+
+        @param values: scalar or array of values to add
+        """
+        values = self._valid_values(values)
+        if values.size == 0:
+            return
+        minimum, maximum = values.min(), values.max()
+        self._fit_range(minimum, maximum)
+        self._minimum = min(self._minimum, minimum)
+        self._maximum = max(self._maximum, maximum)
+        self._add_to_bins(self._bin_indices(values), 1)
+        self._count += values.size
+
+    def remove(self, values):
+        """ Remove values that have been added before from the histogram.
+
+        @param values: scalar or array of values to remove
+        """
+        values = self._valid_values(values)
+        if values.size == 0 or self._count == 0:
+            return
+        self._add_to_bins(self._bin_indices(values), -1)
+        self._count -= values.size
+
+    def percentile(self, q):
+        """ Percentile(s) of the counted values like np.percentile (linear interpolation).
+
+        @param q: float or sequence of floats, percentile(s) in the range [0, 100]
+
+        @return: float or numpy.ndarray with the percentile value(s), NaN if the histogram is empty
+        """
+        q = np.asarray(q, dtype=np.float64)
+        if self._count == 0:
+            return np.full(q.shape, np.nan)[()]
+        cumsum = np.cumsum(self._counts)
+        rank = np.clip(q, 0, 100) / 100 * (self._count - 1)
+        index = np.searchsorted(cumsum, rank, side='right')
+        in_bin = self._counts[index]
+        position = (rank - (cumsum[index] - in_bin) + 0.5) / in_bin
+        values = self._start + (index + position) * self._width
+        return np.clip(values, self._minimum, self._maximum)[()]
+
+    def _valid_values(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        if self._ignore_zeros:
+            return values[np.isfinite(values) & (values != 0)]
+        return values[np.isfinite(values)]
+
+    def _bin_indices(self, values):
+        indices = np.floor((values - self._start) / self._width).astype(np.intp)
+        return np.clip(indices, 0, self._bins - 1, out=indices)
+
+    def _add_to_bins(self, indices, sign):
+        # bincount only over the occupied part of the bins
+        first = indices.min()
+        counts = np.bincount(indices - first)
+        if sign < 0:
+            self._counts[first:first + counts.size] -= counts
+        else:
+            self._counts[first:first + counts.size] += counts
+
+    def _fit_range(self, minimum, maximum):
+        if self._count == 0:
+            span = maximum - minimum
+            if span <= 0:
+                span = abs(maximum) * 2 ** -20 if maximum != 0 else 1.0
+            self._width = 2.0 ** np.ceil(np.log2(span / self._bins))
+            self._start = np.floor(minimum / self._width) * self._width
+            while self._start + self._bins * self._width <= maximum:
+                self._width *= 2
+                self._start = np.floor(minimum / self._width) * self._width
+            self._counts[:] = 0
+            self._minimum = np.inf
+            self._maximum = -np.inf
+            return
+
+        stop = self._start + self._bins * self._width
+        if minimum >= self._start and maximum < stop:
+            return
+        minimum = min(minimum, self._start)
+        maximum = max(maximum, stop - self._width)
+        factor = 1
+        start = self._start
+        while True:
+            factor *= 2
+            start = np.floor(minimum / (self._width * factor)) * (self._width * factor)
+            if start + self._bins * self._width * factor > maximum:
+                break
+        # merge the old bins into the wider new bins (both start at a multiple of the old width)
+        offset = int(round((self._start - start) / self._width))
+        new_indices = (offset + np.arange(self._bins)) // factor
+        self._counts = np.bincount(new_indices, weights=self._counts,
+                                   minlength=self._bins).astype(np.int64)
+        self._start = start
+        self._width *= factor
+
+
+class ImageHistogram(IncrementalHistogram):
+    """
+    IncrementalHistogram of a 2D image that is updated line by line.
+
+    A copy of the counted lines is kept, so that a line can be replaced by removing its old values
+    and adding the new ones. Updating a line costs O(line length) independent of the image size.
+    """
+
+    def __init__(self, bins=65536, ignore_zeros=True):
+        """
+        @param int bins: optional, number of histogram bins (default: 65536)
+        @param bool ignore_zeros: optional, do not count values equal to zero (default: True)
+        """
+        super().__init__(bins=bins, ignore_zeros=ignore_zeros)
+        self._lines = None
+
+    @property
+    def is_valid(self):
+        """ Whether an image has been counted since the last call of clear. """
+        return self._lines is not None
+
+    def clear(self):
+        """ Remove all values. The next update counts the whole image. """
+        super().clear()
+        self._lines = None
+
+    def set_image(self, image):
+        """ Count a whole image (replacing everything counted before).
+
+        @param numpy.ndarray image: 2D image, the first axis is the line index
+        """
+        image = np.asarray(image)
+        super().clear()
+        self._lines = [np.array(line, dtype=np.float64) for line in image]
+        self.add(image)
+
+    def update_lines(self, image, lines=None):
+        """ Count the changed lines of an image. If the image shape has changed, no image has been
+        counted yet or lines is None, the whole image is counted.
+
+        @param numpy.ndarray image: 2D image, the first axis is the line index
+        @param lines: optional, iterable with the indices of the lines that (may) have changed
+        """
+        image = np.asarray(image)
+        if lines is None or not self._fits_image(image):
+            self.set_image(image)
+            return
+        for index in lines:
+            self._replace_line(index, image[index])
+
+    def push_lines(self, image):
+        """ Count an image whose lines are ordered from newest to oldest line (like a waterfall
+        plot), after new lines have been inserted at the beginning and the oldest lines have been
+        dropped from the end.
+
+        The number of new lines is found by searching the newest counted line in the image. Only
+        the new and the dropped lines are counted, so the cost only depends on the number of new
+        lines. If the counted lines are not found in the image, the whole image is counted.
+
+        @param numpy.ndarray image: 2D image, the first axis is the line index (newest first)
+        """
+        image = np.asarray(image)
+        if (self._lines is None or image.ndim != 2 or len(self._lines) == 0
+                or image.shape[0] == 0 or self._lines[0].size != image.shape[1]):
+            self.set_image(image)
+            return
+        overlap = min(2, len(self._lines))
+        for new in range(image.shape[0] - overlap + 1):
+            if all(self._lines_equal(self._lines[ii], image[new + ii]) for ii in range(overlap)):
+                break
+        else:
+            self.set_image(image)
+            return
+        for index in range(new - 1, -1, -1):
+            line = np.array(image[index], dtype=np.float64)
+            self._lines.insert(0, line)
+            self.add(line)
+        while len(self._lines) > image.shape[0]:
+            self.remove(self._lines.pop())
+        for index in range(len(self._lines), image.shape[0]):
+            line = np.array(image[index], dtype=np.float64)
+            self._lines.append(line)
+            self.add(line)
+
+    def _fits_image(self, image):
+        return (self._lines is not None and image.ndim == 2 and len(self._lines) == image.shape[0]
+                and (image.shape[0] == 0 or self._lines[0].size == image.shape[1]))
+
+    @staticmethod
+    def _lines_equal(counted_line, line):
+        line = np.asarray(line, dtype=np.float64)
+        if counted_line.shape != line.shape:
+            return False
+        return bool(np.all((counted_line == line) | (np.isnan(counted_line) & np.isnan(line))))
+
+    def _replace_line(self, index, line):
+        old_line = self._lines[index]
+        if self._lines_equal(old_line, line):
+            return
+        self.remove(old_line)
+        self._lines[index] = np.array(line, dtype=np.float64)
+        self.add(self._lines[index])
@@ -30,3 +30,12 @@ def netobtain(obj):
         return rpyc.utils.classic.obtain(obj)
     else:
         return obj
+
+
+def is_netref(obj):
+    """ Check if obj is a reference to an object of a remote qudi instance.
+
+    @param object obj: object to check
+    @return bool: True if obj is a rpyc remote object
+    """
+    return isinstance(obj, rpyc.core.netref.BaseNetref)
@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+"""
+This file contains a ring buffer container for continuously updated data traces.
+
+Qudi is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Qudi. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
+top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
+"""
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed size trace container to replace the pattern of rolling a whole array with np.roll for
+    every new data point.
+
+    The samples are stored in an array of twice the trace size. New samples are written behind the
+    newest sample. Only if the end of the storage is reached, the most recent samples are copied
+    back to the beginning once. The cost of appending is therefore O(new samples) (amortized) and
+    the trace ordered from oldest to newest sample is always available as contiguous view into the
+    storage without any copy (see property "data").
+
+    The time axis is always the last axis. If channels is None the buffer holds a 1D trace,
+    otherwise a 2D trace with shape (channels, size).
+
+    Please note that the view returned by "data" is only valid until the next call of "append".
+    Copy it if you need to keep it.
+
+    Sharing a trace with other threads (e.g. a logic module appending and the GUI plotting):
+    Never hand out the view returned by "data", since it is overwritten by appends while the other
+    thread still uses it. Keep the RingBuffer private, append to it while holding a lock and
+    publish the trace by a read-only property returning a copy made while holding the same lock.
+    The trace is then copied only when it is actually read (e.g. once per redraw of the GUI)
+    instead of on every append.
+    """
+
+    def __init__(self, size, channels=None, dtype=np.float64, fill_value=0):
+        """
+        @param int size: Number of samples in the trace (per channel)
+        @param int channels: optional, number of channels. If None a 1D buffer is created.
+        @param dtype: optional, numpy dtype of the buffer (default: np.float64)
+        @param fill_value: optional, initial value of all samples (default: 0)
+        """
+        if size < 1:
+            raise ValueError('RingBuffer size must be integer value >= 1.')
+        self._size = int(size)
+        self._channels = None if channels is None else int(channels)
+        if self._channels is None:
+            shape = (2 * self._size,)
+        else:
+            shape = (self._channels, 2 * self._size)
+        self._buffer = np.full(shape, fill_value, dtype=dtype)
+        # index behind the newest sample in the storage
+        self._end = self._size
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def channels(self):
+        return self._channels
+
+    @property
+    def dtype(self):
+        return self._buffer.dtype
+
+    @property
+    def shape(self):
+        return self._buffer.shape[:-1] + (self._size,)
+
+    @property
+    def data(self):
+        """ Zero-copy view of the trace ordered from oldest to newest sample.
+
+        @return numpy.ndarray: view with shape (size,) or (channels, size)
+        """
+        return self._buffer[..., self._end - self._size:self._end]
+
+    def __len__(self):
+        return self._size
+
+    def fill(self, value):
+        """ Set all samples to a value.
+
+        @param value: value to set all samples to
+        """
+        self._buffer.fill(value)
+        self._end = self._size
+
+    def append(self, data):
+        """ Append new samples to the trace. The same number of oldest samples are discarded.
+
+        @param data: The samples to append. For a 1D buffer a scalar or 1D array. For a 2D buffer
+                     either a 1D array with one sample per channel or a 2D array with shape
+                     (channels, samples).
+        """
+        data = np.asarray(data)
+        if self._channels is None:
+            data = data.reshape(-1)
+        elif data.ndim < 2:
+            data = data.reshape((self._channels, 1))
+        new_samples = data.shape[-1]
+        if new_samples == 0:
+            return
+
+        # More new samples than fit into the trace. Just keep the newest ones.
+        if new_samples >= self._size:
+            self._buffer[..., :self._size] = data[..., -self._size:]
+            self._end = self._size
+            return
+
+        # Move the samples that are still needed to the beginning of the storage
+        if self._end + new_samples > self._buffer.shape[-1]:
+            keep = self._size - new_samples
+            self._buffer[..., :keep] = self._buffer[..., self._end - keep:self._end]
+            self._end = keep
+
+        self._buffer[..., self._end:self._end + new_samples] = data
+        self._end += new_samples
+
+    def moving_average(self, width, number_of_samples=None, channels=None):
+        """ Moving average (uniform filter) over the newest samples of the trace.
+
+        Only the filter output for the newest number_of_samples window positions is calculated,
+        i.e. the cost is O(number_of_samples + width) instead of O(size). This is the same as
+        np.convolve(..., np.full(width, 1 / width), mode='valid')[-number_of_samples:].
+
+        @param int width: width of the filter window in samples
+        @param int number_of_samples: optional, number of filtered samples to return. Defaults to
+                                      all possible window positions (size - width + 1).
+        @param list channels: optional, indices of the channels to filter (2D buffer only)
+
+        @return numpy.ndarray: filtered samples (oldest to newest)
+        """
+        tail = self._filter_tail(width, number_of_samples, channels)
+        cumsum = np.zeros(tail.shape[:-1] + (tail.shape[-1] + 1,), dtype=np.float64)
+        np.cumsum(tail, axis=-1, out=cumsum[..., 1:])
+        return (cumsum[..., width:] - cumsum[..., :-width]) / width
+
+    def moving_median(self, width, number_of_samples=None, channels=None):
+        """ Moving median over the newest samples of the trace.
+
+        Only the filter output for the newest number_of_samples window positions is calculated.
+
+        @param int width: width of the filter window in samples
+        @param int number_of_samples: optional, number of filtered samples to return. Defaults to
+                                      all possible window positions (size - width + 1).
+        @param list channels: optional, indices of the channels to filter (2D buffer only)
+
+        @return numpy.ndarray: filtered samples (oldest to newest)
+        """
+        tail = self._filter_tail(width, number_of_samples, channels)
+        # Overlapping windows as view on the samples (shape (..., number_of_samples, width))
+        windows = np.lib.stride_tricks.as_strided(
+            tail,
+            shape=tail.shape[:-1] + (tail.shape[-1] - width + 1, width),
+            strides=tail.strides + tail.strides[-1:],
+            writeable=False)
+        return np.median(windows, axis=-1)
+
+    def _filter_tail(self, width, number_of_samples, channels):
+        width = int(width)
+        if not 1 <= width <= self._size:
+            raise ValueError('Filter width must be integer value in range [1, {0:d}].'
+                             ''.format(self._size))
+        max_samples = self._size - width + 1
+        if number_of_samples is None or number_of_samples > max_samples:
+            number_of_samples = max_samples
+        tail = self.data[..., self._size - (number_of_samples + width - 1):]
+        if channels is not None and self._channels is not None:
+            tail = tail[channels]
+        return tail
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+This file contains a vectorized detection of bright spots (e.g. single emitters) in 2D images.
+
+Qudi is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Qudi. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
+top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
+"""
+
+import numpy as np
+from scipy.ndimage import label, maximum_filter, uniform_filter, uniform_filter1d
+
+
+def detect_spots(image, spot_size, threshold=None, mean_threshold=None, check_shape=True,
+                 refinement=None):
+    """
+    Find the bright spots of an image.
+
+    A pixel is a spot candidate if it is the maximum of the square window of spot_size pixels
+    around it and the window lies completely inside of the image. Neighbouring candidates with the
+    same value (flat maxima) are merged into one spot by labelling. All remaining tests are done
+    for all candidates at once:
+        - the maximum must be larger than threshold
+        - the mean of the window must be larger than mean_threshold
+        - if check_shape is True, the mean of the central row and the central column of the window
+          must not differ by more than 20 % and at most 4 rows/columns of the window may be
+          brighter than the central row/column (rejects elongated features and edges).
+
+    @param numpy.ndarray image: 2D image
+    @param int spot_size: edge length of the window around a spot in pixels
+    @param float threshold: optional, minimum value of the spot maximum
+    @param float mean_threshold: optional, minimum mean value of the window around the spot
+    @param bool check_shape: optional, reject spots that are not round (default: True)
+    @param str refinement: optional, sub-pixel refinement of the spot positions. None (default)
+                           for the pixel of the maximum, 'centroid' for the intensity weighted
+                           centroid of the window (above the window minimum) or 'gaussian' for a
+                           gaussian through the maximum and its neighbours along each axis.
+
+    @return numpy.ndarray: spot positions in (fractional) pixel indices with shape (spots, 2)
+    """
+    image = np.asarray(image, dtype=np.float64)
+    if image.ndim != 2:
+        raise ValueError('Image for spot detection must be a 2D array.')
+    if refinement not in (None, 'centroid', 'gaussian'):
+        raise ValueError('Unknown spot position refinement "{0}". Valid are None, "centroid" and '
+                         '"gaussian".'.format(refinement))
+    size = max(int(spot_size), 1)
+    half = size // 2
+    if image.shape[0] < size or image.shape[1] < size:
+        return np.empty((0, 2), dtype=np.float64)
+
+    # Local maxima with the window completely inside of the image
+    peaks = image == maximum_filter(image, size=size, mode='nearest')
+    inside = np.zeros(image.shape, dtype=bool)
+    inside[half:image.shape[0] - size + half + 1, half:image.shape[1] - size + half + 1] = True
+    peaks &= inside
+    if threshold is not None:
+        peaks &= image > threshold
+    if mean_threshold is not None:
+        peaks &= uniform_filter(image, size=size, mode='nearest') > mean_threshold
+
+    rows, columns = _merge_flat_maxima(peaks)
+    if rows.size == 0:
+        return np.empty((0, 2), dtype=np.float64)
+
+    if check_shape:
+        is_spot = _is_spot_shape(image, rows, columns, size)
+        rows = rows[is_spot]
+        columns = columns[is_spot]
+
+    positions = np.column_stack((rows, columns)).astype(np.float64)
+    if refinement == 'centroid':
+        positions += _centroid_offsets(image, rows, columns, size)
+    elif refinement == 'gaussian':
+        positions += _gaussian_offsets(image, rows, columns)
+    return positions
+
+
+def _merge_flat_maxima(peaks):
+    """ Pixel indices of the connected groups of peak pixels (pixel closest to the group center).
+    """
+    labels, number_of_labels = label(peaks, structure=np.ones((3, 3), dtype=bool))
+    if number_of_labels == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+    rows, columns = np.nonzero(labels)
+    indices = labels[rows, columns]
+    if rows.size == number_of_labels:
+        return rows, columns
+    pixels = np.maximum(np.bincount(indices), 1)
+    center_rows = np.bincount(indices, weights=rows) / pixels
+    center_columns = np.bincount(indices, weights=columns) / pixels
+    # for every label the pixel closest to the center
+    distances = (rows - center_rows[indices]) ** 2 + (columns - center_columns[indices]) ** 2
+    order = np.lexsort((distances, indices))
+    first = order[np.r_[True, indices[order][1:] != indices[order][:-1]]]
+    return rows[first], columns[first]
+
+
+def _is_spot_shape(image, rows, columns, size):
+    """ Shape test of all spot candidates (see detect_spots). """
+    if size < 2:
+        return np.ones(rows.size, dtype=bool)
+    half = size // 2
+    offsets = np.arange(size) - half
+    # mean of every row/column segment of the window length
+    row_means = uniform_filter1d(image, size=size, axis=1, mode='nearest')
+    column_means = uniform_filter1d(image, size=size, axis=0, mode='nearest')
+    center_row_mean = row_means[rows, columns]
+    center_column_mean = column_means[rows, columns]
+    brighter_rows = np.sum(row_means[rows[:, np.newaxis] + offsets, columns[:, np.newaxis]]
+                           > center_row_mean[:, np.newaxis], axis=1)
+    brighter_columns = np.sum(column_means[rows[:, np.newaxis], columns[:, np.newaxis] + offsets]
+                              > center_column_mean[:, np.newaxis], axis=1)
+    is_round = ((center_row_mean <= 1.2 * center_column_mean)
+                & (center_column_mean <= 1.2 * center_row_mean))
+    return is_round & (brighter_rows + brighter_columns <= 4)
+
+
+def _centroid_offsets(image, rows, columns, size):
+    """ Offsets of the intensity weighted centroids of the windows from the window centers. """
+    offsets = np.arange(size) - size // 2
+    windows = image[(rows[:, np.newaxis] + offsets)[:, :, np.newaxis],
+                    (columns[:, np.newaxis] + offsets)[:, np.newaxis, :]]
+    weights = windows - windows.min(axis=(1, 2), keepdims=True)
+    total = weights.sum(axis=(1, 2))
+    valid = total > 0
+    total[~valid] = 1
+    row_offsets = np.einsum('nij,i->n', weights, offsets) / total
+    column_offsets = np.einsum('nij,j->n', weights, offsets) / total
+    return np.where(valid[:, np.newaxis], np.column_stack((row_offsets, column_offsets)), 0)
+
+
+def _gaussian_offsets(image, rows, columns):
+    """ Offsets of the maxima of gaussians through the spot maxima and their direct neighbours
+    (three point estimate along each axis). """
+    offsets = np.zeros((rows.size, 2), dtype=np.float64)
+    for axis, (index, other) in enumerate(((rows, columns), (columns, rows))):
+        before = np.clip(index - 1, 0, image.shape[axis] - 1)
+        after = np.clip(index + 1, 0, image.shape[axis] - 1)
+        if axis == 0:
+            values = np.stack((image[before, other], image[index, other], image[after, other]))
+        else:
+            values = np.stack((image[other, before], image[other, index], image[other, after]))
+        valid = np.all(values > 0, axis=0) & (before != index) & (after != index)
+        log_values = np.log(np.where(valid, values, 1))
+        curvature = log_values[0] - 2 * log_values[1] + log_values[2]
+        valid &= curvature < 0
+        curvature[~valid] = -1
+        offset = 0.5 * (log_values[0] - log_values[2]) / curvature
+        offsets[:, axis] = np.where(valid, np.clip(offset, -0.5, 0.5), 0)
+    return offsets
@@ -28,6 +28,7 @@ import time
 from core.connector import Connector
 from core.configoption import ConfigOption
 from core.statusvariable import StatusVar
+from core.util.histogram import ImageHistogram
 from qtwidgets.scan_plotwidget import ScanImageItem
 from gui.guibase import GUIBase
 from gui.guiutils import ColorBar
@@ -150,6 +151,11 @@ class ConfocalGui(GUIBase):
 
         self._hardware_state = True
 
+        # histograms of the displayed scan images for the percentile colour scaling
+        self._cb_histograms = {'xy': ImageHistogram(), 'depth': ImageHistogram()}
+        # scan image, channel and scan counter of the last histogram update
+        self._cb_histogram_sources = {'xy': None, 'depth': None}
+
         self.initMainUI()      # initialize the main GUI
         self.initSettingsUI()  # initialize the settings GUI
         self.initOptimizerSettingsUI()  # initialize the optimizer settings GUI
@@ -198,7 +204,7 @@ class ConfocalGui(GUIBase):
         self._mw.scanLineDockWidget.hide()
 
         # set up scan line plot
-        sc = self._scanning_logic._scan_counter
+        sc = self._scanning_logic.scan_counter
         sc = sc - 1 if sc >= 1 else sc
         if self._scanning_logic._zscan:
             data = self._scanning_logic.depth_image[sc, :, 0:4:3]
@@ -704,22 +710,21 @@ class ConfocalGui(GUIBase):
     def get_xy_cb_range(self):
         """ Determines the cb_min and cb_max values for the xy scan image
         """
+        histogram = self._get_cb_histogram('xy')
+
         # If "Manual" is checked, or the image data is empty (all zeros), then take manual cb range.
-        if self._mw.xy_cb_manual_RadioButton.isChecked() or np.count_nonzero(self.xy_image.image) < 1:
+        if self._mw.xy_cb_manual_RadioButton.isChecked() or histogram.count < 1:
             cb_min = self._mw.xy_cb_min_DoubleSpinBox.value()
             cb_max = self._mw.xy_cb_max_DoubleSpinBox.value()
 
-        # Otherwise, calculate cb range from percentiles.
+        # Otherwise, calculate cb range from percentiles (of the nonzero pixels, since zeros are
+        # typically due to unfinished scan).
         else:
-            # Exclude any zeros (which are typically due to unfinished scan)
-            xy_image_nonzero = self.xy_image.image[np.nonzero(self.xy_image.image)]
-
             # Read centile range
             low_centile = self._mw.xy_cb_low_percentile_DoubleSpinBox.value()
             high_centile = self._mw.xy_cb_high_percentile_DoubleSpinBox.value()
 
-            cb_min = np.percentile(xy_image_nonzero, low_centile)
-            cb_max = np.percentile(xy_image_nonzero, high_centile)
+            cb_min, cb_max = histogram.percentile([low_centile, high_centile])
 
         cb_range = [cb_min, cb_max]
 
@@ -728,26 +733,59 @@ class ConfocalGui(GUIBase):
     def get_depth_cb_range(self):
         """ Determines the cb_min and cb_max values for the xy scan image
         """
+        histogram = self._get_cb_histogram('depth')
+
         # If "Manual" is checked, or the image data is empty (all zeros), then take manual cb range.
-        if self._mw.depth_cb_manual_RadioButton.isChecked() or np.count_nonzero(self.depth_image.image) < 1:
+        if self._mw.depth_cb_manual_RadioButton.isChecked() or histogram.count < 1:
             cb_min = self._mw.depth_cb_min_DoubleSpinBox.value()
             cb_max = self._mw.depth_cb_max_DoubleSpinBox.value()
 
-        # Otherwise, calculate cb range from percentiles.
+        # Otherwise, calculate cb range from percentiles (of the nonzero pixels, since zeros are
+        # typically due to unfinished scan).
         else:
-            # Exclude any zeros (which are typically due to unfinished scan)
-            depth_image_nonzero = self.depth_image.image[np.nonzero(self.depth_image.image)]
-
             # Read centile range
             low_centile = self._mw.depth_cb_low_percentile_DoubleSpinBox.value()
             high_centile = self._mw.depth_cb_high_percentile_DoubleSpinBox.value()
 
-            cb_min = np.percentile(depth_image_nonzero, low_centile)
-            cb_max = np.percentile(depth_image_nonzero, high_centile)
+            cb_min, cb_max = histogram.percentile([low_centile, high_centile])
 
         cb_range = [cb_min, cb_max]
         return cb_range
 
+    def _get_cb_histogram(self, image_name):
+        """ Histogram of the displayed channel of the xy or depth image of the scanning logic.
+
+        Only the lines around the scan counter, that may have been scanned since the last call,
+        are counted again. So the cost does not grow with the image size during a scan.
+
+        @param str image_name: 'xy' or 'depth'
+
+        @return ImageHistogram: the updated histogram
+        """
+        if image_name == 'xy':
+            scan_image = self._scanning_logic.xy_image
+            channel = self.xy_channel
+        else:
+            scan_image = self._scanning_logic.depth_image
+            channel = self.depth_channel
+        histogram = self._cb_histograms[image_name]
+        image = scan_image[:, :, 3 + channel]
+        scan_counter = self._scanning_logic.scan_counter
+        number_of_lines = image.shape[0]
+
+        # Count the whole image if it has been replaced (new scan, history, ...) or the channel
+        # changed. Otherwise count the lines from the last seen scan line up to the current one.
+        lines = None
+        source = self._cb_histogram_sources[image_name]
+        if source is not None and source[0] is scan_image and source[1] == channel:
+            first_line = source[2] - 1
+            changed_lines = (scan_counter - first_line) % number_of_lines + 1
+            if changed_lines < number_of_lines:
+                lines = [(first_line + ii) % number_of_lines for ii in range(changed_lines)]
+        histogram.update_lines(image, lines)
+        self._cb_histogram_sources[image_name] = (scan_image, channel, scan_counter)
+        return histogram
+
     def refresh_xy_colorbar(self):
         """ Adjust the xy colorbar.
 
@@ -1468,7 +1506,7 @@ class ConfocalGui(GUIBase):
 
     def refresh_scan_line(self):
         """ Get the previously scanned image line and display it in the scan line plot. """
-        sc = self._scanning_logic._scan_counter
+        sc = self._scanning_logic.scan_counter
         sc = sc - 1 if sc >= 1 else sc
         if self._scanning_logic._zscan:
             self.scan_line_plot.setData(self._scanning_logic.depth_image[sc, :, 0:4:3])
@@ -1871,6 +1909,8 @@ class ConfocalGui(GUIBase):
 
             @param tag str: tag indicating command source
         """
+        # the scan counter jumps, count the whole images again
+        self._cb_histogram_sources = {'xy': None, 'depth': None}
         if tag == 'logic':
             self.disable_scan_actions()
 
@@ -1879,6 +1919,8 @@ class ConfocalGui(GUIBase):
 
             @param tag str: tag indicating command source
         """
+        # the scan counter jumps, count the whole images again
+        self._cb_histogram_sources = {'xy': None, 'depth': None}
         if tag == 'logic':
             self.disable_scan_actions()
 
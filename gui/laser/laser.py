@@ -256,8 +256,10 @@ class LaserGUI(GUIBase):
         self._mw.powerLabel.setText('{0:6.3f} W'.format(self._laser_logic.laser_power))
         self._mw.extraLabel.setText(self._laser_logic.laser_extra)
         self.updateButtonsEnabled()
+        # one snapshot of the log per redraw (the property copies the traces)
+        data = self._laser_logic.data
         for name, curve in self.curves.items():
-            curve.setData(x=self._laser_logic.data['time'], y=self._laser_logic.data[name])
+            curve.setData(x=data['time'], y=data[name])
 
     @QtCore.Slot()
     def updateFromSpinBox(self):
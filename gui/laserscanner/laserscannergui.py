@@ -25,6 +25,7 @@ import pyqtgraph as pg
 
 from collections import OrderedDict
 from core.connector import Connector
+from core.util.histogram import ImageHistogram
 from gui.colordefs import ColorScaleInferno
 from gui.guibase import GUIBase
 from gui.guiutils import ColorBar
@@ -80,6 +81,11 @@ class VoltScanGui(GUIBase):
         self._voltscan_logic = self.voltagescannerlogic1()
         self._savelogic = self.savelogic()
 
+        # histogram of the scan matrix for the percentile colour scaling
+        self._matrix_cb_histogram = ImageHistogram()
+        # scan matrix and scan counter of the last histogram update
+        self._matrix_cb_histogram_source = None
+
         # Use the inherited class 'Ui_VoltagescannerGuiUI' to create now the
         # GUI element:
         self._mw = VoltScanMainWindow()
@@ -302,18 +308,7 @@ class VoltScanGui(GUIBase):
         self.refresh_scan_colorbar()
 
         scan_image_data = self._voltscan_logic.scan_matrix
-
-        # If "Centiles" is checked, adjust colour scaling automatically to centiles.
-        # Otherwise, take user-defined values.
-        if self._mw.voltscan_cb_centiles_RadioButton.isChecked():
-            low_centile = self._mw.voltscan_cb_low_centile_InputWidget.value()
-            high_centile = self._mw.voltscan_cb_high_centile_InputWidget.value()
-
-            cb_min = np.percentile(scan_image_data, low_centile)
-            cb_max = np.percentile(scan_image_data, high_centile)
-        else:
-            cb_min = self._mw.voltscan_cb_min_InputWidget.value()
-            cb_max = self._mw.voltscan_cb_max_InputWidget.value()
+        cb_min, cb_max = self.get_matrix_cb_range()
 
         # Now update image with new color scale, and update colorbar
         self.scan_matrix_image.setImage(
@@ -333,23 +328,12 @@ class VoltScanGui(GUIBase):
     def refresh_scan_colorbar(self):
         """ Update the colorbar to a new scaling."""
 
-        # If "Centiles" is checked, adjust colour scaling automatically to centiles.
-        # Otherwise, take user-defined values.
-        if self._mw.voltscan_cb_centiles_RadioButton.isChecked():
-            low_centile = self._mw.voltscan_cb_low_centile_InputWidget.value()
-            high_centile = self._mw.voltscan_cb_high_centile_InputWidget.value()
-
-            cb_min = np.percentile(self.scan_matrix_image.image, low_centile)
-            cb_max = np.percentile(self.scan_matrix_image.image, high_centile)
-        else:
-            cb_min = self._mw.voltscan_cb_min_InputWidget.value()
-            cb_max = self._mw.voltscan_cb_max_InputWidget.value()
-
+        cb_min, cb_max = self.get_matrix_cb_range()
         self.scan_cb.refresh_colorbar(cb_min, cb_max)
         self._mw.voltscan_cb_ViewWidget.update()
 
     def refresh_lines(self):
-        self._mw.elapsed_lines_DisplayWidget.display(self._voltscan_logic._scan_counter_up)
+        self._mw.elapsed_lines_DisplayWidget.display(self._voltscan_logic.scan_counter_up)
 
     def change_voltage(self):
         self.sigChangeVoltage.emit(self._mw.constDoubleSpinBox.value())
@@ -379,27 +363,44 @@ class VoltScanGui(GUIBase):
         """
         Determines the cb_min and cb_max values for the matrix plot
         """
-        matrix_image = self.scan_matrix_image.image
+        histogram = self._get_matrix_cb_histogram()
 
         # If "Manual" is checked or the image is empty (all zeros), then take manual cb range.
-        # Otherwise, calculate cb range from percentiles.
-        if self._mw.voltscan_cb_manual_RadioButton.isChecked() or np.max(matrix_image) < 0.1:
+        # Otherwise, calculate cb range from percentiles (of the nonzero pixels, since zeros are
+        # typically due to unfinished scan).
+        if self._mw.voltscan_cb_manual_RadioButton.isChecked() or histogram.count < 1:
             cb_min = self._mw.voltscan_cb_min_InputWidget.value()
             cb_max = self._mw.voltscan_cb_max_InputWidget.value()
         else:
-            # Exclude any zeros (which are typically due to unfinished scan)
-            matrix_image_nonzero = matrix_image[np.nonzero(matrix_image)]
-
             # Read centile range
             low_centile = self._mw.voltscan_cb_low_centile_InputWidget.value()
             high_centile = self._mw.voltscan_cb_high_centile_InputWidget.value()
 
-            cb_min = np.percentile(matrix_image_nonzero, low_centile)
-            cb_max = np.percentile(matrix_image_nonzero, high_centile)
+            cb_min, cb_max = histogram.percentile([low_centile, high_centile])
 
         cb_range = [cb_min, cb_max]
         return cb_range
 
+    def _get_matrix_cb_histogram(self):
+        """ Histogram of the (upwards) scan matrix of the logic.
+
+        Only the lines around the scan counter, that may have been scanned since the last call,
+        are counted again. So the cost does not grow with the number of scan lines.
+
+        @return ImageHistogram: the updated histogram
+        """
+        scan_matrix = self._voltscan_logic.scan_matrix
+        scan_counter = self._voltscan_logic.scan_counter_up
+
+        # Count the whole matrix if it has been replaced by a new scan.
+        lines = None
+        source = self._matrix_cb_histogram_source
+        if source is not None and source[0] is scan_matrix:
+            lines = range(max(source[1] - 1, 0), min(scan_counter + 1, scan_matrix.shape[0]))
+        self._matrix_cb_histogram.update_lines(scan_matrix, lines)
+        self._matrix_cb_histogram_source = (scan_matrix, scan_counter)
+        return self._matrix_cb_histogram
+
     def save_data(self):
         """ Save the sum plot, the scan marix plot and the scan data """
         filetag = self._mw.save_tag_LineEdit.text()
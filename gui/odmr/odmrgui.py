@@ -25,6 +25,7 @@ import pyqtgraph as pg
 
 from core.connector import Connector
 from core.util import units
+from core.util.histogram import ImageHistogram
 from gui.guibase import GUIBase
 from gui.guiutils import ColorBar
 from gui.colordefs import ColorScaleInferno
@@ -271,6 +272,9 @@ class ODMRGui(GUIBase):
         self.odmr_matrix_image = pg.ImageItem(
             self._odmr_logic.odmr_plot_xy[:, self.display_channel],
             axisOrder='row-major')
+        # histogram of the displayed matrix for the percentile colour scaling
+        self._matrix_cb_histogram = ImageHistogram()
+        self._matrix_cb_histogram.set_image(self.odmr_matrix_image.image)
         self.odmr_matrix_image.setRect(QtCore.QRectF(
             self._odmr_logic.mw_starts[0],
             0,
@@ -820,9 +824,12 @@ class ODMRGui(GUIBase):
         # Update mean signal plot
         self.odmr_image.setData(odmr_data_x, odmr_data_y[self.display_channel])
         # Update raw data matrix plot
+        matrix_range = self._mw.odmr_control_DockWidget.matrix_range_SpinBox.value()
+        odmr_matrix_range = self._odmr_logic.select_odmr_matrix_data(odmr_matrix, self.display_channel, matrix_range)
+        # only the new sweeps (and the dropped old ones) are counted in the colour scale histogram
+        self._matrix_cb_histogram.push_lines(odmr_matrix_range)
         cb_range = self.get_matrix_cb_range()
         self.update_colorbar(cb_range)
-        matrix_range = self._mw.odmr_control_DockWidget.matrix_range_SpinBox.value()
         start = self._odmr_logic.mw_starts[matrix_range]
         step = self._odmr_logic.mw_steps[matrix_range]
         stop = self._odmr_logic.mw_stops[matrix_range]
@@ -836,7 +843,6 @@ class ODMRGui(GUIBase):
                 odmr_matrix.shape[0])
         )
 
-        odmr_matrix_range = self._odmr_logic.select_odmr_matrix_data(odmr_matrix, self.display_channel, matrix_range)
         self.odmr_matrix_image.setImage(
             image=odmr_matrix_range,
             axisOrder='row-major',
@@ -880,23 +886,21 @@ class ODMRGui(GUIBase):
         """
         Determines the cb_min and cb_max values for the matrix plot
         """
-        matrix_image = self.odmr_matrix_image.image
+        # The histogram of the displayed matrix excludes any zeros (which are typically due to
+        # unfinished scan)
+        histogram = self._matrix_cb_histogram
 
         # If "Manual" is checked or the image is empty (all zeros), then take manual cb range.
         # Otherwise, calculate cb range from percentiles.
-        if self._mw.odmr_cb_manual_RadioButton.isChecked() or np.count_nonzero(matrix_image) < 1:
+        if self._mw.odmr_cb_manual_RadioButton.isChecked() or histogram.count < 1:
             cb_min = self._mw.odmr_cb_min_DoubleSpinBox.value()
             cb_max = self._mw.odmr_cb_max_DoubleSpinBox.value()
         else:
-            # Exclude any zeros (which are typically due to unfinished scan)
-            matrix_image_nonzero = matrix_image[np.nonzero(matrix_image)]
-
             # Read centile range
             low_centile = self._mw.odmr_cb_low_percentile_DoubleSpinBox.value()
             high_centile = self._mw.odmr_cb_high_percentile_DoubleSpinBox.value()
 
-            cb_min = np.percentile(matrix_image_nonzero, low_centile)
-            cb_max = np.percentile(matrix_image_nonzero, high_centile)
+            cb_min, cb_max = histogram.percentile([low_centile, high_centile])
 
         cb_range = [cb_min, cb_max]
         return cb_range
@@ -976,6 +980,7 @@ class ODMRGui(GUIBase):
         self.odmr_matrix_image.setImage(self._odmr_logic.select_odmr_matrix_data(self._odmr_logic.odmr_plot_xy,
                                                                                  self.display_channel,
                                                                                  self._odmr_logic.matrix_range))
+        self._matrix_cb_histogram.push_lines(self.odmr_matrix_image.image)
         return
 
     def update_parameter(self, param_dict):
@@ -126,14 +126,17 @@ class SimpleDataGui(GUIBase):
     def updateData(self):
         """ The function that grabs the data and sends it to the plot.
         """
+        # one snapshot of the data per redraw (the properties copy the data)
+        buf = self._simple_logic.buf
+        smooth = self._simple_logic.smooth
         for i in range(self._simple_logic._data_logic.getChannels()):
             self.curvearr[i].setData(
-                y=self._simple_logic.buf[0:-11, i],
-                x=np.arange(0, len(self._simple_logic.buf[0:-11]))
+                y=buf[0:-11, i],
+                x=np.arange(0, len(buf[0:-11]))
                 )
             self.smootharr[i].setData(
-                y=self._simple_logic.smooth[24:-25-10, i],
-                x=np.arange(0, len(self._simple_logic.smooth[24:-25-10]))
+                y=smooth[24:-25-10, i],
+                x=np.arange(0, len(smooth[24:-25-10]))
                 )
 
         if self._simple_logic.module_state() == 'locked':
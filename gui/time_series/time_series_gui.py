@@ -173,12 +173,12 @@ class TimeSeriesGui(GUIBase):
                 pen2 = pg.mkPen(palette.c6, cosmetic=True)
             self.averaged_curves[ch] = pg.PlotCurveItem(pen=pen1,
                                                         clipToView=True,
-                                                        downsampleMethod='subsample',
+                                                        downsampleMethod='peak',
                                                         autoDownsample=True,
                                                         antialias=self._use_antialias)
             self.curves[ch] = pg.PlotCurveItem(pen=pen2,
                                                clipToView=True,
-                                               downsampleMethod='subsample',
+                                               downsampleMethod='peak',
                                                autoDownsample=True,
                                                antialias=self._use_antialias)
 
@@ -453,10 +453,17 @@ class TimeSeriesGui(GUIBase):
     @QtCore.Slot(object, object, object, object)
     def update_data(self, data_time=None, data=None, smooth_time=None, smooth_data=None):
         """ The function that grabs the data and sends it to the plot.
+
+        Data frames that have been superseded by a newer frame of the logic while waiting in the
+        event queue are skipped, so the plot catches up if drawing is slower than the frame rate.
         """
         if data_time is None and data is None and smooth_data is None and smooth_time is None:
-            data_time, data = self._time_series_logic.trace_data
-            smooth_time, smooth_data = self._time_series_logic.averaged_trace_data
+            data_time, data, smooth_time, smooth_data = self._time_series_logic.display_data
+            if data is None:
+                data_time, data = self._time_series_logic.trace_data
+                smooth_time, smooth_data = self._time_series_logic.averaged_trace_data
+        elif data is not None and data is not self._time_series_logic.display_data[1]:
+            return 0
         elif (data_time is None) ^ (data is None) or (smooth_time is None) ^ (smooth_data is None):
             self.log.error('Must provide a full data set of x and y values. update_data failed.')
             return
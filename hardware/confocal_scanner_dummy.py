@@ -316,16 +316,7 @@ class ConfocalScannerDummy(Base, ConfocalScannerInterface):
         if np.shape(line_path)[1] != self._line_length:
             self._set_up_line(np.shape(line_path)[1])
 
-        count_data = np.random.uniform(0, 2e4, self._line_length)
-        z_data = line_path[2, :]
-
-        #TODO: Change the gaussian function here to the one from fitlogic and delete the local modules to calculate
-        #the gaussian functions
-        x_data = np.array(line_path[0, :])
-        y_data = np.array(line_path[1, :])
-        for i in range(self._num_points):
-            count_data += self.twoD_gaussian_function((x_data, y_data), *(self._points[i])
-                ) * self.gaussian_function(np.array(z_data), *(self._points_z[i]))
+        count_data = self._simulate_count_data(line_path)
 
         time.sleep(self._line_length * 1. / self._clock_frequency)
         time.sleep(self._line_length * 1. / self._clock_frequency)
@@ -339,6 +330,72 @@ class ConfocalScannerDummy(Base, ConfocalScannerInterface):
                 np.ones(count_data.shape) * line_path[1, 0] * 100
             ]).transpose()
 
+    def supports_frame_scan(self):
+        """ Function to test if the hardware scans a whole frame (sequence of lines) by itself.
+
+        @return bool: Whether the hardware implements scan_frame
+        """
+        return True
+
+    def scan_frame(self, frame_paths, pixel_clock=None, line_callback=None):
+        """ Scans a sequence of lines and hands back the counts line by line.
+
+        The counts of the whole frame are simulated at once, the lines are then handed back one by
+        one in the (simulated) time it takes to scan them.
+
+        @param list frame_paths: line paths (float[k][n] each, see scan_line) to scan one after another
+        @param list pixel_clock: optional, for each line path whether a pixel clock is needed
+        @param callable line_callback: optional, called as line_callback(path_index, counts) with the
+                                       counts of each line path. Return False to abort the frame.
+
+        @return int: error code (0:OK, -1:error)
+        """
+        if not isinstance(frame_paths, (list, tuple)) or not all(
+                isinstance(path, np.ndarray) for path in frame_paths):
+            self.log.error('Given frame is no list of voltage arrays.')
+            return -1
+        if len(frame_paths) == 0:
+            return 0
+
+        frame_path = np.hstack(frame_paths)
+        count_data = self._simulate_count_data(frame_path)
+        line_stop = np.cumsum([np.shape(path)[1] for path in frame_paths])
+        line_start = np.concatenate(([0], line_stop[:-1]))
+
+        for path_index, line_path in enumerate(frame_paths):
+            line_count_data = count_data[line_start[path_index]:line_stop[path_index]]
+            time.sleep(2 * line_count_data.size / self._clock_frequency)
+            self._current_position = list(line_path[:, -1])
+            if line_callback is None:
+                continue
+            counts = np.array([
+                    line_count_data,
+                    5e5 - line_count_data,
+                    np.ones(line_count_data.shape) * line_path[1, 0] * 100
+                ]).transpose()
+            if line_callback(path_index, counts) is False:
+                break
+        return 0
+
+    def _simulate_count_data(self, line_path):
+        """ Simulates the counts of the dummy NVs along a path.
+
+        @param float[][4] line_path: array of 4-part tuples defining the voltage points
+
+        @return numpy.ndarray: the photon counts per second of each point
+        """
+        count_data = np.random.uniform(0, 2e4, np.shape(line_path)[1])
+        z_data = line_path[2, :]
+
+        #TODO: Change the gaussian function here to the one from fitlogic and delete the local modules to calculate
+        #the gaussian functions
+        x_data = np.array(line_path[0, :])
+        y_data = np.array(line_path[1, :])
+        for i in range(self._num_points):
+            count_data += self.twoD_gaussian_function((x_data, y_data), *(self._points[i])
+                ) * self.gaussian_function(np.array(z_data), *(self._points_z[i]))
+        return count_data
+
     def close_scanner(self):
         """ Closes the scanner and cleans up afterwards.
 
@@ -79,6 +79,7 @@ class InStreamDummy(Base, DataInStreamInterface):
 
         # Data buffer
         self._data_buffer = np.empty(0, dtype=self.__data_type)
+        self._data_buffer_position = 0
         self._has_overflown = False
         self._is_running = False
         self._last_read = None
@@ -162,6 +163,7 @@ class InStreamDummy(Base, DataInStreamInterface):
 
         # Reset data buffer
         self._data_buffer = np.empty(0, dtype=self.__data_type)
+        self._data_buffer_position = 0
         self._has_overflown = False
         self._is_running = False
         self._last_read = None
@@ -507,15 +509,32 @@ class InStreamDummy(Base, DataInStreamInterface):
                                ''.format(self.number_of_channels, buffer.shape[0]))
                 return -1
             number_of_samples = buffer.shape[1] if number_of_samples is None else number_of_samples
-            buffer = buffer.flatten()
+            if number_of_samples > buffer.shape[1]:
+                self.log.error('Number of samples to read ({0:d}) exceeds the size of the buffer '
+                               '({1:d}).'.format(number_of_samples, buffer.shape[1]))
+                return -1
         elif buffer.ndim == 1:
-            number_of_samples = (buffer.size // self.number_of_channels) if number_of_samples is None else number_of_samples
+            if number_of_samples is None:
+                number_of_samples = buffer.size // self.number_of_channels
+            if number_of_samples * self.number_of_channels > buffer.size:
+                self.log.error('Number of samples to read ({0:d} per channel) exceeds the size of '
+                               'the buffer ({1:d}).'.format(number_of_samples, buffer.size))
+                return -1
+            if not buffer.flags['C_CONTIGUOUS']:
+                self.log.error('1D buffer must be C-contiguous. Read failed.')
+                return -1
         else:
             self.log.error('Buffer must be a 1D or 2D numpy.ndarray.')
             return -1
 
         if number_of_samples < 1:
             return 0
+        # 2D view of the samples to read in the buffer of the caller
+        if buffer.ndim == 2:
+            data = buffer[:, :number_of_samples]
+        else:
+            data = buffer[:self.number_of_channels * number_of_samples].reshape(
+                (self.number_of_channels, number_of_samples))
         while self.available_samples < number_of_samples:
             time.sleep(0.001)
 
@@ -524,7 +543,6 @@ class InStreamDummy(Base, DataInStreamInterface):
         if avail_samples > self.buffer_size:
             self._has_overflown = True
 
-        offset = 0
         analog_x = np.arange(number_of_samples, dtype=self.__data_type) / self.__sample_rate
         analog_x *= 2 * np.pi
         analog_x += 2 * np.pi * (self._last_read - self._start_time)
@@ -533,17 +551,15 @@ class InStreamDummy(Base, DataInStreamInterface):
             if chnl in self._digital_channels:
                 ch_index = self._digital_channels.index(chnl)
                 events_per_bin = self._digital_event_rates[ch_index] / self.__sample_rate
-                buffer[offset:(offset+number_of_samples)] = np.random.poisson(events_per_bin,
-                                                                              number_of_samples)
+                data[i] = np.random.poisson(events_per_bin, number_of_samples)
             else:
                 ch_index = self._analog_channels.index(chnl)
                 amplitude = self._analog_amplitudes[ch_index]
-                np.sin(analog_x, out=buffer[offset:(offset+number_of_samples)])
-                buffer[offset:(offset + number_of_samples)] *= amplitude
+                np.sin(analog_x, out=data[i])
+                data[i] *= amplitude
                 noise_level = 0.1 * amplitude
                 noise = noise_level - 2 * noise_level * np.random.rand(number_of_samples)
-                buffer[offset:(offset + number_of_samples)] += noise
-            offset += number_of_samples
+                data[i] += noise
         return number_of_samples
 
     def read_available_data_into_buffer(self, buffer):
@@ -591,18 +607,18 @@ class InStreamDummy(Base, DataInStreamInterface):
             return np.empty((0, 0), dtype=self.data_type)
 
         if number_of_samples is None:
-            read_samples = self.read_available_data_into_buffer(self._data_buffer)
-            if read_samples < 0:
-                return np.empty((0, 0), dtype=self.data_type)
-        else:
-            read_samples = self.read_data_into_buffer(self._data_buffer,
-                                                      number_of_samples=number_of_samples)
-            if read_samples != number_of_samples:
-                return np.empty((0, 0), dtype=self.data_type)
+            number_of_samples = min(self.available_samples, self.buffer_size)
+        data = self._get_ring_buffer_view(number_of_samples)
+        if data is None:
+            self.log.error('Unable to read {0:d} samples per channel at once with a buffer size '
+                           'of {1:d} samples per channel.'
+                           ''.format(number_of_samples, self.buffer_size))
+            return np.empty((0, 0), dtype=self.data_type)
 
-        total_samples = self.number_of_channels * read_samples
-        return self._data_buffer[:total_samples].reshape((self.number_of_channels,
-                                                          number_of_samples))
+        read_samples = self.read_data_into_buffer(data, number_of_samples=number_of_samples)
+        if read_samples != number_of_samples:
+            return np.empty((0, 0), dtype=self.data_type)
+        return data
 
     def read_single_point(self):
         """
@@ -651,9 +667,31 @@ class InStreamDummy(Base, DataInStreamInterface):
             self._data_buffer = np.zeros(
                 self.number_of_channels * self.buffer_size,
                 dtype=self.data_type)
+            self._data_buffer_position = 0
             self._has_overflown = False
         return
 
+    def _get_ring_buffer_view(self, number_of_samples):
+        """
+        Get the view of the internal ring buffer to read the next samples into (see read_data).
+        The samples of all channels of a read are contiguous in the ring buffer. If they do not fit
+        in before the end of the ring buffer, the view starts at its beginning again.
+
+        @param int number_of_samples: number of samples per channel to read
+
+        @return numpy.ndarray: C-contiguous view with shape (number_of_channels, number_of_samples),
+                               None if number_of_samples exceeds the buffer size
+        """
+        total_samples = self.number_of_channels * number_of_samples
+        if total_samples > self._data_buffer.size:
+            return None
+        if self._data_buffer_position + total_samples > self._data_buffer.size:
+            self._data_buffer_position = 0
+        start = self._data_buffer_position
+        self._data_buffer_position += total_samples
+        return self._data_buffer[start:self._data_buffer_position].reshape(
+            (self.number_of_channels, number_of_samples))
+
     def _check_settings_change(self):
         """
         Helper method to check if streamer settings can be changed, i.e. if the streamer is idle.
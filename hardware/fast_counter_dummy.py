@@ -230,6 +230,28 @@ class FastCounterDummy(Base, FastCounterInterface):
         info_dict = {'elapsed_sweeps': None, 'elapsed_time': None}
         return self._count_data, info_dict
 
+    def get_data_trace_dtype(self):
+        """ Returns the numpy dtype the hardware natively delivers the timetrace counts in.
+
+        @return numpy.dtype: dtype of the counts
+        """
+        return self._count_data.dtype
+
+    def get_data_trace_into(self, buffer):
+        """ Polls the current timetrace data and writes it into the buffer of the caller.
+
+        @param numpy.ndarray buffer: array with the shape of the timetrace to write the counts into
+
+        @return dict: info_dict like returned by get_data_trace, None if the buffer does not have
+                      the shape of the timetrace
+        """
+        # include an artificial waiting time
+        time.sleep(0.5)
+        if buffer.shape != self._count_data.shape:
+            return None
+        np.copyto(buffer, self._count_data, casting='unsafe')
+        return {'elapsed_sweeps': None, 'elapsed_time': None}
+
     def get_frequency(self):
         freq = 950.
         time.sleep(0.5)
@@ -181,6 +181,8 @@ class FastComtec(Base, FastCounterInterface):
         #in the fastcomtec it can be on "stopped" or "halt"
         self.stopped_or_halt = "stopped"
         self.timetrace_tmp = []
+        # persistent array the card writes into if the buffer of get_data_trace_into is not uint32
+        self._data_trace_buffer = None
 
     def on_activate(self):
         """ Initialisation performed during activation of the module.
@@ -342,7 +344,7 @@ class FastComtec(Base, FastCounterInterface):
             time.sleep(0.05)
 
         if self.gated:
-            self.timetrace_tmp = self.get_data_trace()
+            self.timetrace_tmp = self.get_data_trace()[0]
         return status
 
     def stop_measure(self):
@@ -395,6 +397,58 @@ class FastComtec(Base, FastCounterInterface):
 
           @return arrray: Time trace.
         """
+        data = np.empty(self._get_data_trace_shape(), dtype=np.uint32)
+        self._read_data_trace(data)
+        time_trace = np.int64(data)
+
+        if self.gated and len(self.timetrace_tmp) > 0:
+            time_trace = time_trace + self.timetrace_tmp
+
+        info_dict = {'elapsed_sweeps': self.get_current_sweeps(),
+                     'elapsed_time': None} 
+        return time_trace, info_dict
+
+    def get_data_trace_dtype(self):
+        """ Returns the numpy dtype the hardware natively delivers the timetrace counts in.
+
+        @return numpy.dtype: dtype of the counts (the card delivers 32 bit bins)
+        """
+        return np.dtype(np.uint32)
+
+    def get_data_trace_into(self, buffer):
+        """ Polls the current timetrace data from the fast counter and writes it into the buffer of
+        the caller. A C-contiguous uint32 buffer is filled by the card directly, any other buffer
+        via a persistent uint32 array.
+
+        @param numpy.ndarray buffer: array with the shape of the timetrace to write the counts into
+
+        @return dict: info_dict like returned by get_data_trace, None if the buffer does not have
+                      the shape of the timetrace
+        """
+        shape = self._get_data_trace_shape()
+        if buffer.shape != shape:
+            return None
+        if buffer.dtype == np.uint32 and buffer.flags['C_CONTIGUOUS'] and buffer.flags['WRITEABLE']:
+            data = buffer
+        else:
+            if self._data_trace_buffer is None or self._data_trace_buffer.shape != shape:
+                self._data_trace_buffer = np.empty(shape, dtype=np.uint32)
+            data = self._data_trace_buffer
+        self._read_data_trace(data)
+        if data is not buffer:
+            np.copyto(buffer, data, casting='unsafe')
+
+        if self.gated and len(self.timetrace_tmp) > 0:
+            np.add(buffer, self.timetrace_tmp, out=buffer, casting='unsafe')
+
+        return {'elapsed_sweeps': self.get_current_sweeps(),
+                'elapsed_time': None}
+
+    def _get_data_trace_shape(self):
+        """ Shape of the timetrace according to the current settings of the card.
+
+        @return tuple: (number of bins,) if ungated, (number of gates, number of bins) if gated
+        """
         setting = AcqSettings()
         self.dll.GetSettingData(ctypes.byref(setting), 0)
         N = setting.range
@@ -403,23 +457,18 @@ class FastComtec(Base, FastCounterInterface):
             bsetting=AcqSettings()
             self.dll.GetSettingData(ctypes.byref(bsetting), 0)
             H = bsetting.cycles
-            data = np.empty((H, int(N / H)), dtype=np.uint32)
+            return H, int(N / H)
+        return N,
 
-        else:
-            data = np.empty((N,), dtype=np.uint32)
+    def _read_data_trace(self, data):
+        """ Let the card write the current timetrace into a C-contiguous uint32 array.
 
+        @param numpy.ndarray data: uint32 array with the shape of the timetrace
+        """
         p_type_ulong = ctypes.POINTER(ctypes.c_uint32)
         ptr = data.ctypes.data_as(p_type_ulong)
         self.dll.LVGetDat(ptr, 0)
-        time_trace = np.int64(data)
-
-        if self.gated and self.timetrace_tmp != []:
-            time_trace = time_trace + self.timetrace_tmp
-
-        info_dict = {'elapsed_sweeps': self.get_current_sweeps(),
-                     'elapsed_time': None} 
-        return time_trace, info_dict
-
+        return
 
     def get_data_testfile(self):
         """ Load data test file """
@@ -102,6 +102,8 @@ class NIXSeriesInStreamer(Base, DataInStreamInterface):
 
         # Data buffer
         self._data_buffer = np.empty(0, dtype=self.__data_type)
+        self._data_buffer_position = 0
+        self._scratch_buffer = np.empty(0, dtype=self.__data_type)
         self._has_overflown = False
 
         # List of all available counters and terminals for this device
@@ -269,6 +271,8 @@ class NIXSeriesInStreamer(Base, DataInStreamInterface):
 
         # Reset data buffer
         self._data_buffer = np.empty(0, dtype=self.__data_type)
+        self._data_buffer_position = 0
+        self._scratch_buffer = np.empty(0, dtype=self.__data_type)
         self._has_overflown = False
         return
 
@@ -278,6 +282,7 @@ class NIXSeriesInStreamer(Base, DataInStreamInterface):
         self.terminate_all_tasks()
         # Free memory if possible while module is inactive
         self._data_buffer = np.empty(0, dtype=self.__data_type)
+        self._scratch_buffer = np.empty(0, dtype=self.__data_type)
         return
 
     @property
@@ -642,39 +647,60 @@ class NIXSeriesInStreamer(Base, DataInStreamInterface):
                                ''.format(self.number_of_channels, buffer.shape[0]))
                 return -1
             number_of_samples = buffer.shape[1] if number_of_samples is None else number_of_samples
-            buffer = buffer.flatten()
+            if number_of_samples > buffer.shape[1]:
+                self.log.error('Number of samples to read ({0:d}) exceeds the size of the buffer '
+                               '({1:d}).'.format(number_of_samples, buffer.shape[1]))
+                return -1
         elif buffer.ndim == 1:
             if number_of_samples is None:
                 number_of_samples = buffer.size // self.number_of_channels
+            if number_of_samples * self.number_of_channels > buffer.size:
+                self.log.error('Number of samples to read ({0:d} per channel) exceeds the size of '
+                               'the buffer ({1:d}).'.format(number_of_samples, buffer.size))
+                return -1
+            if not buffer.flags['C_CONTIGUOUS']:
+                self.log.error('1D buffer must be C-contiguous. Read failed.')
+                return -1
         else:
             self.log.error('Buffer must be a 1D or 2D numpy.ndarray.')
             return -1
 
         if number_of_samples < 1:
             return 0
+        # 2D view of the samples to read in the buffer of the caller
+        if buffer.ndim == 2:
+            data = buffer[:, :number_of_samples]
+        else:
+            data = buffer[:self.number_of_channels * number_of_samples].reshape(
+                (self.number_of_channels, number_of_samples))
 
         # Check for buffer overflow
         if self.available_samples > self.buffer_size:
             self._has_overflown = True
 
         try:
-            write_offset = 0
             # Read digital channels
             for i, reader in enumerate(self._di_readers):
                 # read the counter value. This function is blocking.
+                target = self._get_read_target(data[i])
                 read_samples = reader.read_many_sample_double(
-                    buffer[write_offset:],
+                    target,
                     number_of_samples_per_channel=number_of_samples,
                     timeout=self._rw_timeout)
                 if read_samples != number_of_samples:
                     return -1
-                write_offset += number_of_samples
+                if target is not data[i]:
+                    data[i] = target
             # Read analog channels
             if self._ai_reader is not None:
+                ai_data = data[len(self._di_readers):]
+                target = self._get_read_target(ai_data)
                 read_samples = self._ai_reader.read_many_sample(
-                    buffer[write_offset:],
+                    target,
                     number_of_samples_per_channel=number_of_samples,
                     timeout=self._rw_timeout)
+                if target is not ai_data:
+                    ai_data[...] = target
             if read_samples != number_of_samples:
                 return -1
         except ni.DaqError:
@@ -723,18 +749,18 @@ class NIXSeriesInStreamer(Base, DataInStreamInterface):
             return np.empty((0, 0), dtype=self.__data_type)
 
         if number_of_samples is None:
-            read_samples = self.read_available_data_into_buffer(self._data_buffer)
-            if read_samples < 0:
-                return np.empty((0, 0), dtype=self.__data_type)
-        else:
-            read_samples = self.read_data_into_buffer(self._data_buffer,
-                                                      number_of_samples=number_of_samples)
-            if read_samples != number_of_samples:
-                return np.empty((0, 0), dtype=self.__data_type)
+            number_of_samples = min(self.available_samples, self.buffer_size)
+        data = self._get_ring_buffer_view(number_of_samples)
+        if data is None:
+            self.log.error('Unable to read {0:d} samples per channel at once with a buffer size '
+                           'of {1:d} samples per channel.'
+                           ''.format(number_of_samples, self.buffer_size))
+            return np.empty((0, 0), dtype=self.__data_type)
 
-        total_samples = self.number_of_channels * read_samples
-        return self._data_buffer[:total_samples].reshape((self.number_of_channels,
-                                                          number_of_samples))
+        read_samples = self.read_data_into_buffer(data, number_of_samples=number_of_samples)
+        if read_samples != number_of_samples:
+            return np.empty((0, 0), dtype=self.__data_type)
+        return data
 
     def read_single_point(self):
         """
@@ -1126,9 +1152,48 @@ class NIXSeriesInStreamer(Base, DataInStreamInterface):
     def _init_buffer(self):
         self._data_buffer = np.zeros(self.number_of_channels * self.buffer_size,
                                      dtype=self.__data_type)
+        self._data_buffer_position = 0
         self._has_overflown = False
         return
 
+    def _get_ring_buffer_view(self, number_of_samples):
+        """
+        Get the view of the internal ring buffer to read the next samples into (see read_data).
+        The samples of all channels of a read are contiguous in the ring buffer. If they do not fit
+        in before the end of the ring buffer, the view starts at its beginning again.
+
+        @param int number_of_samples: number of samples per channel to read
+
+        @return numpy.ndarray: C-contiguous view with shape (number_of_channels, number_of_samples),
+                               None if number_of_samples exceeds the buffer size
+        """
+        total_samples = self.number_of_channels * number_of_samples
+        if total_samples > self._data_buffer.size:
+            return None
+        if self._data_buffer_position + total_samples > self._data_buffer.size:
+            self._data_buffer_position = 0
+        start = self._data_buffer_position
+        self._data_buffer_position += total_samples
+        return self._data_buffer[start:self._data_buffer_position].reshape(
+            (self.number_of_channels, number_of_samples))
+
+    def _get_read_target(self, data):
+        """
+        Get an array the stream readers can write the samples for data into. The stream readers
+        only write into C-contiguous arrays. If data is not C-contiguous (e.g. a partially filled
+        2D buffer of the caller), a view of the same shape into a persistent scratch array is
+        returned and the samples have to be copied into data afterwards.
+
+        @param numpy.ndarray data: view of the caller's buffer the samples should end up in
+
+        @return numpy.ndarray: data itself or a C-contiguous view of the scratch array
+        """
+        if data.flags['C_CONTIGUOUS'] and data.flags['WRITEABLE']:
+            return data
+        if self._scratch_buffer.size < data.size:
+            self._scratch_buffer = np.empty(data.size, dtype=self.__data_type)
+        return self._scratch_buffer[:data.size].reshape(data.shape)
+
     def _check_settings_change(self):
         """
         Helper method to check if streamer settings can be changed, i.e. if the streamer is idle.
@@ -32,6 +32,7 @@ from interface.slow_counter_interface import SlowCounterInterface
 from interface.slow_counter_interface import SlowCounterConstraints
 from interface.slow_counter_interface import CountingMode
 from interface.fast_counter_interface import FastCounterInterface
+from hardware.picoquant.tttr_decoder import PicoHarpTTTRDecoder, TTTRHistogram
 
 # =============================================================================
 # Wrapper around the PHLib.DLL. The current file is based on the header files
@@ -99,11 +100,13 @@ class PicoHarp300(Base, SlowCounterInterface, FastCounterInterface):
         module.Class: 'picoquant.picoharp300.PicoHarp300'
         deviceID: 0 # a device index from 0 to 7.
         mode: 0 # 0: histogram mode, 2: T2 mode, 3: T3 mode
+        gated: False # gated fast counter, a marker has to flag the first gate
         
     """
 
     _deviceID = ConfigOption('deviceID', 0, missing='warn') # a device index from 0 to 7.
     _mode = ConfigOption('mode', 0, missing='warn')
+    _gated = ConfigOption('gated', False, missing='nothing')
 
     sigReadoutPicoharp = QtCore.Signal()
     sigAnalyzeData = QtCore.Signal(object, object)
@@ -129,6 +132,12 @@ class PicoHarp300(Base, SlowCounterInterface, FastCounterInterface):
         self._bin_width_ns = 3000
         self._record_length_ns = 100 *1e9
 
+        # TTTR record decoder and histogram of the fast counter
+        self._decoder = None
+        self._histogram = None
+        self._bin_width_s = 2e-9
+        self._start_time = None
+
         self._photon_source2 = None #for compatibility reasons with second APD
         self._count_channel = 1
 
@@ -1057,29 +1066,36 @@ class PicoHarp300(Base, SlowCounterInterface, FastCounterInterface):
 
     #FIXME: The interface connection to the fast counter must be established!
 
-    def configure(self, bin_width_ns, record_length_ns, number_of_gates = 0):
-        """
-        Configuration of the fast counter.
-        bin_width_ns: Length of a single time bin in the time trace histogram
-                      in nanoseconds.
-        record_length_ns: Total length of the timetrace/each single gate in
-                          nanoseconds.
-        number_of_gates: Number of gates in the pulse sequence. Ignore for
-                         ungated counter.
+    def configure(self, bin_width_s, record_length_s, number_of_gates=0):
+        """ Configuration of the fast counter.
+
+        @param float bin_width_s: Length of a single time bin in the time trace histogram in seconds.
+        @param float record_length_s: Total length of the timetrace/each single gate in seconds.
+        @param int number_of_gates: optional, number of gates in the pulse sequence. Ignore for not
+                                    gated counter.
+
+        @return tuple(binwidth_s, record_length_s, number_of_gates):
+                    binwidth_s: float the actual set binwidth in seconds
+                    gate_length_s: the actual record length in seconds
+                    number_of_gates: the number of gated, which are accepted, None if not-gated
+
+        The device is operated in TTTR mode (T2 unless T3 is set as mode in the config). The
+        received records are decoded and histogrammed in analyze_received_data.
         """
-        #        self.initialize(mode=3)
-        self._bin_width_ns = bin_width_ns
-        self._record_length_ns = record_length_ns
-        self._number_of_gates = number_of_gates
+        tttr_mode = self._mode if self._mode in (self.MODE_T2, self.MODE_T3) else self.MODE_T2
+        self.initialize(tttr_mode)
 
-        #FIXME: actualle only an unsigned array will be needed. Change that later.
-        #        self.data_trace = np.zeros(number_of_gates, dtype=np.int64 )
-        self.data_trace = [0]*number_of_gates
-        self.count = 0
+        # unit of the decoded delays in ps (fixed 4 ps in T2 mode)
+        delay_unit_ps = 4 if tttr_mode == self.MODE_T2 else self.get_resolution()
+        bin_width = max(int(round(bin_width_s * 1e12 / delay_unit_ps)), 1)
+        self._bin_width_s = bin_width * delay_unit_ps * 1e-12
+        number_of_bins = max(int(np.ceil(record_length_s / self._bin_width_s)), 1)
+        gates = number_of_gates if self._gated else 0
 
-        self.result = []
-        self.initialize(2)
-        return
+        with self.threadlock:
+            self._decoder = PicoHarpTTTRDecoder(tttr_mode)
+            self._histogram = TTTRHistogram(number_of_bins, bin_width, gates)
+        return self._bin_width_s, number_of_bins * self._bin_width_s, gates if self._gated else None
 
     def get_status(self):
         """
@@ -1113,22 +1129,23 @@ class PicoHarp300(Base, SlowCounterInterface, FastCounterInterface):
         """
         Continues the current measurement if the fast counter is in pause state.
         """
+        self.lock()
         self.meas_run = True
-        self.start(self._record_length_ns/1e6)
+        self.start(self.ACQTMAX)
+        self.sigReadoutPicoharp.emit()
 
     def is_gated(self):
         """
         Boolean return value indicates if the fast counter is a gated counter
         (TRUE) or not (FALSE).
         """
-        return False
+        return self._gated
 
     def get_binwidth(self):
         """
         returns the width of a single timebin in the timetrace in seconds
         """
-        #FIXME: Must be implemented
-        return 2e-9
+        return self._bin_width_s
 
     def get_data_trace(self):
         """
@@ -1142,9 +1159,43 @@ class PicoHarp300(Base, SlowCounterInterface, FastCounterInterface):
             returnarray[gate_index, timebin_index]
         """
 
-        info_dict = {'elapsed_sweeps': None,
-                     'elapsed_time': None}  # TODO : implement that according to hardware capabilities
-        return self.data_trace, info_dict
+        with self.threadlock:
+            if self._histogram is None:
+                self.log.error('PicoHarp: Fast counter has not been configured.')
+                return np.zeros(0, dtype=np.int64), {'elapsed_sweeps': None, 'elapsed_time': None}
+            data = self._histogram.data.copy()
+            sweeps = self._histogram.sweeps
+        elapsed_time = None if self._start_time is None else time.time() - self._start_time
+        info_dict = {'elapsed_sweeps': sweeps,
+                     'elapsed_time': elapsed_time}
+        return data, info_dict
+
+    def get_data_trace_dtype(self):
+        """ Returns the numpy dtype the hardware natively delivers the timetrace counts in.
+
+        @return numpy.dtype: dtype of the counts (the decoded histogram is int64)
+        """
+        return np.dtype(np.int64)
+
+    def get_data_trace_into(self, buffer):
+        """ Polls the current timetrace data and writes it into the buffer of the caller instead
+        of copying the histogram into a new array.
+
+        @param numpy.ndarray buffer: array with the shape of the timetrace to write the counts into
+
+        @return dict: info_dict like returned by get_data_trace, None if the buffer does not have
+                      the shape of the timetrace
+        """
+        with self.threadlock:
+            if self._histogram is None:
+                self.log.error('PicoHarp: Fast counter has not been configured.')
+                return None
+            if buffer.shape != self._histogram.data.shape:
+                return None
+            np.copyto(buffer, self._histogram.data, casting='unsafe')
+            sweeps = self._histogram.sweeps
+        elapsed_time = None if self._start_time is None else time.time() - self._start_time
+        return {'elapsed_sweeps': sweeps, 'elapsed_time': elapsed_time}
 
     # =========================================================================
     #  Test routine for continuous readout
@@ -1155,14 +1206,24 @@ class PicoHarp300(Base, SlowCounterInterface, FastCounterInterface):
         """
         Starts the fast counter.
         """
+        if self._decoder is None or self._histogram is None:
+            self.log.error('PicoHarp: Fast counter has not been configured. Call configure before '
+                           'starting a measurement.')
+            return -1
+
         self.lock()
 
         self.meas_run = True
+        with self.threadlock:
+            self._decoder.reset()
+            self._histogram.clear()
+        self._start_time = time.time()
 
-        # start the device:
-        self.start(int(self._record_length_ns/1e6))
+        # start the device (records are streamed until stop_measure is called):
+        self.start(self.ACQTMAX)
 
         self.sigReadoutPicoharp.emit()
+        return 0
 
     def stop_measure(self):
         """ By setting the Flag, the measurement should stop.  """
@@ -1177,7 +1238,7 @@ class PicoHarp300(Base, SlowCounterInterface, FastCounterInterface):
         #        buffer, actual_counts = [1,2,3,4,5,6,7,8,9], 9
 
         # This analysis signel should be analyzed in a queued thread:
-        self.sigAnalyzeData.emit(buffer[0:actual_counts-1], actual_counts)
+        self.sigAnalyzeData.emit(buffer[:actual_counts], actual_counts)
 
         if not self.meas_run:
             with self.threadlock:
@@ -1185,7 +1246,6 @@ class PicoHarp300(Base, SlowCounterInterface, FastCounterInterface):
                 self.stop_device()
                 return
 
-        print('get new data.')
         # get the next data:
         self.sigReadoutPicoharp.emit()
 
@@ -1197,8 +1257,10 @@ class PicoHarp300(Base, SlowCounterInterface, FastCounterInterface):
         @param arr_data: numpy uint32 array with length 'actual_counts'.
         @param actual_counts: int, number of read out events from the buffer.
 
-        Write the obtained arr_data to the predefined array data_trace,
-        initialized in the configure method.
+        The records are decoded (see PicoHarpTTTRDecoder) and added to the
+        histogram initialized in the configure method, which is returned by
+        get_data_trace. Overflows and the sync reference are carried over
+        between consecutive FIFO reads.
 
         The received array contains 32bit words. The bit assignment starts from
         the MSB (most significant bit), which is here displayed as the most
@@ -1271,36 +1333,13 @@ class PicoHarp300(Base, SlowCounterInterface, FastCounterInterface):
                       the channel-number are set to high (i.e. 1).
         """
 
-        # at first just a simple test
-        time.sleep(0.2)
-
-        self.data_trace[self.count] = actual_counts
-        self.count += 1
-
-        if self.count > self._number_of_gates-1:
-            self.count = 0
-
         if actual_counts == self.TTREADMAX:
-            self.log.warning('Overflow!')
-
-        print('Data analyzed.')
-
-#        self.result = []
-#        for entry in arr_data[0:actual_counts-1]:
-#
-#            # apply three bitmasks to extract the relavent numbers:
-#            overflow = entry & (2**(32-1) )
-#            marker_ch = entry & (2**(32-2)  + 2**(32-3) + 2**(32-4))
-#            time_tag = entry & (2**32 -1 - 2**(32-1) + 2**(32-2) + 2**(32-3) + 2**(32-4))
-
-
-
-
-
-
-
-
-
-
-
+            self.log.warning('PicoHarp: FIFO read returned the maximum number of records. Data '
+                             'might be lost if the count rate is too high.')
 
+        with self.threadlock:
+            if self._decoder is None:
+                return
+            events = self._decoder.decode(arr_data[:actual_counts])
+            self._histogram.add(events)
+        return
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+"""
+This file contains vectorized decoding of PicoHarp TTTR records (T2 and T3 mode) and a histogram
+accumulator for the decoded events.
+
+Qudi is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Qudi. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
+top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
+"""
+
+import numpy as np
+
+
+class TTTREvents:
+    """
+    Decoded events of a block of TTTR records.
+
+    All events are described by a sync index and a delay after this sync:
+        T3 mode: sync is the (overflow corrected) sync counter and delay the start-stop time in
+                 units of the resolution.
+        T2 mode: sync is the number of events on the sync channel (channel 0) recorded so far and
+                 delay the time since the last sync event in units of 4 ps.
+
+    @attr numpy.ndarray channel: channel number of each photon event
+    @attr numpy.ndarray sync: sync index of each photon event (int64)
+    @attr numpy.ndarray delay: delay after the sync of each photon event (int64)
+    @attr numpy.ndarray marker_sync: sync index of each marker event (int64)
+    @attr numpy.ndarray marker_bits: marker bits (1..15) of each marker event
+    @attr numpy.ndarray index: position of the record of each photon event in the block
+    @attr numpy.ndarray marker_index: position of the record of each marker event in the block
+    @attr int overflows: number of overflow records in the block
+    @attr int syncs: number of syncs (sweeps) covered by the block
+    """
+
+    def __init__(self, channel, sync, delay, marker_sync, marker_bits, index, marker_index,
+                 overflows, syncs):
+        self.channel = channel
+        self.sync = sync
+        self.delay = delay
+        self.marker_sync = marker_sync
+        self.marker_bits = marker_bits
+        self.index = index
+        self.marker_index = marker_index
+        self.overflows = overflows
+        self.syncs = syncs
+
+
+class PicoHarpTTTRDecoder:
+    """
+    Vectorized decoder for the 32 bit TTTR records of the PicoHarp 300.
+
+    T2 record: [channel 4 bit | time tag 28 bit]
+        channel 15 is a special record. If the lower 4 bits of the time tag are zero it is an
+        overflow (time tag wrap around), otherwise these bits are external markers.
+    T3 record: [channel 4 bit | dtime 12 bit | nsync 16 bit]
+        channel 15 is a special record. If dtime is zero it is an overflow of nsync, otherwise the
+        lower 4 bits of dtime are external markers.
+
+    The decoder keeps the overflow count and the last sync (in T2 mode the time and index of the
+    last sync event) between calls of decode, so consecutive FIFO reads can be passed in one after another.
+    """
+
+    T2_WRAPAROUND = 210698240
+    T3_WRAPAROUND = 65536
+    SPECIAL_CHANNEL = 15
+
+    def __init__(self, mode):
+        """
+        @param int mode: TTTR mode of the device (2: T2 mode, 3: T3 mode)
+        """
+        if mode not in (2, 3):
+            raise ValueError('PicoHarp TTTR mode must be 2 (T2) or 3 (T3).')
+        self.mode = mode
+        self.reset()
+
+    def reset(self):
+        """ Reset the carry-over state. Call before a new measurement is started.
+        """
+        self._overflows = 0
+        self._last_nsync = None
+        self._last_sync_time = None
+        self._sync_count = 0
+
+    def decode(self, records):
+        """ Decode a block of TTTR records.
+
+        @param numpy.ndarray records: uint32 records as read from the FIFO
+
+        @return TTTREvents: decoded photon and marker events
+        """
+        records = np.asarray(records, dtype=np.uint32)
+        channel = (records >> 28).astype(np.uint8)
+        special = channel == self.SPECIAL_CHANNEL
+
+        if self.mode == 3:
+            dtime = ((records >> 16) & 0xFFF).astype(np.int64)
+            time_tag = (records & 0xFFFF).astype(np.int64)
+            overflow = special & (dtime == 0)
+            wraparound = self.T3_WRAPAROUND
+        else:
+            dtime = None
+            time_tag = (records & 0xFFFFFFF).astype(np.int64)
+            overflow = special & ((time_tag & 0xF) == 0)
+            wraparound = self.T2_WRAPAROUND
+
+        # overflow correction: number of overflows before each record (incl. previous reads)
+        overflow_count = np.cumsum(overflow, dtype=np.int64)
+        overflow_count += self._overflows
+        time_tag += overflow_count * wraparound
+        number_of_overflows = int(overflow_count[-1] - self._overflows) if records.size else 0
+        self._overflows += number_of_overflows
+
+        marker = special & ~overflow
+        photon = ~special
+
+        if self.mode == 3:
+            marker_bits = (dtime[marker] & 0xF).astype(np.uint8)
+            # the sync counter only tells which syncs have passed. Count sweeps from the time tags.
+            syncs = 0
+            if records.size:
+                syncs = int(time_tag[-1] - self._last_nsync) if self._last_nsync is not None \
+                    else int(time_tag[-1] - time_tag[0])
+                self._last_nsync = int(time_tag[-1])
+            return TTTREvents(channel=channel[photon],
+                              sync=time_tag[photon],
+                              delay=dtime[photon],
+                              marker_sync=time_tag[marker],
+                              marker_bits=marker_bits,
+                              index=np.flatnonzero(photon),
+                              marker_index=np.flatnonzero(marker),
+                              overflows=number_of_overflows,
+                              syncs=syncs)
+
+        # T2 mode: photons are referenced to the last event on the sync channel (channel 0)
+        is_sync = photon & (channel == 0)
+        sync_index = np.cumsum(is_sync, dtype=np.int64) + self._sync_count
+        sync_times = time_tag[is_sync]
+        # time of the last sync before (or at) each record
+        last_sync_pos = np.cumsum(is_sync) - 1
+        if self._last_sync_time is None:
+            last_time = np.full(records.size, -1, dtype=np.int64)
+            valid = last_sync_pos >= 0
+            last_time[valid] = sync_times[last_sync_pos[valid]]
+        else:
+            sync_times = np.concatenate(([self._last_sync_time], sync_times))
+            last_time = sync_times[last_sync_pos + 1]
+        has_sync = last_time >= 0
+
+        photon_mask = photon & (channel != 0) & has_sync
+        marker_mask = marker & has_sync
+        syncs = int(np.count_nonzero(is_sync))
+        self._sync_count += syncs
+        if sync_times.size:
+            self._last_sync_time = int(sync_times[-1])
+        return TTTREvents(channel=channel[photon_mask],
+                          sync=sync_index[photon_mask],
+                          delay=time_tag[photon_mask] - last_time[photon_mask],
+                          marker_sync=sync_index[marker_mask],
+                          marker_bits=(time_tag[marker_mask] & 0xF).astype(np.uint8),
+                          index=np.flatnonzero(photon_mask),
+                          marker_index=np.flatnonzero(marker_mask),
+                          overflows=number_of_overflows,
+                          syncs=syncs)
+
+
+class TTTRHistogram:
+    """
+    Accumulates decoded TTTR events into a timetrace histogram.
+
+    Ungated: all photons are binned by their delay after the sync into one histogram.
+    Gated: the gate index of a photon is the number of syncs since the last marker event recorded
+    before the photon, i.e. a marker has to flag the start of the gate sequence and each gate
+    starts with a sync. Photons before the first marker or in gates >= number_of_gates are dropped.
+
+    The marker state is carried over between calls of add.
+    """
+
+    def __init__(self, number_of_bins, bin_width, number_of_gates=0, channels=None):
+        """
+        @param int number_of_bins: number of bins per histogram (gate)
+        @param int bin_width: width of a histogram bin in delay units (see TTTREvents)
+        @param int number_of_gates: number of gates. 0 for an ungated histogram.
+        @param list channels: optional, photon channels to count (default: all)
+        """
+        self.number_of_bins = int(number_of_bins)
+        self.bin_width = max(int(bin_width), 1)
+        self.number_of_gates = int(number_of_gates)
+        self.channels = None if channels is None else np.asarray(channels)
+        if self.number_of_gates > 0:
+            self._data = np.zeros((self.number_of_gates, self.number_of_bins), dtype=np.int64)
+        else:
+            self._data = np.zeros(self.number_of_bins, dtype=np.int64)
+        self._last_marker_sync = None
+        self.sweeps = 0
+
+    @property
+    def data(self):
+        """ The accumulated histogram (1D for ungated, 2D (gates, bins) for gated operation).
+        """
+        return self._data
+
+    def clear(self):
+        self._data.fill(0)
+        self._last_marker_sync = None
+        self.sweeps = 0
+
+    def add(self, events):
+        """ Add the photons of a block of decoded events to the histogram.
+
+        @param TTTREvents events: decoded events
+        """
+        delay_bin = events.delay // self.bin_width
+        valid = (delay_bin >= 0) & (delay_bin < self.number_of_bins)
+        if self.channels is not None:
+            valid &= np.isin(events.channel, self.channels)
+
+        if self.number_of_gates <= 0:
+            self._data += np.bincount(delay_bin[valid], minlength=self.number_of_bins)
+            self.sweeps += events.syncs
+            return
+
+        # gate index: syncs since the last marker recorded before the photon (incl. the last
+        # marker of previous blocks). The record order decides, since a marker can be recorded
+        # after a photon with the same sync.
+        marker_sync = events.marker_sync
+        marker_index = events.marker_index
+        if self._last_marker_sync is not None:
+            marker_sync = np.concatenate(([self._last_marker_sync], marker_sync))
+            marker_index = np.concatenate(([-1], marker_index))
+        marker_pos = np.searchsorted(marker_index, events.index) - 1
+        valid &= marker_pos >= 0
+        gate = np.zeros(events.sync.size, dtype=np.int64)
+        gate[valid] = events.sync[valid] - marker_sync[marker_pos[valid]]
+        valid &= gate < self.number_of_gates
+        index = gate[valid] * self.number_of_bins + delay_bin[valid]
+        self._data += np.bincount(index, minlength=self._data.size).reshape(self._data.shape)
+        self.sweeps += events.marker_sync.size
+        if marker_sync.size:
+            self._last_marker_sync = int(marker_sync[-1])
@@ -218,6 +218,29 @@ class TimeTaggerFastCounter(Base, FastCounterInterface):
                      'elapsed_time': None}  # TODO : implement that according to hardware capabilities
         return np.array(self.pulsed.getData(), dtype='int64'), info_dict
 
+    def get_data_trace_dtype(self):
+        """ Returns the numpy dtype the hardware natively delivers the timetrace counts in.
+
+        @return numpy.dtype: dtype of the counts (TimeDifferences.getData returns int32)
+        """
+        return np.dtype(np.int32)
+
+    def get_data_trace_into(self, buffer):
+        """ Polls the current timetrace data and writes it into the buffer of the caller, without
+        the intermediate int64 copy of get_data_trace.
+
+        @param numpy.ndarray buffer: array with the shape of the timetrace to write the counts into
+
+        @return dict: info_dict like returned by get_data_trace, None if the buffer does not have
+                      the shape of the timetrace
+        """
+        data = self.pulsed.getData()
+        if buffer.shape != data.shape:
+            return None
+        np.copyto(buffer, data, casting='unsafe')
+        return {'elapsed_sweeps': None,
+                'elapsed_time': None}  # TODO : implement that according to hardware capabilities
+
 
     def get_status(self):
         """ Receives the current status of the Fast Counter and outputs it as
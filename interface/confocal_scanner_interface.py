@@ -20,6 +20,8 @@ Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
 top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
 """
 
+import numpy as np
+
 from core.interface import abstract_interface_method
 from core.meta import InterfaceMetaclass
 
@@ -180,6 +182,40 @@ class ConfocalScannerInterface(metaclass=InterfaceMetaclass):
         """
         pass
 
+    def supports_frame_scan(self):
+        """ Function to test if the hardware scans a whole frame (sequence of lines) by itself.
+
+        @return bool: Whether the hardware implements scan_frame
+
+        This function is not abstract - Thus it is optional and if a hardware do not implement it, the answer is False.
+        """
+        return False
+
+    def scan_frame(self, frame_paths, pixel_clock=None, line_callback=None):
+        """ Scans a sequence of lines (e.g. a whole image including the return lines) and hands back the counts line by
+        line as soon as they are available.
+
+        @param list frame_paths: line paths (float[k][n] each, see scan_line) to scan one after another
+        @param list pixel_clock: optional, for each line path whether a pixel clock is needed (default: False)
+        @param callable line_callback: optional, called as line_callback(path_index, counts) with the counts of each
+                                       line path (float[n][m], see scan_line). If it returns False the frame is
+                                       aborted after this line.
+
+        @return int: error code (0:OK, -1:error)
+
+        This function is not abstract - Thus it is optional and if a hardware do not implement it, the lines are
+        scanned one by one with scan_line. Hardware implementing it should also return True in supports_frame_scan.
+        """
+        if pixel_clock is None:
+            pixel_clock = [False] * len(frame_paths)
+        for path_index, line_path in enumerate(frame_paths):
+            counts = self.scan_line(line_path, pixel_clock=pixel_clock[path_index])
+            if np.any(counts == -1):
+                return -1
+            if line_callback is not None and line_callback(path_index, counts) is False:
+                break
+        return 0
+
     @abstract_interface_method
     def close_scanner(self):
         """ Closes the scanner and cleans up afterwards.
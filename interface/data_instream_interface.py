@@ -239,6 +239,13 @@ class DataInStreamInterface(metaclass=InterfaceMetaclass):
         The numpy array must have the same data type as self.data_type.
         If number_of_samples is omitted it will be derived from buffer.shape[1]
 
+        The samples are written into the given array itself (never into a copy of it), so the
+        caller can pass views of its own (persistent) arrays and no memory is allocated per read:
+            2D buffer: buffer[:, :number_of_samples]
+            1D buffer: buffer[:number_of_channels * number_of_samples], channel after channel
+                       (i.e. like a 2D buffer of shape (number_of_channels, number_of_samples)).
+                       A 1D buffer must be C-contiguous.
+
         This method will not return until all requested samples have been read or a timeout occurs.
 
         @param numpy.ndarray buffer: The numpy array to write the samples to
@@ -262,6 +269,7 @@ class DataInStreamInterface(metaclass=InterfaceMetaclass):
 
         This method will read all currently available samples into buffer. If number of available
         samples exceed buffer size, read only as many samples as fit into the buffer.
+        The samples are written into the given array itself (see read_data_into_buffer).
 
         @param numpy.ndarray buffer: The numpy array to write the samples to
 
@@ -285,6 +293,13 @@ class DataInStreamInterface(metaclass=InterfaceMetaclass):
         If no samples are available, this method will immediately return an empty array.
         You can check for a failed data read if number_of_samples != <return_array>.shape[1].
 
+        The returned array is a C-contiguous view of an internal ring buffer of self.buffer_size
+        samples per channel, so no memory is allocated per read. It is not overwritten by the
+        following calls of this method as long as they read less than
+        self.buffer_size - 2 * <largest number of samples per read> samples per channel in total.
+        Copy the data if it is needed for longer. Reading more than self.buffer_size samples at
+        once fails.
+
         @param int number_of_samples: optional, number of samples to read per channel. If omitted,
                                       all available samples are read from buffer.
 
@@ -20,6 +20,8 @@ Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
 top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
 """
 
+import numpy as np
+
 from core.interface import abstract_interface_method
 from core.meta import InterfaceMetaclass
 
@@ -173,5 +175,47 @@ class FastCounterInterface(metaclass=InterfaceMetaclass):
             - 'elapsed_time' : the elapsed time in seconds
 
         If the hardware does not support these features, the values should be None
+
+        Optionally info_dict can contain the key 'is_delta'. If it is True the returned array only
+        contains the counts acquired since the last call of get_data_trace (instead of all counts
+        since the start of the measurement) and the logic accumulates the counts itself.
+        'elapsed_sweeps' and 'elapsed_time' always refer to the whole measurement.
         """
         pass
+
+    def get_data_trace_dtype(self):
+        """ Returns the numpy dtype the hardware natively delivers the timetrace counts in.
+
+        @return numpy.dtype: dtype of the counts (e.g. uint32 for a counter writing 32 bit bins)
+
+        Buffers of this dtype can be filled by get_data_trace_into without any conversion.
+
+        This function is not abstract - Thus it is optional and if a hardware do not implement it, the answer is int64.
+        """
+        return np.dtype(np.int64)
+
+    def get_data_trace_into(self, buffer):
+        """ Polls the current timetrace data from the fast counter like get_data_trace, but writes
+        the counts into a (persistent) array of the caller instead of returning a new array.
+
+        @param numpy.ndarray buffer: array with the shape of the timetrace returned by
+                                     get_data_trace (1D for ungated, 2D for gated counter) to write
+                                     the counts into. Counts are converted if the dtype of the
+                                     buffer differs from get_data_trace_dtype.
+
+        @return dict: info_dict like returned by get_data_trace. None if the buffer does not have
+                      the shape of the timetrace, nothing is written into the buffer in this case.
+
+        This function is not abstract - Thus it is optional and if a hardware do not implement it, the data of
+        get_data_trace is copied into the buffer.
+        """
+        data = self.get_data_trace()
+        if isinstance(data, tuple) and len(data) == 2:
+            data, info_dict = data
+        else:
+            info_dict = {'elapsed_sweeps': None, 'elapsed_time': None}
+        data = np.asarray(data)
+        if data.shape != buffer.shape:
+            return None
+        np.copyto(buffer, data, casting='unsafe')
+        return info_dict
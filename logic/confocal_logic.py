@@ -21,7 +21,9 @@ top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi
 
 from qtpy import QtCore
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from copy import copy
+import threading
 import time
 import datetime
 import numpy as np
@@ -31,6 +33,7 @@ import matplotlib.pyplot as plt
 from logic.generic_logic import GenericLogic
 from core.util.mutex import Mutex
 from core.connector import Connector
+from core.configoption import ConfigOption
 from core.statusvariable import StatusVar
 
 
@@ -257,6 +260,18 @@ class ConfocalLogic(GenericLogic):
     confocalscanner1 = Connector(interface='ConfocalScannerInterface')
     savelogic = Connector(interface='SaveLogic')
 
+    # config options
+    # Optional pipelined scanning: the hardware scans the next line while the counts of the
+    # previous line are processed
+    _pipelined_scan = ConfigOption('pipelined_scan', False)
+    # Optional for pipelined scanning: move to the start of a line and scan it in one hardware
+    # call. Note that the pixel clock is then also output during the move.
+    _merge_return_line = ConfigOption('merge_return_line', False)
+    # Optional frame scanning: the remaining lines of the image are handed to the hardware at once
+    # (see ConfocalScannerInterface.scan_frame). Hardware without native support scans them line
+    # by line.
+    _frame_scan = ConfigOption('frame_scan', False)
+
     # status vars
     _clock_frequency = StatusVar('clock_frequency', 500)
     return_slowness = StatusVar(default=50)
@@ -306,6 +321,13 @@ class ConfocalLogic(GenericLogic):
         self.depth_img_is_xz = True
         self.permanent_scan = False
 
+        # pipelined scanning
+        self._scan_executor = None
+        self._pending_scan_line = None
+        self._pending_scan_frame = None
+        self._scan_paths = None
+        self._return_paths = None
+
     def on_activate(self):
         """ Initialisation performed during activation of the module.
         """
@@ -346,7 +368,18 @@ class ConfocalLogic(GenericLogic):
         self.history_index = len(self.history) - 1
 
         # Sets connections between signals and functions
-        self.signal_scan_lines_next.connect(self._scan_line, QtCore.Qt.QueuedConnection)
+        if self._frame_scan:
+            self._scan_executor = ThreadPoolExecutor(max_workers=1)
+            self.signal_scan_lines_next.connect(self._scan_frame, QtCore.Qt.QueuedConnection)
+            if not self._scanning_device.supports_frame_scan():
+                self.log.info('Scanner hardware does not scan frames by itself. The lines of a '
+                              'frame are scanned one by one.')
+        elif self._pipelined_scan:
+            self._scan_executor = ThreadPoolExecutor(max_workers=1)
+            self.signal_scan_lines_next.connect(self._scan_line_pipelined,
+                                                QtCore.Qt.QueuedConnection)
+        else:
+            self.signal_scan_lines_next.connect(self._scan_line, QtCore.Qt.QueuedConnection)
         self.signal_start_scanning.connect(self.start_scanner, QtCore.Qt.QueuedConnection)
         self.signal_continue_scanning.connect(self.continue_scanner, QtCore.Qt.QueuedConnection)
 
@@ -373,8 +406,21 @@ class ConfocalLogic(GenericLogic):
         for state in reversed(self.history):
             self._statusVariables['history_{0}'.format(histindex)] = state.serialize()
             histindex += 1
+
+        if self._scan_executor is not None:
+            self._scan_executor.shutdown(wait=True)
+            self._scan_executor = None
+        self.signal_scan_lines_next.disconnect()
         return 0
 
+    @property
+    def scan_counter(self):
+        """ Index of the next line to scan in the current image (xy or depth).
+
+        @return int: line index
+        """
+        return self._scan_counter
+
     def save_history_config(self):
         state_config = ConfocalHistoryEntry(self)
         state_config.snapshot(self)
@@ -616,6 +662,8 @@ class ConfocalLogic(GenericLogic):
             self.set_position('scanner')
             return -1
 
+        if self._scan_executor is not None:
+            self._prepare_scan_paths()
         self.signal_scan_lines_next.emit()
         return 0
 
@@ -645,6 +693,8 @@ class ConfocalLogic(GenericLogic):
             self.set_position('scanner')
             return -1
 
+        if self._scan_executor is not None:
+            self._prepare_scan_paths()
         self.signal_scan_lines_next.emit()
         return 0
 
@@ -741,25 +791,8 @@ class ConfocalLogic(GenericLogic):
         """
         # stops scanning
         if self.stopRequested:
-            with self.threadlock:
-                self.kill_scanner()
-                self.stopRequested = False
-                self.module_state.unlock()
-                self.signal_xy_image_updated.emit()
-                self.signal_depth_image_updated.emit()
-                self.set_position('scanner')
-                if self._zscan:
-                    self._depth_line_pos = self._scan_counter
-                else:
-                    self._xy_line_pos = self._scan_counter
-                # add new history entry
-                new_history = ConfocalHistoryEntry(self)
-                new_history.snapshot(self)
-                self.history.append(new_history)
-                if len(self.history) > self.max_history_length:
-                    self.history.pop(0)
-                self.history_index = len(self.history) - 1
-                return
+            self._finish_scan()
+            return
 
         image = self.depth_image if self._zscan else self.xy_image
         n_ch = len(self.get_scanner_axes())
@@ -828,13 +861,13 @@ class ConfocalLogic(GenericLogic):
             else:
                 if n_ch <= 3:
                     return_line = np.vstack([
-                            image[self._scan_counter, 0, 1] * np.ones(self._return_YL.shape),
+                            image[self._scan_counter, 0, 0] * np.ones(self._return_YL.shape),
                             self._return_YL,
                             image[self._scan_counter, 0, 2] * np.ones(self._return_YL.shape)
                         ][0:n_ch])
                 else:
                     return_line = np.vstack([
-                            image[self._scan_counter, 0, 1] * np.ones(self._return_YL.shape),
+                            image[self._scan_counter, 0, 0] * np.ones(self._return_YL.shape),
                             self._return_YL,
                             image[self._scan_counter, 0, 2] * np.ones(self._return_YL.shape),
                             np.ones(self._return_YL.shape) * self._current_a
@@ -878,6 +911,289 @@ class ConfocalLogic(GenericLogic):
             self.stop_scanning()
             self.signal_scan_lines_next.emit()
 
+    def _finish_scan(self):
+        """ Close the scanner after a stop request and add the scan to the history.
+        """
+        with self.threadlock:
+            self.kill_scanner()
+            self.stopRequested = False
+            self.module_state.unlock()
+            self.signal_xy_image_updated.emit()
+            self.signal_depth_image_updated.emit()
+            self.set_position('scanner')
+            if self._zscan:
+                self._depth_line_pos = self._scan_counter
+            else:
+                self._xy_line_pos = self._scan_counter
+            # add new history entry
+            new_history = ConfocalHistoryEntry(self)
+            new_history.snapshot(self)
+            self.history.append(new_history)
+            if len(self.history) > self.max_history_length:
+                self.history.pop(0)
+            self.history_index = len(self.history) - 1
+        return
+
+    def _prepare_scan_paths(self):
+        """ Precompute the scan paths and the return paths of all lines of the image for pipelined
+        scanning.
+
+        The z values of xy scan lines and the a values are filled in right before a line is
+        scanned, since they follow the current position.
+        """
+        image = self.depth_image if self._zscan else self.xy_image
+        n_ch = len(self.get_scanner_axes())
+        n_pos = min(n_ch, 3)
+        n_lines, n_pixels = image.shape[:2]
+
+        # scan lines: [line, axis, pixel]
+        self._scan_paths = np.zeros((n_lines, n_ch, n_pixels))
+        self._scan_paths[:, :n_pos] = image[:, :, :n_pos].transpose(0, 2, 1)
+
+        # lines to go back to the start of the scan line, keeping the other axes constant
+        self._return_paths = np.zeros((n_lines, n_ch, self.return_slowness))
+        self._return_paths[:, :n_pos] = image[:, 0, :n_pos, np.newaxis]
+        if self._zscan and not self.depth_img_is_xz:
+            self._return_paths[:, 1] = self._return_YL
+        else:
+            self._return_paths[:, 0] = self._return_XL
+        self._pending_scan_line = None
+        self._pending_scan_frame = None
+        return
+
+    def _get_line_paths(self, line_index):
+        """ Get the paths to scan a line of the image from the precomputed paths.
+
+        The z values of xy scan lines and the a values are set to the current position here. The
+        scan worker has to be idle when this is called.
+
+        @param int line_index: index of the line in the image
+        @return tuple: move to the start of the line (None if not needed), the scan line and the
+                       return line. The paths are copies since the hardware (e.g. the tilt
+                       correction) may alter them.
+        """
+        image = self.depth_image if self._zscan else self.xy_image
+        n_ch = len(self.get_scanner_axes())
+
+        # adjust z of line in image to current z before scanning the line
+        if not self._zscan:
+            image[line_index, :, 2] = self._current_z
+
+        if line_index == 0:
+            self._current_a = self._scanning_device.get_scanner_position()[-1]
+            # make a line from the current cursor position to the starting position of the scan
+            n_pos = min(n_ch, 3)
+            start_line = np.empty((n_ch, self.return_slowness))
+            start_pos = [self._current_x, self._current_y, self._current_z]
+            for axis in range(n_pos):
+                start_line[axis] = np.linspace(start_pos[axis], image[line_index, 0, axis],
+                                               self.return_slowness)
+        else:
+            start_line = None
+        line = self._scan_paths[line_index].copy()
+        return_line = self._return_paths[line_index].copy()
+
+        for path in (start_line, line, return_line):
+            if path is not None:
+                self._follow_current_position(path)
+        return start_line, line, return_line
+
+    def _follow_current_position(self, path):
+        """ Set the axes of a path which are not scanned to the current position (z for xy scans
+        and a).
+
+        @param numpy.ndarray path: path to alter
+        """
+        n_ch = path.shape[0]
+        if not self._zscan and n_ch > 2:
+            path[2] = self._current_z
+        if n_ch > 3:
+            path[3] = self._current_a
+        return
+
+    def _submit_scan_line(self, line_index):
+        """ Hand the hardware calls for a line of the image over to the scan worker.
+
+        @param int line_index: index of the line in the image
+        """
+        start_line, line, return_line = self._get_line_paths(line_index)
+
+        # list of hardware calls (line path, pixel clock, index of the first scan line pixel or
+        # None to throw the counts away)
+        if self._merge_return_line:
+            if start_line is None:
+                start_line = self._return_paths[line_index - 1].copy()
+                self._follow_current_position(start_line)
+            scan_calls = [(np.hstack((start_line, line)), True, start_line.shape[1])]
+        else:
+            scan_calls = [(line, True, 0), (return_line, False, None)]
+            if start_line is not None:
+                scan_calls.insert(0, (start_line, False, None))
+
+        future = self._scan_executor.submit(self._scan_line_job, scan_calls)
+        self._pending_scan_line = (line_index, future)
+        return
+
+    def _scan_line_job(self, scan_calls):
+        """ Perform the hardware calls for one line. Runs in the scan worker thread.
+
+        @param list scan_calls: list of tuples (line path, pixel clock, index of the first pixel
+                                of the scan line or None to throw the counts away)
+        @return numpy.ndarray: counts of the scan line or None if the hardware reported an error
+        """
+        line_counts = None
+        for line_path, pixel_clock, first_pixel in scan_calls:
+            counts = self._scanning_device.scan_line(line_path, pixel_clock=pixel_clock)
+            if np.any(counts == -1):
+                return None
+            if first_pixel is not None:
+                line_counts = counts[first_pixel:]
+        return line_counts
+
+    def _scan_line_pipelined(self):
+        """ Scan an image in either depth or xy with the hardware calls running in the scan worker.
+
+        The next line is submitted to the scanner before the counts of the previous line are
+        written into the image, so the hardware is kept busy while the data is processed.
+        """
+        try:
+            if self._pending_scan_line is None and not self.stopRequested:
+                self._submit_scan_line(self._scan_counter)
+            if self._pending_scan_line is not None:
+                self._process_scan_line()
+        except:
+            self.log.exception('The scan went wrong, killing the scanner.')
+            self.stop_scanning()
+
+        # stops scanning once the last submitted line is processed
+        if self.stopRequested and self._pending_scan_line is None:
+            self._finish_scan()
+            return
+        self.signal_scan_lines_next.emit()
+        return
+
+    def _process_scan_line(self):
+        """ Wait for the pending line, submit the next one and write the counts into the image.
+        """
+        line_index, future = self._pending_scan_line
+        self._pending_scan_line = None
+        line_counts = future.result()
+        if line_counts is None:
+            self.stopRequested = True
+            return
+
+        next_index = line_index + 1
+        if next_index >= np.size(self._image_vert_axis):
+            next_index = 0 if self.permanent_scan else None
+        if next_index is not None and not self.stopRequested:
+            self._submit_scan_line(next_index)
+
+        # update image with counts from the line just scanned
+        s_ch = len(self.get_scanner_count_channels())
+        if self._zscan:
+            self.depth_image[line_index, :, 3:3 + s_ch] = line_counts
+            self.signal_depth_image_updated.emit()
+        else:
+            self.xy_image[line_index, :, 3:3 + s_ch] = line_counts
+            self.signal_xy_image_updated.emit()
+
+        # stop scanning when last line scan was performed and makes scan not continuable
+        if next_index is None:
+            self._scan_counter = line_index + 1
+            self.stop_scanning()
+            if self._zscan:
+                self._zscan_continuable = False
+            else:
+                self._xyscan_continuable = False
+        else:
+            self._scan_counter = next_index
+        return
+
+    def _scan_frame(self):
+        """ Scan an image in either depth or xy with one scan_frame call of the hardware.
+
+        The remaining lines of the image (incl. the return lines) are handed to the hardware at
+        once. The counts are written into the image line by line as the hardware hands them back.
+        Once the frame is done, this method is triggered again to finish or restart the scan.
+        """
+        try:
+            if self._pending_scan_frame is not None:
+                future = self._pending_scan_frame
+                self._pending_scan_frame = None
+                if future.result() < 0:
+                    self.stopRequested = True
+                elif self._scan_counter >= np.size(self._image_vert_axis):
+                    if self.permanent_scan:
+                        self._scan_counter = 0
+                    else:
+                        self.stop_scanning()
+                        if self._zscan:
+                            self._zscan_continuable = False
+                        else:
+                            self._xyscan_continuable = False
+            if not self.stopRequested:
+                self._submit_scan_frame(self._scan_counter)
+                return
+        except:
+            self.log.exception('The scan went wrong, killing the scanner.')
+            self.stop_scanning()
+
+        if self._pending_scan_frame is None:
+            self._finish_scan()
+        return
+
+    def _submit_scan_frame(self, first_line):
+        """ Hand the lines of the image from first_line on over to the scan worker.
+
+        @param int first_line: index of the first line to scan
+        """
+        frame_paths = list()
+        pixel_clock = list()
+        # line in the image of each path (None for moves)
+        path_lines = list()
+        for line_index in range(first_line, np.size(self._image_vert_axis)):
+            start_line, line, return_line = self._get_line_paths(line_index)
+            if start_line is not None:
+                frame_paths.append(start_line)
+                pixel_clock.append(False)
+                path_lines.append(None)
+            frame_paths.extend((line, return_line))
+            pixel_clock.extend((True, False))
+            path_lines.extend((line_index, None))
+
+        future = self._scan_executor.submit(self._scan_frame_job, frame_paths, pixel_clock,
+                                            path_lines)
+        future.add_done_callback(lambda f: self.signal_scan_lines_next.emit())
+        self._pending_scan_frame = future
+        return
+
+    def _scan_frame_job(self, frame_paths, pixel_clock, path_lines):
+        """ Scan a frame. Runs in the scan worker thread.
+
+        @param list frame_paths: line paths of the frame
+        @param list pixel_clock: for each line path whether a pixel clock is needed
+        @param list path_lines: for each line path the line in the image (None for moves)
+        @return int: error code (0:OK, -1:error)
+        """
+        s_ch = len(self.get_scanner_count_channels())
+
+        def line_callback(path_index, counts):
+            line_index = path_lines[path_index]
+            if line_index is not None:
+                # update image with counts from the line just scanned
+                if self._zscan:
+                    self.depth_image[line_index, :, 3:3 + s_ch] = counts
+                    self.signal_depth_image_updated.emit()
+                else:
+                    self.xy_image[line_index, :, 3:3 + s_ch] = counts
+                    self.signal_xy_image_updated.emit()
+                self._scan_counter = line_index + 1
+            # abort the frame on stop request
+            return not self.stopRequested
+
+        return self._scanning_device.scan_frame(frame_paths, pixel_clock=pixel_clock,
+                                                line_callback=line_callback)
+
     def save_xy_data(self, colorscale_range=None, percentile_range=None, block=True):
         """ Save the current confocal xy data to file.
 
@@ -941,6 +1257,7 @@ class ConfocalLogic(GenericLogic):
                 for n, ch in enumerate(self.get_scanner_count_channels())}
 
         # Save the image data and figure
+        save_jobs = list()
         for n, ch in enumerate(self.get_scanner_count_channels()):
             # data for the text-array "image":
             image_data = OrderedDict()
@@ -950,14 +1267,14 @@ class ConfocalLogic(GenericLogic):
                 'of entries where the Signal is in counts/s:'] = self.xy_image[:, :, 3 + n]
 
             filelabel = 'confocal_xy_image_{0}'.format(ch.replace('/', ''))
-            self._save_logic.save_data(image_data,
-                                       filepath=filepath,
-                                       timestamp=timestamp,
-                                       parameters=parameters,
-                                       filelabel=filelabel,
-                                       fmt='%.6e',
-                                       delimiter='\t',
-                                       plotfig=figs[ch])
+            save_jobs.append(self._save_logic.save_data_async(image_data,
+                                                              filepath=filepath,
+                                                              timestamp=timestamp,
+                                                              parameters=parameters,
+                                                              filelabel=filelabel,
+                                                              fmt='%.6e',
+                                                              delimiter='\t',
+                                                              plotfig=figs[ch]))
 
         # prepare the full raw data in an OrderedDict:
         data = OrderedDict()
@@ -970,16 +1287,16 @@ class ConfocalLogic(GenericLogic):
 
         # Save the raw data to file
         filelabel = 'confocal_xy_data'
-        self._save_logic.save_data(data,
-                                   filepath=filepath,
-                                   timestamp=timestamp,
-                                   parameters=parameters,
-                                   filelabel=filelabel,
-                                   fmt='%.6e',
-                                   delimiter='\t')
-
-        self.log.debug('Confocal Image saved.')
-        self.signal_xy_data_saved.emit()
+        save_jobs.append(self._save_logic.save_data_async(data,
+                                                          filepath=filepath,
+                                                          timestamp=timestamp,
+                                                          parameters=parameters,
+                                                          filelabel=filelabel,
+                                                          fmt='%.6e',
+                                                          delimiter='\t'))
+
+        # The files are written in the background. Report when all of them are done.
+        self._emit_when_saved(save_jobs, self.signal_xy_data_saved)
         return
 
     def save_depth_data(self, colorscale_range=None, percentile_range=None, block=True):
@@ -1050,6 +1367,7 @@ class ConfocalLogic(GenericLogic):
                 for n, ch in enumerate(self.get_scanner_count_channels())}
 
         # Save the image data and figure
+        save_jobs = list()
         for n, ch in enumerate(self.get_scanner_count_channels()):
             # data for the text-array "image":
             image_data = OrderedDict()
@@ -1059,14 +1377,14 @@ class ConfocalLogic(GenericLogic):
                 'of entries where the Signal is in counts/s:'] = self.depth_image[:, :, 3 + n]
 
             filelabel = 'confocal_depth_image_{0}'.format(ch.replace('/', ''))
-            self._save_logic.save_data(image_data,
-                                       filepath=filepath,
-                                       timestamp=timestamp,
-                                       parameters=parameters,
-                                       filelabel=filelabel,
-                                       fmt='%.6e',
-                                       delimiter='\t',
-                                       plotfig=figs[ch])
+            save_jobs.append(self._save_logic.save_data_async(image_data,
+                                                              filepath=filepath,
+                                                              timestamp=timestamp,
+                                                              parameters=parameters,
+                                                              filelabel=filelabel,
+                                                              fmt='%.6e',
+                                                              delimiter='\t',
+                                                              plotfig=figs[ch]))
 
         # prepare the full raw data in an OrderedDict:
         data = OrderedDict()
@@ -1079,16 +1397,40 @@ class ConfocalLogic(GenericLogic):
 
         # Save the raw data to file
         filelabel = 'confocal_depth_data'
-        self._save_logic.save_data(data,
-                                   filepath=filepath,
-                                   timestamp=timestamp,
-                                   parameters=parameters,
-                                   filelabel=filelabel,
-                                   fmt='%.6e',
-                                   delimiter='\t')
-
-        self.log.debug('Confocal Image saved.')
-        self.signal_depth_data_saved.emit()
+        save_jobs.append(self._save_logic.save_data_async(data,
+                                                          filepath=filepath,
+                                                          timestamp=timestamp,
+                                                          parameters=parameters,
+                                                          filelabel=filelabel,
+                                                          fmt='%.6e',
+                                                          delimiter='\t'))
+
+        # The files are written in the background. Report when all of them are done.
+        self._emit_when_saved(save_jobs, self.signal_depth_data_saved)
+        return
+
+    def _emit_when_saved(self, save_jobs, signal):
+        """ Emit a signal once all asynchronous save jobs of an image have finished.
+
+        @param list save_jobs: concurrent.futures.Future objects returned by save_data_async
+        @param QtCore.Signal signal: the signal to emit
+        """
+        remaining = [len(save_jobs)]
+        lock = threading.Lock()
+
+        def job_done(future):
+            with lock:
+                remaining[0] -= 1
+                if remaining[0] > 0:
+                    return
+            if all(job.exception() is None and job.result() != -1 for job in save_jobs):
+                self.log.debug('Confocal Image saved.')
+            else:
+                self.log.error('Saving of confocal image failed.')
+            signal.emit()
+
+        for job in save_jobs:
+            job.add_done_callback(job_done)
         return
 
     def draw_figure(self, data, image_extent, scan_axis=None, cbar_range=None, percentile_range=None,  crosshair_pos=None):
@@ -30,6 +30,7 @@ from core.statusvariable import StatusVar
 from logic.generic_logic import GenericLogic
 from interface.slow_counter_interface import CountingMode
 from core.util.mutex import Mutex
+from core.util.ringbuffer import RingBuffer
 
 
 class CounterLogic(GenericLogic):
@@ -77,6 +78,10 @@ class CounterLogic(GenericLogic):
 
         #locking for thread safety
         self.threadlock = Mutex()
+        # lock of the count trace ring buffers (see countdata)
+        self._trace_lock = Mutex()
+        self._countdata_buffer = None
+        self._countdata_smoothed_buffer = None
 
         self.log.debug('The following configuration was found.')
 
@@ -112,8 +117,7 @@ class CounterLogic(GenericLogic):
         number_of_detectors = constraints.max_detectors
 
         # initialize data arrays
-        self.countdata = np.zeros([len(self.get_channels()), self._count_length])
-        self.countdata_smoothed = np.zeros([len(self.get_channels()), self._count_length])
+        self._init_count_buffers()
         self.rawdata = np.zeros([len(self.get_channels()), self._counting_samples])
         self._already_counted_samples = 0  # For gated counting
         self._data_to_save = []
@@ -426,8 +430,7 @@ class CounterLogic(GenericLogic):
 
             # initialising the data arrays
             self.rawdata = np.zeros([len(self.get_channels()), self._counting_samples])
-            self.countdata = np.zeros([len(self.get_channels()), self._count_length])
-            self.countdata_smoothed = np.zeros([len(self.get_channels()), self._count_length])
+            self._init_count_buffers()
             self._sampling_data = np.empty([len(self.get_channels()), self._counting_samples])
 
             # the sample index for gated counting
@@ -509,8 +512,9 @@ class CounterLogic(GenericLogic):
         else:
             filelabel = 'snapshot_count_trace_' + name_tag
 
+        countdata = self.countdata
         stop_time = self._count_length / self._count_frequency
-        time_step_size = stop_time / len(self.countdata)
+        time_step_size = stop_time / countdata.shape[1]
         x_axis = np.arange(0, stop_time, time_step_size)
 
         # prepare the data in a dict or in an OrderedDict:
@@ -521,7 +525,7 @@ class CounterLogic(GenericLogic):
         datastr = 'Time (s)'
 
         for i, ch in enumerate(chans):
-            savearr[i+1] = self.countdata[i]
+            savearr[i+1] = countdata[i]
             datastr += ',Signal {0} (counts/s)'.format(i)
 
         data[datastr] = savearr.transpose()
@@ -548,23 +552,61 @@ class CounterLogic(GenericLogic):
         """
         return self._counting_device.get_counter_channels()
 
+    @property
+    def countdata(self):
+        """ Snapshot of the count trace, copied upon read (see RingBuffer). Read it once per
+        redraw instead of once per channel.
+
+        @return numpy.ndarray: count trace with shape (channels, count length)
+        """
+        with self._trace_lock:
+            return self._countdata_buffer.data.copy()
+
+    @property
+    def countdata_smoothed(self):
+        """ Snapshot of the smoothed count trace, copied upon read (see RingBuffer).
+
+        @return numpy.ndarray: smoothed count trace with shape (channels, count length)
+        """
+        with self._trace_lock:
+            return self._countdata_smoothed_buffer.data.copy()
+
+    def _init_count_buffers(self):
+        """
+        Initialize the ring buffers holding the count trace and the smoothed count trace.
+        They are only accessed while holding _trace_lock and published as copies by the properties
+        countdata and countdata_smoothed.
+        """
+        channels = len(self.get_channels())
+        with self._trace_lock:
+            self._countdata_buffer = RingBuffer(self._count_length, channels=channels)
+            self._countdata_smoothed_buffer = RingBuffer(self._count_length, channels=channels)
+        return
+
+    def _append_count_data(self, new_counts):
+        """
+        Append one new count value per channel to the count trace and update the smoothed trace.
+
+        @param numpy.ndarray new_counts: 1D array with one count value per channel
+        """
+        with self._trace_lock:
+            self._countdata_buffer.append(new_counts)
+            # calculate the median and save it
+            window_length = min(self._smooth_window_length, self._count_length)
+            median = self._countdata_buffer.moving_median(window_length, number_of_samples=1)
+            self._countdata_smoothed_buffer.append(median)
+            window = -int(self._smooth_window_length / 2) - 1
+            self._countdata_smoothed_buffer.data[:, window:] = median
+        return
+
     def _process_data_continous(self):
         """
         Processes the raw data from the counting device
         @return:
         """
-        for i, ch in enumerate(self.get_channels()):
-            # remember the new count data in circular array
-            self.countdata[i, 0] = np.average(self.rawdata[i])
-        # move the array to the left to make space for the new data
-        self.countdata = np.roll(self.countdata, -1, axis=1)
-        # also move the smoothing array
-        self.countdata_smoothed = np.roll(self.countdata_smoothed, -1, axis=1)
-        # calculate the median and save it
-        window = -int(self._smooth_window_length / 2) - 1
-        for i, ch in enumerate(self.get_channels()):
-            self.countdata_smoothed[i, window:] = np.median(self.countdata[i,
-                                                            -self._smooth_window_length:])
+        # remember the new count data in the ring buffers
+        new_counts = np.average(self.rawdata[:len(self.get_channels())], axis=1)
+        self._append_count_data(new_counts)
 
         # save the data if necessary
         if self._saving:
@@ -583,8 +625,7 @@ class CounterLogic(GenericLogic):
                 chans = self.get_channels()
                 newdata = np.empty((len(chans) + 1, ))
                 newdata[0] = time.time() - self._saving_start_time
-                for i, ch in enumerate(chans):
-                    newdata[i+1] = self.countdata[i, -1]
+                newdata[1:] = new_counts
                 self._data_to_save.append(newdata)
         return
 
@@ -593,15 +634,9 @@ class CounterLogic(GenericLogic):
         Processes the raw data from the counting device
         @return:
         """
-        # remember the new count data in circular array
-        self.countdata[0] = np.average(self.rawdata[0])
-        # move the array to the left to make space for the new data
-        self.countdata = np.roll(self.countdata, -1)
-        # also move the smoothing array
-        self.countdata_smoothed = np.roll(self.countdata_smoothed, -1)
-        # calculate the median and save it
-        self.countdata_smoothed[-int(self._smooth_window_length / 2) - 1:] = np.median(
-            self.countdata[-self._smooth_window_length:])
+        # remember the new count data in the ring buffers
+        new_counts = np.average(self.rawdata, axis=1)
+        self._append_count_data(new_counts)
 
         # save the data if necessary
         if self._saving:
@@ -615,7 +650,7 @@ class CounterLogic(GenericLogic):
             else:
                 # append tuple to data stream (timestamp, average counts)
                 self._data_to_save.append(np.array((time.time() - self._saving_start_time,
-                                                    self.countdata[-1])))
+                                                    new_counts[0])))
         return
 
     def _process_data_finite_gated(self):
@@ -623,17 +658,15 @@ class CounterLogic(GenericLogic):
         Processes the raw data from the counting device
         @return:
         """
-        if self._already_counted_samples+len(self.rawdata[0]) >= len(self.countdata):
-            needed_counts = len(self.countdata) - self._already_counted_samples
-            self.countdata[0:needed_counts] = self.rawdata[0][0:needed_counts]
-            self.countdata = np.roll(self.countdata, -needed_counts)
+        # append the new data to the count trace until count_length samples have been counted
+        needed_counts = self._count_length - self._already_counted_samples
+        new_counts = self.rawdata[:len(self.get_channels()), :needed_counts]
+        with self._trace_lock:
+            self._countdata_buffer.append(new_counts)
+        if self._already_counted_samples + len(self.rawdata[0]) >= self._count_length:
             self._already_counted_samples = 0
             self.stopRequested = True
         else:
-            # replace the first part of the array with the new data:
-            self.countdata[0:len(self.rawdata[0])] = self.rawdata[0]
-            # roll the array by the amount of data it had been inserted:
-            self.countdata = np.roll(self.countdata, -len(self.rawdata[0]))
             # increment the index counter:
             self._already_counted_samples += len(self.rawdata[0])
         return
@@ -22,7 +22,9 @@ top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi
 
 import importlib
 import inspect
+import logging
 import lmfit
+import multiprocessing
 from qtpy import QtCore
 import numpy as np
 import os
@@ -54,11 +56,16 @@ class FitLogic(GenericLogic):
     _additional_methods_import_path = ConfigOption(name='additional_fit_methods_path',
                                                    default=None,
                                                    missing='nothing')
+    # Fit the most used models with the compiled fast path (see fitmethods/fastfitmethods.py)
+    _use_fast_fit = ConfigOption(name='use_fast_fit', default=True, missing='nothing')
 
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
         # locking for thread safety
         self.lock = Mutex()
+        # worker processes for batch fits, started on first use
+        self._batch_fit_pool = None
+        self._batch_fit_pool_size = 0
 
         filenames = []
         # for path in directories:
@@ -82,6 +89,7 @@ class FitLogic(GenericLogic):
                 self.log.error('ConfigOption additional_predefined_methods_path needs to either be a string or '
                                'a list of strings.')
 
+        self._fit_methods_path_list = path_list
         for path in path_list:
             for f in os.listdir(path):
                 if os.path.isfile(os.path.join(path, f)) and f.endswith('.py'):
@@ -177,7 +185,7 @@ class FitLogic(GenericLogic):
 
     def on_deactivate(self):
         """ """
-        pass
+        self._shutdown_batch_fit_pool()
 
     def validate_load_fits(self, fits):
         """ Take fit names and estimators from a dict and check if they are valid.
@@ -283,6 +291,169 @@ class FitLogic(GenericLogic):
       
         return FitContainer(self, container_name, dimension)
 
+    def do_batch_fit(self, fit_function, x_data, y_data, estimator=None, dimension='1d',
+                     units=None, add_params=None, warm_start=True, processes=None,
+                     chunk_size=None, **kwargs):
+        """ Fit the same fit function to a stack of independent data sets (e.g. ODMR channels,
+        POIs or pixels of a map).
+
+        The data sets are split into chunks of consecutive data sets which are fitted in worker
+        processes. Within a chunk each fit can start from the result of the previous data set
+        (warm start), falling back to the estimator if this fit fails. A failing data set does not
+        affect the others.
+
+        @param str fit_function: name of the fit function, i.e. a key of fit_list[dimension]
+                                 (e.g. 'lorentzian' or 'twoDgaussian')
+        @param x_data: x values shared by all data sets or a list with the x values of each
+                       data set (for 2D fits the xy axes)
+        @param y_data: 2D numpy.ndarray with one data set per row or list of data sets
+        @param str estimator: optional, name of the estimator (default: 'generic' or the first
+                              estimator of the fit function)
+        @param str dimension: optional, dimension of the fit function ('1d', '2d' or '3d')
+        @param list units: optional, units passed on to the fit
+        @param Parameters or dict add_params: optional, additional parameters for all fits
+        @param bool warm_start: optional, start each fit from the result of the previous data set
+        @param int processes: optional, number of worker processes (default: number of CPUs,
+                              0: fit in this process)
+        @param int chunk_size: optional, number of consecutive data sets per worker task
+                               (default: split the data sets evenly among the workers)
+        @param kwargs: optional, additional keyword arguments passed on to the fit
+
+        @return list: lmfit.model.ModelResult (incl. result_str_dict) for each data set in order,
+                      None for data sets which could not be fitted
+        """
+        try:
+            fit_methods = self.fit_list[dimension][fit_function]
+        except KeyError:
+            self.log.error('Fit function "{0}" ({1}) for batch fit not found in FitLogic.'
+                           ''.format(fit_function, dimension))
+            return [None] * len(y_data)
+        estimators = [name for name in fit_methods if name not in ('make_fit', 'make_model')]
+        if estimator is None:
+            estimator = 'generic' if 'generic' in estimators else estimators[0]
+        if estimator not in estimators:
+            self.log.error('Estimator "{0}" for fit function "{1}" not found in FitLogic.'
+                           ''.format(estimator, fit_function))
+            return [None] * len(y_data)
+
+        number_of_fits = len(y_data)
+        if isinstance(x_data, (list, tuple)) and len(x_data) == number_of_fits and \
+                (dimension == '1d' or isinstance(x_data[0], (list, tuple))):
+            x_list = list(x_data)
+        else:
+            x_list = [x_data] * number_of_fits
+        y_list = list(y_data)
+
+        if processes is None:
+            processes = os.cpu_count() or 1
+        processes = min(processes, number_of_fits)
+        if chunk_size is None:
+            chunk_size = -(-number_of_fits // max(processes, 1)) if number_of_fits else 1
+        chunk_size = max(int(chunk_size), 1)
+        chunks = [(start, min(start + chunk_size, number_of_fits))
+                  for start in range(0, number_of_fits, chunk_size)]
+
+        fit_args = (fit_function, fit_methods[estimator].__name__)
+        fit_kwargs = {'add_params': add_params, 'warm_start': warm_start, 'units': units,
+                      'fit_kwargs': kwargs}
+        results = list()
+        if processes <= 1 or len(chunks) <= 1:
+            for start, stop in chunks:
+                results.extend(_batch_fit_chunk(*fit_args, x_list[start:stop], y_list[start:stop],
+                                                host=self, **fit_kwargs))
+        else:
+            pool = self._get_batch_fit_pool(processes)
+            if pool is None:
+                for start, stop in chunks:
+                    results.extend(_batch_fit_chunk(*fit_args, x_list[start:stop],
+                                                    y_list[start:stop], host=self, **fit_kwargs))
+            else:
+                tasks = [pool.apply_async(_batch_fit_chunk,
+                                          (*fit_args, x_list[start:stop], y_list[start:stop]),
+                                          fit_kwargs)
+                         for start, stop in chunks]
+                model = fit_methods['make_model']()[0]
+                for (start, stop), task in zip(chunks, tasks):
+                    try:
+                        chunk_results = task.get()
+                    except Exception as e:
+                        chunk_results = ['{0}: {1}'.format(type(e).__name__, e)] * (stop - start)
+                    for index, item in enumerate(chunk_results, start):
+                        if isinstance(item, dict):
+                            item = self._restore_batch_fit_result(model, x_list[index],
+                                                                  y_list[index], item)
+                        results.append(item)
+
+        for index, result in enumerate(results):
+            if isinstance(result, str):
+                self.log.warning('Batch fit "{0}" of data set {1:d} failed: {2}'
+                                 ''.format(fit_function, index, result))
+                results[index] = None
+        return results
+
+    def _get_batch_fit_pool(self, processes):
+        """ Get the pool of worker processes for batch fits with (at least) the given size.
+
+        @param int processes: number of worker processes
+        @return multiprocessing.pool.Pool: the worker pool, None if it could not be started
+        """
+        if self._batch_fit_pool is None or self._batch_fit_pool_size < processes:
+            self._shutdown_batch_fit_pool()
+            try:
+                # Use fresh interpreters instead of forking the (multithreaded) qudi process
+                self._batch_fit_pool = multiprocessing.get_context('spawn').Pool(
+                    processes,
+                    initializer=_init_batch_fit_worker,
+                    initargs=(self._fit_methods_path_list, self._use_fast_fit))
+            except Exception:
+                self.log.exception('Unable to start worker processes for batch fits. '
+                                   'Fitting in this process instead.')
+                return None
+            self._batch_fit_pool_size = processes
+        return self._batch_fit_pool
+
+    def _shutdown_batch_fit_pool(self):
+        """ Stop the worker processes for batch fits.
+        """
+        if self._batch_fit_pool is not None:
+            self._batch_fit_pool.close()
+            self._batch_fit_pool.join()
+            self._batch_fit_pool = None
+            self._batch_fit_pool_size = 0
+
+    def _restore_batch_fit_result(self, model, x_axis, data, result_dict):
+        """ Create an lmfit.model.ModelResult from the result of a batch fit worker.
+
+        @param lmfit.model.Model model: model of the fit function
+        @param x_axis: x values of the data set
+        @param data: the fitted data set
+        @param dict result_dict: result sent back by the worker (see _batch_fit_result_to_dict)
+        @return lmfit.model.ModelResult: the fit result
+        """
+        params = lmfit.parameter.Parameters()
+        init_params = lmfit.parameter.Parameters()
+        parameter_list = result_dict.pop('params')
+        # Add the constraint expressions after all parameters they may refer to
+        for name, value, init_value, stderr, correl, minimum, maximum, vary, _ in parameter_list:
+            params.add(name, value=value, vary=vary, min=minimum, max=maximum)
+            params[name].stderr = stderr
+            params[name].correl = correl
+            init_params.add(name, value=init_value, vary=vary, min=minimum, max=maximum)
+        for name, _, _, stderr, _, _, _, _, expr in parameter_list:
+            if expr is not None:
+                params[name].expr = expr
+                params[name].stderr = stderr
+                init_params[name].expr = expr
+        # ModelResult copies the parameters it is created with, so set them afterwards
+        result = lmfit.model.ModelResult(model, lmfit.parameter.Parameters(), data=data)
+        result.params = params
+        result.init_params = init_params
+        result.init_values = init_params.valuesdict()
+        result.userkws = {model.independent_vars[0]: x_axis}
+        for name, value in result_dict.items():
+            setattr(result, name, value)
+        return result
+
 
 class FitContainer(QtCore.QObject):
     """ A class for managing a single flexible fit setting in a logic module.
@@ -450,8 +621,7 @@ class FitContainer(QtCore.QObject):
         if self.current_fit != 'No Fit':
             # after the fit was performed, retrieve the fitting function and
             # evaluate the fitted parameters according to the function:
-            model, params = self.fit_list[self.current_fit]['make_model']()
-            fit_y = model.eval(x=fit_x, params=result.params)
+            fit_y = result.model.eval(x=fit_x, params=result.params)
 
         if result is not None:
             self.current_fit_param = result.params
@@ -462,3 +632,159 @@ class FitContainer(QtCore.QObject):
         self.sigFitUpdated.emit()
 
         return fit_x, fit_y, result
+
+    def do_batch_fit(self, x_data, y_data, **kwargs):
+        """ Performs the chosen fit on a stack of independent data sets.
+
+        @param x_data: x values shared by all data sets or a list with the x values of each set
+        @param y_data: 2D numpy.ndarray with one data set per row or list of data sets
+        @param kwargs: optional, see FitLogic.do_batch_fit (e.g. warm_start, processes)
+
+        @return list: lmfit.model.ModelResult for each data set in order, None for data sets which
+                      could not be fitted or if no fit is chosen
+        """
+        if self.current_fit not in self.fit_list:
+            return [None] * len(y_data)
+        fit = self.fit_list[self.current_fit]
+        return self.fit_logic.do_batch_fit(fit['fit_name'],
+                                           x_data,
+                                           y_data,
+                                           estimator=fit['est_name'],
+                                           dimension=self.dimension,
+                                           units=self.units,
+                                           add_params=self.use_settings,
+                                           **kwargs)
+
+
+# Attributes of the fit results sent back from the batch fit worker processes
+_BATCH_FIT_RESULT_ATTRIBUTES = ('best_fit', 'init_fit', 'residual', 'success', 'message',
+                                'errorbars', 'nfev', 'ndata', 'nvarys', 'nfree', 'chisqr',
+                                'redchi', 'aic', 'bic', 'covar', 'var_names', 'result_str_dict')
+
+
+class _BatchFitHost:
+    """ Provides the methods of the fit method files in the batch fit worker processes, just like
+    FitLogic does in the main process.
+    """
+    log = logging.getLogger(__name__)
+    _use_fast_fit = True
+
+
+# The fit method host of a batch fit worker process
+_batch_fit_host = None
+
+
+def _init_batch_fit_worker(path_list, use_fast_fit=True):
+    """ Import the fit methods in a batch fit worker process.
+
+    @param list path_list: directories to import the fit method files from
+    @param bool use_fast_fit: optional, use the fast path for fitting (see FitLogic)
+    """
+    global _batch_fit_host
+    _BatchFitHost._use_fast_fit = use_fast_fit
+    for path in path_list:
+        if path not in sys.path:
+            sys.path.append(path)
+        for f in os.listdir(path):
+            if not (os.path.isfile(os.path.join(path, f)) and f.endswith('.py')):
+                continue
+            try:
+                mod = importlib.import_module(f[:-3])
+            except Exception:
+                _BatchFitHost.log.exception('Fit method file "{0}" could not be imported.'
+                                            ''.format(f))
+                continue
+            for method in dir(mod):
+                ref = getattr(mod, method)
+                if callable(ref) and (inspect.ismethod(ref) or inspect.isfunction(ref)):
+                    setattr(_BatchFitHost, method, ref)
+    _batch_fit_host = _BatchFitHost()
+
+
+def _batch_fit_chunk(fit_function, estimator, x_list, y_list, add_params=None, warm_start=True,
+                     units=None, fit_kwargs=None, host=None):
+    """ Fit consecutive data sets one after another.
+
+    @param str fit_function: name of the fit function
+    @param str estimator: name of the estimator method
+    @param list x_list: x values of each data set
+    @param list y_list: data sets
+    @param Parameters or dict add_params: optional, additional parameters for all fits
+    @param bool warm_start: optional, start each fit from the result of the previous data set
+    @param list units: optional, units passed on to the fit
+    @param dict fit_kwargs: optional, additional keyword arguments passed on to the fit
+    @param host: optional, object providing the fit methods. If None, this is a worker process
+                 and the results are converted to dicts to be sent back.
+
+    @return list: fit result of each data set or an error message string if the fit failed
+    """
+    to_dict = host is None
+    if host is None:
+        host = _batch_fit_host
+    if fit_kwargs is None:
+        fit_kwargs = dict()
+    make_fit = getattr(host, 'make_{0}_fit'.format(fit_function))
+    estimator = getattr(host, estimator)
+
+    results = list()
+    previous = None
+    for x_axis, data in zip(x_list, y_list):
+        try:
+            result = None
+            if warm_start and previous is not None:
+                result = make_fit(x_axis, data, estimator, units=units,
+                                  add_params=_warm_start_params(previous.params, add_params),
+                                  **fit_kwargs)
+                if not result.success:
+                    result = None
+            if result is None:
+                result = make_fit(x_axis, data, estimator, units=units,
+                                  add_params=_warm_start_params(None, add_params), **fit_kwargs)
+            previous = result if result.success else None
+            results.append(_batch_fit_result_to_dict(result) if to_dict else result)
+        except Exception as e:
+            previous = None
+            results.append('{0}: {1}'.format(type(e).__name__, e))
+    return results
+
+
+def _warm_start_params(previous_params, add_params=None):
+    """ Combine the fitted values of the previous data set with the additional parameters.
+
+    @param Parameters previous_params: fitted parameters of the previous data set (or None)
+    @param Parameters or dict add_params: additional parameters, these take precedence
+    @return dict: parameter update dictionary (see _substitute_params), None if empty
+    """
+    update = OrderedDict()
+    if previous_params is not None:
+        for name, par in previous_params.items():
+            if par.vary and par.expr is None:
+                update[name] = {'value': par.value}
+    if isinstance(add_params, lmfit.parameter.Parameters):
+        for name, par in add_params.items():
+            update.setdefault(name, dict()).update(
+                {attr: getattr(par, attr) for attr in ('min', 'max', 'vary', 'expr', 'value')
+                 if getattr(par, attr) is not None})
+    elif add_params is not None:
+        for name, par in add_params.items():
+            update.setdefault(name, dict()).update(par)
+    return update if update else None
+
+
+def _batch_fit_result_to_dict(result):
+    """ Convert an lmfit.model.ModelResult into a picklable dict.
+
+    The parameters are sent as plain tuples, since serializing lmfit.Parameters (incl. the
+    interpreter symbol table) takes longer than the fit itself.
+
+    @param lmfit.model.ModelResult result: the fit result
+    @return dict: fit result, parameters as list of tuples (name, value, initial value, stderr,
+                  correl, min, max, vary, expr)
+    """
+    result_dict = {name: getattr(result, name, None) for name in _BATCH_FIT_RESULT_ATTRIBUTES}
+    result_dict['params'] = [
+        (name, par.value,
+         result.init_params[name].value if name in result.init_params else par.value,
+         par.stderr, par.correl, par.min, par.max, par.vary, par.expr)
+        for name, par in result.params.items()]
+    return result_dict
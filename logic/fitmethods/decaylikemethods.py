@@ -213,16 +213,16 @@ def make_decayexponential_fit(self, x_axis, data, estimator, units=None, add_par
                            initial fitting values, best fitting values, data
                            with best fit with given axis,...
     """
-    exponentialdecay, params = self.make_decayexponential_model()
+    exponentialdecay, params = self._make_cached_model('decayexponential')
 
     error, params = estimator(x_axis, data, params)
 
     params = self._substitute_params(initial_params=params,
                                      update_params=add_params)
     try:
-        result = exponentialdecay.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(exponentialdecay, data, x_axis, params, **kwargs)
     except:
-        result = exponentialdecay.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(exponentialdecay, data, x_axis, params, **kwargs)
         self.log.warning('The exponentialdecay with offset fit did not work. '
                          'Message: {}'.format(str(result.message)))
 
@@ -334,16 +334,16 @@ def make_decayexponentialstretched_fit(self, x_axis, data, estimator, units=None
                            initial fitting values, best fitting values, data
                            with best fit with given axis,...
     """
-    stret_exp_decay_offset, params = self.make_decayexponentialstretched_model()
+    stret_exp_decay_offset, params = self._make_cached_model('decayexponentialstretched')
 
     error, params = estimator(x_axis, data, params)
 
     params = self._substitute_params(initial_params=params,
                                      update_params=add_params)
     try:
-        result = stret_exp_decay_offset.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(stret_exp_decay_offset, data, x_axis, params, **kwargs)
     except:
-        result = stret_exp_decay_offset.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(stret_exp_decay_offset, data, x_axis, params, **kwargs)
         self.log.warning('The double exponentialdecay with offset fit did not work. '
                          'Message: {}'.format(str(result.message)))
 
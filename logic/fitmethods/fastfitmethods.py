@@ -0,0 +1,483 @@
+# -*- coding: utf-8 -*-
+"""
+This file contains the fast path for fitting the lmfit models of the fit methods, which is imported
+by class FitLogic.
+
+Building an lmfit model out of several Model objects and evaluating it through lmfit during the
+fit (parameter bookkeeping, expression evaluation and numerical derivatives in every iteration)
+takes much longer than the actual computation for the small data sets of e.g. a refocus or an ODMR
+scan. Therefore the models are built only once and the composite models consisting of the basic
+model functions (constant, amplitude, slope, gaussian, lorentzian, sine, exponential decay and 2D
+gaussian) are compiled into vectorized numpy functions with analytic jacobian, which are fitted
+directly with scipy.optimize.least_squares. The result is returned as lmfit.model.ModelResult, so
+nothing changes for the caller. Everything the fast path does not support (other model functions,
+constrained model parameters, additional fit arguments, ...) is fitted by lmfit as before.
+
+Qudi is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Qudi. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
+top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
+"""
+
+import copy
+import inspect
+import operator
+import weakref
+
+import lmfit
+import numpy as np
+import scipy.optimize
+
+# Models built by _make_cached_model, the key is the model method and its keyword arguments.
+_model_cache = dict()
+# Compiled FastFitModel of each model (None if the model is not supported by the fast path).
+_fast_fit_models = weakref.WeakKeyDictionary()
+# Minimal distance of the internal fit variables from the bounds of the parameters at the start
+_BOUND_OFFSET = 1e-3
+
+
+def _make_cached_model(self, model_name, **kwargs):
+    """ Create the model of a make_<model_name>_model method only once and reuse it afterwards.
+
+    @param str model_name: name of the model, e.g. 'gaussian' for make_gaussian_model
+    @param kwargs: optional, keyword arguments passed on to the model method
+
+    @return tuple: (object model, object params), the model is shared by all calls with the same
+                   arguments, the parameters are created anew for each call.
+
+    The returned model must not be changed (e.g. by set_param_hint), since all fits use the same
+    model object.
+    """
+    make_model = getattr(self, 'make_{0}_model'.format(model_name))
+    key = (getattr(make_model, '__func__', make_model), tuple(sorted(kwargs.items())))
+    model = _model_cache.get(key)
+    if model is None:
+        model, params = make_model(**kwargs)
+        _model_cache[key] = model
+        return model, params
+    return model, model.make_params()
+
+
+def _fit_model(self, model, data, x_axis, params, **kwargs):
+    """ Fit an lmfit model to the data, preferably with the fast path.
+
+    @param lmfit.model.Model model: the model to fit
+    @param numpy.array data: data to fit
+    @param x_axis: independent variable of the model
+    @param lmfit.parameter.Parameters params: initial parameters of the fit
+    @param kwargs: optional, additional keyword arguments for lmfit.model.Model.fit
+
+    @return lmfit.model.ModelResult: the fit result, just like model.fit(data, x=x_axis,
+                                     params=params, **kwargs) would return it
+
+    The fast path is used if enabled (ConfigOption use_fast_fit of FitLogic), no additional fit
+    arguments are given and the model is supported by FastFitModel. Otherwise or if the fast path
+    fails the fit is done by lmfit.
+    """
+    if not kwargs and getattr(self, '_use_fast_fit', True):
+        fast_model = self._get_fast_fit_model(model)
+        if fast_model is not None:
+            try:
+                result = fast_model.fit(model, data, x_axis, params)
+            except Exception as e:
+                self.log.debug('Fast fit path failed, using lmfit instead: {0}'.format(e))
+                result = None
+            if result is not None:
+                return result
+    return model.fit(data, x=x_axis, params=params, **kwargs)
+
+
+def _get_fast_fit_model(self, model):
+    """ Get the compiled fast path of a model.
+
+    @param lmfit.model.Model model: the model
+
+    @return FastFitModel: the compiled model, None if the model is not supported by the fast path
+    """
+    try:
+        return _fast_fit_models[model]
+    except KeyError:
+        pass
+    try:
+        fast_model = FastFitModel(model)
+    except ValueError:
+        fast_model = None
+    _fast_fit_models[model] = fast_model
+    return fast_model
+
+
+class FastFitModel:
+    """ Vectorized evaluation of a composite lmfit model together with its analytic jacobian.
+
+    The lmfit model tree is compiled once into a tree of numpy functions. Each basic model
+    function (leaf of the tree) is identified by the name of its function and replaced by a kernel
+    returning the function value and the partial derivatives with respect to its parameters.
+    Composite models are combined with the sum, difference, product and quotient rule.
+    """
+
+    # name of the model function: name of the kernel
+    _kernels = {'constant_function': '_constant_kernel',
+                'amplitude_function': '_constant_kernel',
+                'slope_function': '_constant_kernel',
+                'linear_function': '_linear_kernel',
+                'physical_gauss': '_gauss_kernel',
+                'physical_lorentzian': '_lorentzian_kernel',
+                'bare_sine_function': '_sine_kernel',
+                'barestretchedexponentialdecay_function': '_stretched_decay_kernel',
+                'twoDgaussian_function': '_twoDgaussian_kernel'}
+
+    _operators = (operator.add, operator.sub, operator.mul, operator.truediv)
+
+    def __init__(self, model):
+        """ Compile the model.
+
+        @param lmfit.model.Model model: the model to compile
+
+        @raise ValueError: if the model contains functions not supported by the fast path
+        """
+        self.param_names = list()
+        self._tree = self._compile(model)
+
+    def _compile(self, model):
+        if isinstance(model, lmfit.model.CompositeModel):
+            if model.op not in self._operators:
+                raise ValueError('Operator {0} not supported.'.format(model.op))
+            return model.op, self._compile(model.left), self._compile(model.right)
+
+        func_name = getattr(model.func, '__name__', None)
+        if func_name not in self._kernels:
+            raise ValueError('Model function {0} not supported.'.format(func_name))
+        kernel = getattr(self, self._kernels[func_name])
+        arg_names = [name for name in inspect.signature(model.func).parameters if name != 'x']
+        indices = list()
+        for name in arg_names:
+            name = model.prefix + name
+            if name not in self.param_names:
+                self.param_names.append(name)
+            indices.append(self.param_names.index(name))
+        return None, kernel, indices
+
+    def evaluate(self, x, values):
+        """ Evaluate the model and its partial derivatives.
+
+        @param x: independent variable
+        @param numpy.array values: values of all parameters in the order of self.param_names
+
+        @return tuple: (model value, dict with the partial derivatives by parameter index)
+        """
+        return self._evaluate(self._tree, x, values)
+
+    def _evaluate(self, node, x, values):
+        op, left, right = node
+        if op is None:
+            value, partials = left(x, *values[right])
+            return value, dict(zip(right, partials))
+
+        left_value, left_partials = self._evaluate(left, x, values)
+        right_value, right_partials = self._evaluate(right, x, values)
+        if op is operator.add:
+            value = left_value + right_value
+            right_factor = 1
+        elif op is operator.sub:
+            value = left_value - right_value
+            right_factor = -1
+        elif op is operator.mul:
+            value = left_value * right_value
+            left_partials = {ii: d * right_value for ii, d in left_partials.items()}
+            right_factor = left_value
+        else:
+            value = left_value / right_value
+            left_partials = {ii: d / right_value for ii, d in left_partials.items()}
+            right_factor = -value / right_value
+
+        partials = left_partials
+        for ii, d in right_partials.items():
+            d = right_factor * d
+            partials[ii] = partials[ii] + d if ii in partials else d
+        return value, partials
+
+    def fit(self, model, data, x_axis, params):
+        """ Fit the model with scipy.optimize.least_squares.
+
+        @param lmfit.model.Model model: the lmfit model this instance was compiled from
+        @param numpy.array data: data to fit
+        @param x_axis: independent variable of the model
+        @param lmfit.parameter.Parameters params: initial parameters of the fit
+
+        @return lmfit.model.ModelResult: the fit result, None if the fit can not be done by the
+                                         fast path (the fit should be done by lmfit instead)
+        """
+        for name in self.param_names:
+            if name not in params or params[name].expr is not None:
+                return None
+
+        data = np.asarray(data, dtype=float)
+        residual_data = data.ravel()
+        if not np.all(np.isfinite(residual_data)):
+            return None
+        if isinstance(x_axis, (tuple, list)) and len(x_axis) > 0 and np.ndim(x_axis[0]) > 0:
+            x = tuple(np.asarray(axis, dtype=float) for axis in x_axis)
+        else:
+            x = np.asarray(x_axis, dtype=float)
+
+        pars = [params[name] for name in self.param_names]
+        init_values = np.array([par.value for par in pars], dtype=float)
+        var_indices = [ii for ii, par in enumerate(pars) if par.vary]
+        var_names = [self.param_names[ii] for ii in var_indices]
+        lower = np.array([-np.inf if pars[ii].min is None else pars[ii].min
+                          for ii in var_indices], dtype=float)
+        upper = np.array([np.inf if pars[ii].max is None else pars[ii].max
+                          for ii in var_indices], dtype=float)
+        ndata = residual_data.size
+        nvarys = len(var_indices)
+        if nvarys == 0 or ndata < nvarys or not np.all(np.isfinite(init_values)):
+            return None
+
+        # Bounds are handled like lmfit does for leastsq: the bounded parameters are replaced by
+        # unbounded internal variables, so the fast Levenberg-Marquardt algorithm of MINPACK can
+        # be used for all fits.
+        both = np.isfinite(lower) & np.isfinite(upper)
+        lower_only = np.isfinite(lower) & ~both
+        upper_only = np.isfinite(upper) & ~both
+        span = np.where(both, upper - lower, 1)
+
+        def to_parameters(internal):
+            var_values = internal.copy()
+            gradient = np.ones(nvarys)
+            var_values[both] = lower[both] + span[both] * (np.sin(internal[both]) + 1) / 2
+            gradient[both] = span[both] * np.cos(internal[both]) / 2
+            root = np.sqrt(internal ** 2 + 1)
+            var_values[lower_only] = lower[lower_only] - 1 + root[lower_only]
+            gradient[lower_only] = internal[lower_only] / root[lower_only]
+            var_values[upper_only] = upper[upper_only] + 1 - root[upper_only]
+            gradient[upper_only] = -internal[upper_only] / root[upper_only]
+            return var_values, gradient
+
+        start_values = np.clip(init_values[var_indices], lower, upper)
+        internal_start = start_values.copy()
+        internal_start[both] = np.arcsin(
+            2 * (start_values[both] - lower[both]) / span[both] - 1)
+        internal_start[lower_only] = np.sqrt(
+            (start_values[lower_only] - lower[lower_only] + 1) ** 2 - 1)
+        internal_start[upper_only] = np.sqrt(
+            (upper[upper_only] - start_values[upper_only] + 1) ** 2 - 1)
+        # A parameter starting exactly at a bound has a vanishing derivative with respect to its
+        # internal variable and would never leave the bound, so start slightly inside.
+        internal_start[both] = np.clip(internal_start[both],
+                                       -np.pi / 2 + _BOUND_OFFSET, np.pi / 2 - _BOUND_OFFSET)
+        internal_start[~both] = np.where(np.isfinite(lower[~both]) | np.isfinite(upper[~both]),
+                                         np.maximum(internal_start[~both], _BOUND_OFFSET),
+                                         internal_start[~both])
+
+        # function value and jacobian of the last evaluated internal variables
+        last = dict()
+
+        def evaluate(internal):
+            if 'internal' not in last or not np.array_equal(internal, last['internal']):
+                var_values, gradient = to_parameters(internal)
+                values = init_values.copy()
+                values[var_indices] = var_values
+                value, partials = self.evaluate(x, values)
+                jac = np.zeros((ndata, nvarys))
+                for column, ii in enumerate(var_indices):
+                    if ii in partials:
+                        jac[:, column] = np.ravel(partials[ii])
+                last['internal'] = np.array(internal)
+                last['value'] = np.broadcast_to(np.ravel(value), residual_data.shape)
+                last['jac'] = jac
+                last['gradient'] = gradient
+            return last
+
+        def residual(internal):
+            return evaluate(internal)['value'] - residual_data
+
+        def jacobian(internal):
+            evaluated = evaluate(internal)
+            jac = evaluated['jac'] * evaluated['gradient']
+            # Columns of parameters without effect (e.g. theta of a round 2D gaussian) only contain
+            # rounding errors. Their tiny column norm would scale up the steps of these parameters
+            # enormously, so they are set to zero.
+            column_max = np.max(np.abs(jac), axis=0)
+            jac[:, column_max <= np.finfo(float).eps * np.max(column_max)] = 0
+            return jac
+
+        fit = scipy.optimize.least_squares(residual, internal_start, jac=jacobian, method='lm',
+                                           x_scale='jac', ftol=1.5e-8, xtol=1.5e-8,
+                                           max_nfev=2000 * (nvarys + 1))
+        if not np.all(np.isfinite(fit.fun)):
+            return None
+        fit_values = to_parameters(fit.x)[0]
+
+        # statistics as calculated by lmfit
+        chisqr = float(np.sum(fit.fun ** 2))
+        nfree = ndata - nvarys
+        redchi = chisqr / max(1, nfree)
+        neg2_log_likel = ndata * np.log(max(chisqr, 1e-250 * ndata) / ndata)
+        try:
+            jac = evaluate(fit.x)['jac']
+            covar = np.linalg.inv(np.dot(jac.T, jac)) * redchi
+            if not np.all(np.isfinite(covar)) or np.any(np.diag(covar) <= 0):
+                covar = None
+        except np.linalg.LinAlgError:
+            covar = None
+
+        # ModelResult keeps a copy of the passed parameters as init_params. This copy becomes the
+        # fit result and the (unchanged) passed parameters the initial parameters.
+        result = lmfit.model.ModelResult(model, params, data=data)
+        result_params = result.init_params
+        if result_params is params:
+            result_params = copy.deepcopy(params)
+        result.params = result_params
+        result.init_params = params
+
+        for name, value in zip(var_names, fit_values):
+            result_params[name].value = value
+        for par in result_params.values():
+            par.stderr, par.correl = 0, None
+        if covar is not None:
+            stderr = np.sqrt(np.diag(covar))
+            for ivar, name in enumerate(var_names):
+                par = result_params[name]
+                par.stderr = float(stderr[ivar])
+                par.correl = {name2: float(covar[ivar, jvar] / (stderr[ivar] * stderr[jvar]))
+                              for jvar, name2 in enumerate(var_names) if jvar != ivar}
+            self._propagate_uncertainties(result_params, var_names, covar)
+
+        best_values = init_values.copy()
+        best_values[var_indices] = fit_values
+        best_fit = np.broadcast_to(np.ravel(self.evaluate(x, best_values)[0]),
+                                   residual_data.shape).copy()
+        init_fit = np.broadcast_to(np.ravel(self.evaluate(x, init_values)[0]),
+                                   residual_data.shape).copy()
+
+        result.method = 'least_squares'
+        result.userkws = {'x': x_axis}
+        result.init_values = {name: par.value for name, par in zip(self.param_names, pars)}
+        result.best_values = {name: float(value)
+                              for name, value in zip(self.param_names, best_values)}
+        result.init_fit = init_fit
+        result.best_fit = best_fit
+        result.residual = model._residual(result_params, data, None, x=x_axis)
+        result.success = bool(fit.success)
+        result.message = fit.message
+        result.nfev = fit.nfev
+        result.ndata = ndata
+        result.nvarys = nvarys
+        result.nfree = nfree
+        result.chisqr = chisqr
+        result.redchi = redchi
+        result.aic = neg2_log_likel + 2 * nvarys
+        result.bic = neg2_log_likel + np.log(ndata) * nvarys
+        result.rsquared = 1 - chisqr / max(np.finfo(float).tiny,
+                                           np.sum((residual_data - residual_data.mean()) ** 2))
+        result.var_names = var_names
+        result.covar = covar
+        result.errorbars = covar is not None
+        return result
+
+    @staticmethod
+    def _propagate_uncertainties(params, var_names, covar):
+        """ Calculate the uncertainties of the constrained parameters (e.g. fwhm) from the
+        covariance matrix of the varied parameters.
+
+        @param lmfit.parameter.Parameters params: fitted parameters
+        @param list var_names: names of the varied parameters
+        @param numpy.array covar: covariance matrix of the varied parameters
+        """
+        expr_names = [name for name, par in params.items() if par.expr is not None]
+        if not expr_names:
+            return
+        expr_values = np.array([params[name].value for name in expr_names], dtype=float)
+        gradient = np.zeros((len(expr_names), len(var_names)))
+        for jvar, name in enumerate(var_names):
+            par = params[name]
+            value = par.value
+            step = 1e-3 * par.stderr if par.stderr else 1e-8 * max(abs(value), 1)
+            par.value = value + step
+            if par.value == value:
+                par.value = value - step
+            step = par.value - value
+            if step != 0:
+                shifted = np.array([params[n].value for n in expr_names], dtype=float)
+                gradient[:, jvar] = (shifted - expr_values) / step
+            par.value = value
+        for name, grad in zip(expr_names, gradient):
+            params[name].stderr = float(np.sqrt(np.dot(grad, np.dot(covar, grad))))
+
+    @staticmethod
+    def _constant_kernel(x, value):
+        return value, (1.0,)
+
+    @staticmethod
+    def _linear_kernel(x):
+        return x, ()
+
+    @staticmethod
+    def _gauss_kernel(x, center, sigma):
+        diff = center - x
+        value = np.exp(-diff ** 2 / (2 * sigma ** 2))
+        return value, (-value * diff / sigma ** 2, value * diff ** 2 / sigma ** 3)
+
+    @staticmethod
+    def _lorentzian_kernel(x, center, sigma):
+        diff = center - x
+        denominator = diff ** 2 + sigma ** 2
+        value = sigma ** 2 / denominator
+        return value, (-2 * value * diff / denominator,
+                       2 * sigma * diff ** 2 / denominator ** 2)
+
+    @staticmethod
+    def _sine_kernel(x, frequency, phase):
+        argument = 2 * np.pi * frequency * x + phase
+        cosine = np.cos(argument)
+        return np.sin(argument), (2 * np.pi * x * cosine, cosine)
+
+    @staticmethod
+    def _stretched_decay_kernel(x, beta, lifetime):
+        ratio = x / lifetime
+        power = np.power(ratio, beta)
+        value = np.exp(-power)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            d_beta = np.where(power != 0, -value * power * np.log(np.abs(ratio)), 0.0)
+        return value, (d_beta, value * beta * power / lifetime)
+
+    @staticmethod
+    def _twoDgaussian_kernel(x, amplitude, center_x, center_y, sigma_x, sigma_y, theta, offset):
+        u, v = x
+        du = np.ravel(u) - center_x
+        dv = np.ravel(v) - center_y
+        cos_sq = np.cos(theta) ** 2
+        sin_sq = np.sin(theta) ** 2
+        sin_2theta = np.sin(2 * theta)
+        cos_2theta = np.cos(2 * theta)
+        inv_x = 1 / sigma_x ** 2
+        inv_y = 1 / sigma_y ** 2
+
+        a = cos_sq * inv_x / 2 + sin_sq * inv_y / 2
+        b = -sin_2theta * inv_x / 4 + sin_2theta * inv_y / 4
+        c = sin_sq * inv_x / 2 + cos_sq * inv_y / 2
+        du_sq = du ** 2
+        dv_sq = dv ** 2
+        du_dv = du * dv
+        exponential = np.exp(-(a * du_sq + 2 * b * du_dv + c * dv_sq))
+        gauss = amplitude * exponential
+
+        d_center_x = 2 * gauss * (a * du + b * dv)
+        d_center_y = 2 * gauss * (b * du + c * dv)
+        d_sigma_x = gauss * (cos_sq * du_sq - sin_2theta * du_dv + sin_sq * dv_sq) / sigma_x ** 3
+        d_sigma_y = gauss * (sin_sq * du_sq + sin_2theta * du_dv + cos_sq * dv_sq) / sigma_y ** 3
+        d_theta = -gauss * (inv_y - inv_x) / 2 * (sin_2theta * du_sq + 2 * cos_2theta * du_dv
+                                                   - sin_2theta * dv_sq)
+        return offset + gauss, (exponential, d_center_x, d_center_y, d_sigma_x, d_sigma_y,
+                                d_theta, 1.0)
@@ -318,14 +318,14 @@ def make_gaussian_fit(self, x_axis, data, estimator, units=None, add_params=None
                           with best fit with given axis,...
     """
 
-    mod_final, params = self.make_gaussian_model()
+    mod_final, params = self._make_cached_model('gaussian')
 
     error, params = estimator(x_axis, data, params)
 
     params = self._substitute_params(initial_params=params,
                                      update_params=add_params)
     try:
-        result = mod_final.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(mod_final, data, x_axis, params, **kwargs)
     except:
         self.log.warning('The 1D gaussian peak fit did not work. Error '
                        'message: {0}\n'.format(result.message))
@@ -489,14 +489,14 @@ def make_gaussianlinearoffset_fit(self, x_axis, data, estimator, units=None, add
                           with best fit with given axis,...
     """
 
-    mod_final, params = self.make_gaussianlinearoffset_model()
+    mod_final, params = self._make_cached_model('gaussianlinearoffset')
 
     error, params = estimator(x_axis, data, params)
 
     params = self._substitute_params(initial_params=params,
                                      update_params=add_params)
     try:
-        result = mod_final.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(mod_final, data, x_axis, params, **kwargs)
     except:
         self.log.warning('The 1D gaussian peak fit did not work. Error '
                        'message: {0}\n'.format(result.message))
@@ -613,7 +613,7 @@ def make_gaussiandouble_fit(self, x_axis, data, estimator,
     if units is None:
         units = ['arb. unit', 'arb. unit']
 
-    model, params = self.make_multiplegaussianoffset_model(no_of_functions=2)
+    model, params = self._make_cached_model('multiplegaussianoffset', no_of_functions=2)
 
     error, params = estimator(x_axis, data, params,
                               threshold_fraction,
@@ -624,9 +624,9 @@ def make_gaussiandouble_fit(self, x_axis, data, estimator,
     params = self._substitute_params(initial_params=params,
                                      update_params=add_params)
     try:
-        result = model.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(model, data, x_axis, params, **kwargs)
     except:
-        result = model.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(model, data, x_axis, params, **kwargs)
         self.log.warning('The double gaussian dip fit did not work: {0}'.format(
             result.message))
 
@@ -779,7 +779,7 @@ def make_twoDgaussian_fit(self, xy_axes, data, estimator, units=None, add_params
 
     x_axis, y_axis = xy_axes
 
-    gaussian_2d_model, params = self.make_twoDgaussian_model()
+    gaussian_2d_model, params = self._make_cached_model('twoDgaussian')
 
     error, params = estimator(x_axis=x_axis, y_axis=y_axis,
                               data=data, params=params)
@@ -787,9 +787,9 @@ def make_twoDgaussian_fit(self, xy_axes, data, estimator, units=None, add_params
     params = self._substitute_params(initial_params=params,
                                      update_params=add_params)
     try:
-        result = gaussian_2d_model.fit(data, x=xy_axes, params=params, **kwargs)
+        result = self._fit_model(gaussian_2d_model, data, xy_axes, params, **kwargs)
     except:
-        result = gaussian_2d_model.fit(data, x=xy_axes, params=params, **kwargs)
+        result = self._fit_model(gaussian_2d_model, data, xy_axes, params, **kwargs)
         self.log.warning('The 2D gaussian fit did not work: {0}'.format(
                        result.message))
 
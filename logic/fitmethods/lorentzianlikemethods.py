@@ -299,16 +299,16 @@ def make_lorentzian_fit(self, x_axis, data, estimator, units=None,
                           with best fit with given axis,...
     """
 
-    model, params = self.make_lorentzian_model()
+    model, params = self._make_cached_model('lorentzian')
 
     error, params = estimator(x_axis, data, params)
 
     params = self._substitute_params(initial_params=params,
                                      update_params=add_params)
     try:
-        result = model.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(model, data, x_axis, params, **kwargs)
     except:
-        result = model.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(model, data, x_axis, params, **kwargs)
         self.log.warning('The 1D lorentzian fit did not work. Error '
                          'message: {0}\n'.format(result.message))
 
@@ -452,7 +452,7 @@ def make_lorentziandouble_fit(self, x_axis, data, estimator, units=None, add_par
 
     """
 
-    model, params = self.make_lorentziandouble_model()
+    model, params = self._make_cached_model('lorentziandouble')
 
     error, params = estimator(x_axis, data, params)
 
@@ -460,9 +460,9 @@ def make_lorentziandouble_fit(self, x_axis, data, estimator, units=None, add_par
     params = self._substitute_params(initial_params=params,
                                      update_params=add_params)
     try:
-        result = model.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(model, data, x_axis, params, **kwargs)
     except:
-        result = model.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(model, data, x_axis, params, **kwargs)
         self.log.error('The double lorentzian fit did not '
                      'work: {0}'.format(result.message))
 
@@ -774,16 +774,16 @@ def make_lorentziantriple_fit(self, x_axis, data, estimator, units=None,
                           with best fit with given axis,...
     """
 
-    model, params = self.make_lorentziantriple_model()
+    model, params = self._make_cached_model('lorentziantriple')
 
     error, params = estimator(x_axis, data, params)
 
     params = self._substitute_params(initial_params=params,
                                      update_params=add_params)
     try:
-        result = model.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(model, data, x_axis, params, **kwargs)
     except:
-        result = model.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(model, data, x_axis, params, **kwargs)
         self.log.error('The triple lorentzian fit did not '
                        'work: {0}'.format(result.message))
 
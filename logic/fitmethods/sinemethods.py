@@ -587,16 +587,16 @@ def make_sine_fit(self, x_axis, data, estimator, units=None, add_params=None, **
                            with best fit with given axis,...
     """
 
-    sine, params = self.make_sine_model()
+    sine, params = self._make_cached_model('sine')
 
     error, params = estimator(x_axis, data, params)
 
     params = self._substitute_params(initial_params=params,
                                      update_params=add_params)
     try:
-        result = sine.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(sine, data, x_axis, params, **kwargs)
     except:
-        result = sine.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(sine, data, x_axis, params, **kwargs)
         self.log.error('The sine fit did not work.\n'
                        'Error message: {0}\n'.format(result.message))
 
@@ -696,17 +696,17 @@ def make_sineexponentialdecay_fit(self, x_axis, data, estimator, units=None, add
                            initial fitting values, best fitting values, data
                            with best fit with given axis,...
     """
-    sine_exp_decay_offset, params = self.make_sineexponentialdecay_model()
+    sine_exp_decay_offset, params = self._make_cached_model('sineexponentialdecay')
 
     error, params = estimator(x_axis, data, params)
 
     params = self._substitute_params(initial_params=params,
                                      update_params=add_params)
     try:
-        result = sine_exp_decay_offset.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(sine_exp_decay_offset, data, x_axis, params, **kwargs)
     except:
 
-        result = sine_exp_decay_offset.fit(data, x=x_axis, params=params, **kwargs)
+        result = self._fit_model(sine_exp_decay_offset, data, x_axis, params, **kwargs)
         self.log.error('The sineexponentialdecayoffset fit did not work.\n'
                        'Error message: {0}'.format(result.message))
 
@@ -198,6 +198,28 @@ class ScannerTiltInterfuse(GenericLogic, ConfocalScannerInterface):
             line_path[:][2] += self._calc_dz(line_path[:][0], line_path[:][1])
         return self._scanning_device.scan_line(line_path, pixel_clock)
 
+    def supports_frame_scan(self):
+        """ Function to test if the hardware scans a whole frame (sequence of lines) by itself.
+
+        @return bool: Whether the hardware implements scan_frame
+        """
+        return self._scanning_device.supports_frame_scan()
+
+    def scan_frame(self, frame_paths, pixel_clock=None, line_callback=None):
+        """ Scans a sequence of lines and hands back the counts line by line.
+
+        @param list frame_paths: line paths (float[k][n] each, see scan_line) to scan one after another
+        @param list pixel_clock: optional, for each line path whether a pixel clock is needed
+        @param callable line_callback: optional, called as line_callback(path_index, counts) with the
+                                       counts of each line path. Return False to abort the frame.
+
+        @return int: error code (0:OK, -1:error)
+        """
+        if self.tiltcorrection:
+            for line_path in frame_paths:
+                line_path[:][2] += self._calc_dz(line_path[:][0], line_path[:][1])
+        return self._scanning_device.scan_frame(frame_paths, pixel_clock, line_callback)
+
     def close_scanner(self):
         """ Closes the scanner and cleans up afterwards.
 
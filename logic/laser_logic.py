@@ -20,11 +20,12 @@ top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi
 """
 
 import time
-import numpy as np
 from qtpy import QtCore
 
 from core.connector import Connector
 from core.configoption import ConfigOption
+from core.util.mutex import Mutex
+from core.util.ringbuffer import RingBuffer
 from logic.generic_logic import GenericLogic
 from interface.simple_laser_interface import ControlMode, ShutterState, LaserState
 
@@ -45,7 +46,9 @@ class LaserLogic(GenericLogic):
         self._laser = self.laser()
         self.stopRequest = False
         self.bufferLength = 100
-        self.data = {}
+        # lock of the log ring buffers (see data)
+        self._trace_lock = Mutex()
+        self._data_buffers = {}
 
         # delay timer for querying laser
         self.queryTimer = QtCore.QTimer()
@@ -100,15 +103,14 @@ class LaserLogic(GenericLogic):
             self.laser_current_setpoint = self._laser.get_current_setpoint()
             self.laser_temps = self._laser.get_temperatures()
 
-            for k in self.data:
-                self.data[k] = np.roll(self.data[k], -1)
+            new_values = dict(self.laser_temps)
+            new_values['power'] = self.laser_power
+            new_values['current'] = self.laser_current
+            new_values['time'] = time.time()
 
-            self.data['power'][-1] = self.laser_power
-            self.data['current'][-1] = self.laser_current
-            self.data['time'][-1] = time.time()
-
-            for k, v in self.laser_temps.items():
-                self.data[k][-1] = v
+            with self._trace_lock:
+                for k, buffer in self._data_buffers.items():
+                    buffer.append(new_values[k] if k in new_values else buffer.data[-1])
         except:
             qi = 3000
             self.log.exception("Exception in laser status loop, throttling refresh rate.")
@@ -132,14 +134,25 @@ class LaserLogic(GenericLogic):
             QtCore.QCoreApplication.processEvents()
             time.sleep(self.queryInterval/1000)
 
+    @property
+    def data(self):
+        """ Snapshot of the logged values, copied upon read (see RingBuffer). Read it once per
+        redraw instead of once per curve.
+
+        @return dict: log trace (numpy.ndarray) for 'time', 'power', 'current' and each temperature
+        """
+        with self._trace_lock:
+            return {name: buffer.data.copy() for name, buffer in self._data_buffers.items()}
+
     def init_data_logging(self):
         """ Zero all log buffers. """
-        self.data['current'] = np.zeros(self.bufferLength)
-        self.data['power'] = np.zeros(self.bufferLength)
-        self.data['time'] = np.ones(self.bufferLength) * time.time()
         temps = self._laser.get_temperatures()
-        for name in temps:
-            self.data[name] = np.zeros(self.bufferLength)
+        with self._trace_lock:
+            self._data_buffers['current'] = RingBuffer(self.bufferLength)
+            self._data_buffers['power'] = RingBuffer(self.bufferLength)
+            self._data_buffers['time'] = RingBuffer(self.bufferLength, fill_value=time.time())
+            for name in temps:
+                self._data_buffers[name] = RingBuffer(self.bufferLength)
 
     @QtCore.Slot(ControlMode)
     def set_control_mode(self, mode):
@@ -134,6 +134,14 @@ class LaserScannerLogic(GenericLogic):
         """
         self.stopRequested = True
 
+    @property
+    def scan_counter_up(self):
+        """ Number of upwards scan lines recorded in scan_matrix since the scan has been started.
+
+        @return int: number of scan lines
+        """
+        return self._scan_counter_up
+
     @QtCore.Slot(float)
     def goto_voltage(self, volts=None):
         """Forwarding the desired output voltage to the scanning device.
@@ -56,7 +56,10 @@ class TTInstreamInterfuse(Base, DataInStreamInterface):
 
         # Data buffer
         self._data_buffer = np.empty(0, dtype=self.__data_type)
+        self._data_buffer_position = 0
         self._has_overflown = False
+        # TimeTagger counter measurement of all active channels
+        self.Counterfunc = None
         self._is_running = False
         self._last_read = None
         self._start_time = None
@@ -96,8 +99,8 @@ class TTInstreamInterfuse(Base, DataInStreamInterface):
         """
         if self.is_running:
             self._is_running = False
-        for chn in self.__active_channels:
-            self.Counterfunc[chn].clear()
+        if self.Counterfunc is not None:
+            self.Counterfunc.clear()
         self.Counterfunc = None
 
     def configure(self, *args, **kwargs):
@@ -272,9 +275,10 @@ class TTInstreamInterfuse(Base, DataInStreamInterface):
         self._start_time = time.perf_counter()
         self._last_read = self._start_time
         if self.__measurement_mode == TTMeasurementMode.COUNTER:
-            self.Counterfunc={}
-            for chn in self.__active_channels:
-                self.Counterfunc[chn] = self._tt.counter(channels=[self.__available_channel_codes[chn]], refresh_rate=self.__sample_rate, n_values=(self.buffer_size // self.number_of_channels))
+            self.Counterfunc = self._tt.counter(
+                channels=[self.__available_channel_codes[chn] for chn in self.__active_channels],
+                refresh_rate=self.__sample_rate,
+                n_values=self.buffer_size)
         return 0
 
     def stop_stream(self):
@@ -285,8 +289,8 @@ class TTInstreamInterfuse(Base, DataInStreamInterface):
         """
         if self.is_running:
             self._is_running = False
-        for chn in self.__active_channels:
-            self.Counterfunc[chn].clear()
+        if self.Counterfunc is not None:
+            self.Counterfunc.clear()
         self.Counterfunc = None
         return 0
 
@@ -325,15 +329,32 @@ class TTInstreamInterfuse(Base, DataInStreamInterface):
                                ''.format(self.number_of_channels, buffer.shape[0]))
                 return -1
             number_of_samples = buffer.shape[1] if number_of_samples is None else number_of_samples
-            buffer = buffer.flatten()
+            if number_of_samples > buffer.shape[1]:
+                self.log.error('Number of samples to read ({0:d}) exceeds the size of the buffer '
+                               '({1:d}).'.format(number_of_samples, buffer.shape[1]))
+                return -1
         elif buffer.ndim == 1:
-            number_of_samples = (buffer.size // self.number_of_channels) if number_of_samples is None else number_of_samples
+            if number_of_samples is None:
+                number_of_samples = buffer.size // self.number_of_channels
+            if number_of_samples * self.number_of_channels > buffer.size:
+                self.log.error('Number of samples to read ({0:d} per channel) exceeds the size of '
+                               'the buffer ({1:d}).'.format(number_of_samples, buffer.size))
+                return -1
+            if not buffer.flags['C_CONTIGUOUS']:
+                self.log.error('1D buffer must be C-contiguous. Read failed.')
+                return -1
         else:
             self.log.error('Buffer must be a 1D or 2D numpy.ndarray.')
             return -1
 
         if number_of_samples < 1:
             return 0
+        # 2D view of the samples to read in the buffer of the caller
+        if buffer.ndim == 2:
+            data = buffer[:, :number_of_samples]
+        else:
+            data = buffer[:self.number_of_channels * number_of_samples].reshape(
+                (self.number_of_channels, number_of_samples))
         while self.available_samples < number_of_samples:
             time.sleep(0.001)
 
@@ -345,10 +366,8 @@ class TTInstreamInterfuse(Base, DataInStreamInterface):
         if self.__measurement_mode == TTMeasurementMode.COUNTER:
             self._last_read = time.perf_counter()
 
-            write_offset = 0
-            for i, chn in enumerate(self.__active_channels):
-                buffer[write_offset:(write_offset+number_of_samples)] = self.Counterfunc[chn].getData()[0][-number_of_samples:]
-                write_offset += number_of_samples
+            # one counter for all channels, getData returns its whole history (channels, n_values)
+            np.copyto(data, self.Counterfunc.getData()[:, -number_of_samples:], casting='unsafe')
         return number_of_samples
 
     def read_available_data_into_buffer(self, buffer):
@@ -401,18 +420,18 @@ class TTInstreamInterfuse(Base, DataInStreamInterface):
             return np.empty((0, 0), dtype=self.data_type)
 
         if number_of_samples is None:
-            read_samples = self.read_available_data_into_buffer(self._data_buffer)
-            if read_samples < 0:
-                return np.empty((0, 0), dtype=self.data_type)
-        else:
-            read_samples = self.read_data_into_buffer(self._data_buffer,
-                                                      number_of_samples=number_of_samples)
-            if read_samples != number_of_samples:
-                return np.empty((0, 0), dtype=self.data_type)
+            number_of_samples = min(self.available_samples, self.buffer_size)
+        data = self._get_ring_buffer_view(number_of_samples)
+        if data is None:
+            self.log.error('Unable to read {0:d} samples per channel at once with a buffer size '
+                           'of {1:d} samples per channel.'
+                           ''.format(number_of_samples, self.buffer_size))
+            return np.empty((0, 0), dtype=self.data_type)
 
-        total_samples = self.number_of_channels * read_samples
-        return self._data_buffer[:total_samples].reshape((self.number_of_channels,
-                                                          number_of_samples))
+        read_samples = self.read_data_into_buffer(data, number_of_samples=number_of_samples)
+        if read_samples != number_of_samples:
+            return np.empty((0, 0), dtype=self.data_type)
+        return data
 
     def read_single_point(self):
         """
@@ -576,9 +595,31 @@ class TTInstreamInterfuse(Base, DataInStreamInterface):
             self._data_buffer = np.zeros(
                 self.number_of_channels * self.buffer_size,
                 dtype=self.data_type)
+            self._data_buffer_position = 0
             self._has_overflown = False
         return
 
+    def _get_ring_buffer_view(self, number_of_samples):
+        """
+        Get the view of the internal ring buffer to read the next samples into (see read_data).
+        The samples of all channels of a read are contiguous in the ring buffer. If they do not fit
+        in before the end of the ring buffer, the view starts at its beginning again.
+
+        @param int number_of_samples: number of samples per channel to read
+
+        @return numpy.ndarray: C-contiguous view with shape (number_of_channels, number_of_samples),
+                               None if number_of_samples exceeds the buffer size
+        """
+        total_samples = self.number_of_channels * number_of_samples
+        if total_samples > self._data_buffer.size:
+            return None
+        if self._data_buffer_position + total_samples > self._data_buffer.size:
+            self._data_buffer_position = 0
+        start = self._data_buffer_position
+        self._data_buffer_position += total_samples
+        return self._data_buffer[start:self._data_buffer_position].reshape(
+            (self.number_of_channels, number_of_samples))
+
     def _check_settings_change(self):
         """
         Helper method to check if streamer settings can be changed, i.e. if the streamer is idle.
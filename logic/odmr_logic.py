@@ -36,6 +36,175 @@ from core.configoption import ConfigOption
 from core.statusvariable import StatusVar
 
 
+class OdmrSweepAccumulator:
+    """
+    Accumulates ODMR sweeps with constant cost per sweep.
+
+    Instead of rolling and averaging the whole raw data array for every new sweep, running sums of
+    all sweeps and of the last average_length sweeps are kept. The last ring_length sweeps are kept
+    in a ring (stored in an array of twice the size), so the sweep matrix ordered from newest to
+    oldest sweep is always available as view without copy.
+
+    If keep_history is True the sweeps are additionally stored in preallocated blocks to be able to
+    save the raw data. With history_length only the most recent history_length sweeps are stored
+    and the oldest block is reused, so memory usage stays bounded. Otherwise memory usage is
+    constant.
+    """
+
+    def __init__(self, channels, points, ring_length, average_length=0, keep_history=True,
+                 history_length=None, history_block_length=1000):
+        """
+        @param int channels: number of ODMR channels
+        @param int points: number of frequency points per sweep
+        @param int ring_length: number of most recent sweeps to keep
+        @param int average_length: number of most recent sweeps to average (0 means all)
+        @param bool keep_history: keep the sweeps in memory (needed to save the raw data)
+        @param int history_length: optional, maximum number of most recent sweeps to keep in the
+                                   history (None means all sweeps)
+        @param int history_block_length: number of sweeps per preallocated history block
+        """
+        self._sweep_shape = (int(channels), int(points))
+        self._ring_length = max(1, int(ring_length), int(average_length))
+        self._average_length = max(0, int(average_length))
+        self._keep_history = bool(keep_history)
+        self._history_length = None if history_length is None else max(1, int(history_length))
+        self._history_block_length = max(1, int(history_block_length))
+        if self._history_length is not None:
+            self._history_block_length = min(self._history_block_length, self._history_length)
+        self.clear()
+
+    @property
+    def number_of_sweeps(self):
+        return self._number_of_sweeps
+
+    @property
+    def average_length(self):
+        return self._average_length
+
+    @property
+    def ring_length(self):
+        return self._ring_length
+
+    def clear(self):
+        """ Discard all accumulated sweeps. """
+        self._ring = np.zeros((2 * self._ring_length,) + self._sweep_shape, dtype=np.float64)
+        # index of the newest sweep in the ring storage
+        self._ring_start = self._ring_length
+        self._total_sum = np.zeros(self._sweep_shape, dtype=np.float64)
+        self._window_sum = np.zeros(self._sweep_shape, dtype=np.float64)
+        self._number_of_sweeps = 0
+        # number of valid sweeps in the ring
+        self._ring_fill = 0
+        self._history_blocks = list()
+        self._history_block_fill = 0
+
+    def add_sweep(self, counts):
+        """ Add a new sweep.
+
+        @param numpy.ndarray counts: count data of the sweep with shape (channels, points)
+        """
+        counts = np.asarray(counts, dtype=np.float64).reshape(self._sweep_shape)
+
+        # remove the sweep dropping out of the averaging window from the window sum
+        if 0 < self._average_length <= self._ring_fill:
+            self._window_sum -= self._ring[self._ring_start + self._average_length - 1]
+
+        # Move the sweeps that are still needed to the end of the ring storage
+        if self._ring_start == 0:
+            self._ring[self._ring_length + 1:] = self._ring[:self._ring_length - 1]
+            self._ring_start = self._ring_length + 1
+        self._ring_start -= 1
+        self._ring[self._ring_start] = counts
+
+        self._window_sum += counts
+        self._total_sum += counts
+        self._number_of_sweeps += 1
+        self._ring_fill = min(self._ring_fill + 1, self._ring_length)
+
+        if self._keep_history:
+            if not self._history_blocks or self._history_block_fill == self._history_block_length:
+                # Reuse the oldest block if its sweeps are not needed anymore
+                kept_sweeps = (len(self._history_blocks) - 1) * self._history_block_length + 1
+                if self._history_length is not None and kept_sweeps >= self._history_length:
+                    block = self._history_blocks.pop(0)
+                else:
+                    block = np.empty((self._history_block_length,) + self._sweep_shape,
+                                     dtype=np.float64)
+                self._history_blocks.append(block)
+                self._history_block_fill = 0
+            self._history_blocks[-1][self._history_block_fill] = counts
+            self._history_block_fill += 1
+
+    def mean(self):
+        """ Mean of the last average_length sweeps (or all sweeps if average_length is 0).
+
+        @return numpy.ndarray: mean signal with shape (channels, points)
+        """
+        if self._number_of_sweeps == 0:
+            return np.zeros(self._sweep_shape, dtype=np.float64)
+        if self._average_length <= 0:
+            return self._total_sum / self._number_of_sweeps
+        return self._window_sum / min(self._average_length, self._ring_fill)
+
+    def matrix(self, number_of_lines):
+        """ The most recent sweeps ordered from newest to oldest as view without copy.
+
+        @param int number_of_lines: number of sweeps to return (at most ring_length)
+
+        @return numpy.ndarray: sweep matrix with shape (lines, channels, points)
+        """
+        number_of_lines = min(int(number_of_lines), self._ring_length)
+        return self._ring[self._ring_start:self._ring_start + number_of_lines]
+
+    def raw_data(self):
+        """ All available sweeps ordered from newest to oldest.
+        If the history is not kept, this only includes the last ring_length sweeps, if the history
+        length is limited, the last history_length sweeps.
+
+        @return numpy.ndarray: raw data with shape (sweeps, channels, points)
+        """
+        if not self._keep_history:
+            return self.matrix(self._ring_fill).copy()
+        if not self._history_blocks:
+            return np.empty((0,) + self._sweep_shape, dtype=np.float64)
+        blocks = self._history_blocks[:-1] + [self._history_blocks[-1][:self._history_block_fill]]
+        return np.concatenate(blocks, axis=0)[::-1][:self._history_length]
+
+    def set_average_length(self, average_length):
+        """ Set the number of most recent sweeps to average (0 means all).
+
+        @param int average_length: number of sweeps to average
+        """
+        self._average_length = max(0, int(average_length))
+        if self._average_length > self._ring_length:
+            self.set_ring_length(self._average_length)
+        lines = min(self._average_length, self._ring_fill)
+        self._window_sum = np.sum(self.matrix(lines), axis=0)
+
+    def set_ring_length(self, ring_length):
+        """ Increase the number of most recent sweeps to keep. Already accumulated sweeps are kept.
+        If the history is kept, the ring is refilled with older sweeps from the history.
+
+        @param int ring_length: number of sweeps to keep
+        """
+        ring_length = max(1, int(ring_length))
+        if ring_length <= self._ring_length:
+            return
+        old_lines = self.matrix(self._ring_fill).copy()
+        if self._keep_history:
+            history = self.raw_data()
+            if history.shape[0] > old_lines.shape[0]:
+                old_lines = history[:ring_length]
+        self._ring = np.zeros((2 * ring_length,) + self._sweep_shape, dtype=np.float64)
+        self._ring_start = ring_length
+        self._ring[ring_length:ring_length + old_lines.shape[0]] = old_lines
+        self._ring_length = ring_length
+        self._ring_fill = old_lines.shape[0]
+        if self._average_length > 0:
+            lines = min(self._average_length, self._ring_fill)
+            self._window_sum = np.sum(self.matrix(lines), axis=0)
+
+
 class ODMRLogic(GenericLogic):
     """This is the Logic class for ODMR."""
 
@@ -52,6 +221,11 @@ class ODMRLogic(GenericLogic):
         'LIST',
         missing='warn',
         converter=lambda x: MicrowaveMode[x.upper()])
+    # Keep the sweeps in memory to save the raw data. If False, only the last sweeps needed for
+    # averaging and the matrix plot are kept and memory usage is constant.
+    _keep_raw_data = ConfigOption('keep_raw_data', True)
+    # Maximum number of most recent sweeps kept as raw data, so memory usage stays bounded
+    _raw_data_sweeps = ConfigOption('raw_data_sweeps', 1000)
 
     clock_frequency = StatusVar('clock_frequency', 200)
     cw_mw_frequency = StatusVar('cw_mw_frequency', 2870e6)
@@ -128,12 +302,8 @@ class ODMRLogic(GenericLogic):
 
         # Initalize the ODMR data arrays (mean signal and sweep matrix)
         self._initialize_odmr_plots()
-        # Raw data array
-        self.odmr_raw_data = np.zeros(
-            [self.number_of_lines,
-             len(self._odmr_counter.get_odmr_channels()),
-             self.odmr_plot_x.size]
-        )
+        # Raw data accumulator
+        self._initialize_sweep_accumulator()
 
         # Switch off microwave and set CW frequency and power
         self.mw_off()
@@ -205,6 +375,27 @@ class ODMRLogic(GenericLogic):
         else:
             return None
 
+    def _initialize_sweep_accumulator(self):
+        """ Initializing the accumulator for the raw data of all sweeps. """
+        self._sweep_accumulator = OdmrSweepAccumulator(
+            channels=len(self._odmr_counter.get_odmr_channels()),
+            points=self.odmr_plot_x.size,
+            ring_length=self.number_of_lines,
+            average_length=self.lines_to_average,
+            keep_history=self._keep_raw_data,
+            history_length=self._raw_data_sweeps)
+        return
+
+    @property
+    def odmr_raw_data(self):
+        """ Raw data of all sweeps ordered from newest to oldest sweep.
+        At most the last raw_data_sweeps (ConfigOption) sweeps are available. If the ConfigOption
+        keep_raw_data is False, only the most recent sweeps needed for the plots are available.
+
+        @return numpy.ndarray: raw data with shape (sweeps, channels, frequency points)
+        """
+        return self._sweep_accumulator.raw_data()
+
     def _initialize_odmr_plots(self):
         """ Initializing the ODMR plots (line and matrix). """
 
@@ -266,20 +457,10 @@ class ODMRLogic(GenericLogic):
 
         @return int: actually set lines to average
         """
-        self.lines_to_average = int(lines_to_average)
-
-        if self.lines_to_average <= 0:
-            self.odmr_plot_y = np.mean(
-                self.odmr_raw_data[:max(1, self.elapsed_sweeps), :, :],
-                axis=0,
-                dtype=np.float64
-            )
-        else:
-            self.odmr_plot_y = np.mean(
-                self.odmr_raw_data[:max(1, min(self.lines_to_average, self.elapsed_sweeps)), :, :],
-                axis=0,
-                dtype=np.float64
-            )
+        with self.threadlock:
+            self.lines_to_average = int(lines_to_average)
+            self._sweep_accumulator.set_average_length(self.lines_to_average)
+            self.odmr_plot_y = self._sweep_accumulator.mean()
 
         self.sigOdmrPlotsUpdated.emit(self.odmr_plot_x, self.odmr_plot_y, self.odmr_plot_xy)
         self.sigParameterUpdated.emit({'average_length': self.lines_to_average})
@@ -364,7 +545,9 @@ class ODMRLogic(GenericLogic):
         @return int: actually set number of matrix lines
         """
         if isinstance(number_of_lines, int):
-            self.number_of_lines = number_of_lines
+            with self.threadlock:
+                self.number_of_lines = number_of_lines
+                self._sweep_accumulator.set_ring_length(self.number_of_lines)
         else:
             self.log.warning('set_matrix_line_number failed. '
                              'Input parameter number_of_lines is no integer.')
@@ -663,18 +846,8 @@ class ODMRLogic(GenericLogic):
                 return -1
 
             self._initialize_odmr_plots()
-            # initialize raw_data array
-            estimated_number_of_lines = self.run_time * self.clock_frequency / self.odmr_plot_x.size
-            estimated_number_of_lines = int(1.5 * estimated_number_of_lines)  # Safety
-            if estimated_number_of_lines < self.number_of_lines:
-                estimated_number_of_lines = self.number_of_lines
-            self.log.debug('Estimated number of raw data lines: {0:d}'
-                           ''.format(estimated_number_of_lines))
-            self.odmr_raw_data = np.zeros(
-                [estimated_number_of_lines,
-                 len(self._odmr_counter.get_odmr_channels()),
-                 self.odmr_plot_x.size]
-            )
+            # initialize raw data accumulator
+            self._initialize_sweep_accumulator()
             self.sigNextLine.emit()
             return 0
 
@@ -767,45 +940,15 @@ class ODMRLogic(GenericLogic):
                 self.sigNextLine.emit()
                 return
 
-            # Add new count data to raw_data array and append if array is too small
+            # Add new count data to the accumulator
             if self._clearOdmrData:
-                self.odmr_raw_data[:, :, :] = 0
+                self._sweep_accumulator.clear()
                 self._clearOdmrData = False
-            if self.elapsed_sweeps == (self.odmr_raw_data.shape[0] - 1):
-                expanded_array = np.zeros(self.odmr_raw_data.shape)
-                self.odmr_raw_data = np.concatenate((self.odmr_raw_data, expanded_array), axis=0)
-                self.log.warning('raw data array in ODMRLogic was not big enough for the entire '
-                                 'measurement. Array will be expanded.\nOld array shape was '
-                                 '({0:d}, {1:d}), new shape is ({2:d}, {3:d}).'
-                                 ''.format(self.odmr_raw_data.shape[0] - self.number_of_lines,
-                                           self.odmr_raw_data.shape[1],
-                                           self.odmr_raw_data.shape[0],
-                                           self.odmr_raw_data.shape[1]))
-
-            # shift data in the array "up" and add new data at the "bottom"
-            self.odmr_raw_data = np.roll(self.odmr_raw_data, 1, axis=0)
-
-            self.odmr_raw_data[0] = new_counts
-
-            # Add new count data to mean signal
-            if self._clearOdmrData:
-                self.odmr_plot_y[:, :] = 0
-
-            if self.lines_to_average <= 0:
-                self.odmr_plot_y = np.mean(
-                    self.odmr_raw_data[:max(1, self.elapsed_sweeps), :, :],
-                    axis=0,
-                    dtype=np.float64
-                )
-            else:
-                self.odmr_plot_y = np.mean(
-                    self.odmr_raw_data[:max(1, min(self.lines_to_average, self.elapsed_sweeps)), :, :],
-                    axis=0,
-                    dtype=np.float64
-                )
+            self._sweep_accumulator.add_sweep(new_counts)
 
-            # Set plot slice of matrix
-            self.odmr_plot_xy = self.odmr_raw_data[:self.number_of_lines, :, :]
+            # Update mean signal and plot slice of matrix
+            self.odmr_plot_y = self._sweep_accumulator.mean()
+            self.odmr_plot_xy = self._sweep_accumulator.matrix(self.number_of_lines)
 
             # Update elapsed time/sweeps
             self.elapsed_sweeps += 1
@@ -883,6 +1026,13 @@ class ODMRLogic(GenericLogic):
         if tag is None:
             tag = ''
 
+        # Only the most recent sweeps are kept as raw data (see odmr_raw_data)
+        odmr_raw_data = self.odmr_raw_data[:self.elapsed_sweeps]
+        saved_sweeps = odmr_raw_data.shape[0]
+        if saved_sweeps < self.elapsed_sweeps:
+            self.log.warning('Only the last {0:d} of {1:d} frequency sweeps are kept and saved as '
+                             'raw data (see ConfigOptions "keep_raw_data" and "raw_data_sweeps").'
+                             ''.format(saved_sweeps, self.elapsed_sweeps))
         for nch, channel in enumerate(self.get_odmr_channels()):
             # first save raw data for each channel
             if len(tag) > 0:
@@ -891,24 +1041,27 @@ class ODMRLogic(GenericLogic):
                 filelabel_raw = 'ODMR_data_ch{0}_raw'.format(nch)
 
             data_raw = OrderedDict()
-            data_raw['count data (counts/s)'] = self.odmr_raw_data[:self.elapsed_sweeps, nch, :]
+            data_raw['count data (counts/s)'] = odmr_raw_data[:, nch, :]
             parameters = OrderedDict()
             parameters['Microwave CW Power (dBm)'] = self.cw_mw_power
             parameters['Microwave Sweep Power (dBm)'] = self.sweep_mw_power
             parameters['Run Time (s)'] = self.run_time
             parameters['Number of frequency sweeps (#)'] = self.elapsed_sweeps
+            parameters['Number of saved sweeps (#)'] = saved_sweeps
+            # the saved sweeps are ordered from newest to oldest sweep (counting from 0)
+            parameters['Index of the oldest saved sweep (#)'] = self.elapsed_sweeps - saved_sweeps
             parameters['Start Frequencies (Hz)'] = self.mw_starts
             parameters['Stop Frequencies (Hz)'] = self.mw_stops
             parameters['Step sizes (Hz)'] = self.mw_steps
             parameters['Clock Frequencies (Hz)'] = self.clock_frequency
             parameters['Channel'] = '{0}: {1}'.format(nch, channel)
-            self._save_logic.save_data(data_raw,
-                                       filepath=filepath,
-                                       parameters=parameters,
-                                       filelabel=filelabel_raw,
-                                       fmt='%.6e',
-                                       delimiter='\t',
-                                       timestamp=timestamp)
+            self._save_logic.save_data_async(data_raw,
+                                             filepath=filepath,
+                                             parameters=parameters,
+                                             filelabel=filelabel_raw,
+                                             fmt='%.6e',
+                                             delimiter='\t',
+                                             timestamp=timestamp)
 
             # now create a plot for each scan range
             data_start_ind = 0
@@ -950,14 +1103,14 @@ class ODMRLogic(GenericLogic):
                                        cbar_range=colorscale_range,
                                        percentile_range=percentile_range)
 
-                self._save_logic.save_data(data,
-                                           filepath=filepath,
-                                           parameters=parameters,
-                                           filelabel=filelabel,
-                                           fmt='%.6e',
-                                           delimiter='\t',
-                                           timestamp=timestamp,
-                                           plotfig=fig)
+                self._save_logic.save_data_async(data,
+                                                 filepath=filepath,
+                                                 parameters=parameters,
+                                                 filelabel=filelabel,
+                                                 fmt='%.6e',
+                                                 delimiter='\t',
+                                                 timestamp=timestamp,
+                                                 plotfig=fig)
 
         self.log.info('ODMR data saved to:\n{0}'.format(filepath))
         return
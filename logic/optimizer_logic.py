@@ -79,6 +79,10 @@ class OptimizerLogic(GenericLogic):
         # Keep track of who called the refocus
         self._caller_tag = ''
 
+        # Scan ranges of the current refocus
+        self._scan_xy_size = 0.
+        self._scan_z_size = 0.
+
     def on_activate(self):
         """ Initialisation performed during activation of the module.
 
@@ -188,12 +192,15 @@ class OptimizerLogic(GenericLogic):
         self.refocus_Z_size = size
         self.sigRefocusZSizeChanged.emit()
 
-    def start_refocus(self, initial_pos=None, caller_tag='unknown', tag='logic'):
+    def start_refocus(self, initial_pos=None, caller_tag='unknown', tag='logic', xy_size=None,
+                      z_size=None):
         """ Starts the optimization scan around initial_pos
 
             @param list initial_pos: with the structure [float, float, float]
             @param str caller_tag:
             @param str tag:
+            @param float xy_size: optional, XY scan range of this refocus only (default: refocus_XY_size)
+            @param float z_size: optional, Z scan range of this refocus only (default: refocus_Z_size)
         """
         # checking if refocus corresponding to crosshair or corresponding to initial_pos
 
@@ -211,6 +218,10 @@ class OptimizerLogic(GenericLogic):
         # Keep track of where the start_refocus was initiated
         self._caller_tag = caller_tag
 
+        # Scan ranges of this refocus
+        self._scan_xy_size = self.refocus_XY_size if xy_size is None else float(xy_size)
+        self._scan_z_size = self.refocus_Z_size if z_size is None else float(z_size)
+
         # Set the optim_pos values to match the initial_pos values.
         # This means we can use optim_pos in subsequent steps and ensure
         # that we benefit from any completed optimization step.
@@ -249,10 +260,10 @@ class OptimizerLogic(GenericLogic):
         y0 = self.optim_pos_y
 
         # defining position intervals for refocushttp://www.spiegel.de/
-        xmin = np.clip(x0 - 0.5 * self.refocus_XY_size, self.x_range[0], self.x_range[1])
-        xmax = np.clip(x0 + 0.5 * self.refocus_XY_size, self.x_range[0], self.x_range[1])
-        ymin = np.clip(y0 - 0.5 * self.refocus_XY_size, self.y_range[0], self.y_range[1])
-        ymax = np.clip(y0 + 0.5 * self.refocus_XY_size, self.y_range[0], self.y_range[1])
+        xmin = np.clip(x0 - 0.5 * self._scan_xy_size, self.x_range[0], self.x_range[1])
+        xmax = np.clip(x0 + 0.5 * self._scan_xy_size, self.x_range[0], self.x_range[1])
+        ymin = np.clip(y0 - 0.5 * self._scan_xy_size, self.y_range[0], self.y_range[1])
+        ymax = np.clip(y0 + 0.5 * self._scan_xy_size, self.y_range[0], self.y_range[1])
 
         self._X_values = np.linspace(xmin, xmax, num=self.optimizer_XY_res)
         self._Y_values = np.linspace(ymin, ymax, num=self.optimizer_XY_res)
@@ -278,8 +289,8 @@ class OptimizerLogic(GenericLogic):
         # optimization steps that have occurred.
         z0 = self.optim_pos_z
 
-        zmin = np.clip(z0 - 0.5 * self.refocus_Z_size, self.z_range[0], self.z_range[1])
-        zmax = np.clip(z0 + 0.5 * self.refocus_Z_size, self.z_range[0], self.z_range[1])
+        zmin = np.clip(z0 - 0.5 * self._scan_z_size, self.z_range[0], self.z_range[1])
+        zmax = np.clip(z0 + 0.5 * self._scan_z_size, self.z_range[0], self.z_range[1])
 
         self._zimage_Z_values = np.linspace(zmin, zmax, num=self.optimizer_Z_res)
         self._fit_zimage_Z_values = np.linspace(zmin, zmax, num=self.optimizer_Z_res)
@@ -434,15 +445,17 @@ class OptimizerLogic(GenericLogic):
                 'min': -self.z_refocus_line[:, self.opt_channel].max(),
                 'max': self.z_refocus_line[:, self.opt_channel].max()
             }}
-            result = self._fit_logic.make_gausspeaklinearoffset_fit(
+            result = self._fit_logic.make_gaussianlinearoffset_fit(
                 x_axis=self._zimage_Z_values,
                 data=self.z_refocus_line[:, self.opt_channel],
+                estimator=self._fit_logic.estimate_gaussianlinearoffset_peak,
                 add_params=adjusted_param)
         else:
             if any(self.use_custom_params.values()):
-                result = self._fit_logic.make_gausspeaklinearoffset_fit(
+                result = self._fit_logic.make_gaussianlinearoffset_fit(
                     x_axis=self._zimage_Z_values,
                     data=self.z_refocus_line[:, self.opt_channel],
+                    estimator=self._fit_logic.estimate_gaussianlinearoffset_peak,
                     # Todo: It is required that the changed parameters are given as a dictionary or parameter object
                     add_params=None)
             else:
@@ -467,22 +480,20 @@ class OptimizerLogic(GenericLogic):
                 if self.z_range[0] <= result.best_values['center'] <= self.z_range[1]:
                     self.optim_pos_z = result.best_values['center']
                     self.optim_sigma_z = result.best_values['sigma']
-                    gauss, params = self._fit_logic.make_gaussianlinearoffset_model()
-                    self.z_fit_data = gauss.eval(
-                        x=self._fit_zimage_Z_values, params=result.params)
+                    self.z_fit_data = result.eval(x=self._fit_zimage_Z_values)
                 else:  # new pos is too far away
                     # checks if new pos is too high
                     self.optim_sigma_z = 0.
                     if result.best_values['center'] > self._initial_pos_z:
-                        if self._initial_pos_z + 0.5 * self.refocus_Z_size <= self.z_range[1]:
+                        if self._initial_pos_z + 0.5 * self._scan_z_size <= self.z_range[1]:
                             # moves to higher edge of scan range
-                            self.optim_pos_z = self._initial_pos_z + 0.5 * self.refocus_Z_size
+                            self.optim_pos_z = self._initial_pos_z + 0.5 * self._scan_z_size
                         else:
                             self.optim_pos_z = self.z_range[1]  # moves to highest possible value
                     else:
-                        if self._initial_pos_z + 0.5 * self.refocus_Z_size >= self.z_range[0]:
+                        if self._initial_pos_z + 0.5 * self._scan_z_size >= self.z_range[0]:
                             # moves to lower edge of scan range
-                            self.optim_pos_z = self._initial_pos_z + 0.5 * self.refocus_Z_size
+                            self.optim_pos_z = self._initial_pos_z + 0.5 * self._scan_z_size
                         else:
                             self.optim_pos_z = self.z_range[0]  # moves to lowest possible value
 
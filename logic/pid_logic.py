@@ -20,12 +20,11 @@ Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
 top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
 """
 
-import numpy as np
-
 from core.connector import Connector
 from core.statusvariable import StatusVar
 from core.configoption import ConfigOption
 from core.util.mutex import Mutex
+from core.util.ringbuffer import RingBuffer
 from logic.generic_logic import GenericLogic
 from qtpy import QtCore
 
@@ -62,6 +61,9 @@ class PIDLogic(GenericLogic):
         #number of lines in the matrix plot
         self.NumberOfSecondsLog = 100
         self.threadlock = Mutex()
+        # lock of the history ring buffer (see history)
+        self._trace_lock = Mutex()
+        self._history_buffer = None
 
     def on_activate(self):
         """ Initialisation performed during activation of the module.
@@ -69,7 +71,8 @@ class PIDLogic(GenericLogic):
         self._controller = self.controller()
         self._save_logic = self.savelogic()
 
-        self.history = np.zeros([3, self.bufferLength])
+        with self._trace_lock:
+            self._history_buffer = RingBuffer(self.bufferLength, channels=3)
         self.savingState = False
         self.enabled = False
         self.timer = QtCore.QTimer()
@@ -81,6 +84,26 @@ class PIDLogic(GenericLogic):
         """ Perform required deactivation. """
         pass
 
+    @property
+    def history(self):
+        """ Snapshot of the process value, control value and setpoint history, copied upon read
+        (see RingBuffer).
+
+        @return numpy.ndarray: history with shape (3, buffer length)
+        """
+        with self._trace_lock:
+            return self._history_buffer.data.copy()
+
+    def _get_newest(self, index):
+        """ Newest value of one row of the history without copying the whole history.
+
+        @param int index: row of the history (0: process value, 1: control value, 2: setpoint)
+
+        @return float: newest value
+        """
+        with self._trace_lock:
+            return self._history_buffer.data[index, -1]
+
     def getBufferLength(self):
         """ Get the current data buffer length.
         """
@@ -100,10 +123,11 @@ class PIDLogic(GenericLogic):
     def loop(self):
         """ Execute step in the data recording loop: save one of each control and process values
         """
-        self.history = np.roll(self.history, -1, axis=1)
-        self.history[0, -1] = self._controller.get_process_value()
-        self.history[1, -1] = self._controller.get_control_value()
-        self.history[2, -1] = self._controller.get_setpoint()
+        new_values = [self._controller.get_process_value(),
+                      self._controller.get_control_value(),
+                      self._controller.get_setpoint()]
+        with self._trace_lock:
+            self._history_buffer.append(new_values)
         self.sigUpdateDisplay.emit()
         if self.enabled:
             self.timer.start(self.timestep * 1000)  # in ms
@@ -135,7 +159,8 @@ class PIDLogic(GenericLogic):
             @param int newBufferLength: new buffer length
         """
         self.bufferLength = newBufferLength
-        self.history = np.zeros([3, self.bufferLength])
+        with self._trace_lock:
+            self._history_buffer = RingBuffer(self.bufferLength, channels=3)
 
     def get_kp(self):
         """ Return the proportional constant.
@@ -184,7 +209,7 @@ class PIDLogic(GenericLogic):
 
             @return float: current set point of the PID controller
         """
-        return self.history[2, -1]
+        return self._get_newest(2)
 
     def set_setpoint(self, setpoint):
         """ Set the current setpoint of the PID controller.
@@ -245,11 +270,11 @@ class PIDLogic(GenericLogic):
 
             @return float: current process input value
         """
-        return self.history[0, -1]
+        return self._get_newest(0)
 
     def get_cv(self):
         """ Get current control output value.
 
             @return float: control output value
         """
-        return self.history[1, -1]
+        return self._get_newest(1)
@@ -26,8 +26,11 @@ import numpy as np
 import time
 
 from collections import OrderedDict
+from core.configoption import ConfigOption
 from core.connector import Connector
 from core.statusvariable import StatusVar
+from core.util.drift_estimation import DriftEstimator
+from core.util.spot_detection import detect_spots
 from datetime import datetime
 from logic.generic_logic import GenericLogic
 from qtpy import QtCore
@@ -360,6 +363,34 @@ class PoiManagerLogic(GenericLogic):
     scannerlogic = Connector(interface='ConfocalLogic')
     savelogic = Connector(interface='SaveLogic')
 
+    # config options
+    # sub-pixel refinement of the automatically detected POI positions (None, 'centroid' or
+    # 'gaussian', see core/util/spot_detection.py)
+    _spot_refinement = ConfigOption(name='spot_refinement', default=None, missing='nothing')
+    # predict the ROI drift from the ROI position history during periodic refocus in order to
+    # start the refocus at the predicted position with a smaller scan range and to adapt the
+    # refocus period to how well the drift is predicted
+    _drift_prediction = ConfigOption(name='drift_prediction', default=False, missing='nothing')
+    # standard deviation of a refocus position measurement in m
+    _drift_measurement_noise = ConfigOption(name='drift_measurement_noise',
+                                            default=10e-9,
+                                            missing='nothing')
+    # spectral density of the drift velocity change in m^2/s^3
+    _drift_process_noise = ConfigOption(name='drift_process_noise',
+                                        default=1e-22,
+                                        missing='nothing')
+    # tolerated prediction error as fraction of the optimizer scan ranges. The refocus period is
+    # stretched if the error is below half of it and shortened if the error exceeds it.
+    _drift_tolerance = ConfigOption(name='drift_tolerance', default=0.1, missing='nothing')
+    # smallest refocus scan range as fraction of the optimizer scan ranges
+    _drift_min_scan_range = ConfigOption(name='drift_min_scan_range',
+                                         default=0.3,
+                                         missing='nothing')
+    # limits of the adapted refocus period as multiples of the refocus period
+    _drift_period_scaling = ConfigOption(name='drift_period_scaling',
+                                         default=(0.25, 4),
+                                         missing='nothing')
+
     # status vars
     _roi = StatusVar(default=dict())  # Notice constructor and representer further below
     _refocus_period = StatusVar(default=120)
@@ -388,6 +419,8 @@ class PoiManagerLogic(GenericLogic):
         self.__timer = None
         self._last_refocus = 0
         self._periodic_refocus_poi = None
+        self._effective_refocus_period = 0
+        self._drift_estimator = None
 
         # threading
         self._threadlock = Mutex()
@@ -400,6 +433,9 @@ class PoiManagerLogic(GenericLogic):
         self.__timer.setSingleShot(False)
         self._last_refocus = 0
         self._periodic_refocus_poi = None
+        self._effective_refocus_period = float(self._refocus_period)
+        self._drift_estimator = DriftEstimator(measurement_noise=self._drift_measurement_noise,
+                                               process_noise=self._drift_process_noise)
 
         # Connect callback for a finished refocus
         self.optimiserlogic().sigRefocusFinished.connect(
@@ -535,7 +571,13 @@ class PoiManagerLogic(GenericLogic):
     def time_until_refocus(self):
         if not self.__timer.isActive():
             return -1
-        return max(0., self._refocus_period - (time.time() - self._last_refocus))
+        return max(0., self._effective_refocus_period - (time.time() - self._last_refocus))
+
+    @property
+    def effective_refocus_period(self):
+        """ The period of the running periodic refocus. It differs from refocus_period if it is
+        adapted to the predicted drift (ConfigOption drift_prediction). """
+        return float(self._effective_refocus_period)
 
     @property
     def scanner_position(self):
@@ -602,6 +644,60 @@ class PoiManagerLogic(GenericLogic):
         self.set_active_poi(poi_name)
         return
 
+    def add_pois(self, positions, names=None, emit_change=True):
+        """
+        Creates several new POIs at once and adds them to the current ROI.
+        In contrast to calling add_poi for each POI, the changed POI set is signaled only once
+        (as ROI update). The last added POI is set as active POI.
+
+        @param scalar[n][3] positions: Array of shape (n, 3) with the (x, y, z) positions of the
+                                       new POIs.
+        @param list names: List of n names for the POIs (must be unique within ROI).
+                           None (default) will create generic names.
+        @param bool emit_change: Flag indicating if the changed POI set should be signaled.
+
+        @return list: names of the added POIs
+        """
+        positions = np.asarray(positions, dtype=float)
+        if positions.ndim != 2 or positions.shape[1] != 3:
+            self.log.error('POI positions to add must be an array of shape (n, 3).')
+            return list()
+        if len(positions) == 0:
+            return list()
+
+        if names is None:
+            if self.poi_nametag is None:
+                # Generic names from the current time, numbered to keep them unique.
+                timestamp = datetime.now().strftime('poi_%Y%m%d%H%M%S%f')
+                names = ['{0}_{1:d}'.format(timestamp, ii) for ii in range(len(positions))]
+            else:
+                names = [None] * len(positions)
+        elif len(names) != len(positions):
+            self.log.error('Number of POI names ({0:d}) does not match the number of positions '
+                           '({1:d}).'.format(len(names), len(positions)))
+            return list()
+        else:
+            given_names = [name for name in names if name]
+            if len(set(given_names)) != len(given_names) or set(given_names) & set(self.poi_names):
+                self.log.error('POI names to add must be unique within ROI. No POIs added.')
+                return list()
+
+        current_poi_set = set(self.poi_names)
+
+        # Add POIs to current ROI
+        for position, name in zip(positions, names):
+            self._roi.add_poi(position=position, name=name)
+
+        poi_names = [name for name in self.poi_names if name not in current_poi_set]
+
+        # Notify about the changed set of POIs if necessary
+        if emit_change:
+            self.sigRoiUpdated.emit({'pois': self.poi_positions})
+
+        # Set last created POI as active poi
+        self.set_active_poi(poi_names[-1])
+        return poi_names
+
     @QtCore.Slot()
     def delete_poi(self, name=None):
         """
@@ -858,6 +954,7 @@ class PoiManagerLogic(GenericLogic):
         # Acquire thread lock in order to change the period during a running periodic refocus
         with self._threadlock:
             self._refocus_period = float(period)
+            self._effective_refocus_period = float(period)
             if self.__timer.isActive():
                 self.sigRefocusTimerUpdated.emit(True, self.refocus_period, self.time_until_refocus)
             else:
@@ -903,6 +1000,8 @@ class PoiManagerLogic(GenericLogic):
                 return
             self.module_state.lock()
             self._periodic_refocus_poi = name
+            self._effective_refocus_period = float(self._refocus_period)
+            self._drift_estimator.update_from_history(self.roi_pos_history)
             self.optimise_poi_position(name=name)
             self._last_refocus = time.time()
             self.__timer.timeout.connect(self._periodic_refocus_loop)
@@ -918,6 +1017,7 @@ class PoiManagerLogic(GenericLogic):
                 self.__timer.stop()
                 self.__timer.timeout.disconnect()
                 self._periodic_refocus_poi = None
+                self._effective_refocus_period = float(self._refocus_period)
                 self.module_state.unlock()
             self.sigRefocusTimerUpdated.emit(False, self.refocus_period, self.refocus_period)
         return
@@ -944,9 +1044,12 @@ class PoiManagerLogic(GenericLogic):
         with self._threadlock:
             if self.__timer.isActive():
                 remaining_time = self.time_until_refocus
-                self.sigRefocusTimerUpdated.emit(True, self.refocus_period, remaining_time)
+                self.sigRefocusTimerUpdated.emit(True, self.effective_refocus_period, remaining_time)
                 if remaining_time <= 0 and self.optimiserlogic().module_state() == 'idle':
-                    self.optimise_poi_position(self._periodic_refocus_poi)
+                    if self._drift_prediction:
+                        self._optimise_predicted_poi_position(self._periodic_refocus_poi)
+                    else:
+                        self.optimise_poi_position(self._periodic_refocus_poi)
                     self._last_refocus = time.time()
         return
 
@@ -983,6 +1086,69 @@ class PoiManagerLogic(GenericLogic):
                              'OptimizerLogic module is still locked.')
         return
 
+    def _optimise_predicted_poi_position(self, name):
+        """
+        Starts the optimisation of a POI at the position predicted from the ROI drift with a scan
+        range that is shrunk to the uncertainty of the prediction. The ROI position is updated
+        like in optimise_poi_position.
+
+        @param str name: Name of the POI for which to optimise the position.
+        """
+        optimiser = self.optimiserlogic()
+        if self._drift_estimator.measurements < 2:
+            self.optimise_poi_position(name)
+            return
+        if optimiser.module_state() != 'idle':
+            self.log.warning('Unable to start POI refocus procedure. '
+                             'OptimizerLogic module is still locked.')
+            return
+
+        now = (datetime.now() - self.roi_creation_time).total_seconds()
+        predicted_origin, sigma = self._drift_estimator.predict(now)
+        initial_pos = self.get_poi_position(name) + (predicted_origin - self.roi_origin)
+
+        # scan +-3 sigma of the predicted position and at least the last prediction error
+        uncertainty = np.sqrt(sigma ** 2 + self._drift_measurement_noise ** 2)
+        residual = self._drift_estimator.residual
+        if residual is not None:
+            uncertainty = np.maximum(uncertainty, np.abs(residual))
+        xy_size = np.clip(6 * np.max(uncertainty[:2]),
+                          self._drift_min_scan_range * optimiser.refocus_XY_size,
+                          optimiser.refocus_XY_size)
+        z_size = np.clip(6 * uncertainty[2],
+                         self._drift_min_scan_range * optimiser.refocus_Z_size,
+                         optimiser.refocus_Z_size)
+
+        optimiser.start_refocus(initial_pos=initial_pos,
+                                caller_tag='poimanagermoveroi_{0}'.format(name),
+                                xy_size=xy_size,
+                                z_size=z_size)
+        self.sigRefocusStateUpdated.emit(True)
+        return
+
+    def _update_drift_prediction(self):
+        """
+        Estimates the ROI drift anew from the ROI position history and adapts the period of the
+        running periodic refocus to the error of the last drift prediction.
+        """
+        self._drift_estimator.update_from_history(self.roi_pos_history)
+        residual = self._drift_estimator.residual
+        if residual is None:
+            return
+        optimiser = self.optimiserlogic()
+        error = max(np.max(np.abs(residual[:2])) / optimiser.refocus_XY_size,
+                    abs(residual[2]) / optimiser.refocus_Z_size)
+        period = self._effective_refocus_period
+        if error < 0.5 * self._drift_tolerance:
+            period *= 1.5
+        elif error > self._drift_tolerance:
+            period *= 0.5
+        self._effective_refocus_period = float(np.clip(
+            period,
+            min(self._drift_period_scaling) * self._refocus_period,
+            max(self._drift_period_scaling) * self._refocus_period))
+        return
+
     def _optimisation_callback(self, caller_tag, optimal_pos):
         """
         Callback function for a finished position optimisation.
@@ -1001,6 +1167,9 @@ class PoiManagerLogic(GenericLogic):
                 optimal_pos = np.array(optimal_pos[:3], dtype=float)
                 if shift_roi:
                     self.move_roi_from_poi_position(name=poi_name, position=optimal_pos)
+                    if self._drift_prediction and poi_name == self._periodic_refocus_poi:
+                        with self._threadlock:
+                            self._update_drift_prediction()
                 else:
                     self.set_poi_anchor_from_position(name=poi_name, position=optimal_pos)
                 if self._move_scanner_after_optimization:
@@ -1188,71 +1357,41 @@ class PoiManagerLogic(GenericLogic):
         arr_size = int(spot_size / pixel_size)
         return arr_size
 
-    def _is_spot_shape(self, local_arr):
-        unspot_e = 0
-        ensem_e = 0
-        len_arr = len(local_arr)
-        mid_f = int(0.5 * len_arr)
-        hm_local_arr = local_arr[mid_f].mean()
-        vm_local_arr = local_arr[:, mid_f].mean()
-        for i in range(0, len_arr):
-            if local_arr[i].mean() > hm_local_arr:
-                ensem_e += 1
-            if local_arr[:, i].mean() > vm_local_arr:
-                ensem_e += 1
-            if hm_local_arr > vm_local_arr * 1.2:
-                unspot_e += 1
-            if vm_local_arr > hm_local_arr * 1.2:
-                unspot_e += 1
-        if ensem_e > 4:
-            return False
-        elif unspot_e > 1:
-            return False
-        else:
-            return True
-
-    def _local_max(self, scan):
-        scan = np.asarray(scan, order="C")  # scan has to be a 2-D array
-        filter_size = self._spot_filter(scan)
-        scan_m = scan.mean()
-        mid_f = int(filter_size / 2)
-        xc = []
-        yc = []
-        for i in range(0, len(scan) - filter_size):
-            for j in range(0, len(scan[i]) - filter_size):
-                local_arr = scan[i:i + filter_size, j:j + filter_size]
-                local_arr = np.asarray(local_arr)
-                arr_threshold = scan_m * self._poi_threshold * 0.5
-                if scan[i + mid_f][j + mid_f] == local_arr.max() and self._is_spot_shape(local_arr) and local_arr.mean() > arr_threshold:
-                    xc.append(i + mid_f)
-                    yc.append(j + mid_f)
-        return xc, yc
-
+    @QtCore.Slot()
     def auto_catch_poi(self):
-        scan_image = self.roi_scan_image.T
+        """
+        Detects bright spots in the ROI scan image and adds them as POIs in one update.
+
+        A spot is a local maximum within a window of the POI diameter that is brighter than
+        poi_threshold times the image mean (and the window mean brighter than half of that) and
+        has a round shape (see core/util/spot_detection.py). The POI positions are refined to
+        sub-pixel precision according to the ConfigOption spot_refinement.
+        """
+        if self.roi_scan_image is None or self.roi_scan_image_extent is None:
+            self.log.error('Unable to detect POIs. No ROI scan image present.')
+            return
+
+        # first axis of the image is x
+        scan_image = np.asarray(self.roi_scan_image, dtype=float).T
         x_range = self.roi_scan_image_extent[0]
         y_range = self.roi_scan_image_extent[1]
-        x_axis = np.arange(x_range[0], x_range[1], (x_range[1] - x_range[0]) / len(scan_image))
-        y_axis = np.arange(y_range[0], y_range[1], (y_range[1] - y_range[0]) / len(scan_image[0]))
-
-        for i in range(0, len(scan_image)):
-            for j in range(0, len(scan_image[i])):
-                scan_image[i][j] = int(scan_image[i][j])  # data here somehow needs to be reset, otherwise shit happens.
+        x_step = (x_range[1] - x_range[0]) / scan_image.shape[0]
+        y_step = (y_range[1] - y_range[0]) / scan_image.shape[1]
 
         threshold = scan_image.mean() * self._poi_threshold
+        try:
+            spots = detect_spots(scan_image,
+                                 spot_size=self._spot_filter(scan_image),
+                                 threshold=threshold,
+                                 mean_threshold=threshold * 0.5,
+                                 refinement=self._spot_refinement)
+        except ValueError as e:
+            self.log.error('Detection of POIs failed: {0}'.format(e))
+            return
 
-        xc1, yc1 = self._local_max(scan_image)
-        xc2 = []
-        yc2 = []
-        for i in range(0, len(xc1)):
-            if scan_image[xc1[i], yc1[i]] > threshold:
-                xc2.append(xc1[i])
-                yc2.append(yc1[i])
-
-        pois = np.zeros((len(xc2), 3))
-        z = self.scanner_position[2]
-        for i in range(0, len(pois)):
-            pois[i] = [x_axis[xc2[i]], y_axis[yc2[i]], z]
-            self.add_poi(pois[i])
-            if self.poi_nametag is None:
-                time.sleep(0.1)
\ No newline at end of file
+        pois = np.empty((len(spots), 3))
+        pois[:, 0] = x_range[0] + spots[:, 0] * x_step
+        pois[:, 1] = y_range[0] + spots[:, 1] * y_step
+        pois[:, 2] = self.scanner_position[2]
+        self.add_pois(pois)
+        return
@@ -0,0 +1,597 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains the vectorized sampling engine used by the SequenceGeneratorLogic to turn a
+PulseBlockEnsemble into analog and digital sample arrays.
+
+Qudi is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Qudi. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
+top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
+"""
+
+import hashlib
+import os
+import threading
+import numpy as np
+from collections import OrderedDict
+
+
+def compile_element_runs(ensemble, blocks, sample_rate, digital_channels, laser_on_edges=False,
+                         max_slice_elements=2**20):
+    """ Discretize the element lengths of a PulseBlockEnsemble into a run-length element table.
+
+    The element end times are accumulated and rounded to time bins exactly like in the element by
+    element loop (the cumulative sum of numpy adds sequentially), but for a whole block with all
+    its repetitions at once. Consecutive repetitions of a block with identical element lengths in
+    bins are then stored only once as a run, i.e. the table size scales with the number of distinct
+    repetitions instead of the number of elements. For a block without increments this is a single
+    run no matter how often it is repeated.
+
+    The run table is a dict of int64 arrays with one entry per run:
+        block_index: index of the block in ensemble.block_list
+        repetitions: number of consecutive block repetitions in the run
+        start_bin: first bin of the run
+        rep_length_bins: length in bins of a single block repetition of the run
+        length_offset: index of the first element length of the run in elements_length_bins
+    and the flat array "elements_length_bins" holding the element lengths of one repetition of each
+    run.
+
+    Repetitions are processed in slices of max_slice_elements elements to limit the memory used.
+
+    @param PulseBlockEnsemble ensemble: The ensemble to analyze
+    @param dict blocks: PulseBlock instances used in the ensemble (keys are the block names)
+    @param float sample_rate: The sample rate in samples/s
+    @param iterable digital_channels: digital channel descriptors to detect the edges for
+    @param bool laser_on_edges: optional, also detect the edges of the laser_on flags
+    @param int max_slice_elements: optional, maximum number of elements discretized at once
+
+    @return dict: element_runs (dict, see above), number_of_samples (int),
+                  number_of_elements (int), ideal_length (float),
+                  digital_rising_bins/digital_falling_bins (dict of sorted unique int64 arrays),
+                  laser_rising_bins/laser_falling_bins (sorted unique int64 arrays)
+    """
+    digital_channels = sorted(digital_channels)
+    runs = {key: list() for key in ('block_index', 'repetitions', 'start_bin', 'rep_length_bins',
+                                     'length_offset', 'elements_length_bins')}
+    rising = {chnl: list() for chnl in digital_channels}
+    falling = {chnl: list() for chnl in digital_channels}
+    laser_rising = list()
+    laser_falling = list()
+
+    # The channel states before the first element are the states of the very last element
+    last_block = blocks[ensemble.block_list[-1][0]] if len(ensemble.block_list) > 0 else None
+    if last_block is not None and len(last_block.element_list) > 0:
+        prev_digital = {chnl: bool(last_block.element_list[-1].digital_high[chnl])
+                        for chnl in digital_channels}
+        prev_laser = bool(last_block.element_list[-1].laser_on)
+    else:
+        prev_digital = {chnl: False for chnl in digital_channels}
+        prev_laser = False
+
+    end_time = 0.0
+    start_bin = 0
+    number_of_elements = 0
+    length_offset = 0
+    for block_index, (block_name, reps) in enumerate(ensemble.block_list):
+        element_list = blocks[block_name].element_list
+        n_elements = len(element_list)
+        if n_elements == 0:
+            continue
+        number_of_elements += n_elements * (reps + 1)
+        init_length = np.array([element.init_length_s for element in element_list],
+                               dtype='float64')
+        increment = np.array([element.increment_s for element in element_list], dtype='float64')
+        digital_states = {chnl: np.array([bool(element.digital_high[chnl])
+                                          for element in element_list], dtype=bool)
+                          for chnl in digital_channels}
+        laser_states = np.array([bool(element.laser_on) for element in element_list], dtype=bool)
+
+        last_row = None
+        slice_reps = max(max_slice_elements // n_elements, 1)
+        for first_rep in range(0, reps + 1, slice_reps):
+            rep_no = np.arange(first_rep, min(first_rep + slice_reps, reps + 1), dtype='int64')
+            lengths_s = init_length + rep_no[:, np.newaxis] * increment
+            end_times = np.cumsum(np.concatenate(([end_time], lengths_s.ravel())))[1:]
+            end_bins = np.rint(end_times * sample_rate).astype('int64')
+            start_bins = np.concatenate(([start_bin], end_bins[:-1]))
+            end_time = float(end_times[-1])
+            start_bin = int(end_bins[-1])
+
+            # Digital and laser edges at the start of the elements
+            for chnl in digital_channels:
+                states = np.tile(digital_states[chnl], rep_no.size)
+                prev_states = np.concatenate(([prev_digital[chnl]], states[:-1]))
+                rising[chnl].append(start_bins[states & ~prev_states])
+                falling[chnl].append(start_bins[~states & prev_states])
+                prev_digital[chnl] = bool(states[-1])
+            if laser_on_edges:
+                states = np.tile(laser_states, rep_no.size)
+                prev_states = np.concatenate(([prev_laser], states[:-1]))
+                laser_rising.append(start_bins[states & ~prev_states])
+                laser_falling.append(start_bins[~states & prev_states])
+                prev_laser = bool(states[-1])
+
+            # Compress consecutive repetitions with identical element lengths into runs
+            rows = (end_bins - start_bins).reshape((rep_no.size, n_elements))
+            new_run = np.ones(rep_no.size, dtype=bool)
+            new_run[1:] = np.any(rows[1:] != rows[:-1], axis=1)
+            if last_row is not None:
+                new_run[0] = np.any(rows[0] != last_row)
+            last_row = rows[-1]
+            run_rows = np.flatnonzero(new_run)
+            run_reps = np.diff(np.append(run_rows, rep_no.size))
+            if run_rows.size == 0 or run_rows[0] > 0:
+                # The first repetitions continue the last run of the previous slice
+                runs['repetitions'][-1][-1] += run_rows[0] if run_rows.size else rep_no.size
+            if run_rows.size == 0:
+                continue
+            runs['block_index'].append(np.full(run_rows.size, block_index, dtype='int64'))
+            runs['repetitions'].append(run_reps)
+            runs['start_bin'].append(start_bins.reshape(rows.shape)[run_rows, 0])
+            runs['rep_length_bins'].append(rows[run_rows].sum(axis=1))
+            runs['length_offset'].append(length_offset + n_elements * np.arange(run_rows.size))
+            runs['elements_length_bins'].append(rows[run_rows].ravel())
+            length_offset += n_elements * run_rows.size
+
+    element_runs = dict()
+    for key, arrays in runs.items():
+        if arrays:
+            element_runs[key] = np.concatenate(arrays).astype('int64')
+        else:
+            element_runs[key] = np.zeros(0, dtype='int64')
+
+    def _edges(arrays):
+        # The edges are collected in chronological order, only duplicates need to be removed
+        edges = np.concatenate(arrays).astype('int64') if arrays else np.zeros(0, dtype='int64')
+        return edges[np.append(True, edges[1:] != edges[:-1])] if edges.size else edges
+
+    return {'element_runs': element_runs,
+            'number_of_samples': start_bin,
+            'number_of_elements': number_of_elements,
+            'ideal_length': end_time,
+            'digital_rising_bins': {chnl: _edges(rising[chnl]) for chnl in digital_channels},
+            'digital_falling_bins': {chnl: _edges(falling[chnl]) for chnl in digital_channels},
+            'laser_rising_bins': _edges(laser_rising),
+            'laser_falling_bins': _edges(laser_falling)}
+
+
+class EnsembleSampler:
+    """
+    Sampling engine for a single PulseBlockEnsemble.
+
+    The ensemble is described by the run-length element table created by compile_element_runs.
+    For each chunk only the block repetitions overlapping with the chunk are expanded into element
+    segments (start bin, length in bins and index of the unique PulseBlockElement instance used).
+    Sampling functions are identified by an integer function id per analog channel. Elements with
+    the same (equal) sampling function share one function id.
+
+    A chunk of samples is then created with a few numpy calls per channel and function id instead of
+    iterating over blocks, repetitions and elements in Python. Sampling functions flagged as
+    elementwise (see SamplingBase.elementwise) are evaluated once for all elements of a chunk that
+    share the function id. All other sampling functions are evaluated for each element separately.
+
+    The time array handed to the sampling functions is created exactly like in the element-by-element
+    sampling, i.e. (offset_bin + np.arange(n, dtype='float64')) / sample_rate, so the resulting
+    samples are bit-identical to it. This includes the quirk that in a non-rotating frame each chunk
+    of an element starts again at the initial offset_bin.
+
+    If a thread pool (concurrent.futures.Executor) is passed, the channels of a chunk are sampled in
+    parallel. Each channel writes into its own array, so no locking is needed.
+
+    If a SampleCache is passed, analog segments are looked up in the cache before they are
+    calculated and newly calculated segments are added to it. Repeated blocks in a non-rotating
+    frame or ensembles sampled again with a few changed elements can then be assembled from
+    already sampled segments.
+    """
+
+    def __init__(self, ensemble, blocks, element_runs, sample_rate, analog_amplitudes,
+                 analog_channels, digital_channels, offset_bin=0, executor=None, cache=None):
+        """
+        @param PulseBlockEnsemble ensemble: The ensemble to sample
+        @param dict blocks: PulseBlock instances used in the ensemble (keys are the block names)
+        @param dict element_runs: run-length element table of the ensemble as returned by
+                                  analyze_block_ensemble (see compile_element_runs)
+        @param float sample_rate: The sample rate in samples/s
+        @param dict analog_amplitudes: peak-to-peak amplitudes of the analog channels
+        @param iterable analog_channels: analog channel descriptors to sample
+        @param iterable digital_channels: digital channel descriptors to sample
+        @param int offset_bin: initial bin offset of the time arrays (rotating frame)
+        @param concurrent.futures.Executor executor: optional, pool to sample channels in parallel
+        @param SampleCache cache: optional, cache of already sampled analog segments
+        """
+        self.sample_rate = sample_rate
+        self.analog_channels = sorted(analog_channels)
+        self.digital_channels = sorted(digital_channels)
+        self.rotating_frame = ensemble.rotating_frame
+        self.offset_bin = int(offset_bin)
+        self.executor = executor
+        self.cache = cache
+        self._amplitudes = {chnl: analog_amplitudes[chnl] for chnl in self.analog_channels}
+
+        # Collect unique PulseBlockElement instances and the index of the first element of each
+        # entry in the block list
+        self.elements = list()
+        first_element = list()
+        for block_name, reps in ensemble.block_list:
+            first_element.append(len(self.elements))
+            self.elements.extend(blocks[block_name].element_list)
+        first_element = np.array(first_element, dtype='int64')
+
+        # Run-length element table
+        self.runs = {key: np.asarray(value, dtype='int64') for key, value in element_runs.items()}
+        self._run_stop_bin = self.runs['start_bin'] + (self.runs['repetitions'] *
+                                                       self.runs['rep_length_bins'])
+        self._run_first_element = first_element[self.runs['block_index']]
+        self._run_elements = np.diff(np.append(self.runs['length_offset'],
+                                               self.runs['elements_length_bins'].size))
+        # start bin of each element within a single repetition of its run
+        lengths = self.runs['elements_length_bins']
+        self._run_element_offsets = np.cumsum(lengths) - lengths - np.repeat(
+            np.cumsum(self.runs['rep_length_bins']) - self.runs['rep_length_bins'],
+            self._run_elements)
+        self.number_of_samples = int(self._run_stop_bin[-1]) if self._run_stop_bin.size else 0
+
+        # Function ids per analog channel and digital states per digital channel for each unique
+        # element.
+        self.functions = list()
+        self.function_keys = list()
+        self.function_ids = dict()
+        function_lookup = dict()
+        for chnl in self.analog_channels:
+            ids = np.empty(len(self.elements), dtype='int64')
+            for ii, element in enumerate(self.elements):
+                func = element.pulse_function[chnl]
+                key = (type(func), repr(func))
+                if key not in function_lookup:
+                    function_lookup[key] = len(self.functions)
+                    self.functions.append(func)
+                    self.function_keys.append(key[1])
+                ids[ii] = function_lookup[key]
+            self.function_ids[chnl] = ids
+        self.digital_states = dict()
+        for chnl in self.digital_channels:
+            self.digital_states[chnl] = np.array(
+                [bool(element.digital_high[chnl]) for element in self.elements], dtype=bool)
+
+    @property
+    def final_offset_bin(self):
+        """ The offset bin to pass on to the next ensemble in order to keep the rotating frame.
+        """
+        if self.rotating_frame:
+            return self.offset_bin + self.number_of_samples
+        return self.offset_bin
+
+    def fingerprint(self, array_length):
+        """ Fingerprint of the samples created by this sampler.
+
+        Two samplers with equal fingerprints produce bit-identical sample arrays. The chunk length
+        is included since in a non-rotating frame the samples depend on the chunk boundaries.
+
+        @param int array_length: number of samples per write chunk
+
+        @return str: hexadecimal SHA1 digest
+        """
+        fingerprint = hashlib.sha1()
+        fingerprint.update(repr((self.sample_rate,
+                                 [(chnl, self._amplitudes[chnl]) for chnl in self.analog_channels],
+                                 self.digital_channels,
+                                 self.rotating_frame,
+                                 self.offset_bin,
+                                 int(array_length) if not self.rotating_frame else None,
+                                 self.function_keys)).encode())
+        for key in sorted(self.runs):
+            fingerprint.update(self.runs[key].tobytes())
+        for chnl in self.analog_channels:
+            fingerprint.update(self.function_ids[chnl].tobytes())
+        for chnl in self.digital_channels:
+            fingerprint.update(self.digital_states[chnl].tobytes())
+        return fingerprint.hexdigest()
+
+    def get_segments(self, start, length):
+        """ Get the parts of all elements that fall into the chunk [start, start + length).
+
+        Only the block repetitions of the runs overlapping with the chunk are expanded.
+
+        @param int start: first sample bin of the chunk within the ensemble
+        @param int length: number of samples in the chunk
+
+        @return tuple: numpy arrays (elements, write_start, segment_length, time_offset_bin).
+                       elements are the indices of the unique element instances, write_start the
+                       index in the chunk array and time_offset_bin the first bin of the time array
+                       of each segment.
+        """
+        stop = start + length
+        first = np.searchsorted(self._run_stop_bin, start, side='right')
+        last = np.searchsorted(self.runs['start_bin'], stop, side='left')
+        runs = np.arange(first, last, dtype='int64')
+        # skip runs without samples
+        runs = runs[self.runs['rep_length_bins'][runs] > 0]
+        run_start = self.runs['start_bin'][runs]
+        rep_length = self.runs['rep_length_bins'][runs]
+
+        # Repetitions of each run overlapping with the chunk
+        first_rep = np.maximum((start - run_start) // rep_length, 0)
+        last_rep = np.minimum(-((run_start - stop) // rep_length), self.runs['repetitions'][runs])
+        rep_count = last_rep - first_rep
+        rep_run = np.repeat(np.arange(runs.size), rep_count)
+        rep_no = np.arange(rep_run.size, dtype='int64') - np.repeat(
+            np.cumsum(rep_count) - rep_count - first_rep, rep_count)
+        rep_start = run_start[rep_run] + rep_no * rep_length[rep_run]
+
+        # Elements of each repetition
+        rep_elements = self._run_elements[runs][rep_run]
+        element_rep = np.repeat(np.arange(rep_run.size), rep_elements)
+        element_no = np.arange(element_rep.size, dtype='int64') - np.repeat(
+            np.cumsum(rep_elements) - rep_elements, rep_elements)
+        rep_runs = runs[rep_run]
+        length_index = self.runs['length_offset'][rep_runs][element_rep] + element_no
+        lengths = self.runs['elements_length_bins'][length_index]
+        element_start = rep_start[element_rep] + self._run_element_offsets[length_index]
+        elements = self._run_first_element[rep_runs][element_rep] + element_no
+
+        # skip zero length elements and elements outside the chunk
+        mask = (lengths > 0) & (element_start < stop) & (element_start + lengths > start)
+        seg_start = np.maximum(element_start[mask], start)
+        seg_stop = np.minimum(element_start[mask] + lengths[mask], stop)
+        if self.rotating_frame:
+            time_offset = self.offset_bin + seg_start
+        else:
+            time_offset = np.full(seg_start.size, self.offset_bin, dtype='int64')
+        return elements[mask], seg_start - start, seg_stop - seg_start, time_offset
+
+    def sample_chunk(self, start, analog_samples, digital_samples):
+        """ Fill preallocated sample arrays with the chunk of the ensemble beginning at bin "start".
+
+        The chunk length is given by the length of the sample arrays.
+
+        @param int start: first sample bin of the chunk within the ensemble
+        @param dict analog_samples: float32 arrays to fill (keys are the analog channels)
+        @param dict digital_samples: bool arrays to fill (keys are the digital channels)
+        """
+        if self.analog_channels:
+            length = analog_samples[self.analog_channels[0]].size
+        elif self.digital_channels:
+            length = digital_samples[self.digital_channels[0]].size
+        else:
+            return
+        if length == 0:
+            return
+        elements, write_start, seg_length, time_offset = self.get_segments(start, length)
+
+        for chnl in self.digital_channels:
+            digital_samples[chnl][:] = np.repeat(self.digital_states[chnl][elements], seg_length)
+
+        if self.executor is None or len(self.analog_channels) < 2:
+            for chnl in self.analog_channels:
+                self._sample_analog_channel(chnl, analog_samples[chnl], elements, write_start,
+                                            seg_length, time_offset)
+        else:
+            futures = [self.executor.submit(self._sample_analog_channel, chnl,
+                                            analog_samples[chnl], elements, write_start,
+                                            seg_length, time_offset)
+                       for chnl in self.analog_channels]
+            for future in futures:
+                future.result()
+
+    def _sample_analog_channel(self, chnl, samples, elements, write_start, seg_length, time_offset):
+        """ Fill the chunk of a single analog channel. See sample_chunk.
+        """
+        norm = self._amplitudes[chnl] / 2
+        ids = self.function_ids[chnl][elements]
+        for func_id in np.unique(ids):
+            func = self.functions[func_id]
+            mask = ids == func_id
+            starts = write_start[mask]
+            lengths = seg_length[mask]
+            offsets = time_offset[mask]
+
+            # Copy cached segments and remember the keys of the segments to add to the cache
+            new_entries = list()
+            if self.cache is not None:
+                calculate = np.ones(starts.size, dtype=bool)
+                for ii in np.flatnonzero(lengths >= self.cache.min_samples):
+                    key = (self.function_keys[func_id], int(offsets[ii]), int(lengths[ii]),
+                           self.sample_rate, self._amplitudes[chnl])
+                    cached = self.cache.get(key)
+                    if cached is None:
+                        new_entries.append((key, starts[ii], lengths[ii]))
+                    else:
+                        samples[starts[ii]:starts[ii] + lengths[ii]] = cached
+                        calculate[ii] = False
+                starts = starts[calculate]
+                lengths = lengths[calculate]
+                offsets = offsets[calculate]
+
+            self._calculate_segments(func, norm, samples, starts, lengths, offsets)
+
+            for key, seg_start, seg_len in new_entries:
+                self.cache.put(key, samples[seg_start:seg_start + seg_len].copy())
+
+    def _calculate_segments(self, func, norm, samples, starts, lengths, offsets):
+        """ Evaluate a sampling function for the given segments of a channel chunk.
+        """
+        if starts.size == 0:
+            return
+        if starts.size == 1 or not getattr(func, 'elementwise', False):
+            for seg_start, seg_len, seg_offset in zip(starts, lengths, offsets):
+                time_arr = (int(seg_offset) + np.arange(seg_len, dtype='float64')) / self.sample_rate
+                samples[seg_start:seg_start + seg_len] = func.get_samples(time_arr) / norm
+            return
+
+        # Evaluate all segments sharing the function at once. The time bins are integer valued
+        # and thus exactly representable as float64, i.e. the time array is identical to the
+        # one created for each element separately.
+        total = int(lengths.sum())
+        seg_first = np.zeros(lengths.size, dtype='int64')
+        np.cumsum(lengths[:-1], out=seg_first[1:])
+        within = np.arange(total, dtype='int64') - np.repeat(seg_first, lengths)
+        time_arr = (np.repeat(offsets, lengths) + within).astype('float64') / self.sample_rate
+        samples[np.repeat(starts, lengths) + within] = func.get_samples(time_arr) / norm
+
+
+class SampleCache:
+    """
+    Content-addressed LRU cache for sampled (normalized, float32) analog element samples.
+
+    The key of an entry describes everything the samples depend on: the sampling function and its
+    parameters, the first time bin (phase offset in the rotating frame), the number of samples,
+    the sample rate and the pp-amplitude of the channel. Cached samples are therefore bit-identical
+    to freshly calculated ones.
+
+    The total size of all entries held in memory is limited to max_bytes. The least recently used
+    entries are evicted first. If cache_dir is given, all entries are additionally stored as .npy
+    files in this directory (limited to max_disk_bytes, oldest files are removed first) and are
+    looked up there if they are not found in memory, e.g. after a restart of qudi.
+
+    Segments shorter than min_samples are not cached since looking them up is not cheaper than
+    calculating them.
+    """
+
+    def __init__(self, max_bytes, cache_dir=None, max_disk_bytes=2**30, min_samples=256):
+        """
+        @param int max_bytes: maximum size of all samples held in memory
+        @param str cache_dir: optional, directory to store cached samples on disk
+        @param int max_disk_bytes: optional, maximum size of all samples stored on disk
+        @param int min_samples: optional, minimum number of samples of a segment to be cached
+        """
+        self.max_bytes = int(max_bytes)
+        self.max_disk_bytes = int(max_disk_bytes)
+        self.min_samples = int(min_samples)
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._disk_entries = OrderedDict()
+        self._disk_bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.cache_dir is not None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Register existing files, oldest first
+            files = [os.path.join(self.cache_dir, f) for f in os.listdir(self.cache_dir) if
+                     f.endswith('.npy')]
+            for path in sorted(files, key=os.path.getmtime):
+                size = os.path.getsize(path)
+                self._disk_entries[path] = size
+                self._disk_bytes += size
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups > 0 else np.nan
+
+    def statistics(self):
+        """ Get the counters of the cache.
+
+        @return dict: hits (incl. disk_hits), disk_hits, misses, entries and bytes in memory
+        """
+        with self._lock:
+            return {'hits': self.hits,
+                    'disk_hits': self.disk_hits,
+                    'misses': self.misses,
+                    'entries': len(self._entries),
+                    'bytes': self._bytes}
+
+    def reset_statistics(self):
+        with self._lock:
+            self.hits = 0
+            self.disk_hits = 0
+            self.misses = 0
+
+    def clear(self):
+        """ Remove all entries held in memory. Files on disk are kept.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get(self, key):
+        """ Look up the samples for a key.
+
+        @param tuple key: hashable key describing the samples
+
+        @return numpy.ndarray: the cached samples (do not modify) or None if not cached
+        """
+        with self._lock:
+            samples = self._entries.get(key)
+            if samples is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return samples
+            path = self._get_path(key)
+            if path is None or path not in self._disk_entries:
+                self.misses += 1
+                return None
+        try:
+            samples = np.load(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self.disk_hits += 1
+            self._add_entry(key, samples)
+        return samples
+
+    def put(self, key, samples):
+        """ Add samples to the cache.
+
+        @param tuple key: hashable key describing the samples
+        @param numpy.ndarray samples: the samples to cache (must not be modified afterwards)
+        """
+        if samples.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                return
+            self._add_entry(key, samples)
+            path = self._get_path(key)
+            if path is None or path in self._disk_entries or samples.nbytes > self.max_disk_bytes:
+                return
+        try:
+            with open(path, 'wb') as file:
+                np.save(file, samples)
+        except OSError:
+            return
+        with self._lock:
+            self._disk_entries[path] = samples.nbytes
+            self._disk_bytes += samples.nbytes
+            while self._disk_bytes > self.max_disk_bytes:
+                old_path, size = self._disk_entries.popitem(last=False)
+                self._disk_bytes -= size
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+
+    def _add_entry(self, key, samples):
+        self._entries[key] = samples
+        self._bytes += samples.nbytes
+        while self._bytes > self.max_bytes:
+            _, old_samples = self._entries.popitem(last=False)
+            self._bytes -= old_samples.nbytes
+
+    def _get_path(self, key):
+        if self.cache_dir is None:
+            return None
+        return os.path.join(self.cache_dir,
+                            hashlib.sha1(repr(key).encode()).hexdigest() + '.npy')
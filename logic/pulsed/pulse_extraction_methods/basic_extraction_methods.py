@@ -22,7 +22,7 @@ top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi
 import numpy as np
 from scipy import ndimage
 
-from logic.pulsed.pulse_extractor import PulseExtractorBase
+from logic.pulsed.pulse_extractor import PulseExtractorBase, lockable_edges
 
 
 class BasicPulseExtractor(PulseExtractorBase):
@@ -32,6 +32,7 @@ class BasicPulseExtractor(PulseExtractorBase):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
+    @lockable_edges
     def gated_conv_deriv(self, count_data, conv_std_dev=20.0, flank_width=0):
         """
         Detects the rising flank in the gated timetrace data and extracts just the laser pulses.
@@ -84,6 +85,7 @@ class BasicPulseExtractor(PulseExtractorBase):
 
         return return_dict
 
+    @lockable_edges
     def ungated_conv_deriv(self, count_data, conv_std_dev=20.0):
         """ Detects the laser pulses in the ungated timetrace data and extracts
             them.
@@ -21,13 +21,30 @@ top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi
 
 import os
 import sys
+import copy
 import inspect
 import importlib
+import numpy as np
 
 from core.util.modules import get_main_dir
 from core.util.helpers import natural_sort
 
 
+def lockable_edges(method):
+    """
+    Decorator to flag an extraction method whose extracted laser pulses are fully determined by
+    the returned rising and falling indices, i.e. the method returns
+        gated: count_data[:, laser_indices_rising:laser_indices_falling]
+        ungated: count_data[rising:rising + max(falling - rising)] for each laser pulse (zero
+                 padded at the end of the timetrace)
+    Once the detected indices are stable the PulseExtractor can lock them and extract the laser
+    pulses without calling the method (see PulsedMeasurementLogic ConfigOption
+    "laser_edge_lock_count").
+    """
+    method.lockable_edges = True
+    return method
+
+
 class PulseExtractorBase:
     """
     All extractor classes to import from must inherit exclusively from this base class.
@@ -79,8 +96,20 @@ class PulseExtractor(PulseExtractorBase):
     8) The keyword "method" must not be used in the extraction method parameters
 
     See BasicPulseExtractor class for an example usage.
+
+    If the current extraction method is flagged with the lockable_edges decorator and the same
+    laser pulse edges have been detected laser_edge_lock_count times in a row, the edges are
+    locked. Edges are considered to be the same if none of them moved by more than EDGE_LOCK_JITTER
+    bins since the last detection (shot noise). The most recently detected edges are locked.
+    From then on the laser pulses are just copied from the count data into a preallocated
+    array without running the edge detection again. The lock is released if the fraction of counts
+    within the laser pulses drops by more than EDGE_LOCK_TOLERANCE (relative) compared to the time
+    of locking, if the shape of the count data changes or if the extraction settings are changed.
     """
 
+    EDGE_LOCK_TOLERANCE = 0.05
+    EDGE_LOCK_JITTER = 2
+
     def __init__(self, pulsedmeasurementlogic):
         # Init base class
         super().__init__(pulsedmeasurementlogic)
@@ -93,6 +122,15 @@ class PulseExtractor(PulseExtractorBase):
         # Currently selected extraction method
         self._current_extraction_method = None
 
+        # Number of identical edge detections in a row needed to lock the laser pulse edges
+        self._edge_lock_count = max(int(pulsedmeasurementlogic.laser_edge_lock_count), 0)
+        # Last detected edges and the number of times they have been detected in a row (within
+        # EDGE_LOCK_JITTER bins)
+        self._edge_candidate = None
+        self._edge_candidate_count = 0
+        # Locked laser pulse edges and preallocated laser pulse array
+        self._locked_edges = None
+
         # import path for extraction modules from default directory (logic.pulse_extraction_methods)
         path_list = [os.path.join(get_main_dir(), 'logic', 'pulsed', 'pulse_extraction_methods')]
         # import path for extraction modules from non-default directory if a path has been given
@@ -161,6 +199,8 @@ class PulseExtractor(PulseExtractorBase):
         if not isinstance(settings_dict, dict):
             return
 
+        self.reset_laser_edges()
+
         # go through all key-value pairs in settings_dict and update self._parameters and
         # self._current_extraction_method accordingly. Ignore unknown parameters.
         for parameter, value in settings_dict.items():
@@ -209,7 +249,9 @@ class PulseExtractor(PulseExtractorBase):
 
         @param numpy.ndarray count_data: 1D (ungated) or 2D (gated) numpy array (dtype='int64')
                                          containing the timetrace to extract laser pulses from.
-        @return dict: result dictionary of the extraction method
+        @return dict: result dictionary of the extraction method. If the laser pulse edges are
+                      locked, "laser_counts_arr" is the same preallocated array for every call,
+                      so copy it if you need to keep it beyond the next call.
         """
         if count_data.ndim > 1 and not self.is_gated:
             self.log.error('"is_gated" flag is set to False but the count data to extract laser '
@@ -218,12 +260,124 @@ class PulseExtractor(PulseExtractorBase):
             self.log.error('"is_gated" flag is set to True but the count data to extract laser '
                            'pulses from is in the format of an ungated timetrace (1D numpy array).')
 
+        # Local reference since the lock may be released from another thread during extraction
+        locked = self._locked_edges
+        if locked is not None and locked['method'] == self._current_extraction_method:
+            return_dict = self._extract_locked_laser_pulses(count_data, locked)
+            if return_dict is not None:
+                return return_dict
+
         if self.is_gated:
             extraction_method = self._gated_extraction_methods[self._current_extraction_method]
         else:
             extraction_method = self._ungated_extraction_methods[self._current_extraction_method]
         kwargs = self._get_extraction_method_kwargs(extraction_method)
-        return extraction_method(count_data=count_data, **kwargs)
+        return_dict = extraction_method(count_data=count_data, **kwargs)
+        if self._edge_lock_count > 0 and getattr(extraction_method, 'lockable_edges', False):
+            self._update_edge_lock(count_data, return_dict)
+        return return_dict
+
+    @property
+    def laser_edges_locked(self):
+        return self._locked_edges is not None
+
+    def reset_laser_edges(self):
+        """
+        Release locked laser pulse edges and restart the edge stability detection.
+        Call this whenever the count data to expect changes, e.g. upon start of a measurement.
+        """
+        self._edge_candidate = None
+        self._edge_candidate_count = 0
+        self._locked_edges = None
+        return
+
+    def _update_edge_lock(self, count_data, return_dict):
+        """
+        Count how often the same edges have been detected in a row and lock them if they are
+        stable.
+
+        @param numpy.ndarray count_data: the count data the edges have been detected in
+        @param dict return_dict: result dictionary of a lockable extraction method
+        """
+        laser_arr = return_dict['laser_counts_arr']
+        rising = np.array(return_dict['laser_indices_rising'], dtype='int64')
+        falling = np.array(return_dict['laser_indices_falling'], dtype='int64')
+        total_counts = count_data.sum()
+        if not laser_arr.any() or total_counts <= 0:
+            self.reset_laser_edges()
+            return
+
+        candidate = (self._current_extraction_method, count_data.shape, rising, falling)
+        previous = self._edge_candidate
+        if previous is not None and previous[:2] == candidate[:2] and \
+                previous[2].shape == rising.shape and previous[3].shape == falling.shape and \
+                np.all(np.abs(previous[2] - rising) <= self.EDGE_LOCK_JITTER) and \
+                np.all(np.abs(previous[3] - falling) <= self.EDGE_LOCK_JITTER):
+            self._edge_candidate_count += 1
+        else:
+            self._edge_candidate_count = 1
+        self._edge_candidate = candidate
+        if self._edge_candidate_count < self._edge_lock_count:
+            return
+
+        locked = {'method': self._current_extraction_method,
+                  'shape': count_data.shape,
+                  'rising': copy.copy(return_dict['laser_indices_rising']),
+                  'falling': copy.copy(return_dict['laser_indices_falling']),
+                  'fraction': laser_arr.sum() / total_counts,
+                  'laser_counts_arr': np.zeros(laser_arr.shape, dtype='int64'),
+                  'index': None,
+                  'invalid': None}
+        if count_data.ndim == 1:
+            # Flat index of each laser pulse bin. Bins beyond the end of the timetrace stay zero.
+            index = rising[:, np.newaxis] + np.arange(laser_arr.shape[1], dtype='int64')
+            invalid = index >= count_data.size
+            index[invalid] = count_data.size - 1
+            locked['index'] = index
+            locked['invalid'] = invalid if invalid.any() else None
+        self._locked_edges = locked
+        self.log.debug('Locked laser pulse edges after {0:d} consistent detections.'
+                       ''.format(self._edge_candidate_count))
+        return
+
+    def _extract_locked_laser_pulses(self, count_data, locked):
+        """
+        Extract the laser pulses at the locked edges into the preallocated laser pulse array.
+
+        @param numpy.ndarray count_data: 1D (ungated) or 2D (gated) count data
+        @param dict locked: the locked laser pulse edges
+        @return dict: result dictionary like the one of the extraction method or None if the lock
+                      has been released. "laser_counts_arr" is overwritten by the next call.
+        """
+        if count_data.shape != locked['shape']:
+            self.reset_laser_edges()
+            return None
+
+        laser_arr = locked['laser_counts_arr']
+        if locked['index'] is None:
+            np.copyto(laser_arr, count_data[:, int(locked['rising']):int(locked['falling'])],
+                      casting='unsafe')
+        else:
+            if count_data.dtype == laser_arr.dtype:
+                np.take(count_data, locked['index'], out=laser_arr, mode='clip')
+            else:
+                laser_arr[...] = count_data[locked['index']]
+            if locked['invalid'] is not None:
+                laser_arr[locked['invalid']] = 0
+
+        # Cheap re-validation: the edges are still right if (almost) the same fraction of counts is
+        # found within the laser pulses.
+        total_counts = count_data.sum()
+        if total_counts > 0 and laser_arr.sum() / total_counts < locked['fraction'] * (
+                1 - self.EDGE_LOCK_TOLERANCE):
+            self.log.debug('Fraction of counts within locked laser pulses dropped. '
+                           'Detecting laser pulse edges again.')
+            self.reset_laser_edges()
+            return None
+
+        return {'laser_counts_arr': laser_arr,
+                'laser_indices_rising': copy.copy(locked['rising']),
+                'laser_indices_falling': copy.copy(locked['falling'])}
 
     def _get_extraction_method_kwargs(self, method):
         """
@@ -1040,9 +1040,10 @@ class PulsedMasterLogic(GenericLogic):
                                               current sample_rate and PulseBlockEnsemble object.
                  total_elements (int): The total number of PulseBlockElements (incl. repetitions) in
                                        the provided PulseBlockEnsemble.
-                 elements_length_bins (1D numpy.ndarray[int]): Array of number of timebins for each
-                                                               PulseBlockElement in chronological
-                                                               order (incl. repetitions).
+                 element_runs (dict): Run-length table of the number of timebins of each
+                                      PulseBlockElement (incl. repetitions). Consecutive block
+                                      repetitions with identical element lengths are stored only
+                                      once (see logic.pulsed.ensemble_sampler.compile_element_runs).
                  digital_rising_bins (dict): Dictionary with keys being the digital channel
                                              descriptor string and items being arrays of
                                              chronological low-to-high transition positions
@@ -1071,9 +1072,8 @@ class PulsedMasterLogic(GenericLogic):
                                               current sample_rate and PulseBlockEnsemble object.
                  total_elements (int): The total number of PulseBlockElements (incl. repetitions) in
                                        the provided PulseBlockEnsemble.
-                 elements_length_bins (1D numpy.ndarray[int]): Array of number of timebins for each
-                                                               PulseBlockElement in chronological
-                                                               order (incl. repetitions).
+                 element_runs_per_step (list): [repetitions, element_runs] for each sequence
+                                               step (see analyze_block_ensemble).
                  digital_rising_bins (dict): Dictionary with keys being the digital channel
                                              descriptor string and items being arrays of
                                              chronological low-to-high transition positions
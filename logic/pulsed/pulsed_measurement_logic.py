@@ -21,8 +21,10 @@ top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi
 
 from qtpy import QtCore
 from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import copy
+import threading
 import time
 import datetime
 import matplotlib.pyplot as plt
@@ -31,7 +33,7 @@ from core.connector import Connector
 from core.configoption import ConfigOption
 from core.statusvariable import StatusVar
 from core.util.mutex import Mutex
-from core.util.network import netobtain
+from core.util.network import netobtain, is_netref
 from core.util import units
 from core.util.math import compute_ft
 from logic.generic_logic import GenericLogic
@@ -57,6 +59,11 @@ class PulsedMeasurementLogic(GenericLogic):
     analysis_import_path = ConfigOption(name='additional_analysis_path', default=None)
     # Optional file type descriptor for saving raw data to file
     _raw_data_save_type = ConfigOption(name='raw_data_save_type', default='text')
+    # Optional number of identical laser pulse edge detections in a row after which the edges are
+    # locked and the edge detection is skipped (0 to always detect the edges)
+    laser_edge_lock_count = ConfigOption(name='laser_edge_lock_count', default=0)
+    # Optional flag to run the laser pulse extraction and analysis in a worker thread
+    _threaded_analysis = ConfigOption(name='threaded_analysis', default=True)
 
     # status variables
     # ext. microwave settings
@@ -129,6 +136,19 @@ class PulsedMeasurementLogic(GenericLogic):
 
         # threading
         self._threadlock = Mutex()
+        # Analysis worker: only the newest raw data snapshot waiting for analysis is kept
+        self._analysis_executor = None
+        self._analysis_schedule_lock = threading.Lock()
+        self._pending_analysis_snapshot = None
+        self._analysis_worker_busy = False
+        self._analysis_snapshot_id = 0
+        self._analysis_published_id = 0
+        # Serializes the extraction/analysis of a snapshot with changes of the extraction and
+        # analysis settings. Always acquire before _threadlock.
+        self._analysis_lock = threading.Lock()
+        # Preallocated raw data arrays of the snapshots that are not in use (see
+        # _get_snapshot_buffer)
+        self._snapshot_buffers = list()
 
         # measurement data
         self.signal_data = np.empty((2, 0), dtype=float)
@@ -136,6 +156,11 @@ class PulsedMeasurementLogic(GenericLogic):
         self.measurement_error = np.empty((2, 0), dtype=float)
         self.laser_data = np.zeros((10, 20), dtype='int64')
         self.raw_data = np.zeros((10, 20), dtype='int64')
+        # preallocated array to accumulate raw data in (see _get_raw_data)
+        self._raw_data_accumulator = None
+        self._raw_data_accumulated = False
+        # preallocated array in the native dtype of the fast counter to read the raw data into
+        self._fast_counter_buffer = None
 
         self._saved_raw_data = OrderedDict()  # temporary saved raw data
         self._recalled_raw_data_tag = None  # the currently recalled raw data dict key
@@ -167,6 +192,8 @@ class PulsedMeasurementLogic(GenericLogic):
         self.__analysis_timer.setInterval(round(1000. * self.__timer_interval))
         self.__analysis_timer.timeout.connect(self._pulsed_analysis_loop,
                                               QtCore.Qt.QueuedConnection)
+        if self._threaded_analysis:
+            self._analysis_executor = ThreadPoolExecutor(max_workers=1)
 
         # Fitting
         self.fc = self.fitlogic().make_fit_container('pulsed', '1d')
@@ -228,6 +255,11 @@ class PulsedMeasurementLogic(GenericLogic):
         self.__analysis_timer.timeout.disconnect()
         self.sigStartTimer.disconnect()
         self.sigStopTimer.disconnect()
+
+        if self._analysis_executor is not None:
+            self._wait_for_analysis()
+            self._analysis_executor.shutdown(wait=True)
+            self._analysis_executor = None
         return
 
     ############################################################################
@@ -646,8 +678,9 @@ class PulsedMeasurementLogic(GenericLogic):
                 num_bins_fast = round(settings_dict[key]/self.fast_counter_settings['bin_width'])
                 settings_dict[key] = num_bins_fast * self.fast_counter_settings['bin_width']
 
-        # Use threadlock to update settings during a running measurement
-        with self._threadlock:
+        # Use threadlock to update settings during a running measurement. Wait for a running
+        # analysis to finish, so it is not done with partly changed settings.
+        with self._analysis_lock, self._threadlock:
             self._pulseanalyzer.analysis_settings = settings_dict
             self.sigAnalysisSettingsUpdated.emit(self.analysis_settings)
         return
@@ -671,8 +704,9 @@ class PulsedMeasurementLogic(GenericLogic):
         else:
             settings_dict.update(kwargs)
 
-        # Use threadlock to update settings during a running measurement
-        with self._threadlock:
+        # Use threadlock to update settings during a running measurement. Wait for a running
+        # extraction to finish, so it is not done with partly changed settings.
+        with self._analysis_lock, self._threadlock:
             self._pulseextractor.extraction_settings = settings_dict
             self.sigExtractionSettingsUpdated.emit(self.extraction_settings)
         return
@@ -766,6 +800,8 @@ class PulsedMeasurementLogic(GenericLogic):
                 self.sigMeasurementStatusUpdated.emit(False, False)
                 return
 
+        # Wait for the analysis worker before taking the threadlock it needs to publish results
+        self._wait_for_analysis()
         with self._threadlock:
             if self.module_state() == 'idle':
                 # Lock module state
@@ -775,8 +811,10 @@ class PulsedMeasurementLogic(GenericLogic):
                 self.do_fit('No Fit', False)
                 self.do_fit('No Fit', True)
 
-                # initialize data arrays
+                # initialize data arrays. Discard analysis results of a previous measurement.
+                self._analysis_published_id = self._analysis_snapshot_id
                 self._initialize_data_arrays()
+                self._pulseextractor.reset_laser_edges()
 
                 # recall stashed raw data
                 if stashed_raw_data_tag in self._saved_raw_data:
@@ -818,7 +856,8 @@ class PulsedMeasurementLogic(GenericLogic):
         """
         # Get raw data and analyze it a last time just before stopping the measurement.
         try:
-            self._pulsed_analysis_loop()
+            self._wait_for_analysis()
+            self._pulsed_analysis_loop(synchronous=True)
         except:
             pass
 
@@ -965,7 +1004,7 @@ class PulsedMeasurementLogic(GenericLogic):
         """ Analyse and display the data
         """
         if self.module_state() == 'locked':
-            self._pulsed_analysis_loop()
+            self._pulsed_analysis_loop(synchronous=True)
         return
 
     @QtCore.Slot(str)
@@ -1097,93 +1136,240 @@ class PulsedMeasurementLogic(GenericLogic):
                                                                         self.__fast_counter_gates))
         return
 
-    def _pulsed_analysis_loop(self):
+    def _pulsed_analysis_loop(self, synchronous=False):
         """ Acquires laser pulses from fast counter,
             calculates fluorescence signal and creates plots.
+
+        Only the raw data is acquired here (holding the threadlock). The extraction and analysis of
+        the laser pulses is handed over to the analysis worker thread (ConfigOption
+        "threaded_analysis"). If the worker is still busy, the raw data snapshot waits for it and
+        is replaced by newer snapshots in the meantime, i.e. timer ticks are coalesced and only the
+        newest raw data is analyzed. The results are published all at once.
+
+        @param bool synchronous: optional, analyze the raw data in the calling thread
         """
         with self._threadlock:
             if self.module_state() == 'locked':
-                # Update elapsed time
-
-                self._extract_laser_pulses()
-
-                tmp_signal, tmp_error = self._analyze_laser_pulses()
-
-                # exclude laser pulses to ignore
-                if len(self._laser_ignore_list) > 0:
-                    # Convert relative negative indices into absolute positive indices
-                    while self._laser_ignore_list[0] < 0:
-                        neg_index = self._laser_ignore_list[0]
-                        self._laser_ignore_list[0] = len(tmp_signal) + neg_index
-                        self._laser_ignore_list.sort()
-
-                    tmp_signal = np.delete(tmp_signal, self._laser_ignore_list)
-                    tmp_error = np.delete(tmp_error, self._laser_ignore_list)
-
-                # order data according to alternating flag
-                if self._alternating:
-                    if len(self.signal_data[0]) != len(tmp_signal[::2]):
-                        self.log.error('Length of controlled variable ({0}) does not match length of number of readout '
-                                       'pulses ({1}).'.format(len(self.signal_data[0]), len(tmp_signal[::2])))
-                        return
-                    self.signal_data[1] = tmp_signal[::2]
-                    self.signal_data[2] = tmp_signal[1::2]
-                    self.measurement_error[1] = tmp_error[::2]
-                    self.measurement_error[2] = tmp_error[1::2]
-                else:
-                    if len(self.signal_data[0]) != len(tmp_signal):
-                        self.log.error('Length of controlled variable ({0}) does not match length of number of readout '
-                                       'pulses ({1}).'.format(len(self.signal_data[0]), len(tmp_signal)))
-                        return
-                    self.signal_data[1] = tmp_signal
-                    self.measurement_error[1] = tmp_error
-
-                # Compute alternative data array from signal
-                self._compute_alt_data()
+                snapshot = self._get_analysis_snapshot()
+            else:
+                snapshot = None
 
             # emit signals
             self.sigTimerUpdated.emit(self.__elapsed_time, self.__elapsed_sweeps,
                                       self.__timer_interval)
+
+        if snapshot is None:
             self.sigMeasurementDataUpdated.emit()
-            return
+        elif synchronous or self._analysis_executor is None:
+            self._analyze_snapshot(snapshot)
+        else:
+            self._schedule_analysis(snapshot)
+        return
+
+    def _get_analysis_snapshot(self):
+        """ Acquire the raw data and the settings needed to analyze it.
 
-    def _extract_laser_pulses(self):
+        The raw data is copied into a snapshot buffer (see _get_snapshot_buffer), since the arrays
+        the fast counter data is read and accumulated into are overwritten with the next call.
+
+        @return dict: raw data snapshot
+        """
         # Get counter raw data (including recalled raw data from previous measurement)
         fc_data, info_dict = self._get_raw_data()
-        self.raw_data = fc_data
         self.__elapsed_sweeps = info_dict['elapsed_sweeps']
         self.__elapsed_time = info_dict['elapsed_time']
 
-        # extract laser pulses from raw data
-        return_dict = self._pulseextractor.extract_laser_pulses(self.raw_data)
-        self.laser_data = return_dict['laser_counts_arr']
+        raw_data = self._get_snapshot_buffer(fc_data.shape)
+        np.copyto(raw_data, fc_data, casting='unsafe')
+
+        self._analysis_snapshot_id += 1
+        return {'id': self._analysis_snapshot_id,
+                'raw_data': raw_data,
+                'controlled_variable': self.signal_data[0].copy(),
+                'alternating': self._alternating,
+                'laser_ignore_list': list(self._laser_ignore_list)}
+
+    def _get_snapshot_buffer(self, shape):
+        """ Get a preallocated int64 array for the raw data of a new snapshot.
+
+        The buffers circulate between the snapshot waiting for analysis, the snapshot being
+        analyzed and the published raw_data. A buffer is reused once its snapshot has been replaced
+        by a newer one, so after the first ticks no new arrays are allocated. The raw data of a
+        snapshot waiting for analysis is overwritten right away, since it would be replaced anyway.
+
+        @param tuple shape: shape of the raw data
+        @return numpy.ndarray: the raw data array
+        """
+        with self._analysis_schedule_lock:
+            pending = self._pending_analysis_snapshot
+            if pending is not None:
+                self._pending_analysis_snapshot = None
+                self._snapshot_buffers.append(pending['raw_data'])
+            while self._snapshot_buffers:
+                buffer = self._snapshot_buffers.pop()
+                if buffer.shape == shape:
+                    return buffer
+        return np.empty(shape, dtype='int64')
+
+    def _release_snapshot_buffer(self, buffer):
+        """ Hand the raw data array of a snapshot that is not needed any more back for reuse.
+
+        @param numpy.ndarray buffer: raw data array (see _get_snapshot_buffer)
+        """
+        with self._analysis_schedule_lock:
+            self._snapshot_buffers.append(buffer)
+        return
+
+    def _schedule_analysis(self, snapshot):
+        """ Hand a raw data snapshot over to the analysis worker. If the worker is busy, the
+        snapshot replaces the one waiting for analysis (if any).
+
+        @param dict snapshot: raw data snapshot (see _get_analysis_snapshot)
+        """
+        with self._analysis_schedule_lock:
+            self._pending_analysis_snapshot = snapshot
+            if self._analysis_worker_busy:
+                return
+            self._analysis_worker_busy = True
+        self._analysis_executor.submit(self._analysis_worker)
+        return
+
+    def _analysis_worker(self):
+        """ Analyze pending raw data snapshots until there is none left. Runs in the worker thread.
+        """
+        while True:
+            with self._analysis_schedule_lock:
+                snapshot = self._pending_analysis_snapshot
+                self._pending_analysis_snapshot = None
+                if snapshot is None:
+                    self._analysis_worker_busy = False
+                    return
+            try:
+                self._analyze_snapshot(snapshot)
+            except:
+                self.log.exception('Analysis of pulsed measurement raw data failed:')
+
+    def _wait_for_analysis(self):
+        """ Discard the snapshot waiting for analysis and wait until the worker is idle.
+        """
+        if self._analysis_executor is None:
+            return
+        with self._analysis_schedule_lock:
+            if self._pending_analysis_snapshot is not None:
+                self._snapshot_buffers.append(self._pending_analysis_snapshot['raw_data'])
+            self._pending_analysis_snapshot = None
+        self._analysis_executor.submit(lambda: None).result()
+        return
+
+    def _analyze_snapshot(self, snapshot):
+        """ Extract and analyze the laser pulses of a raw data snapshot and publish the results.
+
+        @param dict snapshot: raw data snapshot (see _get_analysis_snapshot)
+        """
+        published = False
+        try:
+            published = self._analyze_and_publish_snapshot(snapshot)
+        finally:
+            if not published:
+                self._release_snapshot_buffer(snapshot['raw_data'])
         return
 
-    def _analyze_laser_pulses(self):
+    def _analyze_and_publish_snapshot(self, snapshot):
+        """ See _analyze_snapshot.
+
+        @param dict snapshot: raw data snapshot (see _get_analysis_snapshot)
+        @return bool: whether the raw data of the snapshot has been published
+        """
+        with self._analysis_lock:
+            # The extractor may reuse its laser pulse array for the next snapshot
+            laser_data = self._extract_laser_pulses(snapshot['raw_data']).copy()
+            tmp_signal, tmp_error = self._analyze_laser_pulses(laser_data)
+
+        # exclude laser pulses to ignore
+        if len(snapshot['laser_ignore_list']) > 0:
+            # Convert relative negative indices into absolute positive indices
+            ignore_list = sorted(len(tmp_signal) + index if index < 0 else index for index in
+                                 snapshot['laser_ignore_list'])
+            tmp_signal = np.delete(tmp_signal, ignore_list)
+            tmp_error = np.delete(tmp_error, ignore_list)
+
+        # order data according to alternating flag
+        controlled_variable = snapshot['controlled_variable']
+        signal_dim = 3 if snapshot['alternating'] else 2
+        signal_data = np.zeros((signal_dim, len(controlled_variable)), dtype=float)
+        measurement_error = np.zeros((signal_dim, len(controlled_variable)), dtype=float)
+        signal_data[0] = controlled_variable
+        measurement_error[0] = controlled_variable
+        if snapshot['alternating']:
+            if len(controlled_variable) != len(tmp_signal[::2]):
+                self.log.error('Length of controlled variable ({0}) does not match length of number of readout '
+                               'pulses ({1}).'.format(len(controlled_variable), len(tmp_signal[::2])))
+                return False
+            signal_data[1] = tmp_signal[::2]
+            signal_data[2] = tmp_signal[1::2]
+            measurement_error[1] = tmp_error[::2]
+            measurement_error[2] = tmp_error[1::2]
+        else:
+            if len(controlled_variable) != len(tmp_signal):
+                self.log.error('Length of controlled variable ({0}) does not match length of number of readout '
+                               'pulses ({1}).'.format(len(controlled_variable), len(tmp_signal)))
+                return False
+            signal_data[1] = tmp_signal
+            measurement_error[1] = tmp_error
+
+        # Compute alternative data array from signal
+        signal_alt_data = self._calculate_alt_data(signal_data)
+
+        # Publish all results at once. Results of older snapshots than the ones already published
+        # are discarded.
+        with self._threadlock:
+            if snapshot['id'] <= self._analysis_published_id:
+                return False
+            self._analysis_published_id = snapshot['id']
+            # The replaced raw data array is reused for the next snapshots
+            self._release_snapshot_buffer(self.raw_data)
+            self.raw_data = snapshot['raw_data']
+            self.laser_data = laser_data
+            self.signal_data = signal_data
+            self.measurement_error = measurement_error
+            self.signal_alt_data = signal_alt_data
+        self.sigMeasurementDataUpdated.emit()
+        return True
+
+    def _extract_laser_pulses(self, raw_data):
+        # extract laser pulses from raw data
+        return_dict = self._pulseextractor.extract_laser_pulses(raw_data)
+        return return_dict['laser_counts_arr']
+
+    def _analyze_laser_pulses(self, laser_data):
         # analyze pulses and get data points for signal array. Also check if extraction
         # worked (non-zero array returned).
-        if self.laser_data.any():
-            tmp_signal, tmp_error = self._pulseanalyzer.analyse_laser_pulses(
-                self.laser_data)
+        if laser_data.any():
+            tmp_signal, tmp_error = self._pulseanalyzer.analyse_laser_pulses(laser_data)
         else:
-            tmp_signal = np.zeros(self.laser_data.shape[0])
-            tmp_error = np.zeros(self.laser_data.shape[0])
+            tmp_signal = np.zeros(laser_data.shape[0])
+            tmp_error = np.zeros(laser_data.shape[0])
         return tmp_signal, tmp_error
 
     def _get_raw_data(self):
         """
         Get the raw count data from the fast counting hardware and perform sanity checks.
         Also add recalled raw data to the newly received data.
+
+        If the hardware flags the returned data as delta (info_dict key 'is_delta'), i.e. only the
+        counts acquired since the last call of get_data_trace, the data is added to an int64
+        accumulator that has been initialized with the recalled raw data. Otherwise the recalled
+        raw data is added to the cumulative trace of the hardware. In both cases (and if the
+        hardware delivers another dtype than int64) the result is written into the same
+        preallocated array every time. Together with the persistent buffer the hardware writes
+        into (see _read_fast_counter_data) no memory is allocated per call.
+
         @return tuple(numpy.ndarray, info_dict): The count data (1D for ungated, 2D for gated counter) and
                                                  info_dict with keys 'elapsed_sweeps' and 'elapsed_time'
         """
         # get raw data from fast counter
-        fc_data = self.fastcounter().get_data_trace()
-        if type(fc_data) == tuple and len(fc_data) == 2:  # if the hardware implement the new version of the interface
-            fc_data, info_dict = fc_data
-        else:
-            info_dict = {'elapsed_sweeps': None, 'elapsed_time': None}
-        fc_data = netobtain(fc_data)
+        fc_data, info_dict = self._read_fast_counter_data()
+        is_delta = isinstance(info_dict, dict) and bool(info_dict.get('is_delta'))
 
         if isinstance(info_dict, dict) and info_dict.get('elapsed_sweeps') is not None:
             elapsed_sweeps = info_dict['elapsed_sweeps']
@@ -1196,27 +1382,110 @@ class PulsedMeasurementLogic(GenericLogic):
             elapsed_time = time.time() - self.__start_time
 
         # add old raw data from previous measurements if necessary
-        if self._saved_raw_data.get(self._recalled_raw_data_tag) is not None:
+        recalled_data = self._saved_raw_data.get(self._recalled_raw_data_tag)
+        if recalled_data is not None:
             # self.log.info('Found old saved raw data with tag "{0}".'
             #               ''.format(self._recalled_raw_data_tag))
-            elapsed_sweeps += self._saved_raw_data[self._recalled_raw_data_tag][1]['elapsed_sweeps']
-            elapsed_time += self._saved_raw_data[self._recalled_raw_data_tag][1]['elapsed_time']
+            elapsed_sweeps += recalled_data[1]['elapsed_sweeps']
+            elapsed_time += recalled_data[1]['elapsed_time']
+
+        if is_delta:
+            fc_data = self._accumulate_raw_data(fc_data, recalled_data)
+        elif recalled_data is not None:
             if not fc_data.any():
                 self.log.warning('Only zeros received from fast counter!\n'
                                  'Using recalled raw data only.')
-                fc_data = self._saved_raw_data[self._recalled_raw_data_tag][0]
-            elif self._saved_raw_data[self._recalled_raw_data_tag][0].shape == fc_data.shape:
+                fc_data = recalled_data[0]
+            elif recalled_data[0].shape == fc_data.shape:
                 self.log.debug('Recalled raw data has the same shape as current data.')
-                fc_data = self._saved_raw_data[self._recalled_raw_data_tag][0] + fc_data
+                fc_data = np.add(recalled_data[0], fc_data,
+                                 out=self._get_raw_data_accumulator(fc_data.shape),
+                                 casting='unsafe')
             else:
                 self.log.warning('Recalled raw data has not the same shape as current data.'
                                  '\nDid NOT add recalled raw data to current time trace.')
         elif not fc_data.any():
             self.log.warning('Only zeros received from fast counter!')
-            fc_data = np.zeros(fc_data.shape, dtype='int64')
+            fc_data = self._get_raw_data_accumulator(fc_data.shape)
+            fc_data.fill(0)
+        elif fc_data.dtype != np.int64:
+            # the analysis expects int64 raw data, convert without allocating a new array
+            accumulator = self._get_raw_data_accumulator(fc_data.shape)
+            np.copyto(accumulator, fc_data, casting='unsafe')
+            fc_data = accumulator
 
         return fc_data, {'elapsed_sweeps': elapsed_sweeps, 'elapsed_time': elapsed_time}
 
+    def _read_fast_counter_data(self):
+        """
+        Poll the time trace from the fast counter hardware.
+
+        Local hardware writes the time trace into a persistent buffer of its native dtype (see
+        FastCounterInterface.get_data_trace_into), which is only allocated anew if the shape of the
+        time trace changes. Remote hardware is polled with get_data_trace, since it would have to
+        write into the buffer over the network.
+
+        @return tuple(numpy.ndarray, info_dict): time trace and info_dict of the hardware
+        """
+        fastcounter = self.fastcounter()
+        if not is_netref(fastcounter.get_data_trace_into):
+            buffer = self._fast_counter_buffer
+            if buffer is not None:
+                info_dict = fastcounter.get_data_trace_into(buffer)
+                if info_dict is not None:
+                    return buffer, info_dict
+
+        fc_data = fastcounter.get_data_trace()
+        if type(fc_data) == tuple and len(fc_data) == 2:  # if the hardware implement the new version of the interface
+            fc_data, info_dict = fc_data
+        else:
+            info_dict = {'elapsed_sweeps': None, 'elapsed_time': None}
+        fc_data = netobtain(fc_data)
+        if not is_netref(fastcounter.get_data_trace_into):
+            # (re-)allocate the buffer with the shape of the time trace for the next calls
+            self._fast_counter_buffer = np.zeros(np.shape(fc_data),
+                                                 dtype=fastcounter.get_data_trace_dtype())
+        return fc_data, info_dict
+
+    def _get_raw_data_accumulator(self, shape):
+        """
+        Get the preallocated int64 raw data array. A new (zero) array is only allocated if the shape
+        of the raw data has changed.
+
+        @param tuple shape: shape of the raw data
+        @return numpy.ndarray: the raw data accumulator
+        """
+        if self._raw_data_accumulator is None or self._raw_data_accumulator.shape != shape:
+            self._raw_data_accumulator = np.zeros(shape, dtype='int64')
+            self._raw_data_accumulated = False
+        return self._raw_data_accumulator
+
+    def _accumulate_raw_data(self, delta_data, recalled_data=None):
+        """
+        Add the counts received since the last call to the raw data accumulator.
+        Recalled raw data is added once when the accumulation starts.
+
+        @param numpy.ndarray delta_data: counts acquired since the last call of get_data_trace
+        @param tuple recalled_data: optional, recalled (raw data, info dict) tuple
+        @return numpy.ndarray: the accumulated raw data
+        """
+        if self._raw_data_accumulated and (self._raw_data_accumulator is None or
+                                           self._raw_data_accumulator.shape != delta_data.shape):
+            self.log.warning('Shape of the raw data received from fast counter has changed.\n'
+                             'Restarting raw data accumulation.')
+        accumulator = self._get_raw_data_accumulator(delta_data.shape)
+        if not self._raw_data_accumulated:
+            accumulator.fill(0)
+            if recalled_data is not None:
+                if recalled_data[0].shape == delta_data.shape:
+                    accumulator += recalled_data[0]
+                else:
+                    self.log.warning('Recalled raw data has not the same shape as current data.'
+                                     '\nDid NOT add recalled raw data to current time trace.')
+            self._raw_data_accumulated = True
+        np.add(accumulator, delta_data, out=accumulator, casting='unsafe')
+        return accumulator
+
     def _initialize_data_arrays(self):
         """
         Initializing the signal, error, laser and raw data arrays.
@@ -1241,6 +1510,9 @@ class PulsedMeasurementLogic(GenericLogic):
             self.raw_data = np.zeros((self._number_of_lasers, number_of_bins), dtype='int64')
         else:
             self.raw_data = np.zeros(number_of_bins, dtype='int64')
+        self._raw_data_accumulator = np.zeros(self.raw_data.shape, dtype='int64')
+        self._raw_data_accumulated = False
+        self._fast_counter_buffer = None
 
         self.sigMeasurementDataUpdated.emit()
         return
@@ -1286,14 +1558,14 @@ class PulsedMeasurementLogic(GenericLogic):
             parameters['gated counting'] = self.fast_counter_settings['is_gated']
             parameters['extraction parameters'] = self.extraction_settings
 
-            self.savelogic().save_data(data,
-                                       timestamp=timestamp,
-                                       parameters=parameters,
-                                       filepath=filepath,
-                                       filelabel=filelabel,
-                                       filetype='text',
-                                       fmt='%d',
-                                       delimiter='\t')
+            self.savelogic().save_data_async(data,
+                                             timestamp=timestamp,
+                                             parameters=parameters,
+                                             filepath=filepath,
+                                             filelabel=filelabel,
+                                             filetype='text',
+                                             fmt='%d',
+                                             delimiter='\t')
 
         #####################################################################
         ####                Save measurement data                        ####
@@ -1559,10 +1831,10 @@ class PulsedMeasurementLogic(GenericLogic):
             else:
                 fig = None
 
-            self.savelogic().save_data(data, timestamp=timestamp,
-                                       parameters=parameters, fmt='%.15e',
-                                       filepath=filepath, filelabel=filelabel, filetype='text',
-                                       delimiter='\t', plotfig=fig)
+            self.savelogic().save_data_async(data, timestamp=timestamp,
+                                             parameters=parameters, fmt='%.15e',
+                                             filepath=filepath, filelabel=filelabel, filetype='text',
+                                             delimiter='\t', plotfig=fig)
 
         #####################################################################
         ####                Save raw data timetrace                      ####
@@ -1584,42 +1856,52 @@ class PulsedMeasurementLogic(GenericLogic):
         parameters['Approx. measurement time (s)'] = self.__elapsed_time
         parameters['Measurement sweeps'] = self.__elapsed_sweeps
 
-        self.savelogic().save_data(data, timestamp=timestamp,
-                                   parameters=parameters, fmt='%d',
-                                   filepath=filepath, filelabel=filelabel,
-                                   filetype=self._raw_data_save_type,
-                                   delimiter='\t')
+        self.savelogic().save_data_async(data, timestamp=timestamp,
+                                         parameters=parameters, fmt='%d',
+                                         filepath=filepath, filelabel=filelabel,
+                                         filetype=self._raw_data_save_type,
+                                         delimiter='\t')
         return filepath
 
     def _compute_alt_data(self):
         """
         Performing transformations on the measurement data (e.g. fourier transform).
         """
-        if self._alternative_data_type == 'Delta' and len(self.signal_data) == 3:
-            self.signal_alt_data = np.empty((2, self.signal_data.shape[1]), dtype=float)
-            self.signal_alt_data[0] = self.signal_data[0]
-            self.signal_alt_data[1] = self.signal_data[1] - self.signal_data[2]
-        elif self._alternative_data_type == 'FFT' and self.signal_data.shape[1] >= 2:
-            fft_x, fft_y = compute_ft(x_val=self.signal_data[0],
-                                      y_val=self.signal_data[1],
+        self.signal_alt_data = self._calculate_alt_data(self.signal_data)
+        return
+
+    def _calculate_alt_data(self, signal_data):
+        """
+        Calculate the alternative data (e.g. fourier transform) of the given signal data.
+
+        @param numpy.ndarray signal_data: signal data (controlled variable and signal(s))
+        @return numpy.ndarray: alternative data
+        """
+        if self._alternative_data_type == 'Delta' and len(signal_data) == 3:
+            signal_alt_data = np.empty((2, signal_data.shape[1]), dtype=float)
+            signal_alt_data[0] = signal_data[0]
+            signal_alt_data[1] = signal_data[1] - signal_data[2]
+        elif self._alternative_data_type == 'FFT' and signal_data.shape[1] >= 2:
+            fft_x, fft_y = compute_ft(x_val=signal_data[0],
+                                      y_val=signal_data[1],
                                       zeropad_num=self.zeropad,
                                       window=self.window,
                                       base_corr=self.base_corr,
                                       psd=self.psd)
-            self.signal_alt_data = np.empty((len(self.signal_data), len(fft_x)), dtype=float)
-            self.signal_alt_data[0] = fft_x
-            self.signal_alt_data[1] = fft_y
-            for dim in range(2, len(self.signal_data)):
-                dummy, self.signal_alt_data[dim] = compute_ft(x_val=self.signal_data[0],
-                                                              y_val=self.signal_data[dim],
-                                                              zeropad_num=self.zeropad,
-                                                              window=self.window,
-                                                              base_corr=self.base_corr,
-                                                              psd=self.psd)
+            signal_alt_data = np.empty((len(signal_data), len(fft_x)), dtype=float)
+            signal_alt_data[0] = fft_x
+            signal_alt_data[1] = fft_y
+            for dim in range(2, len(signal_data)):
+                dummy, signal_alt_data[dim] = compute_ft(x_val=signal_data[0],
+                                                         y_val=signal_data[dim],
+                                                         zeropad_num=self.zeropad,
+                                                         window=self.window,
+                                                         base_corr=self.base_corr,
+                                                         psd=self.psd)
         else:
-            self.signal_alt_data = np.zeros(self.signal_data.shape, dtype=float)
-            self.signal_alt_data[0] = self.signal_data[0]
-        return
+            signal_alt_data = np.zeros(signal_data.shape, dtype=float)
+            signal_alt_data[0] = signal_data[0]
+        return signal_alt_data
 
 
 
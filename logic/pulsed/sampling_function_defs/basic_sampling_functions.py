@@ -29,6 +29,8 @@ class Idle(SamplingBase):
     """
     Object representing an idle element (zero voltage)
     """
+    elementwise = True
+
     def __init__(self):
         pass
 
@@ -42,6 +44,8 @@ class DC(SamplingBase):
     """
     Object representing an DC element (constant voltage)
     """
+    elementwise = True
+
     params = OrderedDict()
     params['voltage'] = {'unit': 'V', 'init': 0.0, 'min': -np.inf, 'max': +np.inf, 'type': float}
 
@@ -66,6 +70,8 @@ class Sin(SamplingBase):
     """
     Object representing a sine wave element
     """
+    elementwise = True
+
     params = OrderedDict()
     params['amplitude'] = {'unit': 'V', 'init': 0.0, 'min': 0.0, 'max': np.inf, 'type': float}
     params['frequency'] = {'unit': 'Hz', 'init': 2.87e9, 'min': 0.0, 'max': np.inf, 'type': float}
@@ -101,6 +107,8 @@ class DoubleSinSum(SamplingBase):
     """
     Object representing a double sine wave element (Superposition of two sine waves; NOT normalized)
     """
+    elementwise = True
+
     params = OrderedDict()
     params['amplitude_1'] = {'unit': 'V', 'init': 0.0, 'min': 0.0, 'max': np.inf, 'type': float}
     params['frequency_1'] = {'unit': 'Hz', 'init': 2.87e9, 'min': 0.0, 'max': np.inf, 'type': float}
@@ -159,6 +167,8 @@ class DoubleSinProduct(SamplingBase):
     """
     Object representing a double sine wave element (Product of two sine waves; NOT normalized)
     """
+    elementwise = True
+
     params = OrderedDict()
     params['amplitude_1'] = {'unit': 'V', 'init': 0.0, 'min': 0.0, 'max': np.inf, 'type': float}
     params['frequency_1'] = {'unit': 'Hz', 'init': 2.87e9, 'min': 0.0, 'max': np.inf, 'type': float}
@@ -218,6 +228,8 @@ class TripleSinSum(SamplingBase):
     Object representing a linear combination of three sines
     (Superposition of three sine waves; NOT normalized)
     """
+    elementwise = True
+
     params = OrderedDict()
     params['amplitude_1'] = {'unit': 'V', 'init': 0.0, 'min': 0.0, 'max': np.inf, 'type': float}
     params['frequency_1'] = {'unit': 'Hz', 'init': 2.87e9, 'min': 0.0, 'max': np.inf, 'type': float}
@@ -298,6 +310,8 @@ class TripleSinProduct(SamplingBase):
     Object representing a wave element composed of the product of three sines
     (Product of three sine waves; NOT normalized)
     """
+    elementwise = True
+
     params = OrderedDict()
     params['amplitude_1'] = {'unit': 'V', 'init': 0.0, 'min': 0.0, 'max': np.inf, 'type': float}
     params['frequency_1'] = {'unit': 'Hz', 'init': 2.87e9, 'min': 0.0, 'max': np.inf, 'type': float}
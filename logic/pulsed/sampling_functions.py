@@ -101,8 +101,13 @@ class DDMethods(Enum):
 class SamplingBase:
     """
     Base class for all sampling functions
+
+    Set the class attribute "elementwise" to True if each sample returned by get_samples only
+    depends on the corresponding entry of the time array (and not e.g. on the first/last time or
+    the length of the array). Elements using such a function can be sampled together in one call.
     """
     params = OrderedDict()
+    elementwise = False
     log = logging.getLogger(__name__)
 
     def __repr__(self):
@@ -28,6 +28,7 @@ import copy
 import traceback
 import datetime
 
+from concurrent.futures import ThreadPoolExecutor
 from qtpy import QtCore
 from collections import OrderedDict
 from core.statusvariable import StatusVar
@@ -41,6 +42,8 @@ from logic.generic_logic import GenericLogic
 from logic.pulsed.pulse_objects import PulseBlock, PulseBlockEnsemble, PulseSequence
 from logic.pulsed.pulse_objects import PulseObjectGenerator, PulseBlockElement
 from logic.pulsed.sampling_functions import SamplingFunctions
+from logic.pulsed.ensemble_sampler import EnsembleSampler, SampleCache, compile_element_runs
+from logic.pulsed.waveform_fingerprints import WaveformFingerprints
 from interface.pulser_interface import SequenceOption
 
 
@@ -76,6 +79,16 @@ class SequenceGeneratorLogic(GenericLogic):
                                                    missing='nothing')
     _info_on_estimated_upload_time = ConfigOption(name='info_on_estimated_upload_time', default=60, missing='nothing')
     _disable_bench_prompt = ConfigOption(name='disable_benchmark_prompt', default=False, missing='nothing')
+    # Number of threads used to sample the analog channels of a waveform in parallel
+    _sampling_threads = ConfigOption(name='sampling_threads', default=1, missing='nothing')
+    # Memory (bytes) used to cache sampled elements (0 to disable) and optional cache directory
+    _sample_cache_size = ConfigOption(name='sample_cache_size', default=256 * 2**20, missing='nothing')
+    _sample_cache_dir = ConfigOption(name='sample_cache_dir', default=None, missing='nothing')
+    _sample_cache_disk_size = ConfigOption(name='sample_cache_disk_size', default=2**30, missing='nothing')
+    # Skip writing waveforms if identical samples are already present on the device
+    _skip_unchanged_waveforms = ConfigOption(name='skip_unchanged_waveforms', default=True, missing='nothing')
+    # Sample the next chunk of a waveform while the current chunk is written to the device
+    _pipelined_sampling = ConfigOption(name='pipelined_sampling', default=True, missing='nothing')
 
     # status vars
     # Global parameters describing the channel usage and common parameters used during pulsed object
@@ -145,6 +158,13 @@ class SequenceGeneratorLogic(GenericLogic):
         # Get instance of PulseObjectGenerator which takes care of collecting all predefined methods
         self._pog = None
 
+        # Thread pool used for parallel sampling of analog channels (None for serial sampling)
+        self._sampling_executor = None
+        # Cache of sampled analog elements (None if disabled)
+        self._sample_cache = None
+        # Fingerprints of the waveforms written to the device
+        self._waveform_fingerprints = WaveformFingerprints()
+
         # The created pulse objects (PulseBlock, PulseBlockEnsemble, PulseSequence) are saved in
         # these dictionaries. The keys are the names.
         self._saved_pulse_blocks = OrderedDict()
@@ -211,12 +231,29 @@ class SequenceGeneratorLogic(GenericLogic):
         self._pog = PulseObjectGenerator(sequencegeneratorlogic=self)
 
         self.__sequence_generation_in_progress = False
+        self._waveform_fingerprints.clear()
+
+        if self._sampling_threads > 1:
+            self._sampling_executor = ThreadPoolExecutor(max_workers=self._sampling_threads)
+        else:
+            self._sampling_executor = None
 
+        # (Re-)create the sample cache since the sampling functions might have changed
+        if self._sample_cache_size > 0:
+            self._sample_cache = SampleCache(max_bytes=self._sample_cache_size,
+                                             cache_dir=self._sample_cache_dir,
+                                             max_disk_bytes=self._sample_cache_disk_size)
+        else:
+            self._sample_cache = None
         return
 
     def on_deactivate(self):
         """ Deinitialisation performed during deactivation of the module.
         """
+        if self._sampling_executor is not None:
+            self._sampling_executor.shutdown()
+            self._sampling_executor = None
+        self._sample_cache = None
         return
 
     # @_saved_pulse_blocks.constructor
@@ -462,6 +499,7 @@ class SequenceGeneratorLogic(GenericLogic):
             self.log.error('Can´t clear the pulser as it is running. Switch off the pulser and try again.')
             return -1
         self.pulsegenerator().clear_all()
+        self._waveform_fingerprints.clear()
         # Delete all sampling information from all PulseBlockEnsembles and PulseSequences
         for seq_name in self.saved_pulse_sequences:
             seq = self.saved_pulse_sequences[seq_name]
@@ -1241,13 +1279,15 @@ class SequenceGeneratorLogic(GenericLogic):
 
     def analyze_block_ensemble(self, ensemble):
         """
-        This helper method runs through each element of a PulseBlockEnsemble object and extracts
-        important information about the Waveform that can be created out of this object.
+        This helper method analyzes a PulseBlockEnsemble object and extracts important information
+        about the Waveform that can be created out of this object.
         Especially the discretization due to the set self.sample_rate is taken into account.
         The positions in time (as integer time bins) of the PulseBlockElement transitions are
         determined here (all the "rounding-to-best-match-value").
         Additional information like the total number of samples, total number of PulseBlockElements
         and the timebins for digital channel low-to-high transitions get returned as well.
+        All repetitions of a block are discretized at once with numpy, the result is identical to
+        running through each element one after another.
 
         This method assumes that sanity checking has been already performed on the
         PulseBlockEnsemble (via _sampling_ensemble_sanity_check). Meaning it assumes that all
@@ -1259,9 +1299,10 @@ class SequenceGeneratorLogic(GenericLogic):
                                               current sample_rate and PulseBlockEnsemble object.
                  total_elements (int): The total number of PulseBlockElements (incl. repetitions) in
                                        the provided PulseBlockEnsemble.
-                 elements_length_bins (1D numpy.ndarray[int]): Array of number of timebins for each
-                                                               PulseBlockElement in chronological
-                                                               order (incl. repetitions).
+                 element_runs (dict): Run-length table of the number of timebins of each
+                                      PulseBlockElement (incl. repetitions). Consecutive block
+                                      repetitions with identical element lengths are stored only
+                                      once (see logic.pulsed.ensemble_sampler.compile_element_runs).
                  digital_rising_bins (dict): Dictionary with keys being the digital channel
                                              descriptor string and items being arrays of
                                              chronological low-to-high transition positions
@@ -1284,106 +1325,42 @@ class SequenceGeneratorLogic(GenericLogic):
         laser_channel = self.generation_parameters['gate_channel'] if self.generation_parameters[
             'gate_channel'] else self.generation_parameters['laser_channel']
 
-        # memorize the digital channel state of the previous element
-        tmp_digital_high = dict()
-        # memorize the laser_on flag of the previous element (in case of non-digital laser channel)
-        tmp_laser_on = False
         # Set of used analog and digital channels
         digital_channels = set()
         analog_channels = set()
-        # check for active channels and initialize tmp_digital_high/tmp_laser_on with the state of
-        # the very last element in the ensemble
         if len(ensemble) > 0:
             block = self.get_block(ensemble[0][0])
             digital_channels = block.digital_channels
             analog_channels = block.analog_channels
-            block = self.get_block(ensemble[-1][0])
-            if len(block) > 0:
-                tmp_digital_high = block[-1].digital_high.copy()
-                tmp_laser_on = block[-1].laser_on
-            else:
-                tmp_digital_high = {chnl: False for chnl in digital_channels}
-                tmp_laser_on = False
-
-        # dicts containing the bins where the digital channels are rising/falling
-        digital_rising_bins = {chnl: list() for chnl in digital_channels}
-        digital_falling_bins = {chnl: list() for chnl in digital_channels}
-        laser_rising_bins = list()
-        laser_falling_bins = list()
-
-        # Array to store the length in bins for all elements including repetitions in the order
-        # they are occuring in the waveform later on.
-        elements_length_bins = list()
-
-        # variables to keep track of the current timeframe
-        current_end_time = 0.0
-        current_start_bin = 0
-
-        # Loop through all blocks in the ensemble
-        for block_name, reps in ensemble:
-            # Get the stored PulseBlock instance
-            block = self.get_block(block_name)
-
-            # Iterate over all repetitions of the current block
-            for rep_no in range(reps + 1):
-                # Iterate over the Block_Elements inside the current block
-                for element in block:
-                    # save bin position if a transition from low to high or vice versa has occurred
-                    # in a digital channel
-                    if tmp_digital_high != element.digital_high:
-                        for chnl, state in element.digital_high.items():
-                            if not tmp_digital_high[chnl] and state:
-                                digital_rising_bins[chnl].append(current_start_bin)
-                            elif tmp_digital_high[chnl] and not state:
-                                digital_falling_bins[chnl].append(current_start_bin)
-                        tmp_digital_high = element.digital_high.copy()
-
-                    if not laser_channel.startswith('d') and tmp_laser_on != element.laser_on:
-                        if not tmp_laser_on and element.laser_on:
-                            laser_rising_bins.append(current_start_bin)
-                        else:
-                            laser_falling_bins.append(current_start_bin)
-                        tmp_laser_on = element.laser_on
-
-                    # Calculate length of the current element with current repetition count in sec
-                    # and add this to the ideal end time for the sequence up until this point.
-                    current_end_time += element.init_length_s + rep_no * element.increment_s
-
-                    # Nearest possible match including the discretization in bins
-                    current_end_bin = int(np.rint(current_end_time * self.__sample_rate))
 
-                    # append current element length in discrete bins to temporary array
-                    elements_length_bins.append(current_end_bin - current_start_bin)
-
-                    # advance bin offset for next element
-                    current_start_bin = current_end_bin
-
-        elements_length_bins = np.array(elements_length_bins, dtype='int64')
-
-        # convert rising/falling indices to numpy.ndarrays. Remove duplicates.
-        for chnl in digital_channels:
-            digital_rising_bins[chnl] = sorted(set(digital_rising_bins[chnl]))
-            digital_falling_bins[chnl] = sorted(set(digital_falling_bins[chnl]))
-            digital_rising_bins[chnl] = np.array(digital_rising_bins[chnl], dtype='int64')
-            digital_falling_bins[chnl] = np.array(digital_falling_bins[chnl], dtype='int64')
+        # Discretize all elements (incl. repetitions) into a run-length element table and collect
+        # the digital channel and laser_on transitions.
+        runs_info = compile_element_runs(
+            ensemble=ensemble,
+            blocks={name: self.get_block(name) for name, reps in ensemble.block_list},
+            sample_rate=self.__sample_rate,
+            digital_channels=digital_channels,
+            laser_on_edges=not laser_channel.startswith('d'))
+        digital_rising_bins = runs_info['digital_rising_bins']
+        digital_falling_bins = runs_info['digital_falling_bins']
         if laser_channel.startswith('d'):
             laser_rising_bins = digital_rising_bins[laser_channel]
             laser_falling_bins = digital_falling_bins[laser_channel]
         else:
-            laser_rising_bins = np.array(sorted(set(laser_rising_bins)), dtype='int64')
-            laser_falling_bins = np.array(sorted(set(laser_falling_bins)), dtype='int64')
+            laser_rising_bins = runs_info['laser_rising_bins']
+            laser_falling_bins = runs_info['laser_falling_bins']
 
         return_dict = dict()
-        return_dict['number_of_samples'] = np.sum(elements_length_bins)
-        return_dict['number_of_elements'] = len(elements_length_bins)
-        return_dict['elements_length_bins'] = elements_length_bins
+        return_dict['number_of_samples'] = np.int64(runs_info['number_of_samples'])
+        return_dict['number_of_elements'] = runs_info['number_of_elements']
+        return_dict['element_runs'] = runs_info['element_runs']
         return_dict['digital_rising_bins'] = digital_rising_bins
         return_dict['digital_falling_bins'] = digital_falling_bins
         return_dict['analog_channels'] = analog_channels
         return_dict['digital_channels'] = digital_channels
         return_dict['channel_set'] = analog_channels.union(digital_channels)
         return_dict['generation_parameters'] = self.generation_parameters.copy()
-        return_dict['ideal_length'] = current_end_time
+        return_dict['ideal_length'] = runs_info['ideal_length']
         return_dict['laser_rising_bins'] = laser_rising_bins
         return_dict['laser_falling_bins'] = laser_falling_bins
         return return_dict
@@ -1408,9 +1385,8 @@ class SequenceGeneratorLogic(GenericLogic):
                                               current sample_rate and PulseBlockEnsemble object.
                  total_elements (int): The total number of PulseBlockElements (incl. repetitions) in
                                        the provided PulseBlockEnsemble.
-                 elements_length_bins (1D numpy.ndarray[int]): Array of number of timebins for each
-                                                               PulseBlockElement in chronological
-                                                               order (incl. repetitions).
+                 element_runs_per_step (list): [repetitions, element_runs] for each sequence
+                                               step (see analyze_block_ensemble).
                  digital_rising_bins (dict): Dictionary with keys being the digital channel
                                              descriptor string and items being arrays of
                                              chronological low-to-high transition positions
@@ -1459,7 +1435,7 @@ class SequenceGeneratorLogic(GenericLogic):
         step_length_bins = np.zeros(len(sequence), dtype='int64')
         ideal_step_length = np.zeros(len(sequence), dtype='float64')
         number_of_step_elements = np.zeros(len(sequence), dtype='int64')
-        step_elements_length_bins = list()
+        step_element_runs = list()
         laser_rising_bins = list()
         laser_falling_bins = list()
         digital_rising_bins = {chnl: list() for chnl in digital_channels}
@@ -1493,8 +1469,7 @@ class SequenceGeneratorLogic(GenericLogic):
             step_length_bins[step_no] = ens_bins * reps if is_finite else -1
             number_of_step_elements[step_no] = info_dict['number_of_elements'] * reps if is_finite else -1
             ideal_step_length[step_no] = info_dict['ideal_length'] * reps if is_finite else np.inf
-            step_elements_length_bins.append(
-                [seq_step.repetitions, info_dict['elements_length_bins']])
+            step_element_runs.append([seq_step.repetitions, info_dict['element_runs']])
 
             # Get the digital channel rising/falling bin positions and concatenate them according
             # to sequence step repetition count considering bin offsets.
@@ -1597,7 +1572,7 @@ class SequenceGeneratorLogic(GenericLogic):
         return_dict['ensemble_names'] = ensemble_name_set
         return_dict['number_of_elements'] = np.sum(number_of_step_elements)
         return_dict['number_of_elements_per_step'] = number_of_step_elements
-        return_dict['elements_length_bins_per_step'] = step_elements_length_bins
+        return_dict['element_runs_per_step'] = step_element_runs
         return_dict['ideal_length_per_step'] = ideal_step_length
         return_dict['ideal_length'] = np.sum(ideal_step_length)
         return_dict['laser_rising_bins'] = laser_rising_bins
@@ -1673,8 +1648,10 @@ class SequenceGeneratorLogic(GenericLogic):
 
         This method is creating the actual samples (voltages and logic states) for each time step
         of the analog and digital channels specified in the PulseBlockEnsemble.
-        Therefore it iterates through all blocks, repetitions and elements of the ensemble and
-        calculates the exact voltages (float64) according to the specified math_function. The
+        Therefore the ensemble is compiled into a flat table of all elements (see EnsembleSampler)
+        and the exact voltages (float64) are calculated according to the specified math_function.
+        Elements sharing the same elementwise sampling function are evaluated in a single call.
+        The analog channels can be sampled in parallel (ConfigOption "sampling_threads"). The
         samples are later on stored inside a float32 array.
         So each element is calculated with high precision (float64) and then down-converted to
         float32 to be stored.
@@ -1716,9 +1693,6 @@ class SequenceGeneratorLogic(GenericLogic):
         # Set the waveform name (excluding the device specific channel naming suffix, i.e. '_ch1')
         waveform_name = name_tag if name_tag else ensemble.name
 
-        # check for old waveforms associated with the ensemble and delete them from pulse generator.
-        self._delete_waveform_by_nametag(waveform_name)
-
         # Take current time
         start_time = time.time()
 
@@ -1789,130 +1763,77 @@ class SequenceGeneratorLogic(GenericLogic):
             self.sigSampleEnsembleComplete.emit(None)
             return -1, list(), dict()
 
-        # Allocate the sample arrays that are used for a single write command
-        analog_samples = dict()
-        digital_samples = dict()
-        try:
-            for chnl in ensemble_info['analog_channels']:
-                analog_samples[chnl] = np.empty(array_length, dtype='float32')
-            for chnl in ensemble_info['digital_channels']:
-                digital_samples[chnl] = np.empty(array_length, dtype=bool)
-        except MemoryError:
-            self.log.error('Sampling of PulseBlockEnsemble "{0}" failed due to a MemoryError.\n'
-                           'The sample array needed is too large to allocate in memory.\n'
-                           'Try using the overhead_bytes ConfigOption to limit memory usage.'
-                           ''.format(ensemble.name))
-            if not self.__sequence_generation_in_progress:
-                self.module_state.unlock()
-            self.sigSampleEnsembleComplete.emit(None)
-            return -1, list(), dict()
+        # Compile the ensemble into a flat element table
+        sampler = EnsembleSampler(
+            ensemble=ensemble,
+            blocks={name: self.get_block(name) for name, reps in ensemble.block_list},
+            element_runs=ensemble_info['element_runs'],
+            sample_rate=self.__sample_rate,
+            analog_amplitudes=self.__analog_levels[0],
+            analog_channels=ensemble_info['analog_channels'],
+            digital_channels=ensemble_info['digital_channels'],
+            offset_bin=offset_bin,
+            executor=self._sampling_executor,
+            cache=self._sample_cache)
+
+        # Check if the very same samples have already been written to the device under this name
+        fingerprint = sampler.fingerprint(array_length)
+        written_waveforms = None
+        if self._skip_unchanged_waveforms:
+            written_waveforms = self._waveform_fingerprints.lookup(waveform_name,
+                                                                   fingerprint,
+                                                                   self.sampled_waveforms)
+        if written_waveforms is not None:
+            self.log.info('Samples of PulseBlockEnsemble "{0}" are unchanged. Reusing waveforms {1} '
+                          'already present on the device.'.format(ensemble.name, written_waveforms))
+        else:
+            # check for old waveforms associated with the ensemble and delete them from pulse
+            # generator.
+            self._delete_waveform_by_nametag(waveform_name)
 
-        t_est_upload = self._benchmark_write.estimate_time(ensemble_info['number_of_samples'])
-        if t_est_upload > self._info_on_estimated_upload_time:
-            now = datetime.datetime.now()
-            self.log.info("Estimated finish of writing for long waveform:"
-                          " {0:%Y-%m-%d %H:%M:%S} ({1:d} s)".format(
-                (now + datetime.timedelta(0, t_est_upload)), int(t_est_upload)))
-
-        # integer to keep track of the sampls already processed
-        processed_samples = 0
-        # Index to keep track of the samples written into the preallocated samples array
-        array_write_index = 0
-        # Keep track of the number of elements already written
-        element_count = 0
-        # set of written waveform names on the device
-        written_waveforms = set()
-        # Iterate over all blocks within the PulseBlockEnsemble object
-        for block_name, reps in ensemble.block_list:
-            block = self.get_block(block_name)
-            # Iterate over all repetitions of the current block
-            for rep_no in range(reps + 1):
-                # Iterate over the PulseBlockElement instances inside the current block
-                for element in block.element_list:
-                    digital_high = element.digital_high
-                    pulse_function = element.pulse_function
-                    element_length_bins = ensemble_info['elements_length_bins'][element_count]
-
-                    # Indicator on how many samples of this element have been written already
-                    element_samples_written = 0
-
-                    while element_samples_written != element_length_bins:
-                        samples_to_add = min(array_length - array_write_index,
-                                             element_length_bins - element_samples_written)
-                        # create floating point time array for the current element inside rotating
-                        # frame if analog samples are to be calculated.
-                        if pulse_function:
-                            time_arr = (offset_bin + np.arange(
-                                samples_to_add, dtype='float64')) / self.__sample_rate
-
-                        # Calculate respective part of the sample arrays
-                        for chnl in digital_high:
-                            digital_samples[chnl][array_write_index:array_write_index + samples_to_add] = digital_high[
-                                chnl]
-                        for chnl in pulse_function:
-                            analog_samples[chnl][array_write_index:array_write_index + samples_to_add] = pulse_function[
-                                                                                                             chnl].get_samples(
-                                time_arr) / (self.__analog_levels[0][chnl] / 2)
-
-                        # Free memory
-                        if pulse_function:
-                            del time_arr
-
-                        element_samples_written += samples_to_add
-                        array_write_index += samples_to_add
-                        processed_samples += samples_to_add
-                        # if the rotating frame should be preserved (default) increment the offset
-                        # counter for the time array.
-                        if ensemble.rotating_frame:
-                            offset_bin += samples_to_add
-
-                        # Check if the temporary sample array is full and write to the device if so.
-                        if array_write_index == array_length:
-                            # Set first/last chunk flags
-                            is_first_chunk = array_write_index == processed_samples
-                            is_last_chunk = processed_samples == ensemble_info['number_of_samples']
-                            written_samples, wfm_list = self.pulsegenerator().write_waveform(
-                                name=waveform_name,
-                                analog_samples=analog_samples,
-                                digital_samples=digital_samples,
-                                is_first_chunk=is_first_chunk,
-                                is_last_chunk=is_last_chunk,
-                                total_number_of_samples=ensemble_info['number_of_samples'])
-
-                            # Update written waveforms set
-                            written_waveforms.update(wfm_list)
-
-                            # check if write process was successful
-                            if written_samples != array_length:
-                                self.log.error('Sampling of block "{0}" in ensemble "{1}" failed. '
-                                               'Write to device was unsuccessful.\nThe number of '
-                                               'actually written samples ({2:d}) does not match '
-                                               'the number of samples staged to write ({3:d}).'
-                                               ''.format(block_name, ensemble.name, written_samples,
-                                                         array_length))
-                                if not self.__sequence_generation_in_progress:
-                                    self.module_state.unlock()
-                                self.sigAvailableWaveformsUpdated.emit(self.sampled_waveforms)
-                                self.sigSampleEnsembleComplete.emit(None)
-                                return -1, list(), dict()
-
-                            # Reset array write start pointer
-                            array_write_index = 0
-
-                            # check if the temporary write array needs to be truncated for the next
-                            # part. (because it is the last part of the ensemble to write which can
-                            # be shorter than the previous chunks)
-                            if array_length > ensemble_info['number_of_samples'] - processed_samples:
-                                array_length = ensemble_info['number_of_samples'] - processed_samples
-                                analog_samples = dict()
-                                digital_samples = dict()
-                                for chnl in ensemble_info['analog_channels']:
-                                    analog_samples[chnl] = np.empty(array_length, dtype='float32')
-                                for chnl in ensemble_info['digital_channels']:
-                                    digital_samples[chnl] = np.empty(array_length, dtype=bool)
-
-                    # Increment element index
-                    element_count += 1
+            t_est_upload = self._benchmark_write.estimate_time(ensemble_info['number_of_samples'])
+            if t_est_upload > self._info_on_estimated_upload_time:
+                now = datetime.datetime.now()
+                self.log.info("Estimated finish of writing for long waveform:"
+                              " {0:%Y-%m-%d %H:%M:%S} ({1:d} s)".format(
+                    (now + datetime.timedelta(0, t_est_upload)), int(t_est_upload)))
+
+            if self._sample_cache is not None:
+                cache_stats_start = self._sample_cache.statistics()
+
+            written_waveforms = self._write_ensemble_samples(sampler, ensemble, waveform_name,
+                                                             array_length)
+            if written_waveforms is None:
+                if not self.__sequence_generation_in_progress:
+                    self.module_state.unlock()
+                self.sigAvailableWaveformsUpdated.emit(self.sampled_waveforms)
+                self.sigSampleEnsembleComplete.emit(None)
+                return -1, list(), dict()
+            self._waveform_fingerprints.record(waveform_name, fingerprint, written_waveforms)
+
+            self.log.info('Time needed for sampling and writing PulseBlockEnsemble {0} to device: '
+                          '{1} sec'.format(ensemble.name, int(np.rint(time.time() - start_time))))
+            self.log.debug('Estimated {:.3f} s from current estimated write speed {:.2f} MSa/s'
+                           ' from {} benchmarks'.format(
+                self._benchmark_write.estimate_time(ensemble_info['number_of_samples']),
+                self._benchmark_write.estimate_speed() / 1e6,
+                self._benchmark_write.n_benchmarks))
+            if self._sample_cache is not None:
+                cache_stats = self._sample_cache.statistics()
+                self.log.debug('Sample cache: {0:d} hits ({1:d} from disk), {2:d} misses, overall '
+                               'hit rate {3:.1%}, {4:d} entries using {5:.1f} MB'.format(
+                    cache_stats['hits'] - cache_stats_start['hits'],
+                    cache_stats['disk_hits'] - cache_stats_start['disk_hits'],
+                    cache_stats['misses'] - cache_stats_start['misses'],
+                    self._sample_cache.hit_rate,
+                    cache_stats['entries'],
+                    cache_stats['bytes'] / 2**20))
+
+            self._benchmark_write.add_benchmark(time.time() - start_time,
+                                                ensemble_info['number_of_samples'])
+
+        # if the rotating frame should be preserved (default) pass on the offset counter
+        offset_bin = sampler.final_offset_bin
 
         # Save sampling related parameters to the sampling_information container within the
         # PulseBlockEnsemble.
@@ -1925,16 +1846,6 @@ class SequenceGeneratorLogic(GenericLogic):
             ensemble.sampling_information['waveforms'] = natural_sort(written_waveforms)
             self.save_ensemble(ensemble)
 
-        self.log.info('Time needed for sampling and writing PulseBlockEnsemble {0} to device: {1} sec'
-                      ''.format(ensemble.name, int(np.rint(time.time() - start_time))))
-        self.log.debug('Estimated {:.3f} s from current estimated write speed {:.2f} MSa/s'
-                       ' from {} benchmarks'.format(
-            self._benchmark_write.estimate_time(ensemble_info['number_of_samples']),
-            self._benchmark_write.estimate_speed() / 1e6,
-            self._benchmark_write.n_benchmarks))
-
-        self._benchmark_write.add_benchmark(time.time() - start_time, ensemble_info['number_of_samples'])
-
         if ensemble_info['number_of_samples'] == 0:
             self.log.warning('Empty waveform (0 samples) created from PulseBlockEnsemble "{0}".'
                              ''.format(ensemble.name))
@@ -1944,6 +1855,115 @@ class SequenceGeneratorLogic(GenericLogic):
         self.sigSampleEnsembleComplete.emit(ensemble)
         return offset_bin, natural_sort(written_waveforms), ensemble_info
 
+    def _write_ensemble_samples(self, sampler, ensemble, waveform_name, array_length):
+        """ Sample an ensemble chunk by chunk and write the chunks to the pulse generator.
+
+        If the ensemble is written in more than one chunk and the ConfigOption "pipelined_sampling"
+        is set, the next chunk is sampled by a worker thread while the current chunk is written to
+        the device (double buffering). Chunks are always written in order, i.e. is_first_chunk and
+        is_last_chunk are handed to the device exactly like in serial operation. In this mode two
+        sets of chunk arrays are held in memory, i.e. up to twice the "overhead_bytes".
+
+        @param EnsembleSampler sampler: the compiled ensemble to sample
+        @param PulseBlockEnsemble ensemble: the ensemble to sample (used for log messages)
+        @param str waveform_name: name of the waveform to write (without channel suffix)
+        @param int array_length: maximum number of samples per chunk
+
+        @return set: names of the written waveforms on the device, None if writing failed
+        """
+        number_of_samples = sampler.number_of_samples
+        array_length = min(array_length, number_of_samples)
+        chunk_starts = list(range(0, number_of_samples, max(array_length, 1)))
+        pipelined = self._pipelined_sampling and len(chunk_starts) > 1
+
+        # Allocate the sample arrays that are used for a single write command (two sets of arrays
+        # in pipelined mode to sample one while the other is written).
+        try:
+            buffers = [self._allocate_sample_arrays(sampler, array_length)
+                       for _ in range(2 if pipelined else 1)]
+        except MemoryError:
+            self.log.error('Sampling of PulseBlockEnsemble "{0}" failed due to a MemoryError.\n'
+                           'The sample array needed is too large to allocate in memory.\n'
+                           'Try using the overhead_bytes ConfigOption to limit memory usage.'
+                           ''.format(ensemble.name))
+            return None
+
+        def sample_chunk(index):
+            start = chunk_starts[index]
+            length = min(array_length, number_of_samples - start)
+            if length == array_length:
+                analog_samples, digital_samples = buffers[index % len(buffers)]
+            else:
+                # The last part of the ensemble can be shorter than the previous chunks
+                analog_samples, digital_samples = self._allocate_sample_arrays(sampler, length)
+            chunk_start_time = time.perf_counter()
+            sampler.sample_chunk(start, analog_samples, digital_samples)
+            return analog_samples, digital_samples, time.perf_counter() - chunk_start_time
+
+        # set of written waveform names on the device
+        written_waveforms = set()
+        # time spent for sampling and writing chunks
+        sampling_time = 0
+        writing_time = 0
+        start_time = time.perf_counter()
+        worker = ThreadPoolExecutor(max_workers=1) if pipelined else None
+        try:
+            if worker is not None:
+                next_chunk = worker.submit(sample_chunk, 0)
+            for index in range(len(chunk_starts)):
+                # Get the sample arrays of the current chunk and start sampling the next chunk
+                if worker is None:
+                    analog_samples, digital_samples, chunk_time = sample_chunk(index)
+                else:
+                    analog_samples, digital_samples, chunk_time = next_chunk.result()
+                    if index + 1 < len(chunk_starts):
+                        next_chunk = worker.submit(sample_chunk, index + 1)
+                sampling_time += chunk_time
+                chunk_length = analog_samples[sampler.analog_channels[0]].size if \
+                    sampler.analog_channels else digital_samples[sampler.digital_channels[0]].size
+
+                chunk_start_time = time.perf_counter()
+                written_samples, wfm_list = self.pulsegenerator().write_waveform(
+                    name=waveform_name,
+                    analog_samples=analog_samples,
+                    digital_samples=digital_samples,
+                    is_first_chunk=index == 0,
+                    is_last_chunk=index == len(chunk_starts) - 1,
+                    total_number_of_samples=number_of_samples)
+                writing_time += time.perf_counter() - chunk_start_time
+
+                # Update written waveforms set
+                written_waveforms.update(wfm_list)
+
+                # check if write process was successful
+                if written_samples != chunk_length:
+                    self.log.error('Sampling of ensemble "{0}" failed. Write to device was '
+                                   'unsuccessful.\nThe number of actually written samples ({1:d}) '
+                                   'does not match the number of samples staged to write ({2:d}).'
+                                   ''.format(ensemble.name, written_samples, chunk_length))
+                    return None
+        finally:
+            if worker is not None:
+                worker.shutdown()
+
+        if pipelined:
+            total_time = time.perf_counter() - start_time
+            self.log.debug('Pipelined sampling of {0:d} chunks: sampling {1:.3f} s, writing {2:.3f} '
+                           's, total {3:.3f} s, overlap gain {4:.3f} s'.format(
+                len(chunk_starts), sampling_time, writing_time, total_time,
+                sampling_time + writing_time - total_time))
+        return written_waveforms
+
+    @staticmethod
+    def _allocate_sample_arrays(sampler, array_length):
+        analog_samples = dict()
+        digital_samples = dict()
+        for chnl in sampler.analog_channels:
+            analog_samples[chnl] = np.empty(array_length, dtype='float32')
+        for chnl in sampler.digital_channels:
+            digital_samples[chnl] = np.empty(array_length, dtype=bool)
+        return analog_samples, digital_samples
+
     @QtCore.Slot(str)
     def sample_pulse_sequence(self, sequence):
         """ Samples the PulseSequence object, which serves as the construction plan.
@@ -2093,6 +2113,7 @@ class SequenceGeneratorLogic(GenericLogic):
         if isinstance(names, str):
             names = [names]
         current_waveforms = self.sampled_waveforms
+        self._waveform_fingerprints.forget(names)
         for wfm in names:
             if wfm in current_waveforms:
                 self.pulsegenerator().delete_waveform(wfm)
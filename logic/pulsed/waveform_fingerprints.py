@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file contains the bookkeeping of waveforms written to the pulse generator device by the
+SequenceGeneratorLogic in order to skip the upload of unchanged waveforms.
+
+Qudi is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Qudi. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
+top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
+"""
+
+
+class WaveformFingerprints:
+    """
+    Registry of the fingerprints of all waveforms written to the pulse generator.
+
+    For each waveform name (without the device specific channel suffix) the fingerprint of the
+    written samples (see EnsembleSampler.fingerprint) and the list of waveform names created on the
+    device is recorded. Before a waveform is sampled and written again, lookup tells if identical
+    samples are still present on the device, so transfer and loading can be skipped.
+
+    Entries are invalidated whenever one of the device waveforms is deleted (see forget) and if a
+    device waveform is missing upon lookup, e.g. because the device has been cleared externally.
+    The registry is not persistent, i.e. after a restart of qudi all waveforms are written again.
+    """
+
+    def __init__(self):
+        self._entries = dict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, name, fingerprint, device_waveforms):
+        """ Get the device waveforms written with identical samples under the given name.
+
+        @param str name: waveform name (without channel suffix)
+        @param str fingerprint: fingerprint of the samples to write
+        @param list device_waveforms: names of all waveforms currently present on the device
+
+        @return list: device waveform names to reuse, None if the samples need to be written
+        """
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        recorded_fingerprint, waveforms = entry
+        if recorded_fingerprint != fingerprint:
+            return None
+        if not waveforms or not set(waveforms).issubset(device_waveforms):
+            del self._entries[name]
+            return None
+        return list(waveforms)
+
+    def record(self, name, fingerprint, waveforms):
+        """ Record the fingerprint of samples written to the device.
+
+        @param str name: waveform name (without channel suffix)
+        @param str fingerprint: fingerprint of the written samples
+        @param iterable waveforms: names of the waveforms created on the device
+        """
+        self._entries[name] = (fingerprint, tuple(waveforms))
+
+    def forget(self, waveforms):
+        """ Remove all entries that include any of the given device waveforms.
+
+        @param iterable waveforms: names of deleted or overwritten device waveforms
+        """
+        waveforms = set(waveforms)
+        for name in [name for name, (_, wfms) in self._entries.items() if waveforms.intersection(wfms)]:
+            del self._entries[name]
+
+    def clear(self):
+        self._entries.clear()
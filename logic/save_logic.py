@@ -20,25 +20,36 @@ top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi
 """
 
 from cycler import cycler
+import copy
 import datetime
 import inspect
 import logging
 import matplotlib.pyplot as plt
 import numpy as np
 import os
+import queue
 import sys
+import threading
 import time
 
 from collections import OrderedDict
+from concurrent.futures import Future
+from qtpy import QtCore
 from core.configoption import ConfigOption
 from core.util import units
 from core.util.mutex import Mutex
 from core.util.network import netobtain
 from logic.generic_logic import GenericLogic
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from matplotlib.backends.backend_pdf import PdfPages
 from PIL import Image
 from PIL import PngImagePlugin
 
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
 
 class DailyLogHandler(logging.FileHandler):
     """
@@ -129,6 +140,9 @@ class SaveLogic(GenericLogic):
         log_into_daily_directory: True
         save_pdf: True
         save_png: True
+        hdf5_compression: 'gzip'    # optional, compression filter for filetype 'hdf5'
+        hdf5_chunk_size: 65536      # optional, number of rows per chunk for filetype 'hdf5'
+        save_queue_size: 16         # optional, max. number of pending jobs for save_data_async
     """
 
     _win_data_dir = ConfigOption('win_data_directory', 'C:/Data/')
@@ -136,6 +150,13 @@ class SaveLogic(GenericLogic):
     log_into_daily_directory = ConfigOption('log_into_daily_directory', False, missing='warn')
     save_pdf = ConfigOption('save_pdf', False)
     save_png = ConfigOption('save_png', True)
+    hdf5_compression = ConfigOption('hdf5_compression', 'gzip')
+    hdf5_chunk_size = ConfigOption('hdf5_chunk_size', 65536)
+    save_queue_size = ConfigOption('save_queue_size', 16)
+
+    # Emitted from the writer thread after an asynchronous save job has finished.
+    # Holds the path to the saved file (empty string if saving failed) and a success flag.
+    sigAsyncSaveFinished = QtCore.Signal(str, bool)
 
     # Matplotlib style definition for saving plots
     mpl_qd_style = {
@@ -202,6 +223,10 @@ class SaveLogic(GenericLogic):
 
         self._daily_loghandler = None
 
+        # background writer for save_data_async
+        self._save_queue = None
+        self._save_thread = None
+
     def on_activate(self):
         """ Definition, configuration and initialisation of the SaveLogic.
         """
@@ -217,7 +242,21 @@ class SaveLogic(GenericLogic):
         else:
             self._daily_loghandler = None
 
+        # start the background writer for asynchronous saving
+        self._save_queue = queue.Queue(maxsize=max(1, int(self.save_queue_size)))
+        self._save_thread = threading.Thread(target=self._save_worker_loop,
+                                             name='savelogic-writer',
+                                             daemon=True)
+        self._save_thread.start()
+
     def on_deactivate(self):
+        # Let the writer finish all pending jobs before shutting down
+        if self._save_thread is not None:
+            self._save_queue.put(None)
+            self._save_thread.join()
+            self._save_thread = None
+            self._save_queue = None
+
         if self._daily_loghandler is not None:
             # removes the log handler logging into the daily directory
             logging.getLogger().removeHandler(self._daily_loghandler)
@@ -238,7 +277,8 @@ class SaveLogic(GenericLogic):
         self._daily_loghandler.setLevel(level)
 
     def save_data(self, data, filepath=None, parameters=None, filename=None, filelabel=None,
-                  timestamp=None, filetype='text', fmt='%.15e', delimiter='\t', plotfig=None):
+                  timestamp=None, filetype='text', fmt='%.15e', delimiter='\t', plotfig=None,
+                  append=False):
         """
         General save routine for data.
 
@@ -284,7 +324,10 @@ class SaveLogic(GenericLogic):
                                    filename and a timestamp, because then the timestamp will be
                                    ignored.
         @param string filetype: optional, the file format the data should be saved in. Valid inputs
-                                are 'text', 'xml' and 'npz'. Default is 'text'.
+                                are 'text', 'npz' and 'hdf5'. Default is 'text'.
+                                With 'hdf5' each data item is stored as its own chunked and
+                                compressed dataset and the parameters are stored as attributes.
+                                Arrays of different length, dtype and dimension can be mixed.
         @param string or list of strings fmt: optional, format specifier for saved data. See python
                                               documentation for
                                               "Format Specification Mini-Language". If you want for
@@ -299,6 +342,9 @@ class SaveLogic(GenericLogic):
                                               behaviour or failure to save right away.
         @param string delimiter: optional, insert here the delimiter, like '\n' for new line, '\t'
                                  for tab, ',' for a comma ect.
+        @param bool append: optional, only used for filetype 'hdf5'. If True and the file already
+                            exists, the data items are appended along the first axis to the
+                            existing datasets of the same name. Default is False.
 
         1D data
         =======
@@ -328,6 +374,149 @@ class SaveLogic(GenericLogic):
 
         YOU ARE RESPONSIBLE FOR THE IDENTIFIER! DO NOT FORGET THE UNITS FOR THE SAVED TIME
         TRACE/MATRIX.
+
+        @return str: path to the saved file, -1 if saving failed
+        """
+        try:
+            return self._save_data(data,
+                                   module_name=self._get_caller_module_name(),
+                                   poi_name=self.active_poi_name,
+                                   additional_parameters=self._additional_parameters,
+                                   filepath=filepath,
+                                   parameters=parameters,
+                                   filename=filename,
+                                   filelabel=filelabel,
+                                   timestamp=timestamp,
+                                   filetype=filetype,
+                                   fmt=fmt,
+                                   delimiter=delimiter,
+                                   plotfig=plotfig,
+                                   append=append)
+        finally:
+            # close matplotlib figure
+            if plotfig is not None:
+                plt.close(plotfig)
+
+    def save_data_async(self, data, filepath=None, parameters=None, filename=None, filelabel=None,
+                        timestamp=None, filetype='text', fmt='%.15e', delimiter='\t', plotfig=None,
+                        append=False):
+        """
+        Same as save_data but the actual file writing and figure rendering is done by a background
+        writer thread. A snapshot of data and parameters is taken immediately, so the caller can
+        continue to modify its arrays right after this method returns.
+
+        The passed plotfig is closed in pyplot right away and handed over to the writer thread,
+        which renders it without pyplot (not thread-safe) on a plain Agg canvas. The figure must
+        not be used by the caller afterwards.
+
+        If the queue of pending jobs is full (config option "save_queue_size"), this method blocks
+        until the writer has caught up. If the writer is not running, the data is saved
+        synchronously.
+
+        See save_data for a description of the parameters.
+
+        @return concurrent.futures.Future: future holding the path to the saved file (or -1 if
+                                           saving failed) once the job is finished. Completion is
+                                           also signalled by sigAsyncSaveFinished.
+        """
+        # Everything depending on the caller or on mutable state is resolved right here
+        if plotfig is not None:
+            # Detach the figure from pyplot and from the canvas of the GUI backend
+            plt.close(plotfig)
+            FigureCanvasAgg(plotfig)
+        if timestamp is None:
+            timestamp = datetime.datetime.now()
+        job = dict(data=OrderedDict((key, np.array(value)) for key, value in data.items()),
+                   module_name=self._get_caller_module_name(),
+                   poi_name=self.active_poi_name,
+                   additional_parameters=self._additional_parameters.copy(),
+                   filepath=filepath,
+                   parameters=copy.deepcopy(parameters),
+                   filename=filename,
+                   filelabel=filelabel,
+                   timestamp=timestamp,
+                   filetype=filetype,
+                   fmt=fmt,
+                   delimiter=delimiter,
+                   plotfig=plotfig,
+                   append=append)
+
+        future = Future()
+        save_queue = self._save_queue
+        if save_queue is None:
+            self._run_save_job(future, job)
+            return future
+
+        if save_queue.full():
+            self.log.debug('Save queue is full. Waiting for background writer to catch up.')
+        save_queue.put((future, job))
+        return future
+
+    def _save_worker_loop(self):
+        """
+        Main loop of the background writer thread. Processes save jobs until None is received.
+        """
+        save_queue = self._save_queue
+        while True:
+            item = save_queue.get()
+            try:
+                if item is None:
+                    break
+                self._run_save_job(*item)
+            finally:
+                save_queue.task_done()
+
+    def _run_save_job(self, future, job):
+        """
+        Execute a single save job and report the outcome to the future and via signal.
+        """
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = self._save_data(**job)
+        except Exception as e:
+            self.log.exception('Asynchronous saving of data failed:')
+            future.set_exception(e)
+            self.sigAsyncSaveFinished.emit('', False)
+            return
+        future.set_result(result)
+        if result == -1:
+            self.sigAsyncSaveFinished.emit('', False)
+        else:
+            self.sigAsyncSaveFinished.emit(result, True)
+
+    @staticmethod
+    def _get_caller_module_name():
+        """
+        Try to trace back the function call to the module which was calling the save method.
+        Must be called directly from a public save method.
+
+        @return str: name of the calling module, 'UNSPECIFIED' if it can not be inferred
+        """
+        try:
+            frm = inspect.stack()[2]
+            # this will get the object, which called the save_data function.
+            mod = inspect.getmodule(frm[0])
+            # that will extract the name of the class.
+            module_name = mod.__name__.split('.')[-1]
+        except:
+            # Sometimes it is not possible to get the object which called the save_data function
+            # (such as when calling this from the console).
+            module_name = 'UNSPECIFIED'
+        return module_name
+
+    def _save_data(self, data, module_name, poi_name, additional_parameters, filepath=None,
+                   parameters=None, filename=None, filelabel=None, timestamp=None,
+                   filetype='text', fmt='%.15e', delimiter='\t', plotfig=None, append=False):
+        """
+        Implementation of save_data. All state that might change between the call of a public
+        save method and the actual saving is passed explicitly.
+
+        @param str module_name: name of the module that requested saving the data
+        @param str poi_name: name of the active POI, empty string if none
+        @param dict additional_parameters: global parameters to include in the header
+
+        See save_data for a description of all other parameters.
         """
         start_time = time.time()
         # Create timestamp if none is present
@@ -354,7 +543,10 @@ class SaveLogic(GenericLogic):
                     return -1
 
             # determine dimensions
-            if data[keyname].ndim < 3:
+            if filetype == 'hdf5':
+                # Every data item becomes its own dataset. No need to align dimensions.
+                pass
+            elif data[keyname].ndim < 3:
                 length = data[keyname].shape[0]
                 arr_length.append(length)
                 if length > max_line_num:
@@ -384,18 +576,6 @@ class SaveLogic(GenericLogic):
                            'arrays only. Saving data failed!')
             return -1
 
-        # try to trace back the functioncall to the class which was calling it.
-        try:
-            frm = inspect.stack()[1]
-            # this will get the object, which called the save_data function.
-            mod = inspect.getmodule(frm[0])
-            # that will extract the name of the class.
-            module_name = mod.__name__.split('.')[-1]
-        except:
-            # Sometimes it is not possible to get the object which called the save_data function
-            # (such as when calling this from the console).
-            module_name = 'UNSPECIFIED'
-
         # determine proper file path
         if filepath is None:
             filepath = self.get_path_for_module(module_name)
@@ -407,12 +587,13 @@ class SaveLogic(GenericLogic):
         # create filelabel if none has been passed
         if filelabel is None:
             filelabel = module_name
-        if self.active_poi_name != '':
-            filelabel = self.active_poi_name.replace(' ', '_') + '_' + filelabel
+        if poi_name != '':
+            filelabel = poi_name.replace(' ', '_') + '_' + filelabel
 
         # determine proper unique filename to save if none has been passed
         if filename is None:
-            filename = timestamp.strftime('%Y%m%d-%H%M-%S' + '_' + filelabel + '.dat')
+            extension = '.h5' if filetype == 'hdf5' else '.dat'
+            filename = timestamp.strftime('%Y%m%d-%H%M-%S' + '_' + filelabel + extension)
 
         # Check format specifier.
         if not isinstance(fmt, str) and len(fmt) != len(data):
@@ -426,14 +607,14 @@ class SaveLogic(GenericLogic):
                  ''.format(module_name, timestamp.strftime('%d.%m.%Y at %Hh%Mm%Ss'))
         header += '\nParameters:\n===========\n\n'
         # Include the active POI name (if not empty) as a parameter in the header
-        if self.active_poi_name != '':
-            header += 'Measured at POI: {0}\n'.format(self.active_poi_name)
+        if poi_name != '':
+            header += 'Measured at POI: {0}\n'.format(poi_name)
         # add the parameters if specified:
         if parameters is not None:
             # check whether the format for the parameters have a dict type:
             if isinstance(parameters, dict):
-                if isinstance(self._additional_parameters, dict):
-                    parameters = {**self._additional_parameters, **parameters}
+                if isinstance(additional_parameters, dict):
+                    parameters = {**additional_parameters, **parameters}
                 for entry, param in parameters.items():
                     if isinstance(param, float):
                         header += '{0}: {1:.16e}\n'.format(entry, param)
@@ -498,6 +679,20 @@ class SaveLogic(GenericLogic):
             self.save_array_as_text(data=[], filename=filename[:-4]+'_params.dat', filepath=filepath,
                                     fmt=fmt, header=header, delimiter=delimiter, comments='#',
                                     append=False)
+        # write every data item as dataset into a hdf5 file and save parameters as attributes
+        elif filetype == 'hdf5':
+            if h5py is None:
+                self.log.error('Saving data as hdf5-file requires the python package "h5py". '
+                               'Could not save data.')
+                return -1
+            if parameters is None or not isinstance(parameters, dict):
+                parameters = dict()
+            if isinstance(additional_parameters, dict):
+                parameters = {**additional_parameters, **parameters}
+            if poi_name != '':
+                parameters['Measured at POI'] = poi_name
+            self.save_array_as_hdf5(data=data, filename=filename, filepath=filepath, header=header,
+                                    parameters=parameters, append=append)
         else:
             self.log.error('Only saving of data as textfile and npz-file is implemented. Filetype "{0}" is not '
                            'supported yet. Saving as textfile.'.format(filetype))
@@ -524,7 +719,7 @@ class SaveLogic(GenericLogic):
             
             if self.save_pdf:
                 # determine the PDF-Filename
-                fig_fname_vector = os.path.join(filepath, filename)[:-4] + '_fig.pdf'
+                fig_fname_vector = os.path.splitext(os.path.join(filepath, filename))[0] + '_fig.pdf'
 
                 # Create the PdfPages object to which we will save the pages:
                 # The with statement makes sure that the PdfPages object is closed properly at
@@ -539,7 +734,7 @@ class SaveLogic(GenericLogic):
 
             if self.save_png:
                 # determine the PNG-Filename and save the plain PNG
-                fig_fname_image = os.path.join(filepath, filename)[:-4] + '_fig.png'
+                fig_fname_image = os.path.splitext(os.path.join(filepath, filename))[0] + '_fig.png'
                 plotfig.savefig(fig_fname_image, bbox_inches='tight', pad_inches=0.05)
 
                 # Use Pillow (an fork for PIL) to attach metadata to the PNG
@@ -561,10 +756,9 @@ class SaveLogic(GenericLogic):
                 # save the picture again, this time including the metadata
                 png_image.save(fig_fname_image, "png", pnginfo=png_metadata)
 
-            # close matplotlib figure
-            plt.close(plotfig)
             self.log.debug('Time needed to save data: {0:.2f}s'.format(time.time()-start_time))
             #----------------------------------------------------------------------------------
+        return os.path.join(filepath, filename)
 
     def save_array_as_text(self, data, filename, filepath='', fmt='%.15e', header='',
                            delimiter='\t', comments='#', append=False):
@@ -583,6 +777,77 @@ class SaveLogic(GenericLogic):
                            comments=comments)
         return
 
+    def save_array_as_hdf5(self, data, filename, filepath='', header='', parameters=None,
+                           append=False):
+        """
+        An independent method, which saves every item of a data dictionary as separate dataset into
+        a hdf5 file. The datasets are chunked and compressed and can grow along the first axis, so
+        it is possible to append to an existing file.
+
+        @param dict data: Dictionary containing the data arrays (numpy.ndarray) to save. The keys
+                          are used as dataset names.
+        @param str filename: name of the file to save to
+        @param str filepath: optional, path to the directory to save the file in
+        @param str header: optional, header string to save as file attribute
+        @param dict parameters: optional, dictionary of parameters to save as file attributes
+        @param bool append: optional, append data along the first axis of existing datasets if the
+                            file already exists. Default is False.
+        """
+        mode = 'a' if append else 'w'
+        with h5py.File(os.path.join(filepath, filename), mode) as file:
+            # Keep the header of the initial save when appending to an existing file
+            if not append or 'header' not in file.attrs:
+                file.attrs['header'] = header
+            if parameters is not None:
+                for entry, param in parameters.items():
+                    file.attrs[entry] = self._to_hdf5_attribute(param)
+
+            for keyname, arr in data.items():
+                # A slash would create a sub group, so replace it in the dataset name
+                dset_name = keyname.replace('/', '_')
+                arr = np.asarray(arr)
+                if arr.dtype.kind == 'U':
+                    arr = arr.astype(h5py.string_dtype())
+                if arr.ndim == 0:
+                    arr = arr.reshape(1)
+
+                if dset_name in file:
+                    dset = file[dset_name]
+                    if dset.shape[1:] != arr.shape[1:]:
+                        self.log.error('Unable to append data "{0}" of shape {1} to existing '
+                                       'dataset of shape {2} in file "{3}".'
+                                       ''.format(keyname, arr.shape, dset.shape, filename))
+                        continue
+                    old_length = dset.shape[0]
+                    dset.resize(old_length + arr.shape[0], axis=0)
+                    dset[old_length:] = arr
+                else:
+                    chunk_rows = max(1, min(arr.shape[0], int(self.hdf5_chunk_size)))
+                    dset = file.create_dataset(dset_name,
+                                               data=arr,
+                                               maxshape=(None,) + arr.shape[1:],
+                                               chunks=(chunk_rows,) + arr.shape[1:],
+                                               compression=self.hdf5_compression,
+                                               shuffle=self.hdf5_compression is not None)
+                    dset.attrs['name'] = keyname
+        return
+
+    @staticmethod
+    def _to_hdf5_attribute(param):
+        """
+        Convert a parameter into a type that can be stored as hdf5 attribute. Numbers, strings and
+        homogeneous numeric arrays are stored as they are, everything else as string representation.
+        """
+        if isinstance(param, (str, bool, int, float, complex, np.number, np.bool_)):
+            return param
+        try:
+            arr = np.asarray(param)
+            if arr.dtype.kind in 'biufc':
+                return arr
+        except Exception:
+            pass
+        return str(param)
+
     def get_daily_directory(self):
         """ Gets or creates daily save directory.
 
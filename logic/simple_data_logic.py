@@ -22,6 +22,8 @@ top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi
 import numpy as np
 
 from core.connector import Connector
+from core.util.mutex import Mutex
+from core.util.ringbuffer import RingBuffer
 from logic.generic_logic import GenericLogic
 from qtpy import QtCore
 
@@ -40,6 +42,10 @@ class SimpleDataLogic(GenericLogic):
         self._data_logic = self.simpledata()
         self.stopRequest = False
         self.bufferLength = 10000
+        # lock of the data ring buffer and the smoothed data (see buf and smooth)
+        self._trace_lock = Mutex()
+        self._buffer = None
+        self._smooth = None
         self.sigRepeat.connect(self.measureLoop, QtCore.Qt.QueuedConnection)
 
     def on_deactivate(self):
@@ -50,8 +56,9 @@ class SimpleDataLogic(GenericLogic):
     def startMeasure(self):
         """ Start measurement: zero the buffer and call loop function."""
         self.window_len = 50
-        self.buf = np.zeros((self.bufferLength,  self._data_logic.getChannels()))
-        self.smooth = np.zeros((self.bufferLength + self.window_len - 1,  self._data_logic.getChannels()))
+        with self._trace_lock:
+            self._buffer = RingBuffer(self.bufferLength, channels=self._data_logic.getChannels())
+            self._smooth = np.zeros((self.bufferLength + self.window_len - 1,  self._data_logic.getChannels()))
         self.module_state.lock()
         self.sigRepeat.emit()
 
@@ -70,12 +77,31 @@ class SimpleDataLogic(GenericLogic):
         data = np.zeros((100,  self._data_logic.getChannels()))
         data[:, 0] = np.array([self._data_logic.getData() for i in range(100)])
 
-        self.buf = np.roll(self.buf, -100, axis=0)
-        self.buf[-101:-1] = data
         w = np.hanning(self.window_len)
-        s = np.r_[self.buf[self.window_len-1:0:-1], self.buf, self.buf[-1:-self.window_len:-1]]
-        for channel in range(self._data_logic.getChannels()):
-            convolved = np.convolve(w/w.sum(), s[:, channel], mode='valid')
-            self.smooth[:, channel] = convolved
+        with self._trace_lock:
+            self._buffer.append(data.transpose())
+            buf = self._buffer.data.transpose()
+            s = np.r_[buf[self.window_len-1:0:-1], buf, buf[-1:-self.window_len:-1]]
+            for channel in range(self._data_logic.getChannels()):
+                convolved = np.convolve(w/w.sum(), s[:, channel], mode='valid')
+                self._smooth[:, channel] = convolved
         self.sigRepeat.emit()
 
+    @property
+    def buf(self):
+        """ Snapshot of the data buffer, copied upon read (see RingBuffer).
+
+        @return numpy.ndarray: data with shape (buffer length, channels)
+        """
+        with self._trace_lock:
+            return self._buffer.data.transpose().copy()
+
+    @property
+    def smooth(self):
+        """ Snapshot of the smoothed data, copied upon read.
+
+        @return numpy.ndarray: smoothed data with shape (buffer length + window length - 1, channels)
+        """
+        with self._trace_lock:
+            return self._smooth.copy()
+
@@ -22,7 +22,7 @@ top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi
 
 from qtpy import QtCore
 from core.util.mutex import Mutex
-import numpy as np
+from core.util.ringbuffer import RingBuffer
 
 from logic.generic_logic import GenericLogic
 from interface.pid_controller_interface import PIDControllerInterface
@@ -64,6 +64,9 @@ class SoftPIDController(GenericLogic, PIDControllerInterface):
         #number of lines in the matrix plot
         self.NumberOfSecondsLog = 100
         self.threadlock = Mutex()
+        # lock of the history ring buffer (see history)
+        self._trace_lock = Mutex()
+        self._history_buffer = None
 
     def on_activate(self):
         """ Initialisation performed during activation of the module.
@@ -81,7 +84,8 @@ class SoftPIDController(GenericLogic, PIDControllerInterface):
         self.timer.timeout.connect(self._calcNextStep, QtCore.Qt.QueuedConnection)
         self.sigNewValue.connect(self._control.set_control_value)
 
-        self.history = np.zeros([3, 5])
+        with self._trace_lock:
+            self._history_buffer = RingBuffer(5, channels=3)
         self.savingState = False
         self.enable = False
         self.integrated = 0
@@ -130,10 +134,8 @@ class SoftPIDController(GenericLogic, PIDControllerInterface):
             if self.cv < limits[0]:
                 self.cv = limits[0]
 
-            self.history = np.roll(self.history, -1, axis=1)
-            self.history[0, -1] = self.pv
-            self.history[1, -1] = self.cv
-            self.history[2, -1] = self.setpoint
+            with self._trace_lock:
+                self._history_buffer.append([self.pv, self.cv, self.setpoint])
             self.sigNewValue.emit(self.cv)
         else:
             self.cv = self.manualvalue
@@ -146,6 +148,16 @@ class SoftPIDController(GenericLogic, PIDControllerInterface):
 
         self.timer.start(self.timestep)
 
+    @property
+    def history(self):
+        """ Snapshot of the process value, control value and setpoint history, copied upon read
+        (see RingBuffer).
+
+        @return numpy.ndarray: history with shape (3, 5)
+        """
+        with self._trace_lock:
+            return self._history_buffer.data.copy()
+
     def startLoop(self):
         """ Start the control loop. """
         self.countdown = 2
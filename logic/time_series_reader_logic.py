@@ -22,6 +22,7 @@ top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi
 from qtpy import QtCore
 import numpy as np
 import datetime as dt
+import os
 import time
 import matplotlib.pyplot as plt
 
@@ -30,10 +31,103 @@ from core.statusvariable import StatusVar
 from core.configoption import ConfigOption
 from logic.generic_logic import GenericLogic
 from core.util.mutex import Mutex
+from core.util.ringbuffer import RingBuffer
+from core.util.decimation import MinMaxDecimator, decimation_factor
 from core.util.units import ScaledFloat
 from interface.data_instream_interface import StreamChannelType, StreamingMode
 
 
+class StreamRecorder:
+    """
+    Helper class to stream data frames directly to disk while recording.
+
+    The samples are written into a preallocated, memory-mapped file in numpy .npy format with the
+    shape (samples, channels). The file grows in blocks of block_size samples, so memory usage
+    stays bounded independent of the recording duration. On close the file is truncated to the
+    number of samples actually written and can be loaded with numpy.load (e.g. with
+    mmap_mode='r').
+    """
+    # Fixed size of the .npy header in bytes, so it can be rewritten in place
+    _header_size = 128
+
+    def __init__(self, file_path, number_of_channels, block_size, dtype=np.float64):
+        self.file_path = file_path
+        self.number_of_channels = int(number_of_channels)
+        self.block_size = max(1, int(block_size))
+        self.dtype = np.dtype(dtype)
+        self._samples_written = 0
+        self._capacity = 0
+        self._mmap = None
+
+        with open(self.file_path, 'wb') as file:
+            self._write_header(file, 0)
+        self._grow(self.block_size)
+
+    @property
+    def samples_written(self):
+        return self._samples_written
+
+    @property
+    def is_open(self):
+        return self._mmap is not None
+
+    def append(self, data):
+        """
+        Append a data frame to the file.
+
+        @param numpy.ndarray data: data frame of shape (channels, samples)
+        """
+        new_samples = data.shape[1]
+        if self._samples_written + new_samples > self._capacity:
+            blocks = (self._samples_written + new_samples - self._capacity) // self.block_size + 1
+            self._grow(self._capacity + blocks * self.block_size)
+        self._mmap[self._samples_written:self._samples_written + new_samples] = data.transpose()
+        self._samples_written += new_samples
+
+    def close(self):
+        """
+        Flush the data and truncate the file to the number of samples written.
+
+        @return int: number of samples written
+        """
+        if self._mmap is None:
+            return self._samples_written
+        self._mmap.flush()
+        self._mmap = None
+        with open(self.file_path, 'r+b') as file:
+            file.truncate(self._header_size + self._samples_written * self._row_bytes)
+            self._write_header(file, self._samples_written)
+        return self._samples_written
+
+    @property
+    def _row_bytes(self):
+        return self.number_of_channels * self.dtype.itemsize
+
+    def _grow(self, capacity):
+        if self._mmap is not None:
+            self._mmap.flush()
+            self._mmap = None
+        with open(self.file_path, 'r+b') as file:
+            file.truncate(self._header_size + capacity * self._row_bytes)
+        self._capacity = capacity
+        self._mmap = np.memmap(self.file_path,
+                               dtype=self.dtype,
+                               mode='r+',
+                               offset=self._header_size,
+                               shape=(capacity, self.number_of_channels))
+
+    def _write_header(self, file, number_of_samples):
+        header = "{{'descr': {0!r}, 'fortran_order': False, 'shape': ({1:d}, {2:d}), }}".format(
+            np.lib.format.dtype_to_descr(self.dtype), number_of_samples, self.number_of_channels)
+        # magic string (6 bytes), version (2 bytes), header length (2 bytes), header, newline
+        header_len = self._header_size - 10
+        header = header.ljust(header_len - 1) + '\n'
+        file.seek(0)
+        file.write(b'\x93NUMPY\x01\x00')
+        file.write(np.uint16(header_len).tobytes())
+        file.write(header.encode('latin1'))
+
+
 class TimeSeriesReaderLogic(GenericLogic):
     """
     This logic module gathers data from a hardware streaming device.
@@ -44,6 +138,8 @@ class TimeSeriesReaderLogic(GenericLogic):
         module.Class: 'time_series_reader_logic.TimeSeriesReaderLogic'
         max_frame_rate: 10  # optional (10Hz by default) should be > 2/trace_window_size
         calc_digital_freq: True  # optional (True by default)
+        record_mode: 'memory'  # optional, 'memory' (default) or 'stream' to write directly to disk
+        max_display_points: 4000  # optional (4000 by default) points per channel sent to the GUI
         connect:
             _streamer_con: <streamer_name>
             _savelogic_con: <save_logic_name>
@@ -61,6 +157,8 @@ class TimeSeriesReaderLogic(GenericLogic):
     # config options
     _max_frame_rate = ConfigOption('max_frame_rate', default=10, missing='warn')
     _calc_digital_freq = ConfigOption('calc_digital_freq', default=True, missing='warn')
+    _record_mode = ConfigOption('record_mode', default='memory')
+    _max_display_points = ConfigOption('max_display_points', default=4000)
 
     # status vars
     _trace_window_size = StatusVar('trace_window_size', default=6)
@@ -83,14 +181,21 @@ class TimeSeriesReaderLogic(GenericLogic):
         self._samples_per_frame = None
         self._stop_requested = True
 
-        # Data arrays
+        # Data arrays. The trace ring buffers are only accessed while holding _trace_lock and are
+        # published as copies (see trace_data)
+        self._trace_lock = Mutex()
         self._trace_data = None
         self._trace_times = None
         self._trace_data_averaged = None
-        self.__moving_filter = None
+
+        # Decimated data for display
+        self._display_decimator = None
+        self._display_decimator_averaged = None
+        self._display_data = None
 
         # for data recording
         self._recorded_data = None
+        self._stream_recorder = None
         self._data_recording_active = False
         self._record_start_time = None
         return
@@ -107,6 +212,11 @@ class TimeSeriesReaderLogic(GenericLogic):
         self._data_recording_active = False
         self._record_start_time = None
 
+        if self._record_mode not in ('memory', 'stream'):
+            self.log.warning('Invalid record_mode ConfigOption "{0}". Must be "memory" or "stream". '
+                             'Falling back to "memory".'.format(self._record_mode))
+            self._record_mode = 'memory'
+
         # Check valid StatusVar
         # active channels
         avail_channels = tuple(ch.name for ch in self._streamer.available_channels)
@@ -162,12 +272,28 @@ class TimeSeriesReaderLogic(GenericLogic):
 
     def _init_data_arrays(self):
         window_size = self.trace_window_size_samples
-        self._trace_data = np.zeros(
-            [self.number_of_active_channels, window_size + self.moving_average_width // 2])
-        self._trace_data_averaged = np.zeros(
-            [len(self._averaged_channels), window_size - self.moving_average_width // 2])      #self.trace_window_size * data_rate - self._moving_average_width//2 > self.data_rate/ self._max_frame_rate
+        with self._trace_lock:
+            self._trace_data = RingBuffer(size=window_size + self.moving_average_width // 2,
+                                          channels=self.number_of_active_channels)
+            self._trace_data_averaged = RingBuffer(size=window_size - self.moving_average_width // 2,
+                                                   channels=len(self._averaged_channels))      #self.trace_window_size * data_rate - self._moving_average_width//2 > self.data_rate/ self._max_frame_rate
         self._trace_times = np.arange(window_size) / self.data_rate
         self._recorded_data = list()
+
+        # Peak preserving decimation of the traces to the display resolution. The decimators see
+        # the same samples as the displayed part of the traces.
+        factor = decimation_factor(window_size, self._max_display_points)
+        if factor > 1:
+            self._display_decimator = MinMaxDecimator(size=window_size,
+                                                      factor=factor,
+                                                      channels=self.number_of_active_channels)
+            self._display_decimator_averaged = MinMaxDecimator(
+                size=self._trace_data_averaged.size,
+                factor=min(factor, self._trace_data_averaged.size),
+                channels=len(self._averaged_channels))
+        else:
+            self._display_decimator = None
+            self._display_decimator_averaged = None
         return
 
     @property
@@ -279,18 +405,68 @@ class TimeSeriesReaderLogic(GenericLogic):
 
     @property
     def trace_data(self):
-        data_offset = self._trace_data.shape[1] - self._moving_average_width // 2
-        data = {ch: self._trace_data[i, :data_offset] for i, ch in
-                enumerate(self.active_channel_names)}
+        """ Snapshot of the raw resolution traces, copied upon read (see RingBuffer).
+
+        @return tuple: time, data dict
+        """
+        with self._trace_lock:
+            data_offset = self._trace_data.size - self._moving_average_width // 2
+            trace_data = self._trace_data.data[:, :data_offset].copy()
+        data = {ch: trace_data[i] for i, ch in enumerate(self.active_channel_names)}
         return self._trace_times, data
 
     @property
     def averaged_trace_data(self):
+        """ Snapshot of the raw resolution moving average traces, copied upon read.
+
+        @return tuple: time, data dict (both None if no channel is averaged)
+        """
         if not self.averaged_channel_names or self.moving_average_width <= 1:
             return None, None
-        data = {ch: self._trace_data_averaged[i] for i, ch in
-                enumerate(self.averaged_channel_names)}
-        return self._trace_times[-self._trace_data_averaged.shape[1]:], data
+        with self._trace_lock:
+            averaged_data = self._trace_data_averaged.data.copy()
+        data = {ch: averaged_data[i] for i, ch in enumerate(self.averaged_channel_names)}
+        return self._trace_times[-averaged_data.shape[1]:], data
+
+    @property
+    def display_data(self):
+        """ The data of the last sigDataChanged emit, i.e. the traces decimated to the display
+        resolution (see ConfigOption max_display_points). Raw resolution data is available via
+        trace_data and averaged_trace_data.
+
+        @return tuple: time, data dict, averaged time, averaged data dict
+        """
+        if self._display_data is None:
+            return None, None, None, None
+        return self._display_data
+
+    def _update_display_data(self):
+        """ Decimate the traces to the display resolution and emit them with sigDataChanged.
+
+        The emitted arrays are copies, so they are not changed by the following data frames while
+        waiting in the event queue of the GUI thread. Since the emitted data is kept in display_data,
+        a receiver that is behind can skip all frames that have been superseded in the meantime.
+        """
+        if self._display_decimator is None:
+            times, data = self.trace_data
+        else:
+            indices, values = self._display_decimator.decimated()
+            times = indices / self.data_rate
+            data = {ch: values[i] for i, ch in enumerate(self.active_channel_names)}
+
+        if not self.averaged_channel_names or self.moving_average_width <= 1:
+            averaged_times, averaged_data = None, None
+        elif self._display_decimator_averaged is None:
+            averaged_times, averaged_data = self.averaged_trace_data
+        else:
+            indices, values = self._display_decimator_averaged.decimated()
+            offset = self._trace_times.size - self._trace_data_averaged.size
+            averaged_times = (indices + offset) / self.data_rate
+            averaged_data = {ch: values[i] for i, ch in enumerate(self.averaged_channel_names)}
+
+        self._display_data = (times, data, averaged_times, averaged_data)
+        self.sigDataChanged.emit(*self._display_data)
+        return
 
     @property
     def all_settings(self):
@@ -373,8 +549,6 @@ class TimeSeriesReaderLogic(GenericLogic):
                 if new_val / data_rate > self.trace_window_size:
                     if 'data_rate' in settings_dict or 'trace_window_size' in settings_dict:
                         self._moving_average_width = new_val
-                        self.__moving_filter = np.full(shape=self.moving_average_width,
-                                                       fill_value=1.0 / self.moving_average_width)
                     else:
                         self.log.warning('Moving average width to set ({0:d}) is smaller than the '
                                          'trace window size. Will adjust trace window size to '
@@ -382,8 +556,6 @@ class TimeSeriesReaderLogic(GenericLogic):
                         self._trace_window_size = float(new_val / data_rate)
                 else:
                     self._moving_average_width = new_val
-                    self.__moving_filter = np.full(shape=self.moving_average_width,
-                                                   fill_value=1.0 / self.moving_average_width)
 
             if 'data_rate' in settings_dict:
                 new_val = float(settings_dict['data_rate'])
@@ -462,7 +634,7 @@ class TimeSeriesReaderLogic(GenericLogic):
             settings = self.all_settings
             self.sigSettingsChanged.emit(settings)
             if not restart:
-                self.sigDataChanged.emit(*self.trace_data, *self.averaged_trace_data)
+                self._update_display_data()
         if restart:
             self.start_reading()
         return settings
@@ -504,8 +676,7 @@ class TimeSeriesReaderLogic(GenericLogic):
             # self.sigSettingsChanged.emit(settings)
 
             if self._data_recording_active:
-                self._record_start_time = dt.datetime.now()
-                self._recorded_data = list()
+                self._init_recording()
 
             if self._streamer.start_stream() < 0:
                 self.log.error('Error while starting streaming device data acquisition.')
@@ -571,7 +742,7 @@ class TimeSeriesReaderLogic(GenericLogic):
                 self._process_trace_data(data)
 
                 # Emit update signal
-                self.sigDataChanged.emit(*self.trace_data, *self.averaged_trace_data)
+                self._update_display_data()
                 self._sigNextDataFrame.emit()
         return
 
@@ -599,25 +770,34 @@ class TimeSeriesReaderLogic(GenericLogic):
 
         # Append data to save if necessary
         if self._data_recording_active:
-            self._recorded_data.append(data.copy())
-
-        data = data[:, -self._trace_data.shape[1]:]     # Just in case data size is larger than self._trace_data, which should not happened.
-        new_samples = data.shape[1]
-
-        # Roll data array to have a continuously running time trace
-        self._trace_data = np.roll(self._trace_data, -new_samples, axis=1)
-        # Insert new data
-        self._trace_data[:, -new_samples:] = data
-
-        # Calculate moving average by using numpy.convolve with a normalized uniform filter
-        if self.moving_average_width > 1 and self.averaged_channel_names:
-            # Only convolve the new data and roll the previously calculated moving average
-            self._trace_data_averaged = np.roll(self._trace_data_averaged, -new_samples, axis=1)
-            offset = new_samples + len(self.__moving_filter) - 1
-            for i, ch in enumerate(self.averaged_channel_names):
-                data_index = self.active_channel_names.index(ch)
-                self._trace_data_averaged[i, -new_samples:] = np.convolve(
-                    self._trace_data[data_index, -offset:], self.__moving_filter, mode='valid')
+            if self._stream_recorder is not None:
+                self._stream_recorder.append(data)
+            else:
+                self._recorded_data.append(data.copy())
+
+        with self._trace_lock:
+            data = data[:, -self._trace_data.size:]     # Just in case data size is larger than self._trace_data, which should not happened.
+            new_samples = data.shape[1]
+
+            # Insert new data into the continuously running time trace
+            self._trace_data.append(data)
+            if self._display_decimator is not None:
+                # The newest moving_average_width // 2 samples are not displayed yet
+                display_end = self._trace_data.size - self.moving_average_width // 2
+                self._display_decimator.append(
+                    self._trace_data.data[:, max(display_end - new_samples, 0):display_end])
+
+            # Calculate moving average with a normalized uniform filter
+            if self.moving_average_width > 1 and self.averaged_channel_names:
+                # Only filter the new data and keep the previously calculated moving average
+                channel_indices = [self.active_channel_names.index(ch) for ch in
+                                   self.averaged_channel_names]
+                averaged_data = self._trace_data.moving_average(self.moving_average_width,
+                                                                number_of_samples=new_samples,
+                                                                channels=channel_indices)
+                self._trace_data_averaged.append(averaged_data)
+                if self._display_decimator_averaged is not None:
+                    self._display_decimator_averaged.append(averaged_data)
         return
 
     @QtCore.Slot()
@@ -635,8 +815,7 @@ class TimeSeriesReaderLogic(GenericLogic):
 
             self._data_recording_active = True
             if self.module_state() == 'locked':
-                self._recorded_data = list()
-                self._record_start_time = dt.datetime.now()
+                self._init_recording()
                 self.sigStatusChanged.emit(True, True)
             else:
                 self.start_reading()
@@ -662,6 +841,85 @@ class TimeSeriesReaderLogic(GenericLogic):
                 self.sigStatusChanged.emit(True, False)
         return 0
 
+    def _init_recording(self):
+        """ Set the recording start time and prepare the storage for the recorded data.
+        Depending on the record_mode ConfigOption the data is either collected in memory or
+        streamed to a file.
+        """
+        self._record_start_time = dt.datetime.now()
+        self._recorded_data = list()
+        if self._record_mode == 'stream':
+            filepath = self._savelogic.get_path_for_module(module_name='TimeSeriesReader')
+            filename = self._record_start_time.strftime('%Y%m%d-%H%M-%S_data_trace.npy')
+            # Grow the file in blocks of one minute worth of data (at least one trace window)
+            block_size = max(int(round(60 * self.data_rate)), self.trace_window_size_samples)
+            self._stream_recorder = StreamRecorder(os.path.join(filepath, filename),
+                                                   number_of_channels=self.number_of_active_channels,
+                                                   block_size=block_size)
+        return
+
+    def _save_streamed_data(self, to_file=True, name_tag=''):
+        """ Close the file the data has been streamed to and save the parameters alongside.
+        The figure is not created in this mode to keep stopping independent of the record length.
+        If the data should not be saved to file, it is loaded into memory and the file is removed.
+
+        @param bool to_file: indicate, whether the data file should be kept and the parameter file
+                             should be written
+        @param str name_tag: an additional tag, which will be added to the filename upon save
+
+        @return numpy.ndarray, dict: recorded data (read-only memory map of the data file if saved
+                                     to file), parameters
+        """
+        recorder = self._stream_recorder
+        self._stream_recorder = None
+        number_of_samples = recorder.close()
+        file_path = recorder.file_path
+        if number_of_samples == 0:
+            os.remove(file_path)
+            self.log.error('No data has been recorded. Save to file failed.')
+            return np.empty(0), dict()
+
+        saving_stop_time = self._record_start_time + dt.timedelta(
+            seconds=number_of_samples / self.data_rate)
+
+        if to_file and name_tag:
+            # If there is a postfix then add separating underscore
+            tagged_path = '{0}_{1}.npy'.format(file_path[:-4], name_tag)
+            os.replace(file_path, tagged_path)
+            file_path = tagged_path
+
+        # write the parameters:
+        parameters = dict()
+        parameters['Start recoding time'] = self._record_start_time.strftime(
+            '%d.%m.%Y, %H:%M:%S.%f')
+        parameters['Stop recoding time'] = saving_stop_time.strftime('%d.%m.%Y, %H:%M:%S.%f')
+        parameters['Data rate (Hz)'] = self.data_rate
+        parameters['Oversampling factor (samples)'] = self.oversampling_factor
+        parameters['Sampling rate (Hz)'] = self.sampling_rate
+        if to_file:
+            parameters['Data file'] = os.path.basename(file_path)
+        parameters['Data shape (samples, channels)'] = (number_of_samples,
+                                                        recorder.number_of_channels)
+        parameters['Channels'] = ', '.join(
+            '{0} ({1})'.format(ch, unit) for ch, unit in self.active_channel_units.items())
+
+        if not to_file:
+            data = np.load(file_path).transpose()
+            os.remove(file_path)
+            return data, parameters
+
+        header = 'Saved Data from the class TimeSeriesReaderLogic on {0}.\n\nParameters:\n' \
+                 '===========\n\n'.format(saving_stop_time.strftime('%d.%m.%Y at %Hh%Mm%Ss'))
+        for entry, param in parameters.items():
+            header += '{0}: {1}\n'.format(entry, param)
+        filepath, filename = os.path.split(file_path)
+        self._savelogic.save_array_as_text(data=[],
+                                           filename=filename[:-4] + '_params.dat',
+                                           filepath=filepath,
+                                           header=header)
+        self.log.info('Time series saved to: {0}'.format(file_path))
+        return np.load(file_path, mmap_mode='r').transpose(), parameters
+
     def _save_recorded_data(self, to_file=True, name_tag='', save_figure=True):
         """ Save the counter trace data and writes it to a file.
 
@@ -671,6 +929,9 @@ class TimeSeriesReaderLogic(GenericLogic):
 
         @return dict parameters: Dictionary which contains the saving parameters
         """
+        if self._stream_recorder is not None:
+            return self._save_streamed_data(to_file=to_file, name_tag=name_tag)
+
         if not self._recorded_data:
             self.log.error('No data has been recorded. Save to file failed.')
             return np.empty(0), dict()
@@ -774,8 +1035,8 @@ class TimeSeriesReaderLogic(GenericLogic):
 
             header = ', '.join(
                 '{0} ({1})'.format(ch, unit) for ch, unit in self.active_channel_units.items())
-            data_offset = self._trace_data.shape[1] - self.moving_average_width // 2
-            data = {header: self._trace_data[:, :data_offset].transpose()}
+            data_offset = self._trace_data.size - self.moving_average_width // 2
+            data = {header: self._trace_data.data[:, :data_offset].transpose()}
 
             if to_file:
                 filepath = self._savelogic.get_path_for_module(module_name='TimeSeriesReader')
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of FitLogic.do_batch_fit against fitting the data sets one by one.
+
+Usage (from the qudi main directory):
+    python tools/benchmark_batch_fit.py [number of worker processes]
+
+A stack of noisy lorentzian dips with slowly drifting center (e.g. ODMR spectra of neighbouring
+pixels) is fitted sequentially with make_lorentzian_fit and with do_batch_fit in this process and
+in worker processes (with and without warm start). The time and the largest deviation of the
+fitted center from the sequential fit are printed.
+
+Qudi is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Qudi. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
+top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
+"""
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from qtpy import QtCore
+from logic.fit_logic import FitLogic
+
+
+class _BenchmarkManager:
+    """ Minimal stand-in for the qudi manager needed to create a FitLogic instance. """
+    tree = {'global': dict()}
+
+
+def make_data(number_of_fits, number_of_points=201, seed=42):
+    rng = np.random.RandomState(seed)
+    x = np.linspace(2.80e9, 2.94e9, number_of_points)
+    centers = 2.87e9 + np.cumsum(rng.normal(0, 2e5, number_of_fits))
+    fwhm = 8e6
+    y = np.empty((number_of_fits, number_of_points))
+    for ii, center in enumerate(centers):
+        y[ii] = 1 - 0.2 * (fwhm / 2) ** 2 / ((x - center) ** 2 + (fwhm / 2) ** 2)
+    y += rng.normal(0, 0.01, y.shape)
+    return x, y
+
+
+def run_benchmark(fit_numbers=(16, 64, 256), processes=None):
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication(sys.argv)
+    fit_logic = FitLogic(manager=_BenchmarkManager(), name='fitlogic', config=dict())
+
+    # start the worker processes before timing
+    fit_logic.do_batch_fit('lorentzian', *make_data(2), estimator='dip', processes=processes)
+
+    print('{0:>6} {1:>24} {2:>10} {3:>8} {4:>16}'.format(
+        'fits', 'method', 'time [s]', 'speedup', 'max dev. [Hz]'))
+    for number_of_fits in fit_numbers:
+        x, y = make_data(number_of_fits)
+        start = time.perf_counter()
+        sequential = [fit_logic.make_lorentzian_fit(x, data, fit_logic.estimate_lorentzian_dip)
+                      for data in y]
+        sequential_time = time.perf_counter() - start
+        reference = np.array([result.params['center'].value for result in sequential])
+        print('{0:>6d} {1:>24} {2:>10.2f} {3:>8} {4:>16}'.format(
+            number_of_fits, 'sequential', sequential_time, '', ''))
+
+        cases = (('batch, this process', 0, False),
+                 ('batch, workers', processes, False),
+                 ('batch, workers, warm', processes, True))
+        for name, case_processes, warm_start in cases:
+            start = time.perf_counter()
+            results = fit_logic.do_batch_fit('lorentzian', x, y, estimator='dip',
+                                             processes=case_processes, warm_start=warm_start)
+            batch_time = time.perf_counter() - start
+            centers = np.array([np.nan if result is None else result.params['center'].value
+                                for result in results])
+            print('{0:>6d} {1:>24} {2:>10.2f} {3:>8.1f} {4:>16.3g}'.format(
+                number_of_fits, name, batch_time, sequential_time / batch_time,
+                np.nanmax(np.abs(centers - reference))))
+    fit_logic.on_deactivate()
+
+
+if __name__ == '__main__':
+    run_benchmark(processes=int(sys.argv[1]) if len(sys.argv) > 1 else None)
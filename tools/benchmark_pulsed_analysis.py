@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the vectorized pulsed analysis methods in
+logic/pulsed/pulsed_analysis_methods/basic_analysis_methods.py against the former implementations
+looping over the laser pulses one by one.
+
+Usage (from the qudi main directory):
+    python tools/benchmark_pulsed_analysis.py
+
+For 10^3, 10^4 and 10^5 laser pulses of random (poissonian) counts the results of both
+implementations are compared and the mean execution time per call is printed.
+
+Qudi is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Qudi. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
+top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
+"""
+
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from logic.pulsed.pulsed_analysis_methods.basic_analysis_methods import BasicPulseAnalyzer
+
+
+BIN_WIDTH = 1e-9
+WINDOWS = {'signal_start': 0.0, 'signal_end': 200e-9, 'norm_start': 300e-9, 'norm_end': 500e-9}
+
+
+class _BenchmarkLogic:
+    """ Minimal stand-in for the PulsedMeasurementLogic settings read by the analyzer. """
+    fast_counter_settings = {'bin_width': BIN_WIDTH}
+    measurement_settings = dict()
+    sampling_information = dict()
+    log = None
+
+
+def _window_bins(signal_start, signal_end, norm_start=None, norm_end=None):
+    bins = [round(signal_start / BIN_WIDTH), round(signal_end / BIN_WIDTH)]
+    if norm_start is not None:
+        bins += [round(norm_start / BIN_WIDTH), round(norm_end / BIN_WIDTH)]
+    return bins
+
+
+def loop_mean_norm(laser_data, signal_start, signal_end, norm_start, norm_end):
+    signal_start_bin, signal_end_bin, norm_start_bin, norm_end_bin = _window_bins(
+        signal_start, signal_end, norm_start, norm_end)
+    signal_data = np.empty(laser_data.shape[0], dtype=float)
+    error_data = np.empty(laser_data.shape[0], dtype=float)
+    for ii, laser_arr in enumerate(laser_data):
+        tmp_data = laser_arr[norm_start_bin:norm_end_bin]
+        reference_sum = np.sum(tmp_data)
+        reference_mean = (reference_sum / len(tmp_data)) if len(tmp_data) != 0 else 0.0
+        tmp_data = laser_arr[signal_start_bin:signal_end_bin]
+        signal_sum = np.sum(tmp_data)
+        signal_mean = (signal_sum / len(tmp_data)) if len(tmp_data) != 0 else 0.0
+        if reference_mean > 0 and signal_mean >= 0:
+            signal_data[ii] = signal_mean / reference_mean
+        else:
+            signal_data[ii] = 0.0
+        if reference_sum > 0 and signal_sum > 0:
+            error_data[ii] = signal_data[ii] * np.sqrt(1 / signal_sum + 1 / reference_sum)
+        else:
+            error_data[ii] = 0.0
+    return signal_data, error_data
+
+
+def loop_sum(laser_data, signal_start, signal_end):
+    signal_start_bin, signal_end_bin = _window_bins(signal_start, signal_end)
+    signal_data = np.empty(laser_data.shape[0], dtype=float)
+    error_data = np.empty(laser_data.shape[0], dtype=float)
+    for ii, laser_arr in enumerate(laser_data):
+        signal = laser_arr[signal_start_bin:signal_end_bin].sum()
+        signal_error = np.sqrt(signal)
+        if signal < 0 or signal != signal:
+            signal_data[ii] = 0.0
+            error_data[ii] = 0.0
+        else:
+            signal_data[ii] = signal
+            error_data[ii] = signal_error
+    return signal_data, error_data
+
+
+def loop_mean(laser_data, signal_start, signal_end):
+    signal_start_bin, signal_end_bin = _window_bins(signal_start, signal_end)
+    signal_data = np.empty(laser_data.shape[0], dtype=float)
+    error_data = np.empty(laser_data.shape[0], dtype=float)
+    for ii, laser_arr in enumerate(laser_data):
+        signal = laser_arr[signal_start_bin:signal_end_bin].mean()
+        signal_sum = laser_arr[signal_start_bin:signal_end_bin].sum()
+        signal_error = np.sqrt(signal_sum) / (signal_end_bin - signal_start_bin)
+        if signal < 0 or signal != signal:
+            signal_data[ii] = 0.0
+            error_data[ii] = 0.0
+        else:
+            signal_data[ii] = signal
+            error_data[ii] = signal_error
+    return signal_data, error_data
+
+
+def loop_mean_reference(laser_data, signal_start, signal_end, norm_start, norm_end):
+    signal_start_bin, signal_end_bin, norm_start_bin, norm_end_bin = _window_bins(
+        signal_start, signal_end, norm_start, norm_end)
+    signal_data = np.empty(laser_data.shape[0], dtype=float)
+    error_data = np.empty(laser_data.shape[0], dtype=float)
+    for ii, laser_arr in enumerate(laser_data):
+        tmp_data = laser_arr[norm_start_bin:norm_end_bin]
+        reference_sum = np.sum(tmp_data)
+        reference_mean = (reference_sum / len(tmp_data)) if len(tmp_data) != 0 else 0.0
+        tmp_data = laser_arr[signal_start_bin:signal_end_bin]
+        signal_sum = np.sum(tmp_data)
+        signal_mean = (signal_sum / len(tmp_data)) if len(tmp_data) != 0 else 0.0
+        signal_data[ii] = signal_mean - reference_mean
+        error_data[ii] = signal_data[ii] * np.sqrt(1 / abs(signal_sum) + 1 / abs(reference_sum))
+    return signal_data, error_data
+
+
+def _time_call(func, *args, repeat=3, **kwargs):
+    best = np.inf
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run_benchmark(laser_numbers=(1000, 10000, 100000), laser_length=600, seed=42):
+    analyzer = BasicPulseAnalyzer(_BenchmarkLogic())
+    rng = np.random.RandomState(seed)
+    cases = (('mean_norm', loop_mean_norm, WINDOWS),
+             ('sum', loop_sum, {k: WINDOWS[k] for k in ('signal_start', 'signal_end')}),
+             ('mean', loop_mean, {k: WINDOWS[k] for k in ('signal_start', 'signal_end')}),
+             ('mean_reference', loop_mean_reference, WINDOWS))
+
+    print('{0:>16} {1:>8} {2:>12} {3:>12} {4:>8} {5:>6}'.format(
+        'method', 'lasers', 'loop [ms]', 'vector [ms]', 'speedup', 'equal'))
+    for number_of_lasers in laser_numbers:
+        laser_data = rng.poisson(0.5, size=(number_of_lasers, laser_length)).astype('int64')
+        for name, loop_func, kwargs in cases:
+            vector_func = getattr(analyzer, 'analyse_' + name)
+            loop_time, loop_result = _time_call(loop_func, laser_data, **kwargs)
+            vector_time, vector_result = _time_call(vector_func, laser_data, **kwargs)
+            # np.array_equal has no equal_nan argument in older numpy versions
+            equal = all(np.array_equal(np.isnan(a), np.isnan(b)) and
+                        np.array_equal(a[~np.isnan(a)], b[~np.isnan(b)])
+                        for a, b in zip(loop_result, vector_result))
+            print('{0:>16} {1:>8d} {2:>12.2f} {3:>12.2f} {4:>8.1f} {5:>6}'.format(
+                name, number_of_lasers, loop_time * 1e3, vector_time * 1e3,
+                loop_time / vector_time, str(equal)))
+
+
+if __name__ == '__main__':
+    run_benchmark()
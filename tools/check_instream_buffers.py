@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Check of the buffer handling of the data instream dummy (hardware/data_instream_dummy.py).
+
+Usage (from the qudi main directory):
+    python tools/check_instream_buffers.py
+
+Reads from an InStreamDummy with two digital and one analog channel into 2D and 1D buffers of the
+caller and checks that the buffers are filled in place with the layout of the
+DataInStreamInterface, that partly filled buffers are left untouched behind the read samples and
+that read_data returns views into the same preallocated ring buffer on every call.
+Exits with a non-zero status if a check fails.
+
+Qudi is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Qudi. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
+top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from hardware.data_instream_dummy import InStreamDummy
+from interface.data_instream_interface import StreamingMode
+
+
+SAMPLE_RATE = 1e6
+BUFFER_SIZE = 1000
+SAMPLES = 100
+DIGITAL_CHANNELS = ('dch0', 'dch1')
+ANALOG_CHANNELS = ('ach0',)
+ANALOG_AMPLITUDE = 5
+
+
+class _CheckManager:
+    """ Minimal stand-in for the qudi manager needed to create a module. """
+    tree = {'global': dict()}
+
+
+def _create_streamer():
+    config = {'digital_channels': DIGITAL_CHANNELS,
+              'analog_channels': ANALOG_CHANNELS,
+              'digital_event_rates': 1000,
+              'analog_voltage_ranges': ANALOG_AMPLITUDE}
+    streamer = InStreamDummy(manager=_CheckManager(), name='instreamer', config=config)
+    streamer.on_activate()
+    streamer.configure(sample_rate=SAMPLE_RATE,
+                       streaming_mode=StreamingMode.CONTINUOUS,
+                       active_channels=DIGITAL_CHANNELS + ANALOG_CHANNELS,
+                       buffer_size=BUFFER_SIZE,
+                       use_circular_buffer=True)
+    return streamer
+
+
+def _check_samples(data):
+    """ Check that the (channels, samples) array holds data of the configured channels. """
+    digital = data[:len(DIGITAL_CHANNELS)]
+    analog = data[len(DIGITAL_CHANNELS):]
+    assert np.all(np.isfinite(data)), 'Unwritten samples in read data'
+    assert np.all(digital >= 0) and np.all(digital == np.round(digital)), \
+        'Digital channel data are no counts'
+    assert np.all(np.abs(analog) <= 1.1 * ANALOG_AMPLITUDE), \
+        'Analog channel data exceed the configured amplitude'
+
+
+def check_2d_buffer(streamer):
+    channels = streamer.number_of_channels
+    buffer = np.full((channels, SAMPLES), np.nan, dtype=streamer.data_type)
+    address = buffer.ctypes.data
+    read = streamer.read_data_into_buffer(buffer)
+    assert read == SAMPLES, 'Read {0} instead of {1} samples'.format(read, SAMPLES)
+    assert buffer.ctypes.data == address and buffer.shape == (channels, SAMPLES), \
+        '2D buffer was not filled in place'
+    _check_samples(buffer)
+
+    read = streamer.read_available_data_into_buffer(buffer)
+    assert 0 <= read <= SAMPLES, 'Read {0} samples into a buffer of {1}'.format(read, SAMPLES)
+    assert buffer.ctypes.data == address, '2D buffer was not filled in place'
+    _check_samples(buffer)
+
+
+def check_1d_buffer(streamer):
+    channels = streamer.number_of_channels
+    buffer = np.full(channels * SAMPLES, np.nan, dtype=streamer.data_type)
+    address = buffer.ctypes.data
+    read = streamer.read_data_into_buffer(buffer)
+    assert read == SAMPLES, 'Read {0} instead of {1} samples'.format(read, SAMPLES)
+    assert buffer.ctypes.data == address and buffer.shape == (channels * SAMPLES,), \
+        '1D buffer was not filled in place'
+    # The samples of one channel follow each other, channel after channel
+    _check_samples(buffer.reshape((channels, SAMPLES)))
+
+    strided = np.full(2 * channels * SAMPLES, np.nan, dtype=streamer.data_type)[::2]
+    assert streamer.read_data_into_buffer(strided) < 0, \
+        'Non-contiguous 1D buffer was not rejected'
+    assert np.all(np.isnan(strided)), 'Rejected 1D buffer was written'
+
+
+def check_partial_buffers(streamer):
+    channels = streamer.number_of_channels
+    partial = SAMPLES // 3
+
+    buffer = np.full((channels, SAMPLES), np.nan, dtype=streamer.data_type)
+    read = streamer.read_data_into_buffer(buffer, number_of_samples=partial)
+    assert read == partial, 'Read {0} instead of {1} samples'.format(read, partial)
+    _check_samples(buffer[:, :partial])
+    assert np.all(np.isnan(buffer[:, partial:])), \
+        '2D buffer was written behind the read samples'
+
+    buffer = np.full(channels * SAMPLES, np.nan, dtype=streamer.data_type)
+    read = streamer.read_data_into_buffer(buffer, number_of_samples=partial)
+    assert read == partial, 'Read {0} instead of {1} samples'.format(read, partial)
+    _check_samples(buffer[:channels * partial].reshape((channels, partial)))
+    assert np.all(np.isnan(buffer[channels * partial:])), \
+        '1D buffer was written behind the read samples'
+
+    assert streamer.read_data_into_buffer(buffer, number_of_samples=SAMPLES + 1) < 0, \
+        'Read of more samples than fit into the buffer was not rejected'
+
+
+def check_read_data_views(streamer):
+    channels = streamer.number_of_channels
+    ring_buffer = streamer._data_buffer
+    reads_per_cycle = (ring_buffer.size // (channels * SAMPLES))
+    addresses = list()
+    for _ in range(reads_per_cycle + 1):
+        data = streamer.read_data(number_of_samples=SAMPLES)
+        assert data.shape == (channels, SAMPLES), 'read_data returned shape {0}'.format(data.shape)
+        assert data.flags['C_CONTIGUOUS'], 'read_data returned a non-contiguous array'
+        assert streamer._data_buffer is ring_buffer, 'Ring buffer was reallocated by read_data'
+        assert data.base is ring_buffer, 'read_data did not return a view of the ring buffer'
+        _check_samples(data)
+        addresses.append(data.ctypes.data)
+    assert len(set(addresses[:-1])) == reads_per_cycle, \
+        'Consecutive reads returned overlapping views'
+    assert addresses[-1] == addresses[0], 'read_data views did not wrap around the ring buffer'
+
+    assert streamer.read_data(number_of_samples=BUFFER_SIZE + 1).size == 0, \
+        'Read of more samples than fit into the ring buffer was not rejected'
+
+
+def main():
+    streamer = _create_streamer()
+    streamer.start_stream()
+    failed = False
+    try:
+        for check in (check_2d_buffer, check_1d_buffer, check_partial_buffers,
+                      check_read_data_views):
+            try:
+                check(streamer)
+            except AssertionError as err:
+                failed = True
+                print('{0}: FAILED ({1})'.format(check.__name__, err))
+            else:
+                print('{0}: ok'.format(check.__name__))
+    finally:
+        streamer.stop_stream()
+        streamer.on_deactivate()
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
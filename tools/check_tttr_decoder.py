@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Check of the PicoHarp TTTR record decoder and histogram (hardware/picoquant/tttr_decoder.py) with
+synthetic T2 and T3 records.
+
+Usage (from the qudi main directory):
+    python tools/check_tttr_decoder.py
+
+Random photon, sync and marker events are encoded into PicoHarp 300 records including overflow
+records of the time tag (T2) and sync counter (T3) wrap around, also several overflows in a row.
+The records are split at random positions (and at overflow records) into consecutive FIFO reads
+and decoded one read after another. The decoded events and the accumulated ungated and gated
+histograms are compared to the known events. No device or library is needed.
+Exits with a non-zero status if a check fails.
+
+Qudi is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Qudi. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
+top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
+"""
+
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+from hardware.picoquant.tttr_decoder import PicoHarpTTTRDecoder, TTTRHistogram
+
+
+SPECIAL = PicoHarpTTTRDecoder.SPECIAL_CHANNEL
+NUMBER_OF_BINS = 64
+NUMBER_OF_GATES = 5
+
+
+def _record(channel, high, low, low_bits):
+    return (channel << 28) | (high << low_bits) | low
+
+
+def make_t3_records(rng):
+    """ Random T3 records with overflows and markers.
+
+    @return (records, photons, markers): records (uint32), known photons as list of
+                                         (channel, sync, dtime, sync of the last marker before) and
+                                         markers as list of (sync, bits)
+    """
+    wrap = PicoHarpTTTRDecoder.T3_WRAPAROUND
+    syncs = np.sort(rng.choice(np.arange(5 * wrap), size=3000, replace=False))
+    # a long gap without events, i.e. several overflow records in a row
+    syncs[syncs.size // 2:] += 3 * wrap
+    records = list()
+    photons = list()
+    markers = list()
+    overflows = 0
+    for sync in syncs:
+        while sync // wrap > overflows:
+            records.append(_record(SPECIAL, 0, 0, 16))
+            overflows += 1
+        if rng.random_sample() < 0.1:
+            bits = int(rng.randint(1, 16))
+            records.append(_record(SPECIAL, bits, int(sync % wrap), 16))
+            markers.append((int(sync), bits))
+        else:
+            channel = int(rng.randint(1, 5))
+            dtime = int(rng.randint(0, 4096))
+            records.append(_record(channel, dtime, int(sync % wrap), 16))
+            photons.append((channel, int(sync), dtime, markers[-1][0] if markers else None))
+    return np.array(records, dtype=np.uint32), photons, markers
+
+
+def make_t2_records(rng):
+    """ Random T2 records with sync events (channel 0), overflows and markers.
+
+    @return (records, photons, markers): records (uint32), known photons as list of
+                                         (channel, sync index, delay, sync index of the last marker
+                                         before) and markers as list of (sync index, bits)
+    """
+    wrap = PicoHarpTTTRDecoder.T2_WRAPAROUND
+    # times in units of 4 ps, syncs every 4 us and a long gap of several overflows
+    sync_times = np.arange(2000, dtype=np.int64) * 1000000 + 123
+    sync_times[1000:] += 3 * wrap
+    events = [(int(t), 0, 0) for t in sync_times]
+    for _ in range(6000):
+        events.append((int(rng.randint(0, sync_times[-1] + 1000000)), int(rng.randint(1, 5)), 0))
+    for _ in range(300):
+        # marker records only carry the upper 24 bits of the time tag
+        events.append((int(rng.randint(0, sync_times[-1])) & ~0xF, SPECIAL,
+                       int(rng.randint(1, 16))))
+    events.sort()
+
+    records = list()
+    photons = list()
+    markers = list()
+    overflows = 0
+    last_sync_time = None
+    sync_count = 0
+    for event_time, channel, bits in events:
+        while event_time // wrap > overflows:
+            records.append(_record(SPECIAL, 0, 0, 28))
+            overflows += 1
+        time_tag = event_time % wrap
+        if channel == SPECIAL:
+            # the wrap around is a multiple of 16, so the marker bits replace the lower 4 bits
+            records.append(_record(SPECIAL, 0, time_tag | bits, 28))
+            if last_sync_time is not None:
+                markers.append((sync_count, bits))
+            continue
+        records.append(_record(channel, 0, time_tag, 28))
+        if channel == 0:
+            sync_count += 1
+            last_sync_time = event_time
+        elif last_sync_time is not None:
+            photons.append((channel, sync_count, event_time - last_sync_time,
+                            markers[-1][0] if markers else None))
+    return np.array(records, dtype=np.uint32), photons, markers
+
+
+def split_records(records, rng, reads=40):
+    """ Split the records into consecutive FIFO reads at random positions, right before and after
+    overflow records and with an empty read.
+    """
+    overflow_pos = np.flatnonzero(records == (SPECIAL << 28))
+    cuts = set(rng.randint(0, records.size, size=reads).tolist())
+    cuts.update(overflow_pos[:3].tolist())
+    cuts.update((overflow_pos[:3] + 1).tolist())
+    cuts.add(records.size // 2)
+    cuts = sorted(cuts)
+    chunks = np.split(records, cuts)
+    chunks.insert(len(chunks) // 2, records[:0])
+    return chunks
+
+
+def reference_histogram(photons, bin_width, number_of_gates):
+    if number_of_gates <= 0:
+        data = np.zeros(NUMBER_OF_BINS, dtype=np.int64)
+    else:
+        data = np.zeros((number_of_gates, NUMBER_OF_BINS), dtype=np.int64)
+    for _, sync, delay, marker_sync in photons:
+        delay_bin = delay // bin_width
+        if not 0 <= delay_bin < NUMBER_OF_BINS:
+            continue
+        if number_of_gates <= 0:
+            data[delay_bin] += 1
+            continue
+        if marker_sync is None:
+            continue
+        gate = sync - marker_sync
+        if gate < number_of_gates:
+            data[gate, delay_bin] += 1
+    return data
+
+
+def check_mode(mode, records, photons, markers, bin_width, rng):
+    chunks = split_records(records, rng)
+    assert sum(chunk.size for chunk in chunks) == records.size
+    decoder = PicoHarpTTTRDecoder(mode)
+    ungated = TTTRHistogram(NUMBER_OF_BINS, bin_width)
+    gated = TTTRHistogram(NUMBER_OF_BINS, bin_width, NUMBER_OF_GATES)
+    channel, sync, delay, marker_sync, marker_bits = list(), list(), list(), list(), list()
+    overflows = 0
+    for chunk in chunks:
+        events = decoder.decode(chunk)
+        channel.append(events.channel)
+        sync.append(events.sync)
+        delay.append(events.delay)
+        marker_sync.append(events.marker_sync)
+        marker_bits.append(events.marker_bits)
+        overflows += events.overflows
+        ungated.add(events)
+        gated.add(events)
+
+    decoded_photons = list(zip(np.concatenate(channel).tolist(), np.concatenate(sync).tolist(),
+                               np.concatenate(delay).tolist()))
+    decoded_markers = list(zip(np.concatenate(marker_sync).tolist(),
+                               np.concatenate(marker_bits).tolist()))
+    assert decoded_photons == [photon[:3] for photon in photons], \
+        'Decoded photons differ from the encoded photons'
+    assert decoded_markers == markers, 'Decoded markers differ from the encoded markers'
+    assert overflows == np.count_nonzero(records == (SPECIAL << 28)), 'Wrong number of overflows'
+    assert np.array_equal(ungated.data, reference_histogram(photons, bin_width, 0)), \
+        'Ungated histogram differs from the reference'
+    assert np.array_equal(gated.data,
+                          reference_histogram(photons, bin_width, NUMBER_OF_GATES)), \
+        'Gated histogram differs from the reference'
+    assert gated.sweeps == len(markers), 'Wrong number of gated sweeps'
+
+    # decoding all records at once gives the same result
+    events = PicoHarpTTTRDecoder(mode).decode(records)
+    assert np.array_equal(events.sync, np.concatenate(sync)) and \
+        np.array_equal(events.delay, np.concatenate(delay)), \
+        'Decoding in one read differs from decoding in several reads'
+
+
+def check_t3(rng):
+    records, photons, markers = make_t3_records(rng)
+    check_mode(3, records, photons, markers, bin_width=64, rng=rng)
+
+
+def check_t2(rng):
+    records, photons, markers = make_t2_records(rng)
+    check_mode(2, records, photons, markers, bin_width=16000, rng=rng)
+
+
+def main():
+    rng = np.random.RandomState(12345)
+    failed = False
+    for check in (check_t3, check_t2):
+        try:
+            check(rng)
+        except AssertionError as err:
+            failed = True
+            print('{0}: FAILED ({1})'.format(check.__name__, err))
+        else:
+            print('{0}: ok'.format(check.__name__))
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
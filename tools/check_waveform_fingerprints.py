@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+"""
+Check of the skipping of unchanged waveforms in SequenceGeneratorLogic.sample_pulse_block_ensemble
+(see logic/pulsed/waveform_fingerprints.py).
+
+Usage (from the qudi main directory):
+    python tools/check_waveform_fingerprints.py
+
+The logic is connected to a PulserDummy that transfers every written waveform via FTP to a local
+FTP stand-in and then opens the transferred file, like the Tektronix AWG70k does (FTP upload and
+MMEM:OPEN). The same ensemble is sampled twice and the second transfer and open have to be
+skipped. Afterwards a changed ensemble and an ensemble whose waveforms have been deleted on the
+device have to be transferred again.
+Exits with a non-zero status if a check fails.
+
+Qudi is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+Qudi is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with Qudi. If not, see <http://www.gnu.org/licenses/>.
+
+Copyright (c) the Qudi Developers. See the COPYRIGHT.txt file at the
+top-level directory of this distribution and at <https://github.com/Ulm-IQO/qudi/>
+"""
+
+import os
+import io
+import sys
+import socket
+import socketserver
+import tempfile
+import threading
+from ftplib import FTP
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir)))
+
+import numpy as np
+from qtpy import QtCore
+
+from hardware.pulser_dummy import PulserDummy
+from logic.pulsed.sequence_generator_logic import SequenceGeneratorLogic
+from logic.pulsed.pulse_objects import PulseBlock, PulseBlockElement, PulseBlockEnsemble
+from logic.pulsed.sampling_functions import SamplingFunctions
+
+
+class _FtpStandInHandler(socketserver.StreamRequestHandler):
+    """ Control connection of the FTP stand-in. Supports the commands used by ftplib for a login,
+    a binary upload in passive mode and a file deletion.
+    """
+
+    def _reply(self, text):
+        self.wfile.write((text + '\r\n').encode('ascii'))
+
+    def handle(self):
+        data_socket = None
+        self._reply('220 qudi FTP stand-in')
+        for line in self.rfile:
+            command, _, argument = line.decode('ascii').strip().partition(' ')
+            command = command.upper()
+            if command == 'USER':
+                self._reply('331 Password required')
+            elif command in ('PASS', 'CWD', 'TYPE'):
+                self._reply('230 OK' if command == 'PASS' else '250 OK')
+            elif command == 'PASV':
+                data_socket = socket.socket()
+                data_socket.bind(('127.0.0.1', 0))
+                data_socket.listen(1)
+                port = data_socket.getsockname()[1]
+                self._reply('227 Entering Passive Mode (127,0,0,1,{0:d},{1:d})'
+                            ''.format(port // 256, port % 256))
+            elif command == 'STOR' and data_socket is not None:
+                self._reply('150 Ready to receive')
+                connection, _ = data_socket.accept()
+                with connection:
+                    chunks = list()
+                    while True:
+                        chunk = connection.recv(65536)
+                        if not chunk:
+                            break
+                        chunks.append(chunk)
+                data_socket.close()
+                data_socket = None
+                self.server.files[argument] = b''.join(chunks)
+                self.server.uploads.append(argument)
+                self._reply('226 Transfer complete')
+            elif command == 'DELE':
+                self.server.files.pop(argument, None)
+                self._reply('250 Deleted')
+            elif command == 'QUIT':
+                self._reply('221 Bye')
+                break
+            else:
+                self._reply('502 Command not implemented')
+
+
+class _FtpStandIn(socketserver.ThreadingTCPServer):
+    """ Minimal local FTP server keeping the uploaded files in memory. """
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), _FtpStandInHandler)
+        self.files = dict()
+        self.uploads = list()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+
+class _FtpPulserDummy(PulserDummy):
+    """ PulserDummy transferring each written waveform to the FTP stand-in and opening it
+    afterwards, like the AWG70k does.
+    """
+
+    def __init__(self, ftp_port, **kwargs):
+        super().__init__(**kwargs)
+        self._ftp_port = ftp_port
+        self._chunks = dict()
+        self.opened = list()
+
+    def write_waveform(self, name, analog_samples, digital_samples, is_first_chunk, is_last_chunk,
+                       total_number_of_samples):
+        written, waveforms = super().write_waveform(name, analog_samples, digital_samples,
+                                                    is_first_chunk, is_last_chunk,
+                                                    total_number_of_samples)
+        if written < 0:
+            return written, waveforms
+        for chnl, samples in analog_samples.items():
+            wfm_name = '{0}_ch{1}'.format(name, chnl.rsplit('ch', 1)[1])
+            if is_first_chunk:
+                self._chunks[wfm_name] = list()
+            self._chunks[wfm_name].append(np.asarray(samples, dtype=np.float32).tobytes())
+            if is_last_chunk:
+                filename = wfm_name + '.wfmx'
+                with FTP() as ftp:
+                    ftp.connect('127.0.0.1', self._ftp_port)
+                    ftp.login(user='anonymous', passwd='')
+                    ftp.cwd('/waves')
+                    ftp.storbinary('STOR ' + filename,
+                                   io.BytesIO(b''.join(self._chunks.pop(wfm_name))))
+                # MMEM:OPEN of the transferred file
+                self.opened.append(filename)
+        return written, waveforms
+
+
+class _CheckManager:
+    """ Minimal stand-in for the qudi manager needed to create a module. """
+    tree = {'global': dict()}
+
+
+def _save_ensemble(logic, frequency):
+    element = PulseBlockElement(
+        init_length_s=1e-6,
+        pulse_function={chnl: SamplingFunctions.Sin(amplitude=0.1, frequency=frequency)
+                        for chnl in logic.analog_channels},
+        digital_high={chnl: False for chnl in logic.digital_channels})
+    logic.save_block(PulseBlock('check_block', element_list=[element]))
+    logic.save_ensemble(PulseBlockEnsemble('check_ensemble', block_list=[('check_block', 9)]))
+
+
+def run_checks(logic, pulser, server):
+    results = list()
+
+    def check(name, condition):
+        results.append(condition)
+        print('{0}: {1}'.format(name, 'ok' if condition else 'FAILED'))
+
+    channels = len(logic.analog_channels)
+    _save_ensemble(logic, 100e6)
+    logic.sample_pulse_block_ensemble('check_ensemble')
+    first_files = {name: server.files[name] for name in server.uploads}
+    check('first write is transferred and opened',
+          len(server.uploads) == channels and len(pulser.opened) == channels)
+
+    logic.sample_pulse_block_ensemble('check_ensemble')
+    check('unchanged write skips transfer and open',
+          len(server.uploads) == channels and len(pulser.opened) == channels)
+    check('unchanged write keeps the waveforms',
+          sorted(logic.get_ensemble('check_ensemble').sampling_information['waveforms']) ==
+          sorted(logic.sampled_waveforms))
+
+    _save_ensemble(logic, 200e6)
+    logic.sample_pulse_block_ensemble('check_ensemble')
+    check('changed write is transferred and opened again',
+          len(server.uploads) == 2 * channels and len(pulser.opened) == 2 * channels)
+    check('changed write transfers the new samples',
+          all(server.files[name] != samples for name, samples in first_files.items()))
+
+    pulser.delete_waveform(logic.sampled_waveforms)
+    logic.sample_pulse_block_ensemble('check_ensemble')
+    check('write after deletion on the device is transferred again',
+          len(server.uploads) == 3 * channels and len(pulser.opened) == 3 * channels)
+    return all(results)
+
+
+def main():
+    app = QtCore.QCoreApplication.instance() or QtCore.QCoreApplication(sys.argv)
+    server = _FtpStandIn()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    pulser = _FtpPulserDummy(ftp_port=server.port, manager=_CheckManager(), name='pulser',
+                             config=dict())
+    pulser.module_state.activate()
+    # small overhead_bytes to write the waveforms in several chunks
+    logic = SequenceGeneratorLogic(manager=_CheckManager(), name='sequencegenerator',
+                                   config={'assets_storage_path': tempfile.mkdtemp(),
+                                           'overhead_bytes': 2000})
+    logic.connectors['pulsegenerator'].connect(pulser)
+    logic.module_state.activate()
+    try:
+        passed = run_checks(logic, pulser, server)
+    finally:
+        logic.module_state.deactivate()
+        pulser.module_state.deactivate()
+        server.shutdown()
+        server.server_close()
+    return 0 if passed else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())